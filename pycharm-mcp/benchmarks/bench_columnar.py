@@ -0,0 +1,104 @@
+"""Compare decoding row and columnar find-usages responses.
+
+Builds a synthetic response with ``--usages`` usages spread over ``--files``
+files, encodes it both ways and reports, for each format, the payload size,
+the time to parse and validate it into a ``FindUsagesResponse``, the peak
+memory allocated while doing so (tracemalloc) and the memory the decoded
+response keeps alive.
+
+    python benchmarks/bench_columnar.py --usages 100000
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any
+
+from pycharm_mcp.columnar import encode_usages
+from pycharm_mcp.models import FindUsagesResponse
+
+
+def make_usages(count: int, files: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "file": f"/home/dev/projects/service/src/service/module_{i % files}.py",
+            "line": 1 + i // files,
+            "column": 9,
+            "text": f"        result = compute_total(order_{i % 50}, discount)",
+            "isWriteAccess": i % 20 == 0,
+        }
+        for i in range(count)
+    ]
+
+
+def encode(usages: list[dict[str, Any]], columnar: bool) -> bytes:
+    body: dict[str, Any] = {"success": True, "symbol": "compute_total", "totalCount": len(usages)}
+    if columnar:
+        body.update(usages=[], usageColumns=encode_usages(usages))
+    else:
+        body["usages"] = usages
+    return json.dumps(body).encode()
+
+
+def decode(raw: bytes) -> FindUsagesResponse:
+    return FindUsagesResponse.model_validate(json.loads(raw))
+
+
+def measure(raw: bytes, repeat: int) -> dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        decode(raw)
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    response = decode(raw)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for usage in response.usages:
+        _ = (usage.file, usage.line, usage.text)
+    scan = time.perf_counter() - started
+
+    return {
+        "size_mb": len(raw) / 1e6,
+        "decode_ms": min(timings) * 1000,
+        "peak_mb": peak / 1e6,
+        "retained_mb": retained / 1e6,
+        "scan_ms": scan * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--usages", type=int, default=100_000)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    usages = make_usages(args.usages, args.files)
+    results = {
+        "rows": measure(encode(usages, columnar=False), args.repeat),
+        "columnar": measure(encode(usages, columnar=True), args.repeat),
+    }
+
+    print(f"{args.usages} usages in {args.files} files")
+    print(
+        f"{'format':<10} {'size MB':>8} {'decode ms':>10} {'peak MB':>8} "
+        f"{'retained MB':>12} {'scan ms':>8}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<10} {r['size_mb']:>8.1f} {r['decode_ms']:>10.1f} {r['peak_mb']:>8.1f} "
+            f"{r['retained_mb']:>12.1f} {r['scan_ms']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
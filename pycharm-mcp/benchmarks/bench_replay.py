@@ -0,0 +1,215 @@
+"""Replay a recorded bridge session against the current client.
+
+Serves a log recorded with ``PYCHARM_RECORD`` from a replay bridge and sends
+its requests again through ``PyCharmClient``, parsing each response into its
+model. Reports per-endpoint latency, throughput and memory: Python heap peak
+from tracemalloc in a second, untimed pass, and the process's peak RSS. Save
+the results with ``--save`` and pass them to ``--compare`` on a later run to
+see the change; it exits with status 1 if anything regressed by more than
+``--max-regression`` percent.
+
+    python benchmarks/bench_replay.py session.jsonl.gz --time-scale 0.1 --save base.json
+    python benchmarks/bench_replay.py session.jsonl.gz --time-scale 0.1 --compare base.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+from pydantic import BaseModel
+
+from pycharm_mcp import models
+from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.metrics import ClientMetrics, LatencyStats
+from pycharm_mcp.recording import Exchange, load
+from pycharm_mcp.replay_bridge import ReplayBridge
+from pycharm_mcp.scheduling import IndexingGate
+
+RESPONSE_MODELS: dict[str, type[BaseModel]] = {
+    "/health": models.HealthResponse,
+    "/projects": models.ProjectListResponse,
+    "/refactor/rename": models.RenameResponse,
+    "/refactor/move": models.MoveResponse,
+    "/refactor/move-bulk": models.BulkMoveResponse,
+    "/refactor/extract-method": models.ExtractMethodResponse,
+    "/refactor/extract-variable": models.ExtractVariableResponse,
+    "/refactor/extract-ranges": models.MultiExtractResponse,
+    "/refactor/inline": models.InlineResponse,
+    "/refactor/change-signature": models.ChangeSignatureResponse,
+    "/refactor/safe-delete": models.SafeDeleteResponse,
+    "/refactor/safe-delete-bulk": models.BulkSafeDeleteResponse,
+    "/refactor/apply-plan": models.ApplyPlanResponse,
+    "/find/usages": models.FindUsagesResponse,
+    "/find/usages/all-projects": models.CrossProjectUsagesResponse,
+}
+
+
+async def _send(client: PyCharmClient, exchange: Exchange) -> bool:
+    """Send one recorded request and parse the response; False if it failed."""
+    try:
+        data = await client._request(exchange.method, exchange.path, exchange.request)
+    except PyCharmBridgeError:
+        return False
+    RESPONSE_MODELS[exchange.path].model_validate(data)
+    return True
+
+
+async def replay(
+    exchanges: list[Exchange], bridge: ReplayBridge, transport: str, pace: str
+) -> tuple[float, int, ClientMetrics]:
+    """Replay ``exchanges`` and return (wall seconds, failed requests, metrics).
+
+    ``serial`` pace sends each request once the previous one is answered;
+    ``recorded`` sends them at their recorded offsets, scaled like the latency.
+    """
+    client_metrics = ClientMetrics()
+    client = PyCharmClient(
+        base_url=bridge.url if transport == "http" else None,
+        client_metrics=client_metrics,
+        indexing_gate=IndexingGate(),
+        # Recorded 503s are part of the session, not something to wait out
+        indexing_timeout=0,
+        backend=bridge if transport == "inprocess" else None,
+    )
+    started = time.perf_counter()
+    if pace == "serial":
+        results = [await _send(client, exchange) for exchange in exchanges]
+    else:
+        first = exchanges[0].at if exchanges else 0.0
+
+        async def at_offset(exchange: Exchange) -> bool:
+            delay = (exchange.at - first) * bridge.time_scale
+            await asyncio.sleep(delay - (time.perf_counter() - started))
+            return await _send(client, exchange)
+
+        results = await asyncio.gather(*(at_offset(exchange) for exchange in exchanges))
+    wall = time.perf_counter() - started
+    await client.close()
+    return wall, results.count(False), client_metrics
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    exchanges = list(load(args.recording))
+    # Their responses would go unchecked
+    unknown = sorted({exchange.path for exchange in exchanges} - RESPONSE_MODELS.keys())
+    if unknown:
+        raise SystemExit(f"No response model for {', '.join(unknown)}; add it to RESPONSE_MODELS")
+    with ReplayBridge(exchanges, time_scale=args.time_scale) as bridge:
+        wall, failed, client_metrics = asyncio.run(
+            replay(exchanges, bridge, args.transport, args.pace)
+        )
+        unmatched = bridge.unmatched
+
+        bridge.rewind()
+        bridge.time_scale = 0.0
+        gc.collect()
+        tracemalloc.start()
+        asyncio.run(replay(exchanges, bridge, args.transport, "serial"))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    recorded: dict[str, LatencyStats] = {}
+    for exchange in exchanges:
+        recorded.setdefault(exchange.path, LatencyStats()).add(exchange.round_trip_ms)
+    snapshot = client_metrics.snapshot()
+    endpoints = {
+        path: {
+            "count": snapshot[path]["count"],
+            "p50_ms": snapshot[path]["p50_ms"],
+            "p99_ms": snapshot[path]["p99_ms"],
+            "recorded_p50_ms": stats.percentile(0.50),
+        }
+        for path, stats in sorted(recorded.items())
+        if path in snapshot
+    }
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "requests": len(exchanges),
+        "failed": failed,
+        "unmatched": unmatched,
+        "wall_s": wall,
+        "throughput_rps": len(exchanges) / wall if wall else 0.0,
+        "peak_mb": peak / 1e6,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit / 1e6,
+        "endpoints": endpoints,
+    }
+
+
+def report(results: dict[str, Any]) -> None:
+    print(
+        f"{results['requests']} requests ({results['failed']} failed, "
+        f"{results['unmatched']} without an exact recorded match) in {results['wall_s']:.2f} s: "
+        f"{results['throughput_rps']:.1f} req/s"
+    )
+    print(f"heap peak {results['peak_mb']:.1f} MB, max RSS {results['max_rss_mb']:.1f} MB")
+    print(f"{'endpoint':<28} {'count':>6} {'p50 ms':>8} {'p99 ms':>8} {'recorded p50':>13}")
+    for path, r in results["endpoints"].items():
+        print(
+            f"{path:<28} {r['count']:>6} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+            f"{r['recorded_p50_ms']:>13.1f}"
+        )
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> list[str]:
+    """Print the change from ``baseline`` and return the regressions beyond the limit."""
+    # (name, baseline, current, True if higher is better)
+    metrics = [
+        ("throughput req/s", baseline["throughput_rps"], results["throughput_rps"], True),
+        ("heap peak MB", baseline["peak_mb"], results["peak_mb"], False),
+        ("max RSS MB", baseline["max_rss_mb"], results["max_rss_mb"], False),
+    ]
+    for path, r in results["endpoints"].items():
+        base = baseline["endpoints"].get(path)
+        if base is not None:
+            metrics.append((f"{path} p50 ms", base["p50_ms"], r["p50_ms"], False))
+            metrics.append((f"{path} p99 ms", base["p99_ms"], r["p99_ms"], False))
+
+    regressions = []
+    print(f"{'metric':<40} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, before, after, higher_is_better in metrics:
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{name:<40} {before:>10.1f} {after:>10.1f} {change:>+7.1f}%")
+        if (-change if higher_is_better else change) > max_regression:
+            regressions.append(f"{name} {change:+.1f}%")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", help="log written with PYCHARM_RECORD")
+    parser.add_argument(
+        "--time-scale", type=float, default=1.0, help="multiplier for recorded latency"
+    )
+    parser.add_argument("--pace", choices=("serial", "recorded"), default="serial")
+    parser.add_argument("--transport", choices=("http", "inprocess"), default="http")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="results JSON from an earlier run")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="percent")
+    args = parser.parse_args()
+
+    results = run(args)
+    report(results)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(results, baseline, args.max_regression)
+    for regression in regressions:
+        print(f"FAIL: {regression}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
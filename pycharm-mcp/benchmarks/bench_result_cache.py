@@ -0,0 +1,94 @@
+"""Measure the latency of result cache hits on a project with many files.
+
+Writes ``--files`` Python files into a temporary project, stores one
+find-usages result for it, then reports the median and p99 time of a hit
+with the project stamp reused (within ``STAMP_TTL``), with the project walked
+again on every lookup, and with ``--threads`` threads looking up at once.
+
+    python benchmarks/bench_result_cache.py --files 5000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from pycharm_mcp import result_cache
+from pycharm_mcp.result_cache import ResultCache
+
+
+def make_project(root: Path, files: int) -> None:
+    for i in range(files):
+        package = root / f"pkg_{i // 100}"
+        package.mkdir(parents=True, exist_ok=True)
+        (package / f"module_{i}.py").write_text(
+            f"from pkg_0.module_0 import symbol\n\nvalue_{i} = symbol({i})\n"
+        )
+
+
+def hits(cache: ResultCache, payload: dict[str, Any], count: int) -> list[float]:
+    """Milliseconds per lookup, asserting each one is a hit."""
+    times = []
+    for _ in range(count):
+        started = time.perf_counter()
+        assert cache.get("/find/usages", payload) is not None
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def report(name: str, times: list[float]) -> None:
+    ordered = sorted(times)
+    p99 = ordered[min(int(0.99 * len(ordered)), len(ordered) - 1)]
+    print(f"{name:<22} {statistics.median(times):>10.2f} {p99:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory) / "project"
+        make_project(root, args.files)
+        cache = ResultCache(Path(directory) / "cache", max_bytes=64 << 20)
+        payload = {"project": str(root), "file": "pkg_0/module_0.py", "line": 3, "column": 11}
+        body = {
+            "success": True,
+            "symbol": "symbol",
+            "usages": [
+                {"file": f"pkg_0/module_{i}.py", "line": 3, "column": 11, "text": "symbol()"}
+                for i in range(min(args.files, 100))
+            ],
+            "totalCount": min(args.files, 100),
+        }
+        assert cache.put("/find/usages", payload, body, time.time())
+
+        print(f"{args.files} files, {args.lookups} lookups")
+        print(f"{'hit':<22} {'median ms':>10} {'p99 ms':>10}")
+        report("stamp reused", hits(cache, payload, args.lookups))
+
+        ttl = result_cache.STAMP_TTL
+        result_cache.STAMP_TTL = 0.0
+        try:
+            report("project walked", hits(cache, payload, max(args.lookups // 10, 1)))
+            with ThreadPoolExecutor(args.threads) as pool:
+                per_thread = max(args.lookups // 10 // args.threads, 1)
+                results = pool.map(
+                    hits,
+                    [cache] * args.threads,
+                    [payload] * args.threads,
+                    [per_thread] * args.threads,
+                )
+                report(f"walked, {args.threads} threads", [t for r in results for t in r])
+        finally:
+            result_cache.STAMP_TTL = ttl
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
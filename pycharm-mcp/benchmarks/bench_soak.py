@@ -0,0 +1,216 @@
+"""Soak the MCP server with mixed tool calls and check for leaks.
+
+Runs ``pycharm_mcp.server`` in-process behind an in-memory MCP session, with
+the stub bridge in a subprocess so its own bookkeeping does not count, and
+sends thousands of tool calls cycling through every tool. After every window
+of calls it samples RSS, traced Python heap, open file descriptors and the
+window's latency. Growth is measured from the first window after warm-up to
+the last, and the largest allocation sites that grew are listed. Exits with
+status 1 if any growth exceeds its threshold.
+
+    python benchmarks/bench_soak.py --calls 5000 --usages 200
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+
+from mcp.shared.memory import create_connected_server_and_client_session
+
+PROJECT = "/soak/project"
+TARGET = {"project_path": PROJECT, "file_path": "pkg/a.py", "line": 1, "column": 1}
+
+# Cycled through in order; one of each per round
+CALLS: list[tuple[str, dict[str, Any]]] = [
+    ("pycharm_list_projects", {}),
+    ("pycharm_find_usages", TARGET),
+    ("pycharm_find_usages", {**TARGET, "text": "full", "incremental": False}),
+    ("pycharm_rename_symbol", {**TARGET, "new_name": "renamed", "preview": True}),
+    ("pycharm_rename_symbol", {**TARGET, "new_name": "renamed", "file_contents": "diff"}),
+    ("pycharm_move_element", {**TARGET, "target_file": "pkg/b.py", "text": "full"}),
+    ("pycharm_inline_element", TARGET),
+    ("pycharm_change_signature", {**TARGET, "new_name": "changed"}),
+    ("pycharm_safe_delete", {**TARGET, "search_for_usages": False}),
+    (
+        "pycharm_extract_method",
+        {
+            "project_path": PROJECT,
+            "file_path": "pkg/a.py",
+            "start_line": 1,
+            "start_column": 1,
+            "end_line": 2,
+            "end_column": 1,
+            "method_name": "extracted",
+        },
+    ),
+]
+
+
+def rss_mb() -> float:
+    """Current resident set size, or the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        import resource
+
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        unit = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 1e6
+
+
+def open_fds() -> int:
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        if os.path.isdir(fd_dir):
+            return len(os.listdir(fd_dir))
+    return 0
+
+
+def start_bridge(usages: int) -> tuple[subprocess.Popen[str], str]:
+    """Start the stub bridge in a subprocess and return it with its URL."""
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-u",
+            "-m",
+            "pycharm_mcp.stub_bridge",
+            "--port",
+            "0",
+            "--project",
+            PROJECT,
+            "--usages",
+            str(usages),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert process.stdout is not None
+    line = process.stdout.readline()
+    if not line:
+        raise RuntimeError("Stub bridge exited before listening")
+    return process, line.rsplit(" ", 1)[-1].strip()
+
+
+async def soak(args: argparse.Namespace) -> tuple[list[dict[str, float]], Any, Any, int]:
+    """Run the calls; return the samples, heap snapshots at baseline and end, and errors."""
+    from pycharm_mcp.server import mcp
+
+    samples: list[dict[str, float]] = []
+    baseline_heap = None
+    errors = 0
+    async with create_connected_server_and_client_session(mcp) as session:
+        started = time.perf_counter()
+        latencies: list[float] = []
+        for call in range(1, args.calls + 1):
+            name, arguments = CALLS[call % len(CALLS)]
+            call_started = time.perf_counter()
+            result = await session.call_tool(name, arguments)
+            latencies.append((time.perf_counter() - call_started) * 1000)
+            errors += bool(result.isError)
+
+            if call % args.window == 0:
+                gc.collect()
+                heap, _ = tracemalloc.get_traced_memory()
+                samples.append(
+                    {
+                        "calls": call,
+                        "elapsed_s": time.perf_counter() - started,
+                        "rss_mb": rss_mb(),
+                        "heap_mb": heap / 1e6,
+                        "fds": open_fds(),
+                        "p50_ms": statistics.median(latencies),
+                        "p99_ms": sorted(latencies)[int(0.99 * (len(latencies) - 1))],
+                    }
+                )
+                latencies = []
+                if baseline_heap is None and call >= args.warmup:
+                    baseline_heap = tracemalloc.take_snapshot()
+        gc.collect()
+        final_heap = tracemalloc.take_snapshot()
+    return samples, baseline_heap, final_heap, errors
+
+
+def check(samples: list[dict[str, float]], warmup: int, args: argparse.Namespace) -> list[str]:
+    """Return the growth from the first post-warm-up sample to the last beyond thresholds."""
+    steady = [s for s in samples if s["calls"] >= warmup]
+    if len(steady) < 2:
+        return [f"not enough samples after {warmup} warm-up calls; raise --calls"]
+    first, last = steady[0], steady[-1]
+    drift = (last["p50_ms"] - first["p50_ms"]) / first["p50_ms"] * 100 if first["p50_ms"] else 0.0
+    checks = [
+        ("RSS", last["rss_mb"] - first["rss_mb"], args.max_rss_growth_mb, "MB"),
+        ("heap", last["heap_mb"] - first["heap_mb"], args.max_heap_growth_mb, "MB"),
+        ("open fds", last["fds"] - first["fds"], args.max_fd_growth, ""),
+        ("p50 latency", drift, args.max_latency_drift, "%"),
+    ]
+    print(
+        f"growth over calls {first['calls']:.0f}-{last['calls']:.0f}: "
+        + ", ".join(f"{name} {value:+.1f}{unit}" for name, value, _, unit in checks)
+    )
+    return [
+        f"{name} grew {value:+.1f}{unit}, over the limit of {limit:g}{unit}"
+        for name, value, limit, unit in checks
+        if value > limit
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--window", type=int, default=250, help="calls per sample")
+    parser.add_argument("--warmup", type=int, default=500, help="calls before the baseline")
+    parser.add_argument("--usages", type=int, default=200, help="usages per symbol")
+    parser.add_argument("--top", type=int, default=10, help="allocation sites to list")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=30.0)
+    parser.add_argument("--max-heap-growth-mb", type=float, default=5.0)
+    parser.add_argument("--max-fd-growth", type=int, default=5)
+    parser.add_argument("--max-latency-drift", type=float, default=25.0, help="percent")
+    args = parser.parse_args()
+
+    # The server logs every request at INFO
+    logging.disable(logging.INFO)
+    bridge, url = start_bridge(args.usages)
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            os.environ["PYCHARM_BRIDGE_URL"] = url
+            os.environ["PYCHARM_MCP_CACHE_DIR"] = cache_dir
+            tracemalloc.start()
+            samples, baseline_heap, final_heap, errors = asyncio.run(soak(args))
+            tracemalloc.stop()
+    finally:
+        bridge.terminate()
+        bridge.wait()
+
+    print(f"{args.calls} tool calls, {errors} errors")
+    print(
+        f"{'calls':>7} {'elapsed s':>10} {'RSS MB':>8} {'heap MB':>8} {'fds':>5} "
+        f"{'p50 ms':>8} {'p99 ms':>8}"
+    )
+    for s in samples:
+        print(
+            f"{s['calls']:>7.0f} {s['elapsed_s']:>10.1f} {s['rss_mb']:>8.1f} "
+            f"{s['heap_mb']:>8.2f} {s['fds']:>5.0f} {s['p50_ms']:>8.2f} {s['p99_ms']:>8.2f}"
+        )
+
+    if baseline_heap is not None:
+        print(f"\ntop {args.top} allocation sites by growth since warm-up:")
+        for stat in final_heap.compare_to(baseline_heap, "lineno")[: args.top]:
+            print(f"  {stat}")
+
+    failures = check(samples, args.warmup, args)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
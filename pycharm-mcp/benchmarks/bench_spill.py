@@ -0,0 +1,150 @@
+"""Compare peak RSS of reading a huge find-usages response in memory and spilled.
+
+Writes a columnar find-usages body with ``--usages`` usages to a temporary
+file and serves it over HTTP, then for each mode starts a fresh process that
+fetches it with ``PyCharmClient.find_usages`` and scans every row. Reports
+the body size, the time to fetch and decode, and the process's RSS before the
+request and at its peak.
+
+    python benchmarks/bench_spill.py --usages 2000000
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+PROJECT = "/bench/project"
+
+
+def write_body(path: str, count: int, files: int) -> int:
+    """Write the columnar body column by column, without building rows."""
+    texts = 50
+    strings = [f"/home/dev/projects/service/src/service/module_{i}.py" for i in range(files)]
+    strings += [f"        result = compute_total(order_{i}, discount)" for i in range(texts)]
+    columns: dict[str, Any] = {
+        "strings": strings,
+        "file": (i % files for i in range(count)),
+        "line": (1 + i // files for i in range(count)),
+        "column": (9 for _ in range(count)),
+        "text": (files + i % texts for i in range(count)),
+        "flags": (int(i % 20 == 0) for i in range(count)),
+    }
+    with open(path, "w") as f:
+        f.write(f'{{"success": true, "symbol": "compute_total", "totalCount": {count}, ')
+        f.write('"usages": [], "usageColumns": {')
+        for index, (name, values) in enumerate(columns.items()):
+            f.write(", " * (index > 0) + json.dumps(name) + ": [")
+            if isinstance(values, list):
+                f.write(", ".join(json.dumps(v) for v in values))
+            else:
+                for start in range(0, count, 100_000):
+                    chunk = itertools.islice(values, 100_000)
+                    f.write(", " * (start > 0) + ", ".join(map(str, chunk)))
+            f.write("]")
+        f.write("}}")
+    return os.path.getsize(path)
+
+
+def serve(path: str) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(os.path.getsize(path)))
+            self.end_headers()
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, self.wfile, 1 << 20)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    try:
+        # Unlike ru_maxrss, not carried over from the parent across exec
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024 / 1e6
+    except OSError:
+        pass
+    import resource
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 1e6
+
+
+def measure(url: str, spill_bytes: int) -> None:
+    """Fetch and scan the response in this process, printing the results as JSON."""
+    import asyncio
+    import time
+
+    from pycharm_mcp.client import PyCharmClient
+
+    async def fetch() -> dict[str, float]:
+        client = PyCharmClient(
+            base_url=url, result_format="columnar", spill_bytes=spill_bytes, timeout=600
+        )
+        before = peak_rss_mb()
+        started = time.perf_counter()
+        response = await client.find_usages(project=PROJECT, file="a.py", line=1, column=1)
+        decoded = time.perf_counter() - started
+        lines = sum(usage.line for usage in response.usages)
+        await client.close()
+        assert lines > 0
+        return {"decode_s": decoded, "before_mb": before, "peak_mb": peak_rss_mb()}
+
+    print(json.dumps(asyncio.run(fetch())))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--usages", type=int, default=2_000_000)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--measure", metavar="URL", help=argparse.SUPPRESS)
+    parser.add_argument("--spill-bytes", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(args.measure, args.spill_bytes)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "body.json")
+        size = write_body(path, args.usages, args.files)
+        server = serve(path)
+        url = f"http://127.0.0.1:{server.server_port}"
+        modes = {"in memory": 1 << 62, "spilled": 16 << 20}
+        results = {}
+        for name, spill_bytes in modes.items():
+            output = subprocess.run(
+                [sys.executable, __file__, "--measure", url, "--spill-bytes", str(spill_bytes)],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            results[name] = json.loads(output)
+        server.shutdown()
+
+    print(f"{args.usages} usages, {size / 1e6:.1f} MB body")
+    print(f"{'mode':<10} {'decode s':>9} {'RSS before MB':>14} {'peak RSS MB':>12}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['decode_s']:>9.2f} {r['before_mb']:>14.1f} {r['peak_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
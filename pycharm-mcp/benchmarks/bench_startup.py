@@ -0,0 +1,136 @@
+"""Measure cold start of the ``pycharm-mcp`` server.
+
+Reports the ``-X importtime`` breakdown of ``pycharm_mcp.server`` and the time
+from spawning the server over stdio to its first ``tools/list`` response, with
+an empty schema cache (first run) and a warm one. Exits with status 1 if the
+warm median exceeds ``--budget-ms``, or if importing the server loads the
+tool modules, so it can guard against startup regressions in CI.
+
+    python benchmarks/bench_startup.py --runs 5 --budget-ms 800
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import IO, Any
+
+# Modules that must stay off the startup path
+DEFERRED_MODULES = ("pycharm_mcp.tools", "pycharm_mcp.client", "pycharm_mcp.models")
+
+
+def import_breakdown(top: int) -> tuple[float, list[tuple[str, float]], list[str]]:
+    """Return the server's cumulative import time (ms), the slowest modules by
+    self time, and any deferred modules that were imported anyway."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import pycharm_mcp.server"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0.0
+    modules: list[tuple[str, float]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = (
+            part.strip() for part in line[len("import time:") :].split("|")
+        )
+        if not self_us.isdigit():
+            continue
+        modules.append((name, int(self_us) / 1000))
+        if name == "pycharm_mcp.server":
+            total = int(cumulative_us) / 1000
+    loaded = [name for name, _ in modules]
+    leaked = [m for m in DEFERRED_MODULES if m in loaded]
+    return total, sorted(modules, key=lambda m: -m[1])[:top], leaked
+
+
+def _send(stdin: IO[bytes], message: dict[str, Any]) -> None:
+    stdin.write(json.dumps(message).encode() + b"\n")
+    stdin.flush()
+
+
+def _receive(stdout: IO[bytes], request_id: int) -> dict[str, Any]:
+    while True:
+        line = stdout.readline()
+        if not line:
+            raise RuntimeError("Server exited before responding")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+def time_to_tools_list(cache_dir: str) -> tuple[float, int]:
+    """Spawn the server and return (ms until the tools/list response, tool count)."""
+    env = {**os.environ, "PYCHARM_MCP_CACHE_DIR": cache_dir}
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "pycharm_mcp.server"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=env,
+    )
+    assert process.stdin is not None and process.stdout is not None
+    try:
+        _send(
+            process.stdin,
+            {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": "2025-06-18",
+                    "capabilities": {},
+                    "clientInfo": {"name": "bench_startup", "version": "0"},
+                },
+            },
+        )
+        _receive(process.stdout, 1)
+        _send(process.stdin, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        _send(process.stdin, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        response = _receive(process.stdout, 2)
+        elapsed = (time.perf_counter() - started) * 1000
+    finally:
+        process.kill()
+        process.wait()
+    return elapsed, len(response["result"]["tools"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--budget-ms", type=float, default=800.0)
+    args = parser.parse_args()
+
+    total, slowest, leaked = import_breakdown(args.top)
+    print(f"import pycharm_mcp.server: {total:.1f} ms")
+    for name, self_ms in slowest:
+        print(f"  {self_ms:7.1f} ms  {name}")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold, tools = time_to_tools_list(cache_dir)
+        warm = [time_to_tools_list(cache_dir)[0] for _ in range(args.runs)]
+    median = statistics.median(warm)
+    print(
+        f"first tools/list ({tools} tools): cold cache {cold:.1f} ms, warm median {median:.1f} ms"
+    )
+
+    failures = []
+    if leaked:
+        failures.append(f"imported at startup: {', '.join(leaked)}")
+    if median > args.budget_ms:
+        failures.append(f"warm median {median:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,71 @@
 """HTTP client for communicating with the PyCharm Refactoring Bridge plugin."""
 
+import asyncio
+import contextlib
 import os
-from typing import Any
+import time
+from collections.abc import AsyncIterator, Mapping
+from typing import Any, Protocol
 
 import httpx
 
+from pycharm_mcp.metrics import ClientMetrics, metrics
 from pycharm_mcp.models import (
+    ApplyPlanResponse,
+    BridgeEvent,
+    BulkMoveResponse,
+    BulkSafeDeleteResponse,
     ChangeSignatureResponse,
+    CrossProjectUsagesResponse,
+    DeleteCandidate,
     ExtractMethodResponse,
+    ExtractRange,
     ExtractVariableResponse,
     FindUsagesResponse,
     HealthResponse,
     InlineResponse,
+    MoveElement,
     MoveResponse,
+    MultiExtractResponse,
     ParameterInfo,
+    PlanStep,
     ProjectListResponse,
     RenameResponse,
+    RequestTimings,
     SafeDeleteResponse,
 )
+from pycharm_mcp.options import (
+    DOCUMENT_SYNC_MODES,
+    RESULT_FORMATS,
+    DocumentSync,
+    FileContents,
+    Priority,
+    ResultFormat,
+)
+from pycharm_mcp.recording import Exchange, Recorder, default_recorder
+from pycharm_mcp.result_cache import ResultCache, cacheable, default_result_cache
+from pycharm_mcp.scheduling import (
+    IndexingGate,
+    IndexingTimeout,
+    PriorityScheduler,
+    gate,
+    indexing_wait,
+    request_priority,
+    scheduler,
+)
+from pycharm_mcp.spill import read_json, spill_threshold
+from pycharm_mcp.timeouts import (
+    DEADLINE_HEADER,
+    DEFAULT_TIMEOUT,
+    AdaptiveTimeouts,
+    request_timeout,
+    series_name,
+)
+
+SERVER_TIMING_HEADER = "Server-Timing"
+BACKEND_MODES = ("bridge", "local", "auto")
+# Seconds to hold a project after a 503 without a Retry-After header
+_DEFAULT_RETRY_AFTER = 5.0
 
 
 class PyCharmBridgeError(Exception):
@@ -29,6 +77,107 @@ class PyCharmBridgeError(Exception):
         super().__init__(f"{message}: {details}" if details else message)
 
 
+class Backend(Protocol):
+    """Serves the bridge's API in-process, without HTTP or an IDE.
+
+    ``handle`` takes a request and returns ``(status, body, phases)``: the
+    HTTP status, the JSON body the bridge would send and the per-phase
+    durations it would report in ``Server-Timing``. It is called on a worker
+    thread. :class:`~pycharm_mcp.local_engine.LocalEngine` and
+    :class:`~pycharm_mcp.stub_bridge.StubBridge` both implement it.
+    """
+
+    def handle(
+        self, method: str, path: str, payload: dict[str, Any] | None
+    ) -> tuple[int, dict[str, Any], dict[str, float]]: ...
+
+
+def default_backends() -> tuple[Backend | None, Backend | None]:
+    """Return ``(backend, fallback)`` as selected by ``PYCHARM_BACKEND``.
+
+    ``bridge`` (the default) talks to PyCharm only, ``local`` uses the local
+    engine only, and ``auto`` talks to PyCharm and falls back to the local
+    engine when it cannot connect.
+    """
+    mode = os.environ.get("PYCHARM_BACKEND", "bridge")
+    if mode not in BACKEND_MODES:
+        raise ValueError(f"Invalid backend {mode!r}, expected one of {BACKEND_MODES}")
+    if mode == "bridge":
+        return None, None
+
+    # Imported here to keep it off the startup path when unused
+    from pycharm_mcp.local_engine import local_engine
+
+    return (local_engine(), None) if mode == "local" else (None, local_engine())
+
+
+class BridgeIndexingError(PyCharmBridgeError):
+    """The bridge turned a request away, or it was not sent, because of indexing."""
+
+    def __init__(
+        self,
+        message: str,
+        details: str | None = None,
+        indexing_projects: list[str] | None = None,
+        retry_after: float | None = None,
+    ) -> None:
+        super().__init__(message, details)
+        self.indexing_projects = indexing_projects or []
+        self.retry_after = retry_after
+
+
+def _parse_server_timing(header: str) -> dict[str, float]:
+    """Parse a ``Server-Timing`` header into phase durations in milliseconds."""
+    phases: dict[str, float] = {}
+    for entry in header.split(","):
+        name, *params = (part.strip() for part in entry.split(";"))
+        if not name:
+            continue
+        duration = 0.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "dur":
+                with contextlib.suppress(ValueError):
+                    duration = float(value.strip().strip('"'))
+        phases[name] = phases.get(name, 0.0) + duration
+    return phases
+
+
+def _status_error(
+    status: int, data: dict[str, Any], headers: Mapping[str, str]
+) -> PyCharmBridgeError:
+    """Map an error response to the exception to raise."""
+    indexing = data.get("indexingProjects") or []
+    if status == 503:
+        retry_after = headers.get("Retry-After", "")
+        return BridgeIndexingError(
+            data.get("error", "Indexing in progress"),
+            data.get("details"),
+            indexing,
+            float(retry_after) if retry_after.isdigit() else None,
+        )
+    details = data.get("details")
+    if indexing:
+        # Failures during indexing are often spurious
+        note = f"PyCharm was indexing {', '.join(indexing)}"
+        details = f"{details} ({note})" if details else note
+    return PyCharmBridgeError(data.get("error", f"HTTP {status}"), details)
+
+
+def _target(
+    file: str | None, line: int | None, column: int | None, handle: str | None
+) -> dict[str, Any]:
+    """Build the part of a request that identifies the target element."""
+    if handle is not None:
+        return {"handle": handle}
+    if file is None or line is None or column is None:
+        raise PyCharmBridgeError(
+            "No target element",
+            "Provide either an element handle or file, line and column",
+        )
+    return {"file": file, "line": line, "column": column}
+
+
 class PyCharmClient:
     """Client for the PyCharm Refactoring Bridge HTTP API."""
 
@@ -36,13 +185,56 @@ class PyCharmClient:
         self,
         base_url: str | None = None,
         auth_token: str | None = None,
-        timeout: float = 30.0,
+        timeout: float | None = None,
+        client_metrics: ClientMetrics | None = None,
+        document_sync: DocumentSync | None = None,
+        result_format: ResultFormat | None = None,
+        indexing_gate: IndexingGate | None = None,
+        indexing_timeout: float | None = None,
+        backend: Backend | None = None,
+        fallback: Backend | None = None,
+        recorder: Recorder | None = None,
+        result_cache: ResultCache | None = None,
+        priority: Priority | None = None,
+        request_scheduler: PriorityScheduler | None = None,
+        timeouts: AdaptiveTimeouts | None = None,
+        spill_bytes: int | None = None,
     ) -> None:
-        self.base_url = base_url or os.environ.get(
-            "PYCHARM_BRIDGE_URL", "http://localhost:9876"
-        )
+        self.base_url = base_url or os.environ.get("PYCHARM_BRIDGE_URL", "http://localhost:9876")
         self.auth_token = auth_token or os.environ.get("PYCHARM_BRIDGE_TOKEN")
+        # Fixed timeout for every request; if None, chosen per endpoint by timeouts
         self.timeout = timeout
+        self.metrics = client_metrics if client_metrics is not None else metrics
+        self.timeouts = timeouts if timeouts is not None else AdaptiveTimeouts(self.metrics)
+        sync = document_sync or os.environ.get("PYCHARM_DOCUMENT_SYNC", "all")
+        if sync not in DOCUMENT_SYNC_MODES:
+            raise ValueError(
+                f"Invalid document sync mode {sync!r}, expected one of {DOCUMENT_SYNC_MODES}"
+            )
+        self.document_sync: DocumentSync = sync
+        encoding = result_format or os.environ.get("PYCHARM_RESULT_FORMAT", "rows")
+        if encoding not in RESULT_FORMATS:
+            raise ValueError(
+                f"Invalid result format {encoding!r}, expected one of {RESULT_FORMATS}"
+            )
+        self.result_format: ResultFormat = encoding
+        self.gate = indexing_gate if indexing_gate is not None else gate
+        self.indexing_timeout = indexing_wait() if indexing_timeout is None else indexing_timeout
+        if backend is None and fallback is None:
+            backend, fallback = default_backends()
+        # Serves every request in-process instead of the bridge
+        self.backend = backend
+        # Serves requests when the bridge cannot be reached
+        self.fallback = fallback
+        # Logs every exchange for replay, when PYCHARM_RECORD asks for it
+        self.recorder = recorder if recorder is not None else default_recorder()
+        # Answers repeated reads across sessions, when PYCHARM_RESULT_CACHE_MB enables it
+        self.result_cache = result_cache if result_cache is not None else default_result_cache()
+        # Whether requests queue ahead of or behind others when the bridge is busy
+        self.priority: Priority = priority or request_priority.get()
+        self.scheduler = request_scheduler if request_scheduler is not None else scheduler
+        # Responses larger than this are read through a temporary file; see pycharm_mcp.spill
+        self.spill_bytes = spill_threshold() if spill_bytes is None else spill_bytes
         self._client: httpx.AsyncClient | None = None
 
     async def _get_client(self) -> httpx.AsyncClient:
@@ -53,10 +245,25 @@ class PyCharmClient:
             self._client = httpx.AsyncClient(
                 base_url=self.base_url,
                 headers=headers,
-                timeout=self.timeout,
+                timeout=self.timeout or DEFAULT_TIMEOUT,
+                # Loading the CA bundle costs tens of milliseconds per client
+                # and is only needed for an https bridge URL
+                verify=self.base_url.startswith("https://"),
             )
         return self._client
 
+    def timeout_for(self, path: str, requested: float | None = None) -> float:
+        """Seconds to wait for a request to ``path``, or to the metrics series it names.
+
+        The first that is set wins: a :func:`~pycharm_mcp.timeouts.timeout_override`
+        around the call, the ``requested`` timeout of the call, the client's
+        fixed ``timeout``, and the one ``timeouts`` learned for the endpoint.
+        """
+        for timeout in (request_timeout.get(), requested, self.timeout):
+            if timeout is not None:
+                return timeout
+        return self.timeouts.timeout_for(path)
+
     async def close(self) -> None:
         """Close the HTTP client."""
         if self._client is not None:
@@ -64,27 +271,187 @@ class PyCharmClient:
             self._client = None
 
     async def _request(
-        self, method: str, path: str, json_data: dict[str, Any] | None = None
+        self,
+        method: str,
+        path: str,
+        json_data: dict[str, Any] | None = None,
+        timeout: float | None = None,
     ) -> dict[str, Any]:
-        """Make an HTTP request to the PyCharm bridge."""
-        client = await self._get_client()
-        try:
-            if method == "GET":
-                response = await client.get(path)
-            else:
-                response = await client.post(path, json=json_data)
+        """Make an HTTP request to the PyCharm bridge.
+
+        Requests for a project that is indexing are held until it finishes, up
+        to ``indexing_timeout`` seconds, and so are requests the bridge turns
+        away because indexing started after they were sent. Reads with a
+        valid entry in ``result_cache`` are answered from it. ``timeout``
+        overrides the one chosen for the endpoint; see :meth:`timeout_for`.
+        """
+        project = json_data.get("project") if json_data else None
+        if not isinstance(project, str):
+            return await self._send(method, path, json_data, timeout)
 
-            response.raise_for_status()
-            data: dict[str, Any] = response.json()
+        assert json_data is not None
+        if self.result_cache is None or not cacheable(path, json_data):
+            return await self._admit(project, method, path, json_data, timeout)
 
-            if not data.get("success", True):
+        started = time.perf_counter()
+        sent_at = time.time()
+        data = await asyncio.to_thread(self.result_cache.get, path, json_data)
+        lookup_ms = (time.perf_counter() - started) * 1000
+        if data is not None:
+            self.metrics.series("result-cache:hit").add(lookup_ms)
+            data["timings"] = {"phases": {"cache": lookup_ms}, "roundTripMs": lookup_ms}
+            return data
+        self.metrics.series("result-cache:miss").add(lookup_ms)
+        data = await self._admit(project, method, path, json_data, timeout)
+        await asyncio.to_thread(self.result_cache.put, path, json_data, data, sent_at)
+        return data
+
+    async def _admit(
+        self,
+        project: str,
+        method: str,
+        path: str,
+        json_data: dict[str, Any],
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Send a request once its project is admitted, holding it while indexing."""
+        write = not path.startswith("/find/") and not json_data.get("preview", False)
+        deadline = time.monotonic() + self.indexing_timeout
+        while True:
+            try:
+                remaining = max(0.0, deadline - time.monotonic())
+                async with self.gate.admit(project, write=write, timeout=remaining):
+                    return await self._send(method, path, json_data, timeout)
+            except IndexingTimeout as e:
+                raise BridgeIndexingError(
+                    "Indexing in progress",
+                    f"{project} is still indexing after {e.waited_s:.0f}s; retry when it finishes",
+                    [project],
+                ) from e
+            except BridgeIndexingError as e:
+                if time.monotonic() >= deadline:
+                    raise
+                self.gate.hold(project, e.retry_after or _DEFAULT_RETRY_AFTER)
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        json_data: dict[str, Any] | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Send one request to the bridge, or the local backend, and return its JSON body.
+
+        Bridge requests wait for a slot of ``scheduler`` first. Their latency
+        including that wait is recorded per priority class, as
+        ``priority:interactive`` and ``priority:background``. Requests that
+        time out are recorded as ``timeout:<path>``, and raise the timeout of
+        their endpoint; see :meth:`AdaptiveTimeouts.timed_out`.
+        """
+        series = series_name(path, json_data)
+        sent_at = time.time()
+        started = time.perf_counter()
+        headers: Mapping[str, str] = {}
+        queued = 0.0
+        if self.backend is not None:
+            status, data, phases = await asyncio.to_thread(
+                self.backend.handle, method, path, json_data
+            )
+        else:
+            try:
+                async with self.scheduler.slot(self.priority) as queued:
+                    sent_at = time.time()
+                    started = time.perf_counter()
+                    status, data, phases, headers = await self._send_http(
+                        method, path, json_data, self.timeout_for(series, timeout)
+                    )
+            except httpx.TimeoutException as e:
+                waited_s = time.perf_counter() - started
+                self.timeouts.timed_out(series, waited_s)
                 raise PyCharmBridgeError(
-                    data.get("error", "Unknown error"),
-                    data.get("details"),
+                    "Bridge request timed out",
+                    f"No answer to {path} after {waited_s:.1f}s",
+                ) from e
+            except httpx.ConnectError as e:
+                if self.fallback is None:
+                    raise PyCharmBridgeError(
+                        "Cannot connect to PyCharm",
+                        "Is PyCharm running with the Refactoring Bridge plugin installed?",
+                    ) from e
+                status, data, phases = await asyncio.to_thread(
+                    self.fallback.handle, method, path, json_data
+                )
+        timings = RequestTimings(phases=phases, roundTripMs=(time.perf_counter() - started) * 1000)
+        self.metrics.record_request(series, timings)
+        self.metrics.series(f"priority:{self.priority}").add(queued * 1000 + timings.round_trip_ms)
+        if self.recorder is not None:
+            self.recorder.record(
+                Exchange(
+                    sent_at, method, path, json_data, status, data, phases, timings.round_trip_ms
                 )
+            )
 
-            return data
+        if status >= 400:
+            raise _status_error(status, data, headers)
+        data["timings"] = timings.model_dump(by_alias=True)
+        if not data.get("success", True):
+            raise PyCharmBridgeError(
+                data.get("error", "Unknown error"),
+                data.get("details"),
+            )
+        return data
 
+    async def _send_http(
+        self, method: str, path: str, json_data: dict[str, Any] | None, timeout: float
+    ) -> tuple[int, dict[str, Any], dict[str, float], Mapping[str, str]]:
+        client = await self._get_client()
+        # The bridge stops work that cannot finish before the client gives up
+        headers = {DEADLINE_HEADER: str(int(timeout * 1000))}
+        request = client.build_request(
+            method,
+            path,
+            json=json_data if method != "GET" else None,
+            headers=headers,
+            timeout=timeout,
+        )
+        response = await client.send(request, stream=True)
+        try:
+            data = await read_json(response, self.spill_bytes)
+        finally:
+            await response.aclose()
+        phases = _parse_server_timing(response.headers.get(SERVER_TIMING_HEADER, ""))
+        return response.status_code, data, phases, response.headers
+
+    async def health(self) -> HealthResponse:
+        """Check if the PyCharm bridge is healthy."""
+        data = await self._request("GET", "/health")
+        return HealthResponse.model_validate(data)
+
+    async def events(self) -> AsyncIterator[BridgeEvent]:
+        """Subscribe to the bridge's event stream.
+
+        Yields events as the bridge pushes them, starting with a ``connected``
+        event, until the connection drops. Events published while not
+        subscribed are lost, so treat ``connected`` as "anything may have
+        changed".
+        """
+        if self.backend is not None:
+            raise PyCharmBridgeError("No event stream", "The local backend does not publish events")
+        client = await self._get_client()
+        try:
+            # No read timeout: the stream is idle between events
+            timeout = httpx.Timeout(self.timeout_for("/events"), read=None)
+            async with client.stream("GET", "/events", timeout=timeout) as response:
+                if response.is_error:
+                    await response.aread()
+                response.raise_for_status()
+                data: list[str] = []
+                async for line in response.aiter_lines():
+                    if line.startswith("data:"):
+                        data.append(line[5:].removeprefix(" "))
+                    elif not line and data:
+                        yield BridgeEvent.model_validate_json("\n".join(data))
+                        data = []
         except httpx.ConnectError as e:
             raise PyCharmBridgeError(
                 "Cannot connect to PyCharm",
@@ -96,11 +463,8 @@ class PyCharmClient:
                 error_data.get("error", f"HTTP {e.response.status_code}"),
                 error_data.get("details"),
             ) from e
-
-    async def health(self) -> HealthResponse:
-        """Check if the PyCharm bridge is healthy."""
-        data = await self._request("GET", "/health")
-        return HealthResponse.model_validate(data)
+        except httpx.TransportError as e:
+            raise PyCharmBridgeError("Event stream closed", str(e)) from e
 
     async def list_projects(self) -> ProjectListResponse:
         """List all projects currently open in PyCharm."""
@@ -110,27 +474,32 @@ class PyCharmClient:
     async def rename(
         self,
         project: str,
-        file: str,
-        line: int,
-        column: int,
+        file: str | None = None,
+        line: int | None = None,
+        column: int | None = None,
+        *,
         new_name: str,
         search_in_comments: bool = True,
         search_in_strings: bool = False,
         preview: bool = False,
+        handle: str | None = None,
+        sync: DocumentSync | None = None,
+        contents: FileContents = "none",
     ) -> RenameResponse:
-        """Rename a symbol."""
+        """Rename a symbol, located by position or by element handle."""
         data = await self._request(
             "POST",
             "/refactor/rename",
             {
                 "project": project,
-                "file": file,
-                "line": line,
-                "column": column,
+                **_target(file, line, column, handle),
                 "newName": new_name,
                 "searchInComments": search_in_comments,
                 "searchInStrings": search_in_strings,
                 "preview": preview,
+                "sync": sync or self.document_sync,
+                "format": self.result_format,
+                "contents": contents,
             },
         )
         return RenameResponse.model_validate(data)
@@ -138,11 +507,15 @@ class PyCharmClient:
     async def move(
         self,
         project: str,
-        file: str,
-        line: int,
-        column: int,
+        file: str | None = None,
+        line: int | None = None,
+        column: int | None = None,
+        *,
         target_file: str,
         preview: bool = False,
+        handle: str | None = None,
+        sync: DocumentSync | None = None,
+        contents: FileContents = "none",
     ) -> MoveResponse:
         """Move an element to a different module."""
         data = await self._request(
@@ -150,15 +523,40 @@ class PyCharmClient:
             "/refactor/move",
             {
                 "project": project,
-                "file": file,
-                "line": line,
-                "column": column,
+                **_target(file, line, column, handle),
                 "targetFile": target_file,
                 "preview": preview,
+                "sync": sync or self.document_sync,
+                "format": self.result_format,
+                "contents": contents,
             },
         )
         return MoveResponse.model_validate(data)
 
+    async def move_bulk(
+        self,
+        project: str,
+        elements: list[MoveElement],
+        target_file: str,
+        preview: bool = False,
+        sync: DocumentSync | None = None,
+        contents: FileContents = "none",
+    ) -> BulkMoveResponse:
+        """Move many top-level classes and functions into one module, rewriting imports once."""
+        data = await self._request(
+            "POST",
+            "/refactor/move-bulk",
+            {
+                "project": project,
+                "elements": [e.model_dump(by_alias=True, exclude_none=True) for e in elements],
+                "targetFile": target_file,
+                "preview": preview,
+                "sync": sync or self.document_sync,
+                "contents": contents,
+            },
+        )
+        return BulkMoveResponse.model_validate(data)
+
     async def extract_method(
         self,
         project: str,
@@ -169,6 +567,7 @@ class PyCharmClient:
         end_column: int,
         method_name: str,
         preview: bool = False,
+        sync: DocumentSync | None = None,
     ) -> ExtractMethodResponse:
         """Extract selected code into a new method."""
         data = await self._request(
@@ -183,6 +582,7 @@ class PyCharmClient:
                 "endColumn": end_column,
                 "methodName": method_name,
                 "preview": preview,
+                "sync": sync or self.document_sync,
             },
         )
         return ExtractMethodResponse.model_validate(data)
@@ -198,6 +598,7 @@ class PyCharmClient:
         variable_name: str,
         replace_all: bool = True,
         preview: bool = False,
+        sync: DocumentSync | None = None,
     ) -> ExtractVariableResponse:
         """Extract an expression into a variable."""
         data = await self._request(
@@ -213,17 +614,43 @@ class PyCharmClient:
                 "variableName": variable_name,
                 "replaceAll": replace_all,
                 "preview": preview,
+                "sync": sync or self.document_sync,
             },
         )
         return ExtractVariableResponse.model_validate(data)
 
-    async def inline(
+    async def extract_ranges(
         self,
         project: str,
         file: str,
-        line: int,
-        column: int,
+        ranges: list[ExtractRange],
+        sync: DocumentSync | None = None,
+        contents: FileContents = "none",
+    ) -> MultiExtractResponse:
+        """Apply many extractions to one file, all given in its original coordinates."""
+        data = await self._request(
+            "POST",
+            "/refactor/extract-ranges",
+            {
+                "project": project,
+                "file": file,
+                "ranges": [r.model_dump(by_alias=True) for r in ranges],
+                "sync": sync or self.document_sync,
+                "contents": contents,
+            },
+        )
+        return MultiExtractResponse.model_validate(data)
+
+    async def inline(
+        self,
+        project: str,
+        file: str | None = None,
+        line: int | None = None,
+        column: int | None = None,
         preview: bool = False,
+        handle: str | None = None,
+        sync: DocumentSync | None = None,
+        contents: FileContents = "none",
     ) -> InlineResponse:
         """Inline a variable or method."""
         data = await self._request(
@@ -231,10 +658,11 @@ class PyCharmClient:
             "/refactor/inline",
             {
                 "project": project,
-                "file": file,
-                "line": line,
-                "column": column,
+                **_target(file, line, column, handle),
                 "preview": preview,
+                "sync": sync or self.document_sync,
+                "format": self.result_format,
+                "contents": contents,
             },
         )
         return InlineResponse.model_validate(data)
@@ -242,21 +670,25 @@ class PyCharmClient:
     async def change_signature(
         self,
         project: str,
-        file: str,
-        line: int,
-        column: int,
+        file: str | None = None,
+        line: int | None = None,
+        column: int | None = None,
         new_name: str | None = None,
         parameters: list[ParameterInfo] | None = None,
         return_type: str | None = None,
         preview: bool = False,
+        handle: str | None = None,
+        sync: DocumentSync | None = None,
+        contents: FileContents = "none",
     ) -> ChangeSignatureResponse:
         """Change a function's signature."""
         request_data: dict[str, Any] = {
             "project": project,
-            "file": file,
-            "line": line,
-            "column": column,
+            **_target(file, line, column, handle),
             "preview": preview,
+            "sync": sync or self.document_sync,
+            "format": self.result_format,
+            "contents": contents,
         }
         if new_name is not None:
             request_data["newName"] = new_name
@@ -271,10 +703,12 @@ class PyCharmClient:
     async def safe_delete(
         self,
         project: str,
-        file: str,
-        line: int,
-        column: int,
+        file: str | None = None,
+        line: int | None = None,
+        column: int | None = None,
         search_for_usages: bool = True,
+        handle: str | None = None,
+        sync: DocumentSync | None = None,
     ) -> SafeDeleteResponse:
         """Delete an element only if it has no usages."""
         data = await self._request(
@@ -282,30 +716,116 @@ class PyCharmClient:
             "/refactor/safe-delete",
             {
                 "project": project,
-                "file": file,
-                "line": line,
-                "column": column,
+                **_target(file, line, column, handle),
                 "searchForUsages": search_for_usages,
+                "sync": sync or self.document_sync,
             },
         )
         return SafeDeleteResponse.model_validate(data)
 
-    async def find_usages(
+    async def safe_delete_bulk(
         self,
         project: str,
-        file: str,
-        line: int,
-        column: int,
-    ) -> FindUsagesResponse:
-        """Find all usages of a symbol."""
+        candidates: list[DeleteCandidate] | None = None,
+        scope: str | None = None,
+        preview: bool = False,
+        max_usages: int = 10,
+        sync: DocumentSync | None = None,
+        contents: FileContents = "none",
+    ) -> BulkSafeDeleteResponse:
+        """Delete the unused ones of many symbols, counting usages in one pass.
+
+        Pass either ``candidates`` or a file or directory ``scope`` whose
+        top-level functions and classes become the candidates.
+        """
+        request_data: dict[str, Any] = {
+            "project": project,
+            "preview": preview,
+            "maxUsages": max_usages,
+            "sync": sync or self.document_sync,
+            "contents": contents,
+        }
+        if candidates:
+            request_data["candidates"] = [c.model_dump(exclude_none=True) for c in candidates]
+        if scope is not None:
+            request_data["scope"] = scope
+
+        data = await self._request("POST", "/refactor/safe-delete-bulk", request_data)
+        return BulkSafeDeleteResponse.model_validate(data)
+
+    async def apply_plan(
+        self,
+        project: str,
+        steps: list[PlanStep],
+        sync: DocumentSync | None = None,
+        contents: FileContents = "none",
+    ) -> ApplyPlanResponse:
+        """Apply refactorings in order as one IDE command, undoing them all if one fails."""
         data = await self._request(
             "POST",
-            "/find/usages",
+            "/refactor/apply-plan",
             {
                 "project": project,
-                "file": file,
-                "line": line,
-                "column": column,
+                "steps": [step.model_dump(by_alias=True, exclude_none=True) for step in steps],
+                "sync": sync or self.document_sync,
+                "format": self.result_format,
+                "contents": contents,
             },
         )
+        return ApplyPlanResponse.model_validate(data)
+
+    async def find_usages(
+        self,
+        project: str,
+        file: str | None = None,
+        line: int | None = None,
+        column: int | None = None,
+        since_token: str | None = None,
+        handle: str | None = None,
+    ) -> FindUsagesResponse:
+        """Find all usages of a symbol.
+
+        Pass the ``token`` of a previous result as ``since_token`` to get back
+        only the usages added and removed since then.
+        """
+        request_data: dict[str, Any] = {
+            "project": project,
+            **_target(file, line, column, handle),
+            "format": self.result_format,
+        }
+        if since_token is not None:
+            request_data["sinceToken"] = since_token
+
+        data = await self._request("POST", "/find/usages", request_data)
         return FindUsagesResponse.model_validate(data)
+
+    async def find_usages_all_projects(
+        self,
+        project: str,
+        file: str | None = None,
+        line: int | None = None,
+        column: int | None = None,
+        handle: str | None = None,
+        projects: list[str] | None = None,
+        timeout: float = 20.0,
+    ) -> CrossProjectUsagesResponse:
+        """Find usages of a symbol resolved in ``project`` in several open projects.
+
+        Searches ``projects`` (default: every open project) concurrently; a
+        project still searching after ``timeout`` seconds is reported as timed
+        out. The timeout is kept below the HTTP timeout, so the bridge can
+        still answer with the projects that did finish.
+        """
+        path = "/find/usages/all-projects"
+        http_timeout = self.timeout_for(path, timeout / 0.8)
+        request_data: dict[str, Any] = {
+            "project": project,
+            **_target(file, line, column, handle),
+            "timeoutMs": int(min(timeout, http_timeout * 0.8) * 1000),
+            "format": self.result_format,
+        }
+        if projects is not None:
+            request_data["projects"] = projects
+
+        data = await self._request("POST", path, request_data, http_timeout)
+        return CrossProjectUsagesResponse.model_validate(data)
@@ -0,0 +1,327 @@
+"""Columnar encoding for large usage and change lists.
+
+With ``"format": "columnar"`` the bridge returns usages and changes as a
+string table plus parallel integer arrays, instead of one JSON object per row
+that repeats the file path and texts. The client decodes them into
+:class:`UsageTable` / :class:`ChangeTable`, which keep the columns in compact
+arrays and hand out lightweight row views on access, so no per-row model is
+built unless a row is actually looked at.
+
+Row views have the same attributes as :class:`~pycharm_mcp.models.UsageInfo`
+and :class:`~pycharm_mcp.models.FileChange`.
+"""
+
+from abc import ABC, abstractmethod
+from array import array
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from typing import Any, overload
+
+from pydantic import GetCoreSchemaHandler, GetJsonSchemaHandler
+from pydantic.json_schema import JsonSchemaValue
+from pydantic_core import core_schema
+
+WRITE_ACCESS = 1
+
+
+class _StringTable:
+    """Assigns each distinct string an index, in first-seen order."""
+
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self._indexes: dict[str, int] = {}
+
+    def index(self, value: str) -> int:
+        index = self._indexes.get(value)
+        if index is None:
+            index = self._indexes[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def _column(columns: Mapping[str, Any], name: str, typecode: str, length: int) -> "array[int]":
+    values = columns[name]
+    # Responses read through pycharm_mcp.spill already hold arrays; keep them
+    if not isinstance(values, array) or values.typecode != typecode:
+        values = array(typecode, values)
+    if len(values) != length:
+        raise ValueError(f"Column {name!r} has {len(values)} rows, expected {length}")
+    return values
+
+
+class UsageRow:
+    """View of one row of a :class:`UsageTable`."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "UsageTable", index: int) -> None:
+        self._table = table
+        self._index = index
+
+    @property
+    def file(self) -> str:
+        return self._table.strings[self._table.file_ids[self._index]]
+
+    @property
+    def line(self) -> int:
+        return self._table.lines[self._index]
+
+    @property
+    def column(self) -> int:
+        return self._table.columns[self._index]
+
+    @property
+    def text(self) -> str:
+        return self._table.strings[self._table.text_ids[self._index]]
+
+    @property
+    def is_write_access(self) -> bool:
+        return bool(self._table.flags[self._index] & WRITE_ACCESS)
+
+    def to_dict(self, by_alias: bool = True) -> dict[str, Any]:
+        return {
+            "file": self.file,
+            "line": self.line,
+            "column": self.column,
+            "text": self.text,
+            "isWriteAccess" if by_alias else "is_write_access": self.is_write_access,
+        }
+
+    def __repr__(self) -> str:
+        return f"UsageRow({self.file}:{self.line}:{self.column})"
+
+
+class ChangeRow:
+    """View of one row of a :class:`ChangeTable`."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "ChangeTable", index: int) -> None:
+        self._table = table
+        self._index = index
+
+    @property
+    def file(self) -> str:
+        return self._table.strings[self._table.file_ids[self._index]]
+
+    @property
+    def line(self) -> int:
+        return self._table.lines[self._index]
+
+    @property
+    def old_text(self) -> str:
+        return self._table.strings[self._table.old_text_ids[self._index]]
+
+    @property
+    def new_text(self) -> str:
+        return self._table.strings[self._table.new_text_ids[self._index]]
+
+    def to_dict(self, by_alias: bool = True) -> dict[str, Any]:
+        return {
+            "file": self.file,
+            "line": self.line,
+            "oldText" if by_alias else "old_text": self.old_text,
+            "newText" if by_alias else "new_text": self.new_text,
+        }
+
+    def __repr__(self) -> str:
+        return f"ChangeRow({self.file}:{self.line})"
+
+
+class _Table(ABC):
+    """Pydantic integration shared by the tables.
+
+    Validates from a columnar mapping as sent by the bridge, and serializes
+    back to a list of row dicts so dumps look the same as for row responses.
+    """
+
+    @classmethod
+    @abstractmethod
+    def from_columns(cls, columns: Mapping[str, Any]) -> Any:
+        """Build a table from the bridge's columns."""
+
+    @classmethod
+    def _validate(cls, value: Any) -> Any:
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, Mapping):
+            return cls.from_columns(value)
+        raise ValueError(f"Expected columnar data for {cls.__name__}")
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls._validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda table, info: [row.to_dict(bool(info.by_alias)) for row in table],
+                info_arg=True,
+            ),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(
+        cls, schema: core_schema.CoreSchema, handler: GetJsonSchemaHandler
+    ) -> JsonSchemaValue:
+        # Described the way tables dump, as a list of row objects
+        return handler(core_schema.list_schema(core_schema.dict_schema(core_schema.str_schema())))
+
+
+class UsageTable(_Table, Sequence[UsageRow]):
+    """Usages stored column by column."""
+
+    def __init__(
+        self,
+        strings: list[str],
+        file_ids: "array[int]",
+        lines: "array[int]",
+        columns: "array[int]",
+        text_ids: "array[int]",
+        flags: "array[int]",
+    ) -> None:
+        self.strings = strings
+        self.file_ids = file_ids
+        self.lines = lines
+        self.columns = columns
+        self.text_ids = text_ids
+        self.flags = flags
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, Any]) -> "UsageTable":
+        """Decode the bridge's ``usageColumns`` object."""
+        length = len(columns["file"])
+        return cls(
+            list(columns["strings"]),
+            _column(columns, "file", "I", length),
+            _column(columns, "line", "I", length),
+            _column(columns, "column", "I", length),
+            _column(columns, "text", "I", length),
+            _column(columns, "flags", "B", length),
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Any]) -> "UsageTable":
+        """Build a table from usage models or row views."""
+        return cls.from_columns(encode_usages(rows))
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    @overload
+    def __getitem__(self, index: int) -> UsageRow: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[UsageRow]: ...
+
+    def __getitem__(self, index: int | slice) -> UsageRow | list[UsageRow]:
+        if isinstance(index, slice):
+            return [UsageRow(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("usage index out of range")
+        return UsageRow(self, index)
+
+    def __iter__(self) -> Iterator[UsageRow]:
+        return (UsageRow(self, i) for i in range(len(self)))
+
+
+class ChangeTable(_Table, Sequence[ChangeRow]):
+    """File changes stored column by column."""
+
+    def __init__(
+        self,
+        strings: list[str],
+        file_ids: "array[int]",
+        lines: "array[int]",
+        old_text_ids: "array[int]",
+        new_text_ids: "array[int]",
+    ) -> None:
+        self.strings = strings
+        self.file_ids = file_ids
+        self.lines = lines
+        self.old_text_ids = old_text_ids
+        self.new_text_ids = new_text_ids
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, Any]) -> "ChangeTable":
+        """Decode the bridge's ``changeColumns`` object."""
+        length = len(columns["file"])
+        return cls(
+            list(columns["strings"]),
+            _column(columns, "file", "I", length),
+            _column(columns, "line", "I", length),
+            _column(columns, "oldText", "I", length),
+            _column(columns, "newText", "I", length),
+        )
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    @overload
+    def __getitem__(self, index: int) -> ChangeRow: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[ChangeRow]: ...
+
+    def __getitem__(self, index: int | slice) -> ChangeRow | list[ChangeRow]:
+        if isinstance(index, slice):
+            return [ChangeRow(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("change index out of range")
+        return ChangeRow(self, index)
+
+    def __iter__(self) -> Iterator[ChangeRow]:
+        return (ChangeRow(self, i) for i in range(len(self)))
+
+
+def encode_usages(rows: Iterable[Any]) -> dict[str, Any]:
+    """Encode usages (dicts, models or row views) in the bridge's columnar form."""
+    table = _StringTable()
+    file: list[int] = []
+    line: list[int] = []
+    column: list[int] = []
+    text: list[int] = []
+    flags: list[int] = []
+    for row in rows:
+        if isinstance(row, Mapping):
+            values = (row["file"], row["line"], row["column"], row["text"])
+            write = row.get("isWriteAccess", False)
+        else:
+            values = (row.file, row.line, row.column, row.text)
+            write = row.is_write_access
+        file.append(table.index(values[0]))
+        line.append(values[1])
+        column.append(values[2])
+        text.append(table.index(values[3]))
+        flags.append(WRITE_ACCESS if write else 0)
+    return {
+        "strings": table.strings,
+        "file": file,
+        "line": line,
+        "column": column,
+        "text": text,
+        "flags": flags,
+    }
+
+
+def encode_changes(rows: Iterable[Mapping[str, Any]]) -> dict[str, Any]:
+    """Encode change dicts in the bridge's columnar form."""
+    table = _StringTable()
+    columns: dict[str, Any] = {"file": [], "line": [], "oldText": [], "newText": []}
+    for row in rows:
+        columns["file"].append(table.index(row["file"]))
+        columns["line"].append(row["line"])
+        columns["oldText"].append(table.index(row["oldText"]))
+        columns["newText"].append(table.index(row["newText"]))
+    return {"strings": table.strings, **columns}
+
+
+def columns_into(data: Any, columns_key: str, rows_key: str) -> Any:
+    """Move a columnar payload into the field that normally holds the rows."""
+    if isinstance(data, dict) and data.get(columns_key) is not None:
+        data = {**data, rows_key: data[columns_key]}
+        del data[columns_key]
+    return data
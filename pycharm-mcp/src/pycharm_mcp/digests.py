@@ -0,0 +1,37 @@
+"""Digests of the files a refactoring modified, as the bridge reports them.
+
+Applied refactorings answer with a ``files`` entry per modified file: its
+SHA-256 and size, plus its new content or a unified diff when the request asked
+for ``contents``. The stub bridge and the local engine build theirs here.
+"""
+
+import difflib
+import hashlib
+from typing import Any
+
+from pycharm_mcp.options import FileContents
+
+
+def file_digest(
+    path: str, data: bytes, contents: FileContents = "none", before: str = ""
+) -> dict[str, Any]:
+    """Describe ``data``, the new bytes of ``path``; ``before`` is its old text."""
+    digest: dict[str, Any] = {
+        "file": path,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "size": len(data),
+    }
+    if contents == "content":
+        digest["content"] = data.decode("utf-8")
+    elif contents == "diff":
+        digest["diff"] = unified_diff(path, before, data.decode("utf-8"))
+    return digest
+
+
+def unified_diff(path: str, before: str, after: str) -> str:
+    """Unified diff of two versions of ``path``, empty if they are equal."""
+    return "".join(
+        difflib.unified_diff(
+            before.splitlines(keepends=True), after.splitlines(keepends=True), path, path
+        )
+    )
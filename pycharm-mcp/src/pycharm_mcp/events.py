@@ -0,0 +1,88 @@
+"""Subscription to the bridge's event stream.
+
+The bridge pushes file changes, indexing state and project open/close over
+``GET /events``. The MCP server keeps one subscription open in the background
+and hands every event to the handlers that caches register here, so they can
+drop exactly the entries an event makes stale instead of expiring everything
+on a timer. The subscription reconnects with backoff when the bridge goes
+away; each new connection starts with a ``connected`` event, which handlers
+treat as "anything may have changed".
+"""
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import Callable
+
+from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.models import BridgeEvent
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[BridgeEvent], None]
+
+_MAX_RETRY_DELAY = 30.0
+
+
+class EventStream:
+    """Background subscription that dispatches bridge events to handlers."""
+
+    def __init__(self, retry_delay: float = 1.0) -> None:
+        self.retry_delay = retry_delay
+        self.connected = False
+        self.last_event: BridgeEvent | None = None
+        self._handlers: list[EventHandler] = []
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add_handler(self, handler: EventHandler) -> None:
+        """Call ``handler`` with every event received from now on."""
+        self._handlers.append(handler)
+
+    def dispatch(self, event: BridgeEvent) -> None:
+        """Hand ``event`` to every handler; a failing handler does not stop the rest."""
+        self.last_event = event
+        for handler in self._handlers:
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Event handler failed for %s event", event.type)
+
+    def start(self) -> None:
+        """Subscribe in the background."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Close the subscription."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self.connected = False
+
+    async def _run(self) -> None:
+        delay = self.retry_delay
+        while True:
+            client = PyCharmClient()
+            try:
+                async for event in client.events():
+                    if event.type == "connected":
+                        self.connected = True
+                        delay = self.retry_delay
+                    self.dispatch(event)
+            except PyCharmBridgeError as e:
+                logger.debug("Bridge event stream unavailable: %s", e)
+            finally:
+                self.connected = False
+                await client.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _MAX_RETRY_DELAY)
+
+
+# Shared by the registry and the caches that invalidate on events
+stream = EventStream()
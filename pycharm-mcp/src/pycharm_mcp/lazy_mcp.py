@@ -0,0 +1,172 @@
+"""FastMCP server that keeps tool registration off the startup path.
+
+Registering a tool with FastMCP builds a pydantic model and JSON schema from
+its signature. :class:`LazyFastMCP` only records ``@tool()`` functions and
+registers them on the first ``tools/call``. ``tools/list`` is answered from an
+on-disk schema cache keyed by the tools' signatures, docstrings and library
+versions, and the source of the modules their types may come from, so an
+unchanged server never builds the schemas just to list them.
+
+Types the tool signatures name from heavier modules go through
+:meth:`LazyFastMCP.defer_import`: with postponed annotations, such a module is
+only imported when FastMCP evaluates the signatures at registration.
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import re
+from collections.abc import Callable
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any
+
+from mcp.server.fastmcp import FastMCP
+from mcp.types import Tool as MCPTool
+
+from pycharm_mcp import __version__
+from pycharm_mcp.options import cache_dir
+
+AnyFunction = Callable[..., Any]
+
+_PACKAGE = __name__.partition(".")[0]
+# Top-level imports of this package's modules; imports inside functions are lazy
+_IMPORT = re.compile(
+    rb"^(?:from\s+([\w.]+)\s+import\s+(\([^)]*\)|[\w ,]+)|import\s+([\w.]+))", re.M
+)
+
+
+def _imported_modules(source: bytes) -> set[str]:
+    """This package's modules that ``source`` imports at top level."""
+    modules = set()
+    for match in _IMPORT.finditer(source):
+        module = (match[1] or match[3]).decode()
+        if module != _PACKAGE and not module.startswith(f"{_PACKAGE}."):
+            continue
+        modules.add(module)
+        if module == _PACKAGE and match[2]:
+            # from pycharm_mcp import models: maybe a module, maybe a name
+            names = re.split(rb"[\s,()]+", match[2])
+            modules.update(f"{module}.{name.decode()}" for name in names if name)
+    return modules
+
+
+def _module_sources(roots: list[str]) -> dict[str, bytes]:
+    """Source of ``roots`` and every module of this package they import, by name."""
+    sources: dict[str, bytes] = {}
+    stack = list(roots)
+    while stack:
+        name = stack.pop()
+        if name in sources:
+            continue
+        try:
+            spec = importlib.util.find_spec(name)
+        except ImportError:
+            spec = None
+        if spec is None or spec.origin is None or not spec.origin.endswith(".py"):
+            sources[name] = b""
+            continue
+        sources[name] = Path(spec.origin).read_bytes()
+        stack.extend(_imported_modules(sources[name]))
+    return sources
+
+
+class DeferredModule:
+    """Stand-in for a module that imports it on first attribute access."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(importlib.import_module(self.name), attr)
+
+
+def schema_cache_dir() -> Path:
+    """Directory for cached tool schemas."""
+    return cache_dir()
+
+
+class LazyFastMCP(FastMCP):
+    """FastMCP with deferred tool registration and cached tool schemas."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._pending_tools: list[tuple[AnyFunction, dict[str, Any]]] = []
+        self._deferred_modules: list[str] = []
+
+    def defer_import(self, name: str) -> DeferredModule:
+        """Refer to module ``name`` in tool annotations without importing it yet."""
+        self._deferred_modules.append(name)
+        return DeferredModule(name)
+
+    def tool(self, **kwargs: Any) -> Callable[[AnyFunction], AnyFunction]:  # type: ignore[override]
+        """Record a tool to register on first use."""
+
+        def decorator(fn: AnyFunction) -> AnyFunction:
+            self._pending_tools.append((fn, kwargs))
+            return fn
+
+        return decorator
+
+    def register_pending_tools(self) -> None:
+        """Register every recorded tool with FastMCP."""
+        pending, self._pending_tools = self._pending_tools, []
+        for fn, kwargs in pending:
+            super().tool(**kwargs)(fn)
+
+    def schema_cache_key(self) -> str:
+        """Hash of everything the recorded tools' schemas are generated from."""
+        digest = hashlib.sha256()
+        for part in (__version__, version("mcp"), version("pydantic")):
+            digest.update(part.encode())
+        # The schemas also depend on the types the signatures name, from the
+        # tools' own modules, the deferred ones and whatever those import (e.g.
+        # Literals from options). Hash their source, since importing the
+        # deferred modules is what the cache avoids.
+        roots = [*self._deferred_modules, *(fn.__module__ for fn, _ in self._pending_tools)]
+        for name, source in sorted(_module_sources(roots).items()):
+            digest.update(name.encode() + b"\0" + source)
+        for fn, kwargs in self._pending_tools:
+            digest.update(
+                repr(
+                    (
+                        fn.__qualname__,
+                        fn.__doc__,
+                        fn.__annotations__,
+                        fn.__defaults__,
+                        fn.__kwdefaults__,
+                        sorted(kwargs.items()),
+                    )
+                ).encode()
+            )
+        return digest.hexdigest()[:16]
+
+    async def list_tools(self) -> list[MCPTool]:
+        if not self._pending_tools:
+            return await super().list_tools()
+
+        cache_file = schema_cache_dir() / f"tools-{self.schema_cache_key()}.json"
+        try:
+            cached = json.loads(cache_file.read_text())
+            return [MCPTool.model_validate(tool) for tool in cached]
+        except (OSError, ValueError):
+            pass
+
+        self.register_pending_tools()
+        tools = await super().list_tools()
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            partial = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            partial.write_text(
+                json.dumps([tool.model_dump(mode="json", by_alias=True) for tool in tools])
+            )
+            partial.replace(cache_file)
+        except OSError:
+            pass
+        return tools
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> Any:
+        self.register_pending_tools()
+        return await super().call_tool(name, arguments)
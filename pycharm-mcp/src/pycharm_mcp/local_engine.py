@@ -0,0 +1,834 @@
+"""Python-native engine for find-usages, rename and safe-delete without PyCharm.
+
+On machines with no IDE (CI, batch codemods) the client can serve the tools
+from this engine instead of the bridge; see ``PYCHARM_BACKEND`` in
+:mod:`pycharm_mcp.client`. It answers the bridge's own requests with the
+bridge's own response bodies, so tools and models work unchanged, and marks
+every response with ``"backend": "local"``.
+
+The engine indexes every identifier occurrence in a project with :mod:`ast`:
+names, attributes, definitions, parameters and imports, each tagged with the
+function scope it is local to, plus each module's imports and the names it
+defines. Lookups match by name and scope, not by type inference. A
+module-level symbol is looked for in the module that defines it and in the
+modules that import it (``from mod import name`` or ``mod.name``); class
+members are matched by name in every module, as every attribute with the same
+name is taken for the same symbol. Changed files are re-parsed in a process
+pool, and the index is kept on disk keyed by each file's mtime and size.
+"""
+
+import ast
+import hashlib
+import json
+import keyword
+import os
+import re
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from pycharm_mcp.columnar import encode_changes, encode_usages
+from pycharm_mcp.digests import file_digest
+from pycharm_mcp.options import cache_dir
+
+BridgeResult = tuple[int, dict[str, Any], dict[str, float]]
+
+# Bump when the index layout changes, to ignore old cache files
+INDEX_VERSION = 2
+# Below this many files to parse, a process pool costs more than it saves
+PARALLEL_THRESHOLD = 64
+
+SKIP_DIRS = frozenset(
+    {
+        ".git",
+        ".hg",
+        ".idea",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".ruff_cache",
+        ".tox",
+        ".venv",
+        "__pycache__",
+        "build",
+        "dist",
+        "node_modules",
+        "venv",
+    }
+)
+
+# Occurrence kinds
+DEFINITION = "def"
+READ = "read"
+WRITE = "write"
+
+# (line, column, kind, scope, via): 1-indexed line, 0-indexed character column,
+# the function scope the name is local to ("" for module level), and for
+# attributes the dotted name they are read from ("mod" in ``mod.name``; "" if
+# not a plain name), None otherwise
+Occurrence = list[Any]
+
+
+class LocalEngineError(Exception):
+    """A request the local engine cannot serve, answered with a 4xx/5xx status."""
+
+    def __init__(self, status: int, error: str, details: str) -> None:
+        super().__init__(details)
+        self.status = status
+        self.error = error
+        self.details = details
+
+
+def _char_column(line: str, byte_column: int) -> int:
+    """Convert an ``ast`` UTF-8 byte offset into a character offset."""
+    if line.isascii():
+        return byte_column
+    return len(line.encode()[:byte_column].decode(errors="replace"))
+
+
+def _dotted_name(node: ast.AST) -> str:
+    """``a.b.c`` for a chain of attributes on a name, "" for anything else."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        prefix = _dotted_name(node.value)
+        return f"{prefix}.{node.attr}" if prefix else ""
+    return ""
+
+
+def _bound_names(node: ast.AST) -> set[str]:
+    """Names bound directly in a function, lambda or comprehension scope."""
+    bound: set[str] = set()
+    declared: set[str] = set()
+
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+        args = node.args
+        for arg in [*args.posonlyargs, *args.args, *args.kwonlyargs, args.vararg, args.kwarg]:
+            if arg is not None:
+                bound.add(arg.arg)
+        body: list[ast.AST] = list(node.body) if isinstance(node.body, list) else [node.body]
+    elif isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+        body = [gen.target for gen in node.generators]
+    else:
+        return bound
+
+    stack = list(body)
+    while stack:
+        child = stack.pop()
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(child.name)
+            stack.extend(child.decorator_list)
+            continue
+        if isinstance(
+            child, (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+        ):
+            continue
+        if isinstance(child, (ast.Global, ast.Nonlocal)):
+            declared.update(child.names)
+        elif isinstance(child, ast.Name) and isinstance(child.ctx, (ast.Store, ast.Del)):
+            bound.add(child.id)
+        elif isinstance(child, (ast.Import, ast.ImportFrom)):
+            for alias in child.names:
+                bound.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(child, (ast.ExceptHandler, ast.MatchAs, ast.MatchStar)) and child.name:
+            bound.add(child.name)
+        stack.extend(ast.iter_child_nodes(child))
+    return bound - declared
+
+
+class _Indexer(ast.NodeVisitor):
+    """Collects identifier occurrences, imports and definitions for one module."""
+
+    def __init__(self, lines: list[str]) -> None:
+        self.lines = lines
+        self.names: dict[str, list[Occurrence]] = {}
+        # [line, column, first line, last line] of deletable definitions
+        self.spans: list[list[int]] = []
+        # [bound name, level, module, imported name, line]; the imported name is
+        # None for ``import module``, whose bound name is the dotted module name
+        # or its alias
+        self.imports: list[list[Any]] = []
+        # Names bound at module level other than by imports, and in class bodies
+        self.defined: set[str] = set()
+        self.members: set[str] = set()
+        # (scope id, names bound in it), innermost last
+        self._scopes: list[tuple[str, set[str]]] = []
+        # Number of scopes around each class body being visited
+        self._class_bodies: list[int] = []
+
+    def _scope_of(self, name: str) -> str:
+        for scope_id, bound in reversed(self._scopes):
+            if name in bound:
+                return scope_id
+        return ""
+
+    def _add(
+        self,
+        name: str,
+        line: int,
+        byte_column: int,
+        kind: str,
+        scope: str,
+        via: str | None = None,
+    ) -> None:
+        column = _char_column(self.lines[line - 1], byte_column)
+        self.names.setdefault(name, []).append([line, column, kind, scope, via])
+
+    def _define(self, name: str) -> None:
+        """Record a module-level or class-body binding of ``name``."""
+        if self._class_bodies and self._class_bodies[-1] == len(self._scopes):
+            self.members.add(name)
+        else:
+            self.defined.add(name)
+
+    def _add_in_line(self, name: str, line: int, start: int, kind: str) -> int | None:
+        """Record ``name`` at its first whole-word match on a line, from ``start``."""
+        match = re.compile(rf"\b{re.escape(name)}\b").search(self.lines[line - 1], start)
+        if match is None:
+            return None
+        self.names.setdefault(name, []).append(
+            [line, match.start(), kind, self._scope_of(name), None]
+        )
+        return match.end()
+
+    def _push(self, node: ast.AST) -> None:
+        position = f"{getattr(node, 'lineno', 0)}:{getattr(node, 'col_offset', 0)}"
+        self._scopes.append((position, _bound_names(node)))
+
+    def visit_Name(self, node: ast.Name) -> None:  # noqa: N802
+        kind = READ if isinstance(node.ctx, ast.Load) else WRITE
+        scope = self._scope_of(node.id)
+        self._add(node.id, node.lineno, node.col_offset, kind, scope)
+        if kind == WRITE and not scope:
+            self._define(node.id)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:  # noqa: N802
+        self.visit(node.value)
+        if node.end_lineno == node.lineno and node.end_col_offset is not None:
+            kind = READ if isinstance(node.ctx, ast.Load) else WRITE
+            start = node.end_col_offset - len(node.attr.encode())
+            self._add(node.attr, node.lineno, start, kind, "", _dotted_name(node.value))
+
+    def _visit_definition(
+        self, node: ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef
+    ) -> None:
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        keyword_match = re.compile(r"(?:async\s+)?(?:def|class)\s+").match(
+            self.lines[node.lineno - 1], _char_column(self.lines[node.lineno - 1], node.col_offset)
+        )
+        if keyword_match is not None:
+            column = keyword_match.end()
+            scope = self._scope_of(node.name)
+            self.names.setdefault(node.name, []).append(
+                [node.lineno, column, DEFINITION, scope, None]
+            )
+            if not scope:
+                self._define(node.name)
+            first = min([d.lineno for d in node.decorator_list] + [node.lineno])
+            self.spans.append([node.lineno, column, first, node.end_lineno or node.lineno])
+
+    def visit_FunctionDef(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:  # noqa: N802
+        self._visit_definition(node)
+        for default in [*node.args.defaults, *node.args.kw_defaults]:
+            if default is not None:
+                self.visit(default)
+        if node.returns is not None:
+            self.visit(node.returns)
+        self._push(node)
+        args = node.args
+        for arg in [*args.posonlyargs, *args.args, *args.kwonlyargs, args.vararg, args.kwarg]:
+            if arg is not None:
+                self.visit(arg)
+        for statement in node.body:
+            self.visit(statement)
+        self._scopes.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef  # noqa: N815
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:  # noqa: N802
+        self._visit_definition(node)
+        for base in [*node.bases, *node.keywords]:
+            self.visit(base)
+        self._class_bodies.append(len(self._scopes))
+        for statement in node.body:
+            self.visit(statement)
+        self._class_bodies.pop()
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:  # noqa: N802
+        for default in [*node.args.defaults, *node.args.kw_defaults]:
+            if default is not None:
+                self.visit(default)
+        self._push(node)
+        args = node.args
+        for arg in [*args.posonlyargs, *args.args, *args.kwonlyargs, args.vararg, args.kwarg]:
+            if arg is not None:
+                self.visit(arg)
+        self.visit(node.body)
+        self._scopes.pop()
+
+    def _visit_comprehension(
+        self, node: ast.ListComp | ast.SetComp | ast.DictComp | ast.GeneratorExp
+    ) -> None:
+        # The first iterable is evaluated in the enclosing scope
+        self.visit(node.generators[0].iter)
+        self._push(node)
+        for index, generator in enumerate(node.generators):
+            self.visit(generator.target)
+            if index:
+                self.visit(generator.iter)
+            for condition in generator.ifs:
+                self.visit(condition)
+        if isinstance(node, ast.DictComp):
+            self.visit(node.key)
+            self.visit(node.value)
+        else:
+            self.visit(node.elt)
+        self._scopes.pop()
+
+    visit_ListComp = _visit_comprehension  # noqa: N815
+    visit_SetComp = _visit_comprehension  # noqa: N815
+    visit_DictComp = _visit_comprehension  # noqa: N815
+    visit_GeneratorExp = _visit_comprehension  # noqa: N815
+
+    def visit_arg(self, node: ast.arg) -> None:  # noqa: N802
+        self._add(node.arg, node.lineno, node.col_offset, DEFINITION, self._scope_of(node.arg))
+        if node.annotation is not None:
+            self.visit(node.annotation)
+
+    def visit_Import(self, node: ast.Import | ast.ImportFrom) -> None:  # noqa: N802
+        for alias in node.names:
+            if alias.name == "*":
+                continue
+            if isinstance(node, ast.ImportFrom):
+                bound = alias.asname or alias.name
+                self.imports.append([bound, node.level, node.module or "", alias.name, node.lineno])
+            else:
+                self.imports.append([alias.asname or alias.name, 0, alias.name, None, node.lineno])
+            if isinstance(node, ast.ImportFrom) or "." not in alias.name:
+                # ``from m import name``: the imported name is a reference to
+                # m's definition; ``import name`` binds it
+                kind = READ if isinstance(node, ast.ImportFrom) else DEFINITION
+                self._add(alias.name, alias.lineno, alias.col_offset, kind, "")
+            if alias.asname:
+                column = _char_column(self.lines[alias.lineno - 1], alias.col_offset)
+                self._add_in_line(alias.asname, alias.lineno, column + len(alias.name), DEFINITION)
+
+    visit_ImportFrom = visit_Import  # noqa: N815
+
+    def visit_Global(self, node: ast.Global | ast.Nonlocal) -> None:  # noqa: N802
+        start: int | None = _char_column(self.lines[node.lineno - 1], node.col_offset)
+        for name in node.names:
+            if start is not None:
+                start = self._add_in_line(name, node.lineno, start, READ)
+
+    visit_Nonlocal = visit_Global  # noqa: N815
+
+    def visit_Assign(self, node: ast.Assign | ast.AnnAssign) -> None:  # noqa: N802
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        if not self._scopes and len(targets) == 1 and isinstance(targets[0], ast.Name):
+            # Module-level ``NAME = ...`` can be safe-deleted
+            target = targets[0]
+            column = _char_column(self.lines[target.lineno - 1], target.col_offset)
+            self.spans.append([target.lineno, column, node.lineno, node.end_lineno or node.lineno])
+        self.generic_visit(node)
+
+    visit_AnnAssign = visit_Assign  # noqa: N815
+
+
+def index_source(source: str) -> dict[str, Any]:
+    """Index the identifier occurrences and definitions of one module.
+
+    Raises:
+        SyntaxError: If ``source`` does not parse.
+    """
+    tree = ast.parse(source)
+    indexer = _Indexer([line.rstrip("\r") for line in source.split("\n")])
+    indexer.visit(tree)
+    return {
+        "names": indexer.names,
+        "spans": indexer.spans,
+        "imports": indexer.imports,
+        "defined": sorted(indexer.defined),
+        "members": sorted(indexer.members),
+    }
+
+
+def index_file(path: str) -> dict[str, Any]:
+    """Index one file, recording the stamp it was read at."""
+    stat = os.stat(path)
+    entry: dict[str, Any] = {
+        "stamp": [stat.st_mtime_ns, stat.st_size],
+        "names": {},
+        "spans": [],
+        "imports": [],
+        "defined": [],
+        "members": [],
+    }
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry.update(index_source(f.read()))
+    except (SyntaxError, UnicodeDecodeError, ValueError) as e:
+        entry["error"] = str(e)
+    return entry
+
+
+def python_files(root: Path) -> Iterator[tuple[str, list[int]]]:
+    """Yield ``(path, stamp)`` for every Python file under ``root``."""
+    stack = [str(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in SKIP_DIRS and not entry.name.endswith(".egg-info"):
+                    stack.append(entry.path)
+            elif entry.name.endswith(".py") and entry.is_file():
+                stat = entry.stat()
+                yield entry.path, [stat.st_mtime_ns, stat.st_size]
+
+
+class ProjectIndex:
+    """Identifier index of one project, refreshed from and saved to disk."""
+
+    def __init__(self, root: Path, cache_file: Path | None, workers: int | None = None) -> None:
+        self.root = root
+        self.cache_file = cache_file
+        self.workers = workers
+        self.files: dict[str, dict[str, Any]] = {}
+        self._loaded = False
+
+    def _load(self) -> None:
+        self._loaded = True
+        if self.cache_file is None:
+            return
+        try:
+            cached = json.loads(self.cache_file.read_text())
+        except (OSError, ValueError):
+            return
+        if cached.get("version") == INDEX_VERSION and cached.get("root") == str(self.root):
+            self.files = cached["files"]
+
+    def _save(self) -> None:
+        if self.cache_file is None:
+            return
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            partial = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+            partial.write_text(
+                json.dumps({"version": INDEX_VERSION, "root": str(self.root), "files": self.files})
+            )
+            partial.replace(self.cache_file)
+        except OSError:
+            pass
+
+    def refresh(self) -> int:
+        """Re-index files added or changed since the last refresh; return how many."""
+        if not self._loaded:
+            self._load()
+        current = dict(python_files(self.root))
+        stale = [
+            path
+            for path, stamp in current.items()
+            if self.files.get(path, {}).get("stamp") != stamp
+        ]
+        removed = self.files.keys() - current.keys()
+        for path in removed:
+            del self.files[path]
+
+        if len(stale) >= PARALLEL_THRESHOLD and self.workers != 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                indexed = pool.map(index_file, stale, chunksize=16)
+                self.files.update(zip(stale, indexed, strict=True))
+        else:
+            self.files.update((path, index_file(path)) for path in stale)
+
+        if stale or removed:
+            self._save()
+        return len(stale)
+
+    def module_file(self, level: int, module: str, importer: str) -> str | None:
+        """The indexed file of a module as ``importer`` imports it, if in the project."""
+        if level:
+            base = Path(importer).parent
+            for _ in range(level - 1):
+                base = base.parent
+            bases = [base]
+        else:
+            bases = [self.root, self.root / "src"]
+        parts = module.split(".") if module else []
+        for base in bases:
+            path = base.joinpath(*parts)
+            candidates = [path / "__init__.py"]
+            if parts:
+                candidates.insert(0, path.with_name(f"{path.name}.py"))
+            for candidate in candidates:
+                if str(candidate) in self.files:
+                    return str(candidate)
+        return None
+
+    def _imported_module(self, entry: list[Any], importer: str) -> str | None:
+        """The project module an import binds, if it binds a module at all."""
+        _, level, module, imported, _ = entry
+        if imported is None:
+            return self.module_file(level, module, importer)
+        return self.module_file(level, f"{module}.{imported}" if module else imported, importer)
+
+    def defining_module(self, name: str, file: str, target: Occurrence) -> str | None:
+        """The module that defines the module-level symbol ``target`` refers to.
+
+        None if ``target`` is a class member or attribute, or if its module
+        cannot be told.
+        """
+        entry = self.files[file]
+        via = target[4]
+        if via is None:
+            if name in entry["defined"]:
+                return file
+            for imported in entry["imports"]:
+                # Imported under its own name, or pointed at in the import itself
+                if imported[3] == name and (imported[0] == name or imported[4] == target[0]):
+                    return self.module_file(imported[1], imported[2], file)
+            if name in entry["members"]:
+                return None
+            definers = self.definers(name)
+            # Reached through ``from module import *``, say
+            return definers[0] if len(definers) == 1 else None
+        for imported in entry["imports"]:
+            if imported[0] == via:
+                return self._imported_module(imported, file)
+        return None
+
+    def definers(self, name: str, members: bool = False) -> list[str]:
+        """Files that define ``name`` at module level, or also in a class body."""
+        return [
+            path
+            for path, entry in self.files.items()
+            if name in entry["defined"] or (members and name in entry["members"])
+        ]
+
+    def occurrences(
+        self, name: str, file: str, target: Occurrence
+    ) -> Iterator[tuple[str, Occurrence]]:
+        """Yield ``(file, occurrence)`` for every occurrence of the symbol at ``target``.
+
+        Function-local symbols are only looked for in their own file,
+        module-level ones in their module and the modules that import it.
+        Class members and symbols whose module is unknown match by name in
+        every file.
+        """
+        scope = target[3]
+        if scope:
+            for occurrence in self.files[file]["names"].get(name, ()):
+                if occurrence[3] == scope:
+                    yield file, occurrence
+            return
+
+        module = self.defining_module(name, file, target)
+        for path, entry in self.files.items():
+            found = [o for o in entry["names"].get(name, ()) if not o[3]]
+            if not found:
+                continue
+            if module is None:
+                yield from ((path, occurrence) for occurrence in found)
+                continue
+            if path == module:
+                yield from ((path, occurrence) for occurrence in found if occurrence[4] is None)
+                continue
+            # Names imported from the module, and the aliases it is imported as
+            names: set[str] = set()
+            import_lines: set[int] = set()
+            aliases: set[str] = set()
+            for imported in entry["imports"]:
+                if (
+                    imported[3] == name
+                    and self.module_file(imported[1], imported[2], path) == module
+                ):
+                    names.add(imported[0])
+                    import_lines.add(imported[4])
+                elif self._imported_module(imported, path) == module:
+                    aliases.add(imported[0])
+            for occurrence in found:
+                via = occurrence[4]
+                if (
+                    (via is None and name in names)
+                    or (via is None and occurrence[0] in import_lines and occurrence[2] == READ)
+                    or (via is not None and via in aliases)
+                ):
+                    yield path, occurrence
+
+    def other_definers(self, name: str, file: str, target: Occurrence) -> list[str]:
+        """Files besides the symbol's own that define a symbol of the same name."""
+        if target[3]:
+            return []
+        module = self.defining_module(name, file, target)
+        if module is not None:
+            return [path for path in self.definers(name) if path != module]
+        definers = self.definers(name, members=True)
+        return definers if len(definers) > 1 else []
+
+
+class LocalEngine:
+    """Serves find-usages, rename and safe-delete requests from a project index."""
+
+    def __init__(
+        self,
+        projects: list[str] | None = None,
+        cache_dir: Path | None = None,
+        workers: int | None = None,
+    ) -> None:
+        if projects is None:
+            configured = os.environ.get("PYCHARM_LOCAL_PROJECTS")
+            projects = configured.split(os.pathsep) if configured else [os.getcwd()]
+        self.projects = [str(Path(p).resolve()) for p in projects if p]
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self._indexes: dict[str, ProjectIndex] = {}
+
+    def index(self, project: str) -> ProjectIndex:
+        """Return the (not yet refreshed) index of a project directory."""
+        root = Path(project).resolve()
+        index = self._indexes.get(str(root))
+        if index is None:
+            cache_file = None
+            if self.cache_dir is not None:
+                digest = hashlib.sha256(str(root).encode()).hexdigest()[:16]
+                cache_file = self.cache_dir / f"index-{digest}.json"
+            index = self._indexes[str(root)] = ProjectIndex(root, cache_file, self.workers)
+        return index
+
+    # Request handling
+
+    def handle(self, method: str, path: str, payload: dict[str, Any] | None) -> BridgeResult:
+        """Produce ``(status, body, phases)`` for one request, like the bridge."""
+        if method == "GET" and path == "/health":
+            body = {"status": "ok", "version": "local", "projectsOpen": len(self.projects)}
+            return 200, {**body, "backend": "local"}, {}
+        if method == "GET" and path == "/projects":
+            projects = [
+                {"name": Path(p).name, "path": p, "isOpen": True, "isDefault": False}
+                for p in self.projects
+            ]
+            return 200, {"success": True, "projects": projects, "backend": "local"}, {}
+
+        handler = _POST_HANDLERS.get(path) if method == "POST" else None
+        if handler is None:
+            return _error(
+                501, "Not supported by the local engine", f"{method} {path} needs PyCharm"
+            )
+        payload = payload or {}
+        try:
+            project = payload.get("project")
+            if not project or not Path(project).is_dir():
+                raise LocalEngineError(400, "Bad Request", f"No such project: {project}")
+            if payload.get("handle") is not None:
+                raise LocalEngineError(
+                    400, "Bad Request", "Element handles need PyCharm; pass file, line and column"
+                )
+            status, body, phases = handler(self, payload)
+        except LocalEngineError as e:
+            return _error(e.status, e.error, e.details)
+        return status, {**body, "backend": "local"}, phases
+
+    def _resolve(self, payload: dict[str, Any]) -> tuple[ProjectIndex, dict[str, float]]:
+        started = time.perf_counter()
+        index = self.index(payload["project"])
+        index.refresh()
+        return index, {"scan": (time.perf_counter() - started) * 1000}
+
+    def _target(self, index: ProjectIndex, payload: dict[str, Any]) -> tuple[str, str, Occurrence]:
+        """Return ``(file, name, occurrence)`` for the symbol at the request's position."""
+        file = Path(payload.get("file", ""))
+        if not file.is_absolute():
+            file = index.root / file
+        path = str(file.resolve())
+        entry = index.files.get(path)
+        if entry is None:
+            raise LocalEngineError(400, "Bad Request", f"Not a Python file in the project: {file}")
+        if "error" in entry:
+            raise LocalEngineError(400, "Bad Request", f"Cannot parse {file}: {entry['error']}")
+
+        line, column = payload.get("line"), payload.get("column", 0) - 1
+        for name, occurrences in entry["names"].items():
+            for occurrence in occurrences:
+                if occurrence[0] == line and occurrence[1] <= column < occurrence[1] + len(name):
+                    return path, name, occurrence
+        raise LocalEngineError(
+            400, "Bad Request", f"No symbol at {file}:{line}:{payload.get('column')}"
+        )
+
+    def _find_usages(self, payload: dict[str, Any]) -> BridgeResult:
+        index, phases = self._resolve(payload)
+        started = time.perf_counter()
+        file, name, target = self._target(index, payload)
+        # Like the bridge, the definition comes first, as a write usage
+        usages = _usage_rows(index.occurrences(name, file, target))
+        phases["search"] = (time.perf_counter() - started) * 1000
+        body: dict[str, Any] = {
+            "success": True,
+            "symbol": name,
+            "usages": usages,
+            "totalCount": len(usages),
+        }
+        if payload.get("format") == "columnar":
+            body.update(usages=[], usageColumns=encode_usages(usages))
+        return 200, body, phases
+
+    def _rename(self, payload: dict[str, Any]) -> BridgeResult:
+        new_name = payload.get("newName", "")
+        if not new_name.isidentifier() or keyword.iskeyword(new_name):
+            raise LocalEngineError(400, "Bad Request", f"Not a valid identifier: {new_name!r}")
+        index, phases = self._resolve(payload)
+        started = time.perf_counter()
+        file, name, target = self._target(index, payload)
+        others = index.other_definers(name, file, target)
+        if others and not payload.get("preview", False):
+            listed = ", ".join(os.path.relpath(path, index.root) for path in others[:5])
+            raise LocalEngineError(
+                400,
+                "Bad Request",
+                f"'{name}' is also defined in {listed}, which the local engine may confuse "
+                "with it; preview the rename or use PyCharm",
+            )
+        edits: dict[str, list[Occurrence]] = {}
+        for path, occurrence in index.occurrences(name, file, target):
+            edits.setdefault(path, []).append(occurrence)
+        changes = [
+            {"file": path, "line": occurrence[0], "oldText": name, "newText": new_name}
+            for path, occurrences in edits.items()
+            for occurrence in sorted(occurrences, key=lambda o: (o[0], o[1]))
+        ]
+        phases["search"] = (time.perf_counter() - started) * 1000
+
+        files = []
+        if not payload.get("preview", False):
+            started = time.perf_counter()
+            contents = payload.get("contents", "none")
+            # Check every file before writing any, so a conflict leaves none changed
+            staged = {
+                path: _replaced(path, name, new_name, occurrences)
+                for path, occurrences in edits.items()
+            }
+            for path, (before, after) in staged.items():
+                _write(path, after)
+                files.append(file_digest(path, after.encode("utf-8"), contents, before))
+            phases["write"] = (time.perf_counter() - started) * 1000
+
+        body: dict[str, Any] = {
+            "success": True,
+            "changes": changes,
+            "filesModified": len(edits),
+            "usagesUpdated": len(changes),
+            "files": files,
+        }
+        if payload.get("format") == "columnar":
+            body.update(changes=[], changeColumns=encode_changes(changes))
+        return 200, body, phases
+
+    def _safe_delete(self, payload: dict[str, Any]) -> BridgeResult:
+        index, phases = self._resolve(payload)
+        started = time.perf_counter()
+        file, name, target = self._target(index, payload)
+        span = next(
+            (s for s in index.files[file]["spans"] if s[:2] == target[:2]),
+            None,
+        )
+        if span is None or target[2] not in (DEFINITION, WRITE):
+            raise LocalEngineError(
+                400,
+                "Bad Request",
+                "The local engine can only delete functions, classes and module-level "
+                "assignments; point at the name in the definition",
+            )
+        # References inside the definition itself (e.g. recursion) do not block it
+        usages = _usage_rows(
+            (path, occurrence)
+            for path, occurrence in index.occurrences(name, file, target)
+            if occurrence[2] != DEFINITION
+            and not (path == file and span[2] <= occurrence[0] <= span[3])
+        )
+        phases["search"] = (time.perf_counter() - started) * 1000
+
+        if usages and payload.get("searchForUsages", True):
+            body = {"success": True, "deleted": False, "usagesFound": len(usages), "usages": usages}
+            return 200, body, phases
+
+        started = time.perf_counter()
+        _delete_lines(file, span[2], span[3])
+        phases["write"] = (time.perf_counter() - started) * 1000
+        return 200, {"success": True, "deleted": True, "usagesFound": 0, "usages": None}, phases
+
+
+def _read_lines(path: str) -> list[str]:
+    # Split where ast counts lines, keeping the endings: str.splitlines also
+    # splits on form feeds and other separators ast leaves inside a line
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.readlines()
+
+
+def _usage_rows(found: Iterator[tuple[str, Occurrence]]) -> list[dict[str, Any]]:
+    lines: dict[str, list[str]] = {}
+    rows = []
+    ordered = sorted(found, key=lambda f: (f[1][2] != DEFINITION, f[0], f[1][0], f[1][1]))
+    for path, (line, column, kind, *_) in ordered:
+        if path not in lines:
+            lines[path] = _read_lines(path)
+        text = lines[path][line - 1].rstrip("\r\n") if line <= len(lines[path]) else ""
+        rows.append(
+            {
+                "file": path,
+                "line": line,
+                "column": column + 1,
+                "text": text,
+                "isWriteAccess": kind != READ,
+            }
+        )
+    return rows
+
+
+def _replaced(path: str, old: str, new: str, occurrences: list[Occurrence]) -> tuple[str, str]:
+    """Return a file's text before and after renaming ``occurrences``, without writing it."""
+    lines = _read_lines(path)
+    before = "".join(lines)
+    # Bottom-up and right to left, so earlier columns stay valid
+    for line, column, *_ in sorted(occurrences, key=lambda o: (o[0], o[1]), reverse=True):
+        text = lines[line - 1]
+        if text[column : column + len(old)] != old:
+            raise LocalEngineError(
+                409, "Conflict", f"{path}:{line} changed since it was indexed; retry"
+            )
+        lines[line - 1] = text[:column] + new + text[column + len(old) :]
+    return before, "".join(lines)
+
+
+def _write(path: str, text: str) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def _delete_lines(path: str, first: int, last: int) -> None:
+    lines = _read_lines(path)
+    del lines[first - 1 : last]
+    _write(path, "".join(lines))
+
+
+def _error(status: int, error: str, details: str) -> BridgeResult:
+    return status, {"success": False, "error": error, "details": details}, {}
+
+
+_POST_HANDLERS = {
+    "/find/usages": LocalEngine._find_usages,
+    "/refactor/rename": LocalEngine._rename,
+    "/refactor/safe-delete": LocalEngine._safe_delete,
+}
+
+
+@lru_cache(maxsize=1)
+def local_engine() -> LocalEngine:
+    """The process-wide engine, so indexes stay in memory between tool calls."""
+    return LocalEngine(cache_dir=cache_dir() / "local-index")
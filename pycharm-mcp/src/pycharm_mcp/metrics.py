@@ -0,0 +1,83 @@
+"""Client-side latency metrics for requests to the PyCharm bridge."""
+
+from collections import deque
+
+from pycharm_mcp.models import RequestTimings
+
+
+class LatencyStats:
+    """Count, total and a rolling window of latency samples for one series."""
+
+    def __init__(self, max_samples: int = 1024) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._samples: deque[float] = deque(maxlen=max_samples)
+
+    def add(self, duration_ms: float) -> None:
+        """Record one sample."""
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self._samples.append(duration_ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Return the ``q`` quantile (0-1) of the recent samples."""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": self.mean_ms,
+            "p50_ms": self.percentile(0.50),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms,
+        }
+
+
+class ClientMetrics:
+    """Latency per bridge endpoint, plus the bridge's per-phase breakdown.
+
+    Series are named after the request path (``/refactor/rename``) for the
+    client-observed round trip, and ``<path>:<phase>`` for each phase the
+    bridge reported in its ``Server-Timing`` header.
+    """
+
+    def __init__(self) -> None:
+        self._series: dict[str, LatencyStats] = {}
+
+    def series(self, name: str) -> LatencyStats:
+        """Return the stats for ``name``, creating them on first use."""
+        stats = self._series.get(name)
+        if stats is None:
+            stats = self._series[name] = LatencyStats()
+        return stats
+
+    def get(self, name: str) -> LatencyStats | None:
+        """Return the stats for ``name``, or None if nothing was recorded yet."""
+        return self._series.get(name)
+
+    def record_request(self, endpoint: str, timings: RequestTimings) -> None:
+        """Record one completed request."""
+        self.series(endpoint).add(timings.round_trip_ms)
+        for phase, duration in timings.phases.items():
+            self.series(f"{endpoint}:{phase}").add(duration)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Return a plain-dict view of every series."""
+        return {name: stats.snapshot() for name, stats in sorted(self._series.items())}
+
+    def reset(self) -> None:
+        self._series.clear()
+
+
+# Shared by every client in the process, since tools create one client per call
+metrics = ClientMetrics()
@@ -1,8 +1,13 @@
 """Pydantic models for PyCharm MCP server."""
 
-from typing import Optional
+from collections import Counter
+from collections.abc import Iterable
+from typing import Any, TypeVar
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+from pycharm_mcp.columnar import ChangeTable, UsageRow, UsageTable, columns_into
+from pycharm_mcp.options import DiagnosticKind, ExtractKind, PlanStepType
 
 
 class FileChange(BaseModel):
@@ -16,6 +21,21 @@ class FileChange(BaseModel):
     model_config = {"populate_by_name": True}
 
 
+class FileDigest(BaseModel):
+    """A file as saved after a refactoring.
+
+    Lets callers skip re-reading files whose hash they already know.
+    ``content`` or ``diff`` (unified, against the content before the
+    refactoring) are only set when requested.
+    """
+
+    file: str
+    sha256: str
+    size: int
+    content: str | None = None
+    diff: str | None = None
+
+
 class ProjectInfo(BaseModel):
     """Information about an open project in PyCharm."""
 
@@ -23,6 +43,8 @@ class ProjectInfo(BaseModel):
     path: str
     is_open: bool = Field(alias="isOpen")
     is_default: bool = Field(default=False, alias="isDefault")
+    # Filled in by the MCP server from the indexing state it tracks
+    indexing: bool = False
 
     model_config = {"populate_by_name": True}
 
@@ -43,75 +65,256 @@ class ParameterInfo(BaseModel):
     """Information about a function parameter."""
 
     name: str
-    type: Optional[str] = None
-    default_value: Optional[str] = Field(default=None, alias="defaultValue")
+    type: str | None = None
+    default_value: str | None = Field(default=None, alias="defaultValue")
 
     model_config = {"populate_by_name": True}
 
 
+class PlanStep(BaseModel):
+    """One refactoring of a plan, with the fields of the matching single refactoring.
+
+    Its target is resolved when the step runs, after the steps before it, so
+    use handles, which follow earlier edits, rather than positions for
+    anything an earlier step changes.
+    """
+
+    type: PlanStepType
+    file: str | None = None
+    line: int | None = None
+    column: int | None = None
+    handle: str | None = None
+    new_name: str | None = Field(default=None, alias="newName")
+    search_in_comments: bool = Field(default=True, alias="searchInComments")
+    search_in_strings: bool = Field(default=False, alias="searchInStrings")
+    target_file: str | None = Field(default=None, alias="targetFile")
+    parameters: list[ParameterInfo] | None = None
+    return_type: str | None = Field(default=None, alias="returnType")
+
+    model_config = {"populate_by_name": True}
+
+
+class DeleteCandidate(BaseModel):
+    """A symbol for a bulk safe delete to consider, by position or handle."""
+
+    file: str | None = None
+    line: int | None = None
+    column: int | None = None
+    handle: str | None = None
+
+
+class MoveElement(BaseModel):
+    """An element for a bulk move, by position, handle or dotted qualified name."""
+
+    file: str | None = None
+    line: int | None = None
+    column: int | None = None
+    handle: str | None = None
+    qualified_name: str | None = Field(default=None, alias="qualifiedName")
+
+    model_config = {"populate_by_name": True}
+
+
+class ExtractRange(BaseModel):
+    """One extraction of a multi-range extract.
+
+    Positions are in the file as it is before any of the request's
+    extractions. ``replace_all`` only applies to variables.
+    """
+
+    kind: ExtractKind
+    start_line: int = Field(alias="startLine")
+    start_column: int = Field(alias="startColumn")
+    end_line: int = Field(alias="endLine")
+    end_column: int = Field(alias="endColumn")
+    name: str
+    replace_all: bool = Field(default=True, alias="replaceAll")
+
+    model_config = {"populate_by_name": True}
+
+
+class RequestTimings(BaseModel):
+    """Per-phase timing breakdown for a single bridge request, in milliseconds.
+
+    ``phases`` comes from the bridge's ``Server-Timing`` header (e.g. ``save``,
+    ``resolve``, ``search``, ``write``, ``serialize``); ``round_trip_ms`` is
+    measured by the client.
+    """
+
+    phases: dict[str, float] = Field(default_factory=dict)
+    round_trip_ms: float = Field(default=0.0, alias="roundTripMs")
+
+    model_config = {"populate_by_name": True}
+
+    @property
+    def server_ms(self) -> float:
+        """Total time accounted for by the bridge."""
+        return sum(self.phases.values())
+
+    def format_lines(self) -> list[str]:
+        """Render the breakdown as indented lines for tool output."""
+        lines = [f"Timings: {self.round_trip_ms:.1f} ms round trip"]
+        for name, duration in self.phases.items():
+            lines.append(f"  {name}: {duration:.1f} ms")
+        lines.append(f"  transport/other: {max(self.round_trip_ms - self.server_ms, 0.0):.1f} ms")
+        return lines
+
+
 # Response models
 
 
+class BridgeResponse(BaseModel):
+    """Base for all successful bridge responses."""
+
+    timings: RequestTimings | None = None
+    # "local" when served by the local engine instead of PyCharm
+    backend: str | None = None
+
+
 class ErrorResponse(BaseModel):
     """Error response from the PyCharm bridge."""
 
     success: bool = False
     error: str
-    details: Optional[str] = None
+    details: str | None = None
+    indexing_projects: list[str] = Field(default_factory=list, alias="indexingProjects")
+
+    model_config = {"populate_by_name": True}
+
+
+class Diagnostic(BaseModel):
+    """A problem found in a file modified by a refactoring."""
+
+    file: str
+    line: int
+    column: int
+    kind: DiagnosticKind
+    message: str
+
+
+class Verification(BaseModel):
+    """Result of checking the files a refactoring modified (see pycharm_mcp.verify).
+
+    ``skipped`` says why nothing was checked, e.g. the project is not on this
+    machine.
+    """
+
+    files_checked: int = Field(alias="filesChecked")
+    diagnostics: list[Diagnostic] = Field(default_factory=list)
+    elapsed_ms: float = Field(alias="elapsedMs")
+    skipped: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class ChangeListResponse(BridgeResponse):
+    """Base for responses listing changed lines.
+
+    ``changes`` holds :class:`FileChange` rows, or a :class:`ChangeTable` when
+    the bridge answered with ``changeColumns``. Once applied, ``files`` has a
+    :class:`FileDigest` per modified file.
+    """
+
+    changes: ChangeTable | list[FileChange]
+    files: list[FileDigest] = Field(default_factory=list)
+    # Filled in by the MCP server when a tool is called with verify
+    verification: Verification | None = None
 
+    @model_validator(mode="before")
+    @classmethod
+    def _decode_columns(cls, data: Any) -> Any:
+        return columns_into(data, "changeColumns", "changes")
 
-class HealthResponse(BaseModel):
+
+class BridgeEvent(BaseModel):
+    """Event pushed by the bridge on its ``/events`` stream."""
+
+    id: int = 0
+    type: str
+    project: str | None = None
+    files: list[str] = Field(default_factory=list)
+    indexing: bool | None = None
+    truncated: bool = False
+
+
+class HealthResponse(BridgeResponse):
     """Health check response."""
 
     status: str
     version: str
     projects_open: int = Field(alias="projectsOpen")
+    indexing_projects: list[str] = Field(default_factory=list, alias="indexingProjects")
 
     model_config = {"populate_by_name": True}
 
 
-class ProjectListResponse(BaseModel):
+class ProjectListResponse(BridgeResponse):
     """Response containing list of open projects."""
 
     success: bool = True
     projects: list[ProjectInfo]
 
 
-class RenameResponse(BaseModel):
+class RenameResponse(ChangeListResponse):
     """Response from a rename operation."""
 
     success: bool = True
-    changes: list[FileChange]
     files_modified: int = Field(alias="filesModified")
     usages_updated: int = Field(alias="usagesUpdated")
+    handle: str | None = None
 
     model_config = {"populate_by_name": True}
 
 
-class MoveResponse(BaseModel):
+class MoveResponse(ChangeListResponse):
     """Response from a move operation."""
 
     success: bool = True
-    changes: list[FileChange]
     files_modified: int = Field(alias="filesModified")
     imports_updated: int = Field(alias="importsUpdated")
+    handle: str | None = None
 
     model_config = {"populate_by_name": True}
 
 
-class ExtractMethodResponse(BaseModel):
+class MovedElement(BaseModel):
+    """A class or function a bulk move moved, where it was before."""
+
+    name: str
+    file: str
+    line: int
+
+
+class BulkMoveResponse(ChangeListResponse):
+    """Response from a bulk move.
+
+    ``changes`` has a row per moved element and one per referencing file,
+    whose imports were rewritten once for all the elements it uses.
+    """
+
+    success: bool = True
+    moved: list[MovedElement]
+    target_file: str = Field(alias="targetFile")
+    files_modified: int = Field(alias="filesModified")
+    imports_updated: int = Field(alias="importsUpdated")
+    preview: bool = False
+
+    model_config = {"populate_by_name": True}
+
+
+class ExtractMethodResponse(BridgeResponse):
     """Response from an extract method operation."""
 
     success: bool = True
     file: str
     method_line: int = Field(alias="methodLine")
     parameters: list[str]
-    return_type: Optional[str] = Field(default=None, alias="returnType")
+    return_type: str | None = Field(default=None, alias="returnType")
 
     model_config = {"populate_by_name": True}
 
 
-class ExtractVariableResponse(BaseModel):
+class ExtractVariableResponse(BridgeResponse):
     """Response from an extract variable operation."""
 
     success: bool = True
@@ -122,43 +325,232 @@ class ExtractVariableResponse(BaseModel):
     model_config = {"populate_by_name": True}
 
 
-class InlineResponse(BaseModel):
+class ExtractedRange(BaseModel):
+    """Where an extraction's new method or variable ended up.
+
+    ``line`` is its line once every extraction was applied; ``start_line`` is
+    the line the range was sent with.
+    """
+
+    kind: ExtractKind
+    name: str
+    start_line: int = Field(alias="startLine")
+    line: int
+    occurrences_replaced: int = Field(default=1, alias="occurrencesReplaced")
+
+    model_config = {"populate_by_name": True}
+
+
+class MultiExtractResponse(BridgeResponse):
+    """Response from a multi-range extract, with the ranges in request order."""
+
+    success: bool = True
+    file: str
+    extracted: list[ExtractedRange]
+    files: list[FileDigest] = Field(default_factory=list)
+    # Filled in by the MCP server when a tool is called with verify
+    verification: Verification | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class InlineResponse(ChangeListResponse):
     """Response from an inline operation."""
 
     success: bool = True
-    changes: list[FileChange]
     usages_inlined: int = Field(alias="usagesInlined")
+    handle: str | None = None
 
     model_config = {"populate_by_name": True}
 
 
-class ChangeSignatureResponse(BaseModel):
+class ChangeSignatureResponse(ChangeListResponse):
     """Response from a change signature operation."""
 
     success: bool = True
-    changes: list[FileChange]
     call_sites_updated: int = Field(alias="callSitesUpdated")
+    handle: str | None = None
 
     model_config = {"populate_by_name": True}
 
 
-class SafeDeleteResponse(BaseModel):
+class PlanStepResult(BaseModel):
+    """What one step of an applied plan changed."""
+
+    type: PlanStepType
+    change_count: int = Field(alias="changeCount")
+    files_modified: int = Field(alias="filesModified")
+
+    model_config = {"populate_by_name": True}
+
+
+class ApplyPlanResponse(ChangeListResponse):
+    """Response from applying a plan: the changes of every step combined."""
+
+    success: bool = True
+    steps: list[PlanStepResult]
+    files_modified: int = Field(alias="filesModified")
+
+    model_config = {"populate_by_name": True}
+
+
+class SafeDeleteResponse(BridgeResponse):
     """Response from a safe delete operation."""
 
     success: bool = True
     deleted: bool
     usages_found: int = Field(default=0, alias="usagesFound")
-    usages: Optional[list[UsageInfo]] = None
+    usages: list[UsageInfo] | None = None
+    handle: str | None = None
 
     model_config = {"populate_by_name": True}
 
 
-class FindUsagesResponse(BaseModel):
-    """Response from a find usages operation."""
+class DeletedSymbol(BaseModel):
+    """A symbol a bulk safe delete removed, or would remove in a preview."""
+
+    name: str
+    file: str
+    line: int
+
+
+class BlockedSymbol(BaseModel):
+    """A bulk safe delete candidate kept because it is used.
+
+    ``usages`` holds the first of the ``usages_found`` usages from outside the
+    deleted symbols.
+    """
+
+    name: str
+    file: str
+    line: int
+    usages_found: int = Field(alias="usagesFound")
+    usages: list[UsageInfo]
+    handle: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class BulkSafeDeleteResponse(BridgeResponse):
+    """Response from a bulk safe delete: what was deleted and what was kept."""
+
+    success: bool = True
+    deleted: list[DeletedSymbol]
+    blocked: list[BlockedSymbol]
+    preview: bool = False
+    files_modified: int = Field(default=0, alias="filesModified")
+    files: list[FileDigest] = Field(default_factory=list)
+    # Filled in by the MCP server when a tool is called with verify
+    verification: Verification | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class FindUsagesResponse(BridgeResponse):
+    """Response from a find usages operation.
+
+    When the request carried a ``sinceToken`` the bridge may answer with a
+    delta: ``incremental`` is set, ``usages`` is empty and only the ``added``
+    and ``removed`` usages are returned. Use :meth:`apply_delta` to merge it
+    into the previous result.
+
+    ``usages`` is a :class:`UsageTable` when the bridge answered with
+    ``usageColumns``.
+    """
 
     success: bool = True
     symbol: str
-    usages: list[UsageInfo]
+    usages: UsageTable | list[UsageInfo]
+    total_count: int = Field(alias="totalCount")
+    handle: str | None = None
+    token: str | None = None
+    incremental: bool = False
+    added: list[UsageInfo] = Field(default_factory=list)
+    removed: list[UsageInfo] = Field(default_factory=list)
+
+    model_config = {"populate_by_name": True}
+
+    @model_validator(mode="before")
+    @classmethod
+    def _decode_columns(cls, data: Any) -> Any:
+        return columns_into(data, "usageColumns", "usages")
+
+    def apply_delta(self, delta: "FindUsagesResponse") -> "FindUsagesResponse":
+        """Return this result updated with an incremental ``delta``."""
+        if not delta.incremental:
+            return delta
+
+        removed = Counter(_usage_key(u) for u in delta.removed)
+        usages: UsageTable | list[UsageInfo]
+        if isinstance(self.usages, UsageTable):
+            usages = UsageTable.from_rows([*_without(self.usages, removed), *delta.added])
+        else:
+            usages = [*_without(self.usages, removed), *delta.added]
+
+        return FindUsagesResponse.model_validate(
+            {
+                "symbol": delta.symbol,
+                "usages": usages,
+                "totalCount": len(usages),
+                "handle": delta.handle,
+                "token": delta.token,
+                "timings": delta.timings,
+                "backend": delta.backend,
+            }
+        )
+
+
+class ProjectUsages(BaseModel):
+    """Usages found in one project by a cross-project search.
+
+    ``error`` is set, and ``usages`` empty, if the project could not be
+    searched; ``timed_out`` marks a search cut off by the timeout.
+    """
+
+    project: str
+    usages: UsageTable | list[UsageInfo] = Field(default_factory=list)
+    total_count: int = Field(default=0, alias="totalCount")
+    timed_out: bool = Field(default=False, alias="timedOut")
+    error: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+    @model_validator(mode="before")
+    @classmethod
+    def _decode_columns(cls, data: Any) -> Any:
+        return columns_into(data, "usageColumns", "usages")
+
+
+class CrossProjectUsagesResponse(BridgeResponse):
+    """Response from a find usages search across several open projects.
+
+    ``total_count`` counts each location once, even if it was found in two
+    projects that share a file.
+    """
+
+    success: bool = True
+    symbol: str
+    qualified_name: str | None = Field(default=None, alias="qualifiedName")
+    projects: list[ProjectUsages]
     total_count: int = Field(alias="totalCount")
+    handle: str | None = None
 
     model_config = {"populate_by_name": True}
+
+
+_Usage = TypeVar("_Usage", UsageInfo, UsageRow)
+
+
+def _without(usages: Iterable[_Usage], removed: Counter[tuple[Any, ...]]) -> list[_Usage]:
+    kept = []
+    for usage in usages:
+        key = _usage_key(usage)
+        if removed[key] > 0:
+            removed[key] -= 1
+        else:
+            kept.append(usage)
+    return kept
+
+
+def _usage_key(usage: UsageInfo | UsageRow) -> tuple[str, int, int, str, bool]:
+    return (usage.file, usage.line, usage.column, usage.text, usage.is_write_access)
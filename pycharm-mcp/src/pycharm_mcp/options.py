@@ -0,0 +1,60 @@
+"""Request options and settings shared by the client, the tools and the MCP server.
+
+Kept free of heavy imports: ``server.py`` needs these for tool signatures and
+loads this module at startup.
+"""
+
+import os
+from pathlib import Path
+from typing import Literal
+
+# How the bridge syncs IDE documents to disk before a refactoring: every unsaved
+# document, only the files named in the request, or nothing at all because the
+# on-disk state is authoritative.
+DocumentSync = Literal["all", "files", "none"]
+DOCUMENT_SYNC_MODES: tuple[DocumentSync, ...] = ("all", "files", "none")
+
+# How the bridge encodes usage and change lists: one object per row, or
+# columns with de-duplicated strings (see pycharm_mcp.columnar).
+ResultFormat = Literal["rows", "columnar"]
+RESULT_FORMATS: tuple[ResultFormat, ...] = ("rows", "columnar")
+
+# What applied refactorings return about each modified file besides its hash
+# and size: nothing, the full new content, or a unified diff.
+FileContents = Literal["none", "content", "diff"]
+
+# The refactorings a plan can chain (see PlanStep).
+PlanStepType = Literal["rename", "move", "inline", "change-signature"]
+
+# What a range of a multi-range extract becomes (see ExtractRange).
+ExtractKind = Literal["method", "variable"]
+
+# How urgently a bridge request is sent when the bridge is busy: ahead of
+# queued work for an agent waiting on it, or behind it for batch jobs.
+Priority = Literal["interactive", "background"]
+
+# What a verification found wrong with a modified file (see pycharm_mcp.verify):
+# it does not compile, imports something missing from the project, reads a
+# name bound nowhere in it, or cannot be read at all.
+DiagnosticKind = Literal["syntax", "import", "name", "read"]
+
+# What a tool returns as text next to its structured result: a few summary
+# lines, the full human-readable listing, or nothing.
+TextOutput = Literal["summary", "full", "none"]
+
+
+def env_float(name: str, default: float) -> float:
+    """A number from the environment, or ``default`` if unset or not a number."""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def cache_dir() -> Path:
+    """Directory for on-disk caches (tool schemas, local engine indexes)."""
+    configured = os.environ.get("PYCHARM_MCP_CACHE_DIR")
+    if configured:
+        return Path(configured)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pycharm-mcp"
@@ -0,0 +1,208 @@
+"""Local pre-flight checks for file/line/column positions.
+
+Positions are checked against the file on disk before a request is sent, so a
+missing file, a line past the end or a column on whitespace fails immediately
+instead of after a round trip, a document save and a PSI lookup in the IDE.
+
+Checks only run when the project directory exists locally; a bridge on another
+machine or in a container sees a different filesystem. Set
+``PYCHARM_PREFLIGHT=0`` to turn them off, e.g. when positions refer to unsaved
+editor content.
+
+Cached line indexes are also dropped when the bridge's event stream reports
+their file changed.
+"""
+
+import mmap
+import os
+import re
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+from pycharm_mcp.client import PyCharmBridgeError
+from pycharm_mcp.events import stream
+from pycharm_mcp.models import BridgeEvent
+
+_IDENTIFIER = re.compile(r"\w+")
+_MAX_CACHED_FILES = 256
+
+
+class InvalidPositionError(PyCharmBridgeError):
+    """A position that does not exist in the file on disk."""
+
+
+class LineIndex:
+    """Byte offsets of the start of each line in a file."""
+
+    def __init__(self, path: Path, stamp: tuple[int, int], starts: "array[int]") -> None:
+        self.path = path
+        self.stamp = stamp
+        self._starts = starts
+
+    @classmethod
+    def build(cls, path: Path) -> "LineIndex":
+        """Scan ``path`` for line breaks through a memory map."""
+        stat = path.stat()
+        starts = array("Q", [0])
+        if stat.st_size:
+            with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = mm.find(b"\n")
+                while pos != -1:
+                    starts.append(pos + 1)
+                    pos = mm.find(b"\n", pos + 1)
+        return cls(path, (stat.st_mtime_ns, stat.st_size), starts)
+
+    @property
+    def line_count(self) -> int:
+        return len(self._starts)
+
+    def line_text(self, line: int) -> str:
+        """Return the text of a 1-indexed line, without its line break."""
+        start = self._starts[line - 1]
+        end = self._starts[line] if line < len(self._starts) else self.stamp[1]
+        with self.path.open("rb") as f:
+            f.seek(start)
+            raw = f.read(end - start)
+        return raw.decode("utf-8", errors="replace").rstrip("\r\n")
+
+
+_line_indexes: OrderedDict[Path, LineIndex] = OrderedDict()
+
+
+def line_index(path: Path) -> LineIndex:
+    """Return the line index for ``path``, rebuilding it if the file changed."""
+    stat = path.stat()
+    index = _line_indexes.get(path)
+    if index is None or index.stamp != (stat.st_mtime_ns, stat.st_size):
+        index = _line_indexes[path] = LineIndex.build(path)
+    _line_indexes.move_to_end(path)
+    while len(_line_indexes) > _MAX_CACHED_FILES:
+        _line_indexes.popitem(last=False)
+    return index
+
+
+def _on_event(event: BridgeEvent) -> None:
+    """Drop line indexes of files the bridge reports as changed."""
+    if event.type == "connected":
+        _line_indexes.clear()
+    elif event.type == "files-changed" and event.truncated:
+        # Only some of the changed files are listed; drop the whole project
+        for path in list(_line_indexes):
+            if event.project is None or path.is_relative_to(event.project):
+                del _line_indexes[path]
+    elif event.type == "files-changed":
+        for file in event.files:
+            _line_indexes.pop(Path(file), None)
+
+
+stream.add_handler(_on_event)
+
+
+def _enabled() -> bool:
+    return os.environ.get("PYCHARM_PREFLIGHT", "1").lower() not in ("0", "false", "off")
+
+
+def _local_file(project_path: str, file_path: str) -> Path | None:
+    """Resolve ``file_path`` like the bridge does, or None to skip checking."""
+    root = Path(project_path)
+    if not _enabled() or not root.is_dir():
+        return None
+    path = Path(file_path)
+    if not path.is_absolute():
+        path = root / path
+    if not path.is_file():
+        raise InvalidPositionError("File not found", f"{file_path} (project: {project_path})")
+    return path
+
+
+def _check_line(index: LineIndex, file_path: str, line: int) -> str:
+    if not 1 <= line <= index.line_count:
+        raise InvalidPositionError(
+            "Line out of range", f"{file_path} has {index.line_count} lines, got line {line}"
+        )
+    return index.line_text(line)
+
+
+def _check_column(text: str, file_path: str, line: int, column: int, end: bool = False) -> None:
+    # An end column may sit just past the last character of the line
+    last = len(text) + 1 if end else len(text)
+    if not 1 <= column <= max(last, 1):
+        raise InvalidPositionError(
+            "Column out of range",
+            f"Line {line} of {file_path} has {len(text)} characters, got column {column}",
+        )
+
+
+def nearest_identifier(text: str, column: int) -> tuple[str, int] | None:
+    """Return the identifier on ``text`` closest to a 1-indexed column."""
+    best: tuple[int, str, int] | None = None
+    for match in _IDENTIFIER.finditer(text):
+        if match.group().isdigit():
+            continue
+        distance = min(abs(match.start() + 1 - column), abs(match.end() - column))
+        if best is None or distance < best[0]:
+            best = (distance, match.group(), match.start() + 1)
+    return (best[1], best[2]) if best else None
+
+
+def check_position(
+    project_path: str, file_path: str | None, line: int | None, column: int | None
+) -> None:
+    """Check that a position points at an identifier in the file on disk.
+
+    Raises:
+        InvalidPositionError: If the file, line or column cannot hold a symbol.
+    """
+    if file_path is None or line is None or column is None:
+        return
+    path = _local_file(project_path, file_path)
+    if path is None:
+        return
+
+    text = _check_line(line_index(path), file_path, line)
+    _check_column(text, file_path, line, column)
+    if _IDENTIFIER.match(text, column - 1):
+        return
+
+    found = text[column - 1] if column <= len(text) else ""
+    what = f"{found!r}" if found.strip() else "whitespace"
+    nearest = nearest_identifier(text, column)
+    hint = (
+        f"nearest identifier is '{nearest[0]}' at column {nearest[1]}"
+        if nearest
+        else "there is no identifier on this line"
+    )
+    raise InvalidPositionError(
+        "No symbol at position",
+        f"Line {line}, column {column} of {file_path} is {what}; {hint}",
+    )
+
+
+def check_range(
+    project_path: str,
+    file_path: str,
+    start_line: int,
+    start_column: int,
+    end_line: int,
+    end_column: int,
+) -> None:
+    """Check that a selection lies within the file on disk.
+
+    Raises:
+        InvalidPositionError: If either end is out of range or they are reversed.
+    """
+    path = _local_file(project_path, file_path)
+    if path is None:
+        return
+
+    index = line_index(path)
+    start_text = _check_line(index, file_path, start_line)
+    _check_column(start_text, file_path, start_line, start_column)
+    end_text = _check_line(index, file_path, end_line)
+    _check_column(end_text, file_path, end_line, end_column, end=True)
+    if (end_line, end_column) <= (start_line, start_column):
+        raise InvalidPositionError(
+            "Empty selection",
+            f"{end_line}:{end_column} does not come after {start_line}:{start_column}",
+        )
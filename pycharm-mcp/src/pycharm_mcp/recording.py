@@ -0,0 +1,88 @@
+"""Recording and replay of bridge traffic.
+
+With ``PYCHARM_RECORD`` set to a file path, every request a
+:class:`~pycharm_mcp.client.PyCharmClient` sends is appended to a
+gzip-compressed JSON-lines log together with the response, the phases the
+bridge reported and the client-side round trip.
+:class:`~pycharm_mcp.replay_bridge.ReplayBridge` serves such a log again, so
+a session captured against a real IDE can be replayed offline against a newer
+client (see ``benchmarks/bench_replay.py``).
+
+Event streams are not recorded.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import threading
+from collections.abc import Iterator
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Any, NamedTuple
+
+
+class Exchange(NamedTuple):
+    """One recorded request and the response the client got for it."""
+
+    # Seconds since the Unix epoch when the request was sent
+    at: float
+    method: str
+    path: str
+    request: dict[str, Any] | None
+    status: int
+    body: dict[str, Any]
+    phases: dict[str, float]
+    round_trip_ms: float
+
+
+class Recorder:
+    """Appends exchanges to a gzip-compressed JSON-lines file.
+
+    Each process appends its own gzip member, so several servers can record
+    into the same file. Call :meth:`close` to flush the last records.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.count = 0
+        self._file: IO[str] | None = None
+        self._lock = threading.Lock()
+
+    def record(self, exchange: Exchange) -> None:
+        """Append one exchange."""
+        # Columns of spilled responses are arrays (see pycharm_mcp.spill)
+        line = json.dumps(exchange._asdict(), separators=(",", ":"), default=list) + "\n"
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # Kept open between records and closed by close()
+                self._file = gzip.open(self.path, "at", encoding="utf-8")  # noqa: SIM115
+            self._file.write(line)
+            self.count += 1
+
+    def close(self) -> None:
+        """Flush and close the file; recording more reopens it."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+@lru_cache(maxsize=1)
+def default_recorder() -> Recorder | None:
+    """The recorder selected by ``PYCHARM_RECORD``, closed when the process exits."""
+    path = os.environ.get("PYCHARM_RECORD")
+    if not path:
+        return None
+    recorder = Recorder(path)
+    atexit.register(recorder.close)
+    return recorder
+
+
+def load(path: str | Path) -> Iterator[Exchange]:
+    """Read the exchanges recorded in ``path``, in the order they were written."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield Exchange(**json.loads(line))
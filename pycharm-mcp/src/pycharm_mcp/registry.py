@@ -0,0 +1,202 @@
+"""Cached registry of the projects open in PyCharm.
+
+The MCP server starts a heartbeat at startup that fetches ``/health`` and
+``/projects`` in the background, then polls ``/health`` and re-fetches the
+project list when the number of open projects changes or the list gets old.
+``list_projects`` answers from the cache, and tools use it to infer the
+project that owns a file without a round trip. Project open/close and
+indexing events from the bridge's event stream update it in between, and
+indexing state from either source is passed on to the client's
+:class:`~pycharm_mcp.scheduling.IndexingGate`.
+
+Set ``PYCHARM_HEARTBEAT_INTERVAL=0`` to disable the heartbeat; the registry
+then fetches on demand and caches for a short time.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from pathlib import PurePath
+
+from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.events import stream
+from pycharm_mcp.models import BridgeEvent, HealthResponse, ProjectListResponse
+from pycharm_mcp.options import env_float
+from pycharm_mcp.scheduling import IndexingGate, gate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEARTBEAT_INTERVAL = 10.0
+# Re-fetch the project list at least this often, in heartbeats
+_PROJECTS_EVERY = 6
+
+
+def heartbeat_interval() -> float:
+    """Seconds between heartbeats, from ``PYCHARM_HEARTBEAT_INTERVAL``."""
+    return env_float("PYCHARM_HEARTBEAT_INTERVAL", DEFAULT_HEARTBEAT_INTERVAL)
+
+
+class ProjectRegistry:
+    """Last known health and project list of the bridge."""
+
+    def __init__(
+        self, interval: float | None = None, indexing_gate: IndexingGate | None = None
+    ) -> None:
+        self.interval = heartbeat_interval() if interval is None else interval
+        self.gate = indexing_gate if indexing_gate is not None else gate
+        self.health: HealthResponse | None = None
+        self.projects: ProjectListResponse | None = None
+        self._base_url: str | None = None
+        self._fetched_at = 0.0
+        self._client: PyCharmClient | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._refresh_task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def age(self) -> float:
+        """Seconds since the project list was fetched."""
+        return time.monotonic() - self._fetched_at
+
+    def start(self) -> None:
+        """Start the background warm-up and heartbeat."""
+        if self.interval > 0 and not self.running:
+            self._client = PyCharmClient()
+            self._task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and close its connection."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresh_task
+            self._refresh_task = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def _heartbeat(self) -> None:
+        assert self._client is not None
+        beats = 0
+        while True:
+            try:
+                previous = self.health
+                self.health = await self._client.health()
+                self.gate.sync(self.health.indexing_projects)
+                changed = previous is None or previous.projects_open != self.health.projects_open
+                if changed or self.projects is None or beats % _PROJECTS_EVERY == 0:
+                    await self.refresh()
+            except PyCharmBridgeError as e:
+                logger.debug("Bridge heartbeat failed: %s", e)
+                self.health = None
+            beats += 1
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self) -> ProjectListResponse:
+        """Fetch the project list now."""
+        client = self._client if self._client is not None else PyCharmClient()
+        try:
+            self.projects = await client.list_projects()
+        finally:
+            if client is not self._client:
+                await client.close()
+        self._base_url = client.base_url
+        self._fetched_at = time.monotonic()
+        return self.projects
+
+    def on_event(self, event: BridgeEvent) -> None:
+        """Update the registry from a bridge event."""
+        if event.type == "indexing" and event.project is not None:
+            self.gate.set_indexing(event.project, bool(event.indexing))
+            return
+        if event.type not in ("connected", "project-opened", "project-closed"):
+            return
+
+        if event.type == "connected":
+            # Events may have been missed while disconnected
+            self.gate.reset()
+        elif event.type == "project-closed" and event.project is not None:
+            self.gate.set_indexing(event.project, False)
+            if self.projects is not None:
+                remaining = [p for p in self.projects.projects if p.path != event.project]
+                self.projects = self.projects.model_copy(update={"projects": remaining})
+        # Mark the list stale, and fetch it now if the heartbeat is running
+        self._fetched_at = 0.0
+        if self.running and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh_quietly())
+
+    async def _refresh_quietly(self) -> None:
+        try:
+            await self.refresh()
+        except PyCharmBridgeError as e:
+            logger.debug("Project list refresh failed: %s", e)
+
+    def is_indexing(self, project_path: str) -> bool:
+        """Whether the bridge last reported ``project_path`` as indexing."""
+        return self.gate.is_indexing(project_path)
+
+    def _fresh(self) -> bool:
+        if self.projects is None or self._base_url != PyCharmClient().base_url:
+            return False
+        # The heartbeat keeps the list current; without it, cache briefly
+        max_age = self.interval * (_PROJECTS_EVERY + 1) if self.running else 5.0
+        return self.age < max_age
+
+    async def get(self, refresh: bool = False) -> ProjectListResponse:
+        """Return the cached project list, fetching it if missing or stale."""
+        if refresh or not self._fresh():
+            return await self.refresh()
+        assert self.projects is not None
+        return self.projects
+
+    def owner(self, file_path: str) -> str | None:
+        """Return the cached project containing an absolute file path."""
+        if self.projects is None:
+            return None
+        path = PurePath(file_path)
+        matches = [p.path for p in self.projects.projects if p.path and path.is_relative_to(p.path)]
+        return max(matches, key=len) if matches else None
+
+    async def resolve_project(self, project_path: str | None, file_path: str | None) -> str:
+        """Return ``project_path``, or infer it from ``file_path`` or a lone open project.
+
+        Raises:
+            PyCharmBridgeError: If no single project can be inferred.
+        """
+        if project_path:
+            return project_path
+
+        projects = await self.get()
+        if file_path and PurePath(file_path).is_absolute():
+            owner = self.owner(file_path)
+            if owner is None and self.age > 0.5:
+                # The file may belong to a project opened since the last fetch
+                await self.refresh()
+                owner = self.owner(file_path)
+            if owner is not None:
+                return owner
+            raise PyCharmBridgeError(
+                "Cannot infer project",
+                f"{file_path} is not inside any open project; pass project_path",
+            )
+
+        if len(projects.projects) == 1:
+            return projects.projects[0].path
+        raise PyCharmBridgeError(
+            "Cannot infer project",
+            "Pass project_path or an absolute file_path (see list_projects)",
+        )
+
+
+# Shared by every tool call, since tools create one client per call
+registry = ProjectRegistry()
+stream.add_handler(registry.on_event)
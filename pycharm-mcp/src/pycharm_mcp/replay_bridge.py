@@ -0,0 +1,132 @@
+"""Local bridge that serves recorded traffic.
+
+Replays a log written by :class:`~pycharm_mcp.recording.Recorder`, so a
+session captured against a real IDE can be served offline to a newer client,
+at the latency it was recorded with or scaled down.
+
+Run it standalone with::
+
+    python -m pycharm_mcp.replay_bridge session.jsonl.gz --time-scale 0.5
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from pycharm_mcp.recording import Exchange, load
+from pycharm_mcp.stub_bridge import BridgeResult, StubBridge, _error
+
+
+def _key(request: dict[str, Any] | None) -> str:
+    return json.dumps(request, sort_keys=True, separators=(",", ":"))
+
+
+class ReplayBridge(StubBridge):
+    """Serves recorded exchanges in place of the bridge.
+
+    A request gets the response recorded for an identical request, in
+    recorded order when there were several; otherwise the next one recorded
+    for the same endpoint, cycling through them; otherwise 404. Each response
+    takes the time the bridge spent on it (the sum of its phases) multiplied
+    by ``time_scale``, so ``0.1`` replays ten times faster and ``0`` as fast
+    as possible.
+    """
+
+    def __init__(
+        self,
+        exchanges: Iterable[Exchange],
+        time_scale: float = 1.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.exchanges = list(exchanges)
+        projects = sorted(
+            {
+                e.request["project"]
+                for e in self.exchanges
+                if e.request and isinstance(e.request.get("project"), str)
+            }
+        )
+        super().__init__(host=host, port=port, projects=projects)
+        self.time_scale = time_scale
+        self.unmatched = 0
+        self._exact: dict[tuple[str, str, str], deque[Exchange]] = defaultdict(deque)
+        self._by_endpoint: dict[tuple[str, str], deque[Exchange]] = defaultdict(deque)
+        self.rewind()
+
+    def rewind(self) -> None:
+        """Start serving the recording from the beginning again."""
+        with self._lock:
+            self.unmatched = 0
+            self._exact.clear()
+            self._by_endpoint.clear()
+            for exchange in self.exchanges:
+                key = (exchange.method, exchange.path, _key(exchange.request))
+                self._exact[key].append(exchange)
+                self._by_endpoint[exchange.method, exchange.path].append(exchange)
+
+    @classmethod
+    def from_file(cls, path: str | Path, time_scale: float = 1.0) -> "ReplayBridge":
+        return cls(load(path), time_scale=time_scale)
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        payload: dict[str, Any] | None,
+        deadline_ms: int | None = None,
+    ) -> BridgeResult:
+        """Produce the recorded ``(status, body, phases)`` for one request."""
+        self.requests.append((method, path, payload))
+        self.deadlines.append(deadline_ms)
+        exchange = self._match(method, path, payload)
+        if exchange is None:
+            return _error(404, "Not Found", f"No recorded response for {method} {path}")
+
+        phases = {name: ms * self.time_scale for name, ms in exchange.phases.items()}
+        if self.time_scale:
+            time.sleep(sum(phases.values()) / 1000)
+        # Copied, since clients add their timings to the body they get
+        return exchange.status, json.loads(json.dumps(exchange.body)), phases
+
+    def _match(self, method: str, path: str, payload: dict[str, Any] | None) -> Exchange | None:
+        with self._lock:
+            exact = self._exact.get((method, path, _key(payload)))
+            if exact:
+                # The last one keeps answering repeats
+                return exact.popleft() if len(exact) > 1 else exact[0]
+            self.unmatched += 1
+            candidates = self._by_endpoint.get((method, path))
+            if not candidates:
+                return None
+            candidates.rotate(-1)
+            return candidates[-1]
+
+
+def main() -> None:
+    """Serve a recording over HTTP until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve recorded bridge traffic")
+    parser.add_argument("recording")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9876)
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    bridge = ReplayBridge(load(args.recording), args.time_scale, args.host, args.port)
+    bridge.start()
+    print(f"Replaying {len(bridge.exchanges)} exchanges on {bridge.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bridge.stop()
+
+
+if __name__ == "__main__":
+    main()
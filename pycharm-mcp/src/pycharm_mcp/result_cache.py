@@ -0,0 +1,358 @@
+"""On-disk cache of find-usages and preview results, kept across sessions.
+
+With ``PYCHARM_RESULT_CACHE_MB`` set, :class:`~pycharm_mcp.client.PyCharmClient`
+answers repeated ``/find/usages`` queries and refactoring previews from a
+SQLite database per project under ``PYCHARM_MCP_CACHE_DIR/results``, so a new
+session on an unchanged checkout starts warm. An entry is keyed by the request
+and stores the SHA-256 of every file named in the request or the result, plus
+a stamp of the whole project: a hash over the path and SHA-256 of every Python
+file in it. It is only served while all of those still hash the same, so a
+usage added to any file, or a file added or removed, invalidates it. A file is
+re-read only if its mtime or size changed since it was last hashed, so
+computing the stamp is mostly a ``stat`` per file of the project. Lookups
+reuse it for ``STAMP_TTL`` seconds, and walk the project without holding up
+other lookups; the files an entry names are still checked every time.
+Hashes, not times, decide, so a database copied between machines with the
+same checkout path stays valid.
+
+Unsaved editor changes are not seen until they are saved. Element handles and
+incremental tokens belong to the bridge session that issued them, so requests
+with them are not cached and stored results leave them out. Once a database
+passes its size cap, the least recently used entries are evicted.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from pycharm_mcp.options import cache_dir, env_float
+
+# Bump when the table layout or the stored bodies change, to drop old databases
+SCHEMA_VERSION = 2
+# Seconds a lookup reuses the project stamp before walking the project again
+STAMP_TTL = 2.0
+
+# Request fields that do not change the result: the database is per project
+# and documents are compared on disk
+_IGNORED_FIELDS = frozenset({"project", "sync"})
+# Response fields that only mean something in the session that produced them
+_SESSION_FIELDS = frozenset({"handle", "token", "timings"})
+# Refactorings whose previews name every file they touch in the result
+_CACHEABLE_PREVIEWS = frozenset(
+    {
+        "/refactor/rename",
+        "/refactor/move",
+        "/refactor/inline",
+        "/refactor/change-signature",
+        "/refactor/extract-method",
+        "/refactor/extract-variable",
+    }
+)
+
+_SCHEMA = f"""
+DROP TABLE IF EXISTS entries;
+DROP TABLE IF EXISTS stamps;
+CREATE TABLE entries (
+    key TEXT PRIMARY KEY,
+    project TEXT NOT NULL,
+    files TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX entries_used ON entries (used);
+CREATE TABLE stamps (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+PRAGMA user_version = {SCHEMA_VERSION};
+"""
+
+
+def cacheable(path: str, payload: dict[str, Any] | None) -> bool:
+    """Whether a request only reads, so its result can be stored and reused."""
+    if payload is None or "handle" in payload or "sinceToken" in payload:
+        return False
+    return path == "/find/usages" or (
+        path in _CACHEABLE_PREVIEWS and payload.get("preview") is True
+    )
+
+
+def involved_files(payload: dict[str, Any], body: dict[str, Any]) -> set[str]:
+    """Files a request names or its result mentions, as the bridge spells them."""
+    files = {payload[field] for field in ("file", "targetFile") if payload.get(field)}
+    if isinstance(body.get("file"), str):
+        files.add(body["file"])
+    for rows in ("usages", "changes"):
+        files.update(row["file"] for row in body.get(rows) or ())
+    for columns in ("usageColumns", "changeColumns"):
+        table = body.get(columns)
+        if table:
+            files.update(table["strings"][index] for index in table["file"])
+    return files
+
+
+def _key(path: str, payload: dict[str, Any]) -> str:
+    query = {k: v for k, v in payload.items() if k not in _IGNORED_FIELDS}
+    return json.dumps([path, query], sort_keys=True, separators=(",", ":"))
+
+
+class _ChangedDuringRequest(Exception):
+    """A file was modified while the request that read it was in flight."""
+
+
+class ProjectResultCache:
+    """Cached results of one project, in one SQLite database.
+
+    Safe to use from several threads, and from several processes sharing the
+    database file.
+    """
+
+    def __init__(self, root: Path, db_path: Path, max_bytes: int) -> None:
+        self.root = root
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        # Stat and SHA-256 of each Python file at the last stamp, to skip the database
+        self._hashes: dict[str, tuple[int, int, str]] = {}
+        # When the last project stamp was taken (time.monotonic()), and the stamp
+        self._stamp: tuple[float, str] | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit; every statement stands alone
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _digest(self, conn: sqlite3.Connection, file: str, since_ns: int | None = None) -> str:
+        """SHA-256 of a file, "" if it is missing.
+
+        Raises :class:`_ChangedDuringRequest` if the file was modified at or
+        after ``since_ns``, since the result may then predate its content.
+        """
+        path = self.root / file
+        try:
+            stat = path.stat()
+        except OSError:
+            return ""
+        if since_ns is not None and stat.st_mtime_ns >= since_ns:
+            raise _ChangedDuringRequest(file)
+        row = conn.execute(
+            "SELECT mtime_ns, size, sha256 FROM stamps WHERE path = ?", (file,)
+        ).fetchone()
+        if row is not None and (row[0], row[1]) == (stat.st_mtime_ns, stat.st_size):
+            return str(row[2])
+        try:
+            sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            return ""
+        conn.execute(
+            "INSERT OR REPLACE INTO stamps VALUES (?, ?, ?, ?)",
+            (file, stat.st_mtime_ns, stat.st_size, sha256),
+        )
+        return sha256
+
+    def _walk(self) -> list[tuple[str, int, int]]:
+        """Relative path, mtime and size of every Python file in the project, sorted."""
+        # Imported here to keep the local engine off the client's startup path
+        from pycharm_mcp.local_engine import python_files
+
+        return sorted(
+            (os.path.relpath(path, self.root), mtime_ns, size)
+            for path, (mtime_ns, size) in python_files(self.root)
+        )
+
+    def _project_stamp(
+        self,
+        conn: sqlite3.Connection,
+        files: list[tuple[str, int, int]],
+        since_ns: int | None = None,
+    ) -> str:
+        """Hash over the path and SHA-256 of every Python file in ``files``, from :meth:`_walk`.
+
+        Raises :class:`_ChangedDuringRequest` like :meth:`_digest`.
+        """
+        stamp = hashlib.sha256()
+        hashes: dict[str, tuple[int, int, str]] = {}
+        for file, mtime_ns, size in files:
+            if since_ns is not None and mtime_ns >= since_ns:
+                raise _ChangedDuringRequest(file)
+            known = self._hashes.get(file)
+            if known is not None and known[:2] == (mtime_ns, size):
+                sha256 = known[2]
+            else:
+                sha256 = self._digest(conn, file, since_ns)
+            hashes[file] = (mtime_ns, size, sha256)
+            stamp.update(f"{file}\0{sha256}\n".encode())
+        self._hashes = hashes
+        return stamp.hexdigest()
+
+    def _lookup_stamp(self) -> str:
+        """The project stamp for a lookup, taken again once it is ``STAMP_TTL`` seconds old."""
+        cached = self._stamp
+        if cached is not None and time.monotonic() - cached[0] < STAMP_TTL:
+            return cached[1]
+        taken = time.monotonic()
+        # The walk is most of the cost; other lookups need not wait for it
+        files = self._walk()
+        with self._lock:
+            stamp = self._project_stamp(self._connect(), files)
+            self._stamp = (taken, stamp)
+        return stamp
+
+    def get(self, path: str, payload: dict[str, Any]) -> dict[str, Any] | None:
+        """The stored result of a request, if the project and every file it names are unchanged."""
+        key = _key(path, payload)
+        try:
+            stamp = self._lookup_stamp()
+        except (OSError, sqlite3.Error):
+            stamp = None
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT project, files, body FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    files: dict[str, str] = json.loads(row[1])
+                    if stamp == row[0] and all(
+                        self._digest(conn, f) == sha256 for f, sha256 in files.items()
+                    ):
+                        conn.execute(
+                            "UPDATE entries SET used = ? WHERE key = ?", (time.time(), key)
+                        )
+                        self.hits += 1
+                        body: dict[str, Any] = json.loads(zlib.decompress(row[2]))
+                        return body
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            except (OSError, sqlite3.Error):
+                pass
+            self.misses += 1
+            return None
+
+    def put(self, path: str, payload: dict[str, Any], body: dict[str, Any], sent_at: float) -> bool:
+        """Store the result of a request sent at ``sent_at`` (seconds since the epoch).
+
+        Not stored, and False returned, if one of its files was modified after
+        the request was sent or the result alone exceeds the size cap.
+        """
+        stored = {k: v for k, v in body.items() if k not in _SESSION_FIELDS}
+        # Columns of spilled responses are arrays (see pycharm_mcp.spill)
+        blob = zlib.compress(json.dumps(stored, separators=(",", ":"), default=list).encode())
+        if len(blob) > self.max_bytes:
+            return False
+        since_ns = int(sent_at * 1e9)
+        taken = time.monotonic()
+        try:
+            walked = self._walk()
+        except OSError:
+            return False
+        with self._lock:
+            try:
+                conn = self._connect()
+                files = {
+                    f: self._digest(conn, f, since_ns)
+                    for f in sorted(involved_files(payload, body))
+                }
+                stamp = self._project_stamp(conn, walked, since_ns)
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                    (_key(path, payload), stamp, json.dumps(files), blob, len(blob), time.time()),
+                )
+                self._evict(conn)
+            except (_ChangedDuringRequest, OSError, sqlite3.Error):
+                return False
+            self._stamp = (taken, stamp)
+        return True
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used entries until the database is within its cap."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY used"):
+            evicted.append((key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    @property
+    def size(self) -> int:
+        """Bytes of stored results."""
+        with self._lock:
+            conn = self._connect()
+            return int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0])
+
+
+class ResultCache:
+    """Per-project result caches in a directory, one database per project path."""
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._projects: dict[str, ProjectResultCache] = {}
+        self._lock = threading.Lock()
+
+    def project(self, project: str) -> ProjectResultCache | None:
+        """The cache of a project, or None if its directory is not on this machine."""
+        root = Path(project)
+        if not root.is_dir():
+            return None
+        with self._lock:
+            cache = self._projects.get(project)
+            if cache is None:
+                digest = hashlib.sha256(project.encode()).hexdigest()[:16]
+                cache = self._projects[project] = ProjectResultCache(
+                    root, self.directory / f"{digest}.sqlite", self.max_bytes
+                )
+            return cache
+
+    def get(self, path: str, payload: dict[str, Any]) -> dict[str, Any] | None:
+        cache = self.project(payload["project"])
+        return cache.get(path, payload) if cache is not None else None
+
+    def put(self, path: str, payload: dict[str, Any], body: dict[str, Any], sent_at: float) -> bool:
+        if body.get("backend") is not None:
+            # The local engine is cheap to ask again, and PyCharm may be back
+            return False
+        cache = self.project(payload["project"])
+        return cache.put(path, payload, body, sent_at) if cache is not None else False
+
+    def close(self) -> None:
+        with self._lock:
+            for cache in self._projects.values():
+                cache.close()
+
+
+@lru_cache(maxsize=1)
+def default_result_cache() -> ResultCache | None:
+    """The cache enabled by ``PYCHARM_RESULT_CACHE_MB``, capped at that many MB per project."""
+    size_mb = env_float("PYCHARM_RESULT_CACHE_MB", 0)
+    if size_mb <= 0:
+        return None
+    return ResultCache(cache_dir() / "results", int(size_mb * 1024 * 1024))
@@ -0,0 +1,252 @@
+"""Hold bridge requests while PyCharm is indexing, and order them by priority.
+
+During indexing ("dumb mode") searches are slow or incomplete and
+refactorings fail in odd ways, so rather than sending requests into a busy
+IDE the client waits at an :class:`IndexingGate` until the project is back in
+smart mode, up to a deadline. The gate learns about indexing from the bridge's
+event stream, from ``/health`` and from ``503 Indexing in progress`` replies;
+the last only holds requests for the reply's ``Retry-After``, since nothing
+may report the end of indexing when the event stream is not running.
+
+When indexing ends every waiting read is released at once; waiting writes go
+through one at a time, so the refactorings queued up during indexing do not
+all hit the IDE together.
+
+Past the gate, a :class:`PriorityScheduler` bounds how many requests are in
+flight to the bridge. When all its slots are taken, ``interactive`` requests
+queue ahead of ``background`` ones, so an agent's quick lookup does not wait
+behind a batch job. A background request that has waited too long goes next
+regardless, so batch work still progresses under steady interactive load.
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from pycharm_mcp.metrics import ClientMetrics, metrics
+from pycharm_mcp.options import Priority, env_float
+
+DEFAULT_INDEXING_WAIT = 60.0
+DEFAULT_BRIDGE_CONCURRENCY = 4
+DEFAULT_BACKGROUND_MAX_WAIT = 10.0
+
+
+def indexing_wait() -> float:
+    """Seconds to hold a request for indexing, from ``PYCHARM_INDEXING_WAIT``."""
+    return env_float("PYCHARM_INDEXING_WAIT", DEFAULT_INDEXING_WAIT)
+
+
+class IndexingTimeout(Exception):
+    """A project was still indexing when the wait deadline passed."""
+
+    def __init__(self, project: str, waited_s: float) -> None:
+        self.project = project
+        self.waited_s = waited_s
+        super().__init__(f"{project} still indexing after {waited_s:.1f}s")
+
+
+class IndexingGate:
+    """Per-project smart-mode flags that requests wait on.
+
+    Waiting times are recorded in ``metrics`` as ``indexing-wait:read`` and
+    ``indexing-wait:write``, and deadlines missed as ``indexing-timeout``.
+    """
+
+    def __init__(self, client_metrics: ClientMetrics | None = None) -> None:
+        self.metrics = client_metrics if client_metrics is not None else metrics
+        # Set while the project is in smart mode
+        self._smart: dict[str, asyncio.Event] = {}
+        self._write_locks: dict[str, asyncio.Lock] = {}
+        self._expiry: dict[str, asyncio.TimerHandle] = {}
+
+    def _event(self, project: str) -> asyncio.Event:
+        event = self._smart.get(project)
+        if event is None:
+            event = self._smart[project] = asyncio.Event()
+            event.set()
+        return event
+
+    @property
+    def indexing_projects(self) -> list[str]:
+        return [project for project, smart in self._smart.items() if not smart.is_set()]
+
+    def is_indexing(self, project: str) -> bool:
+        smart = self._smart.get(project)
+        return smart is not None and not smart.is_set()
+
+    def set_indexing(self, project: str, indexing: bool) -> None:
+        """Record a project entering or leaving dumb mode.
+
+        Leaving it wakes every request waiting for the project in one go.
+        """
+        expiry = self._expiry.pop(project, None)
+        if expiry is not None:
+            expiry.cancel()
+        smart = self._event(project)
+        if indexing:
+            smart.clear()
+        else:
+            smart.set()
+
+    def hold(self, project: str, seconds: float) -> None:
+        """Treat a project as indexing for ``seconds``, or until told otherwise."""
+        self.set_indexing(project, True)
+        self._expiry[project] = asyncio.get_running_loop().call_later(
+            seconds, self.set_indexing, project, False
+        )
+
+    def sync(self, indexing_projects: Iterable[str]) -> None:
+        """Make ``indexing_projects`` the complete set of indexing projects."""
+        indexing = set(indexing_projects)
+        for project in indexing | set(self._smart):
+            self.set_indexing(project, project in indexing)
+
+    def reset(self) -> None:
+        """Forget all indexing state, releasing every waiting request."""
+        self.sync(())
+
+    @asynccontextmanager
+    async def admit(
+        self, project: str, write: bool = False, timeout: float | None = None
+    ) -> AsyncIterator[float]:
+        """Wait until ``project`` is not indexing, then hold the gate for one request.
+
+        Yields the seconds spent waiting.
+
+        Raises:
+            IndexingTimeout: If the project is still indexing after ``timeout``.
+        """
+        smart = self._event(project)
+        lock = self._write_locks.setdefault(project, asyncio.Lock())
+        if smart.is_set() and not (write and lock.locked()):
+            yield 0.0
+            return
+
+        timeout = indexing_wait() if timeout is None else timeout
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(smart.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.metrics.series("indexing-timeout").add((time.monotonic() - started) * 1000)
+            raise IndexingTimeout(project, time.monotonic() - started) from None
+
+        if not write:
+            waited = time.monotonic() - started
+            self.metrics.series("indexing-wait:read").add(waited * 1000)
+            yield waited
+            return
+
+        async with lock:
+            waited = time.monotonic() - started
+            self.metrics.series("indexing-wait:write").add(waited * 1000)
+            yield waited
+
+
+# Shared by every client in the process, like the metrics
+gate = IndexingGate()
+
+# Priority of requests from clients not given one; see background()
+request_priority: ContextVar[Priority] = ContextVar("request_priority", default="interactive")
+
+
+@contextmanager
+def background() -> Iterator[None]:
+    """Send the bridge requests of the enclosed calls as background work."""
+    token = request_priority.set("background")
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class PriorityScheduler:
+    """Bounds requests in flight to the bridge, queueing the rest by priority.
+
+    Up to ``slots`` requests are in flight at once. Queued interactive
+    requests are let through before queued background ones, unless the
+    oldest background request has waited ``max_background_wait`` seconds.
+    Queueing times are recorded in ``metrics`` as ``queue-wait:interactive``
+    and ``queue-wait:background``.
+    """
+
+    def __init__(
+        self,
+        slots: int | None = None,
+        max_background_wait: float | None = None,
+        client_metrics: ClientMetrics | None = None,
+    ) -> None:
+        if slots is None:
+            slots = int(env_float("PYCHARM_BRIDGE_CONCURRENCY", DEFAULT_BRIDGE_CONCURRENCY))
+        if max_background_wait is None:
+            max_background_wait = env_float(
+                "PYCHARM_BACKGROUND_MAX_WAIT", DEFAULT_BACKGROUND_MAX_WAIT
+            )
+        self.slots = max(1, slots)
+        self.max_background_wait = max_background_wait
+        self.metrics = client_metrics if client_metrics is not None else metrics
+        self.in_flight = 0
+        # (queued at, future resolved when the request gets a slot) per class
+        self._queues: dict[Priority, deque[tuple[float, asyncio.Future[None]]]] = {
+            "interactive": deque(),
+            "background": deque(),
+        }
+
+    @property
+    def queued(self) -> dict[Priority, int]:
+        return {priority: len(queue) for priority, queue in self._queues.items()}
+
+    def _next(self) -> asyncio.Future[None] | None:
+        """The waiter to let through next, taken off its queue."""
+        interactive, background = self._queues["interactive"], self._queues["background"]
+        starved = bool(background) and (
+            time.monotonic() - background[0][0] >= self.max_background_wait
+        )
+        queue = background if starved or not interactive else interactive
+        return queue.popleft()[1] if queue else None
+
+    def _dispatch(self) -> None:
+        while self.in_flight < self.slots:
+            waiter = self._next()
+            if waiter is None:
+                return
+            # Skip waiters cancelled before they were let through
+            if not waiter.done():
+                waiter.set_result(None)
+                self.in_flight += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = "interactive") -> AsyncIterator[float]:
+        """Wait for a free slot, then hold it for one request.
+
+        Yields the seconds spent queued.
+        """
+        started = time.monotonic()
+        if self.in_flight < self.slots and not any(self._queues.values()):
+            self.in_flight += 1
+        else:
+            waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            self._queues[priority].append((started, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Got the slot just as it was cancelled; pass it on
+                    self.in_flight -= 1
+                elif (started, waiter) in self._queues[priority]:
+                    self._queues[priority].remove((started, waiter))
+                self._dispatch()
+                raise
+        waited = time.monotonic() - started
+        self.metrics.series(f"queue-wait:{priority}").add(waited * 1000)
+        try:
+            yield waited
+        finally:
+            self.in_flight -= 1
+            self._dispatch()
+
+
+# Shared by every client in the process, so it bounds the bridge's total load
+scheduler = PriorityScheduler()
@@ -1,54 +1,107 @@
 """PyCharm Refactoring MCP Server."""
 
+from __future__ import annotations
+
 import asyncio
+import contextlib
+import importlib
+import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Annotated
 
 from mcp.server.fastmcp import FastMCP
-
-from pycharm_mcp.tools import (
-    change_signature,
-    extract_method,
-    extract_variable,
-    find_usages,
-    inline_element,
-    list_projects,
-    move_element,
-    rename_symbol,
-    safe_delete,
-)
-
-# Create the MCP server
-mcp = FastMCP(
+from mcp.types import CallToolResult
+
+from pycharm_mcp.lazy_mcp import LazyFastMCP
+from pycharm_mcp.options import DocumentSync, FileContents, TextOutput
+
+
+@asynccontextmanager
+async def warm_up(server: FastMCP) -> AsyncIterator[None]:
+    """Keep the project registry warm and the bridge's event stream open while serving."""
+
+    async def start() -> None:
+        # Import the registry (and with it the client and models) on a worker
+        # thread, so the first requests are not held up behind it
+        module = await asyncio.to_thread(importlib.import_module, "pycharm_mcp.registry")
+        module.registry.start()
+        module.stream.start()
+
+    task = asyncio.create_task(start())
+    try:
+        yield
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        if "pycharm_mcp.registry" in sys.modules:
+            module = sys.modules["pycharm_mcp.registry"]
+            await module.stream.stop()
+            await module.registry.stop()
+
+
+# Create the MCP server. Tools are registered on first use and their modules
+# imported inside each wrapper, so startup only pays for FastMCP itself.
+mcp = LazyFastMCP(
     "PyCharm Refactoring",
     instructions="Exposes PyCharm's refactoring capabilities for intelligent code transformations",
+    lifespan=warm_up,
 )
 
+# The response models are the tools' structured output, and some tools take
+# models as arguments. Named through a deferred import, they are only loaded
+# when the tools are registered.
+if TYPE_CHECKING:
+    from pycharm_mcp import models
+else:
+    models = mcp.defer_import("pycharm_mcp.models")
+
 
 # Register all tools
 @mcp.tool()
-async def pycharm_list_projects() -> str:
+async def pycharm_list_projects(
+    refresh: bool = False, text: TextOutput = "summary", debug_timings: bool = False
+) -> Annotated[CallToolResult, models.ProjectListResponse]:
     """
     List all projects currently open in PyCharm.
 
     Returns project names, paths, and which one is currently active.
     Use this to identify the correct project path before performing refactoring operations.
+    Answers from the project list the server keeps up to date in the background.
+
+    Args:
+        refresh: Fetch the list from PyCharm instead of the cache (default: False)
+        text: Text returned next to the structured result: a 'summary' or 'none';
+              'full' is the same as 'summary' here (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         A formatted list of open projects with their paths.
     """
-    return await list_projects()
+    from pycharm_mcp.tools import list_projects
+
+    return await list_projects(refresh=refresh, text=text, debug_timings=debug_timings)
 
 
 @mcp.tool()
 async def pycharm_rename_symbol(
-    project_path: str,
-    file_path: str,
-    line: int,
-    column: int,
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
+    *,
     new_name: str,
     search_in_comments: bool = True,
     search_in_strings: bool = False,
     preview: bool = False,
-) -> str:
+    handle: str | None = None,
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.RenameResponse]:
     """
     Rename a symbol (variable, function, class, etc.) across the entire project.
 
@@ -56,7 +109,8 @@ async def pycharm_rename_symbol(
     Files are auto-saved before refactoring.
 
     Args:
-        project_path: Absolute path to the project (use pycharm_list_projects to find available projects)
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the symbol (relative to project or absolute)
         line: Line number where the symbol is located (1-indexed)
         column: Column number where the symbol is located (1-indexed)
@@ -64,10 +118,24 @@ async def pycharm_rename_symbol(
         search_in_comments: Also rename occurrences in comments (default: True)
         search_in_strings: Also rename occurrences in string literals (default: False)
         preview: If True, show what would change without applying (default: False)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of changed lines, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Summary of the rename operation including files modified and usages updated.
     """
+    from pycharm_mcp.tools import rename_symbol
+
     return await rename_symbol(
         project_path=project_path,
         file_path=file_path,
@@ -77,18 +145,31 @@ async def pycharm_rename_symbol(
         search_in_comments=search_in_comments,
         search_in_strings=search_in_strings,
         preview=preview,
+        handle=handle,
+        document_sync=document_sync,
+        file_contents=file_contents,
+        verify=verify,
+        text=text,
+        debug_timings=debug_timings,
     )
 
 
 @mcp.tool()
 async def pycharm_move_element(
-    project_path: str,
-    file_path: str,
-    line: int,
-    column: int,
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
+    *,
     target_file: str,
     preview: bool = False,
-) -> str:
+    handle: str | None = None,
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.MoveResponse]:
     """
     Move a class, function, or variable to a different module.
 
@@ -96,16 +177,31 @@ async def pycharm_move_element(
     specified position will be moved to the target file.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the source file containing the element
         line: Line number where the element is defined (1-indexed)
         column: Column number (1-indexed)
         target_file: Path to the destination file
         preview: If True, show what would change without applying (default: False)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of changed lines, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Summary of the move operation including import updates.
     """
+    from pycharm_mcp.tools import move_element
+
     return await move_element(
         project_path=project_path,
         file_path=file_path,
@@ -113,12 +209,76 @@ async def pycharm_move_element(
         column=column,
         target_file=target_file,
         preview=preview,
+        handle=handle,
+        document_sync=document_sync,
+        file_contents=file_contents,
+        verify=verify,
+        text=text,
+        debug_timings=debug_timings,
+    )
+
+
+@mcp.tool()
+async def pycharm_move_elements(
+    project_path: str | None = None,
+    *,
+    elements: list[models.MoveElement],
+    target_file: str,
+    preview: bool = False,
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.BulkMoveResponse]:
+    """
+    Move many top-level classes and functions into one module together.
+
+    Use this to split a module instead of calling pycharm_move_element once per
+    element. All elements move as one refactoring, and imports are rewritten
+    in a single pass, so each referencing file is updated once. The target
+    file is created if it does not exist.
+
+    Args:
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file of the first element or target_file, or the only open project
+        elements: Classes and functions to move, each a 'handle', a 'file', 'line' and
+                  'column', or a dotted 'qualifiedName' such as 'pkg.module.Name'
+        target_file: Path to the destination file
+        preview: If True, show what would change without applying (default: False)
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of changed lines, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
+
+    Returns:
+        The moved elements and the files whose imports were updated.
+    """
+    from pycharm_mcp.tools import move_elements
+
+    return await move_elements(
+        project_path=project_path,
+        elements=elements,
+        target_file=target_file,
+        preview=preview,
+        document_sync=document_sync,
+        file_contents=file_contents,
+        verify=verify,
+        text=text,
+        debug_timings=debug_timings,
     )
 
 
 @mcp.tool()
 async def pycharm_extract_method(
-    project_path: str,
+    project_path: str | None = None,
+    *,
     file_path: str,
     start_line: int,
     start_column: int,
@@ -126,7 +286,10 @@ async def pycharm_extract_method(
     end_column: int,
     method_name: str,
     preview: bool = False,
-) -> str:
+    document_sync: DocumentSync | None = None,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.ExtractMethodResponse]:
     """
     Extract selected code into a new method.
 
@@ -134,7 +297,8 @@ async def pycharm_extract_method(
     selected code's dependencies.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the code to extract
         start_line: Starting line of the selection (1-indexed)
         start_column: Starting column of the selection (1-indexed)
@@ -142,10 +306,17 @@ async def pycharm_extract_method(
         end_column: Ending column of the selection (1-indexed)
         method_name: Name for the new method
         preview: If True, show what would change without applying (default: False)
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        text: Text returned next to the structured result: a 'summary' or 'none';
+              'full' is the same as 'summary' here (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Summary of the extraction including the new method's signature.
     """
+    from pycharm_mcp.tools import extract_method
+
     return await extract_method(
         project_path=project_path,
         file_path=file_path,
@@ -155,12 +326,16 @@ async def pycharm_extract_method(
         end_column=end_column,
         method_name=method_name,
         preview=preview,
+        document_sync=document_sync,
+        text=text,
+        debug_timings=debug_timings,
     )
 
 
 @mcp.tool()
 async def pycharm_extract_variable(
-    project_path: str,
+    project_path: str | None = None,
+    *,
     file_path: str,
     start_line: int,
     start_column: int,
@@ -169,7 +344,10 @@ async def pycharm_extract_variable(
     variable_name: str,
     replace_all: bool = True,
     preview: bool = False,
-) -> str:
+    document_sync: DocumentSync | None = None,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.ExtractVariableResponse]:
     """
     Extract an expression into a variable.
 
@@ -177,7 +355,8 @@ async def pycharm_extract_variable(
     all identical occurrences will be replaced.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the expression
         start_line: Starting line of the expression (1-indexed)
         start_column: Starting column of the expression (1-indexed)
@@ -186,10 +365,17 @@ async def pycharm_extract_variable(
         variable_name: Name for the new variable
         replace_all: Replace all identical occurrences (default: True)
         preview: If True, show what would change without applying (default: False)
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        text: Text returned next to the structured result: a 'summary' or 'none';
+              'full' is the same as 'summary' here (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Summary of the extraction including occurrences replaced.
     """
+    from pycharm_mcp.tools import extract_variable
+
     return await extract_variable(
         project_path=project_path,
         file_path=file_path,
@@ -200,17 +386,83 @@ async def pycharm_extract_variable(
         variable_name=variable_name,
         replace_all=replace_all,
         preview=preview,
+        document_sync=document_sync,
+        text=text,
+        debug_timings=debug_timings,
     )
 
 
 @mcp.tool()
-async def pycharm_inline_element(
-    project_path: str,
+async def pycharm_extract_ranges(
+    project_path: str | None = None,
+    *,
     file_path: str,
-    line: int,
-    column: int,
+    ranges: list[models.ExtractRange],
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.MultiExtractResponse]:
+    """
+    Apply many method and variable extractions to one file in one step.
+
+    Use this instead of calling pycharm_extract_method or
+    pycharm_extract_variable repeatedly on the same file. All ranges are given
+    in the file's current coordinates; there is no need to re-read the file
+    or shift later ranges by hand. They are applied from the bottom of the
+    file up as one undoable command, and the new location of each extracted
+    method or variable is returned.
+
+    Args:
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
+        file_path: Path to the file containing the code to extract
+        ranges: Non-overlapping extractions, each with a 'kind' ('method' or 'variable'),
+                'startLine', 'startColumn', 'endLine', 'endColumn' (1-indexed), the new
+                'name' and, for variables, 'replaceAll' (default: True)
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides the file's hash and size, also return its new 'content'
+                       or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing with the file digest, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
+
+    Returns:
+        Each extraction's new method or variable and the line it ended up on.
+    """
+    from pycharm_mcp.tools import extract_ranges
+
+    return await extract_ranges(
+        project_path=project_path,
+        file_path=file_path,
+        ranges=ranges,
+        document_sync=document_sync,
+        file_contents=file_contents,
+        verify=verify,
+        text=text,
+        debug_timings=debug_timings,
+    )
+
+
+@mcp.tool()
+async def pycharm_inline_element(
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
     preview: bool = False,
-) -> str:
+    handle: str | None = None,
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.InlineResponse]:
     """
     Inline a variable or method (replace usages with the definition).
 
@@ -218,35 +470,62 @@ async def pycharm_inline_element(
     For methods, each call is replaced with the method body.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the element
         line: Line number where the element is defined (1-indexed)
         column: Column number (1-indexed)
         preview: If True, show what would change without applying (default: False)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of changed lines, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Summary of the inline operation including usages replaced.
     """
+    from pycharm_mcp.tools import inline_element
+
     return await inline_element(
         project_path=project_path,
         file_path=file_path,
         line=line,
         column=column,
         preview=preview,
+        handle=handle,
+        document_sync=document_sync,
+        file_contents=file_contents,
+        verify=verify,
+        text=text,
+        debug_timings=debug_timings,
     )
 
 
 @mcp.tool()
 async def pycharm_change_signature(
-    project_path: str,
-    file_path: str,
-    line: int,
-    column: int,
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
     new_name: str | None = None,
     parameters: list[dict[str, str | None]] | None = None,
     return_type: str | None = None,
     preview: bool = False,
-) -> str:
+    handle: str | None = None,
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.ChangeSignatureResponse]:
     """
     Change a function's signature (name, parameters, return type).
 
@@ -254,18 +533,34 @@ async def pycharm_change_signature(
     add/remove/reorder parameters, and change the return type annotation.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the function
         line: Line number where the function is defined (1-indexed)
         column: Column number (1-indexed)
         new_name: New name for the function (optional)
-        parameters: New parameter list, each with 'name', optional 'type', and optional 'defaultValue'
+        parameters: New parameter list, each with 'name', optional 'type', and optional
+                    'defaultValue'
         return_type: New return type annotation (optional)
         preview: If True, show what would change without applying (default: False)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of changed lines, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Summary of the signature change including call sites updated.
     """
+    from pycharm_mcp.tools import change_signature
+
     return await change_signature(
         project_path=project_path,
         file_path=file_path,
@@ -275,17 +570,27 @@ async def pycharm_change_signature(
         parameters=parameters,
         return_type=return_type,
         preview=preview,
+        handle=handle,
+        document_sync=document_sync,
+        file_contents=file_contents,
+        verify=verify,
+        text=text,
+        debug_timings=debug_timings,
     )
 
 
 @mcp.tool()
 async def pycharm_safe_delete(
-    project_path: str,
-    file_path: str,
-    line: int,
-    column: int,
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
     search_for_usages: bool = True,
-) -> str:
+    handle: str | None = None,
+    document_sync: DocumentSync | None = None,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.SafeDeleteResponse]:
     """
     Delete an element only if it has no usages.
 
@@ -294,51 +599,252 @@ async def pycharm_safe_delete(
     reported.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the element
         line: Line number where the element is defined (1-indexed)
         column: Column number (1-indexed)
         search_for_usages: Check for usages before deleting (default: True)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of blocking usages, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Confirmation of deletion or list of usages that prevent deletion.
     """
+    from pycharm_mcp.tools import safe_delete
+
     return await safe_delete(
         project_path=project_path,
         file_path=file_path,
         line=line,
         column=column,
         search_for_usages=search_for_usages,
+        handle=handle,
+        document_sync=document_sync,
+        text=text,
+        debug_timings=debug_timings,
+    )
+
+
+@mcp.tool()
+async def pycharm_safe_delete_bulk(
+    project_path: str | None = None,
+    *,
+    candidates: list[models.DeleteCandidate] | None = None,
+    scope: str | None = None,
+    preview: bool = False,
+    max_usages: int = 10,
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.BulkSafeDeleteResponse]:
+    """
+    Delete every unused symbol among many candidates in one sweep.
+
+    Use this to clean up dead code instead of calling pycharm_safe_delete once
+    per symbol. Usages of all candidates are counted in one pass, and the
+    unused ones are deleted as one undoable command. A candidate used only by
+    other deleted candidates is deleted too. Candidates still in use are kept
+    and reported with their usages.
+
+    Args:
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      scope or file of the first candidate, or the only open project
+        candidates: Symbols to consider, each a 'handle' or 'file', 'line' and 'column'
+        scope: Instead of candidates, a file or directory whose top-level functions
+               and classes are considered, except dunders, tests, decorated ones and
+               names in __all__
+        preview: If True, report what would be deleted without deleting (default: False)
+        max_usages: Usages to return per kept candidate (default: 10)
+        document_sync: Which unsaved editor documents to save first: 'all', only the
+                       involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of deleted and kept symbols, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
+
+    Returns:
+        The deleted symbols, and the kept ones with the usages that keep them.
+    """
+    from pycharm_mcp.tools import safe_delete_bulk
+
+    return await safe_delete_bulk(
+        project_path=project_path,
+        candidates=candidates,
+        scope=scope,
+        preview=preview,
+        max_usages=max_usages,
+        document_sync=document_sync,
+        file_contents=file_contents,
+        verify=verify,
+        text=text,
+        debug_timings=debug_timings,
     )
 
 
 @mcp.tool()
 async def pycharm_find_usages(
-    project_path: str,
-    file_path: str,
-    line: int,
-    column: int,
-) -> str:
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
+    incremental: bool = True,
+    handle: str | None = None,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.FindUsagesResponse]:
     """
     Find all usages of a symbol across the project.
 
     This is useful for previewing what a refactoring would affect, or for
-    understanding how a symbol is used throughout the codebase.
+    understanding how a symbol is used throughout the codebase. Repeating the
+    same query only re-searches files that changed since the previous call.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the symbol
         line: Line number where the symbol is located (1-indexed)
         column: Column number (1-indexed)
+        incremental: Re-search only files changed since the last identical query (default: True)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing grouped by file, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         List of all usages with file locations and context.
     """
+    from pycharm_mcp.tools import find_usages
+
     return await find_usages(
         project_path=project_path,
         file_path=file_path,
         line=line,
         column=column,
+        incremental=incremental,
+        handle=handle,
+        text=text,
+        debug_timings=debug_timings,
+    )
+
+
+@mcp.tool()
+async def pycharm_find_usages_all_projects(
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
+    projects: list[str] | None = None,
+    timeout: float = 20.0,
+    handle: str | None = None,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.CrossProjectUsagesResponse]:
+    """
+    Find all usages of a symbol across several projects open in PyCharm.
+
+    Use this when a shared library and the code using it are open as separate
+    projects. The symbol is resolved once in its own project, then every open
+    project, or the chosen ones, is searched concurrently. A project that
+    times out or cannot be searched is reported, and the others still are.
+
+    Args:
+        project_path: Absolute path to the project defining the symbol; if omitted,
+                      inferred from an absolute file_path or the only open project
+        file_path: Path to the file containing the symbol
+        line: Line number where the symbol is located (1-indexed)
+        column: Column number (1-indexed)
+        projects: Paths of the projects to search (default: every open project)
+        timeout: Seconds to wait for each project's search (default: 20)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing grouped by project and file, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
+
+    Returns:
+        Usages with file locations and context, grouped by project.
+    """
+    from pycharm_mcp.tools import find_usages_all_projects
+
+    return await find_usages_all_projects(
+        project_path=project_path,
+        file_path=file_path,
+        line=line,
+        column=column,
+        projects=projects,
+        timeout=timeout,
+        handle=handle,
+        text=text,
+        debug_timings=debug_timings,
+    )
+
+
+@mcp.tool()
+async def pycharm_apply_plan(
+    project_path: str | None = None,
+    *,
+    steps: list[models.PlanStep],
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> Annotated[CallToolResult, models.ApplyPlanResponse]:
+    """
+    Apply several refactorings in order as one undoable IDE command.
+
+    Use this for a move, then a rename, then a signature change and similar
+    sequences: documents are synced once instead of per step, and if a step
+    fails the steps before it and any edits it made are undone, so the project
+    is never left half-refactored. Each step is resolved after the steps before it ran, so
+    target later steps by the handle from a preview or find_usages result
+    rather than by a position an earlier step may shift.
+
+    Args:
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file of the first step or the only open project
+        steps: Refactorings to apply in order. Each has a 'type' ('rename', 'move', 'inline'
+               or 'change-signature'), a 'handle' or 'file'/'line'/'column', and the
+               arguments of its type: 'newName' (rename, change-signature), 'targetFile'
+               (move), 'parameters' and 'returnType' (change-signature)
+        document_sync: Which unsaved editor documents to save before the first step: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of changed lines, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
+
+    Returns:
+        Summary of each step and the combined changes.
+    """
+    from pycharm_mcp.tools import apply_plan
+
+    return await apply_plan(
+        project_path=project_path,
+        steps=steps,
+        document_sync=document_sync,
+        file_contents=file_contents,
+        verify=verify,
+        text=text,
+        debug_timings=debug_timings,
     )
 
 
@@ -0,0 +1,245 @@
+"""Reading large bridge responses through a temporary file.
+
+A ``find_usages`` or preview of a heavily used symbol can return hundreds of
+MB. Read whole, the body, the parsed JSON and the models built from it are all
+in memory at once. Instead, :func:`read_json` streams a body larger than
+``PYCHARM_SPILL_MB`` into an anonymous temporary file and parses it from a
+memory map a window at a time, releasing the pages it is done with:
+
+- arrays of integers, which is what columnar usage and change lists are made
+  of (see :mod:`pycharm_mcp.columnar`), are read straight into compact
+  :class:`array.array` columns, not lists of Python ints, unless one is
+  wider than 64 bits;
+- other values are decoded one array element or object member at a time.
+
+So peak memory is the decoded result plus a window, not three copies of the
+body. The tables built from the columns create row objects only on access.
+"""
+
+import asyncio
+import json
+import mmap
+import os
+import re
+import tempfile
+from array import array
+from typing import IO, Any
+
+import httpx
+
+from pycharm_mcp.options import env_float
+
+DEFAULT_SPILL_MB = 16.0
+# Bytes of the body decoded at a time
+WINDOW = 1 << 20
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_START = frozenset("-0123456789")
+
+
+def spill_threshold() -> int:
+    """Body size in bytes above which responses are read through a temporary file."""
+    return int(env_float("PYCHARM_SPILL_MB", DEFAULT_SPILL_MB) * 1024 * 1024)
+
+
+async def read_json(response: httpx.Response, threshold: int) -> dict[str, Any]:
+    """Read the JSON body of a streamed response, via a temporary file past ``threshold``."""
+    length = response.headers.get("Content-Length")
+    if length is not None and length.isdigit() and int(length) <= threshold:
+        body = await response.aread()
+        return json.loads(body) if body else {}
+
+    buffer = bytearray()
+    with tempfile.TemporaryFile() as spill:
+        spilled = False
+        async for chunk in response.aiter_bytes():
+            if spilled:
+                spill.write(chunk)
+                continue
+            buffer += chunk
+            if len(buffer) > threshold:
+                spill.write(buffer)
+                buffer = bytearray()
+                spilled = True
+        if not spilled:
+            # Unknown length, but small after all
+            return json.loads(buffer) if buffer else {}
+        return await asyncio.to_thread(parse_file, spill)
+
+
+def parse_file(file: IO[bytes]) -> dict[str, Any]:
+    """Parse a JSON object from a file through a memory map."""
+    file.flush()
+    if os.fstat(file.fileno()).st_size == 0:
+        return {}
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        reader = _Reader(buffer)
+        value = reader.value()
+        reader.end()
+    if not isinstance(value, dict):
+        raise ValueError("Expected a JSON object")
+    return value
+
+
+class _Reader:
+    """Incremental JSON parser over a buffer, holding one decoded window at a time."""
+
+    def __init__(self, buffer: mmap.mmap) -> None:
+        self.buffer = buffer
+        self.decoder = json.JSONDecoder()
+        # Text of the current window, the index into it, and the byte offset it starts at
+        self.text = ""
+        self.index = 0
+        self.base = 0
+        self.eof = False
+        # Bytes at the start of the buffer whose pages were released
+        self.released = 0
+        self._load(0, WINDOW)
+
+    # Windows
+
+    def _load(self, start: int, size: int) -> None:
+        """Decode the window of ``size`` bytes at ``start``, cut at a character boundary."""
+        end = min(start + size, len(self.buffer))
+        self.eof = end == len(self.buffer)
+        if not self.eof:
+            # Do not split a UTF-8 sequence: back up to the byte that starts one
+            while end > start and self.buffer[end] & 0xC0 == 0x80:
+                end -= 1
+        self.text = self.buffer[start:end].decode()
+        self.index = 0
+        self.base = start
+        page_start = start - start % mmap.PAGESIZE
+        if page_start > self.released and hasattr(mmap, "MADV_DONTNEED"):
+            # Pages before the window are done with; drop them from RSS
+            self.buffer.madvise(mmap.MADV_DONTNEED, self.released, page_start - self.released)
+            self.released = page_start
+
+    def _advance(self, size: int = WINDOW) -> None:
+        """Move the window to start at the current position."""
+        consumed = self.text[: self.index]
+        offset = self.index if consumed.isascii() else len(consumed.encode())
+        self._load(self.base + offset, size)
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character, "" at the end."""
+        while True:
+            match = _WHITESPACE.match(self.text, self.index)
+            if match:
+                self.index = match.end()
+            if self.index < len(self.text) or self.eof:
+                return self.text[self.index : self.index + 1]
+            self._advance()
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"Expected {char!r} at byte {self.base + self.index}")
+        self.index += 1
+
+    def end(self) -> None:
+        if self._peek():
+            raise ValueError(f"Extra data at byte {self.base + self.index}")
+
+    # Values
+
+    def value(self) -> Any:
+        """Parse the next value, taking objects and arrays apart member by member."""
+        char = self._peek()
+        if char == "{":
+            return self._object()
+        if char == "[":
+            return self._array()
+        return self._decode()
+
+    def _decode(self) -> Any:
+        """Decode the next value whole, growing the window until it fits."""
+        self._peek()
+        size = WINDOW
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.index)
+                # A value running to the end of the window may be cut short
+                if end < len(self.text) or self.eof:
+                    self.index = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            size *= 2
+            self._advance(size)
+
+    def _object(self) -> dict[str, Any]:
+        self._expect("{")
+        result: dict[str, Any] = {}
+        if self._peek() == "}":
+            self.index += 1
+            return result
+        while True:
+            key = self._decode()
+            self._expect(":")
+            result[key] = self.value()
+            if self._peek() == "}":
+                self.index += 1
+                return result
+            self._expect(",")
+
+    def _array(self) -> "list[Any] | array[int]":
+        self._expect("[")
+        char = self._peek()
+        if char == "]":
+            self.index += 1
+            return []
+        items: list[Any] = []
+        if char in _NUMBER_START:
+            numbers = self._integers()
+            if self._peek() == "]":
+                self.index += 1
+                return numbers
+            # Not only integers; go on element by element
+            items = list(numbers)
+            if numbers:
+                self._expect(",")
+        while True:
+            items.append(self._decode())
+            if self._peek() == "]":
+                self.index += 1
+                return items
+            self._expect(",")
+
+    def _integers(self) -> "array[int] | list[int]":
+        """Read integers up to the end of the array or the first element that is not one.
+
+        Stops before the ``]``, or before the ``,`` ahead of the first element
+        that is not an integer. Returns a list if one does not fit in 64 bits.
+        """
+        values: array[int] | list[int] = array("I")
+        while True:
+            # Past the comma that ends the integers read so far
+            start = self.index + 1 if values else self.index
+            close = self.text.find("]", start)
+            last = close if close >= 0 else self.text.rfind(",", start)
+            if last < 0:
+                if self.eof:
+                    return values
+                self._advance(len(self.text) * 2)
+                continue
+            try:
+                chunk = [int(part) for part in self.text[start:last].split(",")]
+            except ValueError:
+                return values
+            if isinstance(values, list):
+                values.extend(chunk)
+            else:
+                try:
+                    values.extend(array(values.typecode, chunk))
+                except OverflowError:
+                    try:
+                        values = array("q", values)
+                        values.extend(array("q", chunk))
+                    except OverflowError:
+                        # Wider than 64 bits: only Python ints hold them
+                        values = [*values, *chunk]
+            self.index = last
+            if close >= 0:
+                return values
+            self._advance()
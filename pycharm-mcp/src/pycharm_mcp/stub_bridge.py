@@ -0,0 +1,706 @@
+"""Local stand-in for the PyCharm Refactoring Bridge plugin.
+
+Serves the bridge's HTTP API with synthetic but well-formed responses, so the
+client, the tools and the MCP server can be exercised without a running IDE.
+Every response carries a synthetic ``Server-Timing`` header like the real
+bridge, and ``GET /events`` streams the same server-sent events: applied
+refactorings publish ``files-changed``, and tests publish the rest with
+:meth:`StubBridge.emit`.
+
+Run it standalone with::
+
+    python -m pycharm_mcp.stub_bridge --port 9876
+"""
+
+import argparse
+import itertools
+import json
+import queue
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from pycharm_mcp.columnar import encode_changes, encode_usages
+from pycharm_mcp.digests import file_digest
+from pycharm_mcp.timeouts import DEADLINE_HEADER
+
+BridgeResult = tuple[int, dict[str, Any], dict[str, float]]
+
+# Seconds between comment lines on an idle event stream
+KEEPALIVE_INTERVAL = 15.0
+
+
+class StubBridge:
+    """In-process HTTP server that mimics the bridge plugin's API."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        projects: list[str] | None = None,
+        usages_per_symbol: int = 3,
+        latency_ms: float = 0.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.projects = projects if projects is not None else ["/stub/project"]
+        self.usages_per_symbol = usages_per_symbol
+        self.latency_ms = latency_ms
+        self.requests: list[tuple[str, str, dict[str, Any] | None]] = []
+        # X-Deadline-Ms of each request, None if it had none
+        self.deadlines: list[int | None] = []
+        # Projects in dumb mode; requests for them get 503 like from the bridge
+        self.indexing: set[str] = set()
+        # Projects whose part of a cross-project search runs past its timeout
+        self.timing_out: set[str] = set()
+        # Plan step types whose write fails partway through, after editing files
+        self.failing_writes: set[str] = set()
+        # Symbol at (file, line, column); other positions name "symbol"
+        self.symbols: dict[tuple[str | None, int | None, int | None], str] = {}
+        # Symbol each find-usages token was issued for
+        self._tokens: dict[str, str] = {}
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+        self._event_ids = itertools.count(1)
+        self._subscribers: list[queue.Queue[dict[str, Any] | None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("Stub bridge is not running")
+        return f"http://{self.host}:{self._server.server_port}"
+
+    def start(self) -> "StubBridge":
+        """Start serving in a background thread."""
+        handler = type("Handler", (_StubHandler,), {"bridge": self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the listening socket."""
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.put(None)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "StubBridge":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    # Events
+
+    @property
+    def subscribers(self) -> int:
+        """Number of open event streams."""
+        with self._lock:
+            return len(self._subscribers)
+
+    def emit(
+        self,
+        type: str,
+        project: str | None = None,
+        files: list[str] | None = None,
+        indexing: bool | None = None,
+        truncated: bool = False,
+    ) -> dict[str, Any]:
+        """Publish an event to every open event stream and return it."""
+        event = self._event(
+            type, project=project, files=files or [], indexing=indexing, truncated=truncated
+        )
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.put(event)
+        return event
+
+    def open_project(self, path: str) -> None:
+        """Add a project and publish ``project-opened``."""
+        self.projects.append(path)
+        self.emit("project-opened", project=path)
+
+    def close_project(self, path: str) -> None:
+        """Remove a project and publish ``project-closed``."""
+        self.projects.remove(path)
+        self.emit("project-closed", project=path)
+
+    def set_indexing(self, project: str, indexing: bool) -> None:
+        """Enter or leave dumb mode for a project and publish ``indexing``."""
+        if indexing:
+            self.indexing.add(project)
+        else:
+            self.indexing.discard(project)
+        self.emit("indexing", project=project, indexing=indexing)
+
+    def _event(self, type: str, **fields: Any) -> dict[str, Any]:
+        return {"id": next(self._event_ids), "type": type, **fields}
+
+    def _subscribe(self) -> tuple[queue.Queue[dict[str, Any] | None], dict[str, Any]]:
+        subscriber: queue.Queue[dict[str, Any] | None] = queue.Queue()
+        with self._lock:
+            self._subscribers.append(subscriber)
+            # Allocated under the lock, so no later event can be missed
+            return subscriber, self._event("connected")
+
+    def _unsubscribe(self, subscriber: queue.Queue[dict[str, Any] | None]) -> None:
+        with self._lock:
+            self._subscribers.remove(subscriber)
+
+    # Request handling
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        payload: dict[str, Any] | None,
+        deadline_ms: int | None = None,
+    ) -> BridgeResult:
+        """Produce ``(status, body, phases)`` for one request."""
+        self.requests.append((method, path, payload))
+        self.deadlines.append(deadline_ms)
+        if deadline_ms is not None and self.latency_ms > deadline_ms:
+            # Like the bridge, give up on work that cannot finish in time
+            return _error(
+                504, "Deadline exceeded", f"{path} would not finish within {deadline_ms}ms"
+            )
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        if method == "GET" and path == "/health":
+            body = {
+                "status": "ok",
+                "version": "0.1.0",
+                "projectsOpen": len(self.projects),
+                "indexingProjects": sorted(self.indexing),
+            }
+            return 200, body, {"resolve": 0.05}
+        if method == "GET" and path == "/projects":
+            return 200, {"success": True, "projects": self._project_infos()}, {"resolve": 0.05}
+
+        handler = _POST_HANDLERS.get(path) if method == "POST" else None
+        if handler is None:
+            return _error(404, "Not Found", f"No route for {method} {path}")
+
+        payload = payload or {}
+        if payload.get("project") not in self.projects:
+            project = payload.get("project")
+            return _error(400, "Bad Request", f"Project not open in PyCharm: {project}")
+        if payload["project"] in self.indexing:
+            status, body, phases = _error(
+                503, "Indexing in progress", "PyCharm is updating indexes; retry when it finishes"
+            )
+            return status, {**body, "indexingProjects": sorted(self.indexing)}, phases
+        # Extractions take ranges, plans name a target per step and bulk
+        # refactorings per element or by scope
+        targets = {"startLine", "steps", "candidates", "scope", "elements", "ranges"}
+        if not targets & payload.keys() and not _has_target(payload):
+            return _error(
+                400, "Bad Request", "Either handle or file, line and column must be provided"
+            )
+
+        return handler(self, payload)
+
+    def _project_infos(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "name": path.rstrip("/").rsplit("/", 1)[-1],
+                "path": path,
+                "isOpen": True,
+                "isDefault": False,
+            }
+            for path in self.projects
+        ]
+
+    def _usages(self, payload: dict[str, Any]) -> list[dict[str, Any]]:
+        project = payload["project"]
+        return [
+            {
+                "file": f"{project}/pkg/module_{i % 7}.py",
+                "line": 10 + i,
+                "column": 5,
+                "text": f"    value = symbol({i})",
+                "isWriteAccess": i == 0,
+            }
+            for i in range(self.usages_per_symbol)
+        ]
+
+    def _changes(self, payload: dict[str, Any], old: str, new: str) -> list[dict[str, Any]]:
+        return [
+            {"file": usage["file"], "line": usage["line"], "oldText": old, "newText": new}
+            for usage in self._usages(payload)
+        ]
+
+    def _save_phases(self, payload: dict[str, Any]) -> dict[str, float]:
+        sync = payload.get("sync", "all")
+        if sync == "none":
+            return {}
+        return {"save": 0.4 if sync == "all" else 0.05}
+
+    def _search_phases(self, payload: dict[str, Any], write: bool) -> dict[str, float]:
+        phases = {
+            **self._save_phases(payload),
+            "resolve": 0.2,
+            "search": 0.01 * self.usages_per_symbol + 0.1,
+        }
+        if write:
+            phases["write"] = 1.5
+        return phases
+
+    def _rename(self, payload: dict[str, Any]) -> BridgeResult:
+        changes = self._changes(payload, "symbol", payload.get("newName", ""))
+        body: dict[str, Any] = {
+            "success": True,
+            "changes": changes,
+            "filesModified": len({c["file"] for c in changes}),
+            "usagesUpdated": len(changes),
+        }
+        return self._preview_or_apply(payload, body)
+
+    def _move(self, payload: dict[str, Any]) -> BridgeResult:
+        changes = self._changes(payload, "import from source", "import from target")
+        body: dict[str, Any] = {
+            "success": True,
+            "changes": changes,
+            "filesModified": len({c["file"] for c in changes}),
+            "importsUpdated": len(changes),
+        }
+        return self._preview_or_apply(payload, body)
+
+    def _move_bulk(self, payload: dict[str, Any]) -> BridgeResult:
+        elements = payload.get("elements") or []
+        if not elements:
+            return _error(400, "Bad Request", "Provide at least one element to move")
+        target = payload["targetFile"]
+        moved = [
+            {
+                "name": (element.get("qualifiedName") or f"element_{i}").rsplit(".", 1)[-1],
+                "file": element.get("file") or "pkg/source.py",
+                "line": element.get("line") or 1,
+            }
+            for i, element in enumerate(elements)
+        ]
+        # Every element is used from the same files, each rewritten once
+        first_lines: dict[str, int] = {}
+        for usage in self._usages(payload):
+            first_lines.setdefault(usage["file"], usage["line"])
+        changes: list[dict[str, Any]] = [
+            {"file": m["file"], "line": m["line"], "oldText": m["name"], "newText": "moved"}
+            for m in moved
+        ] + [
+            {"file": file, "line": line, "oldText": "import source", "newText": "import target"}
+            for file, line in first_lines.items()
+        ]
+        preview = bool(payload.get("preview", False))
+        body: dict[str, Any] = {
+            "success": True,
+            "moved": moved,
+            "targetFile": target,
+            "changes": changes,
+            "filesModified": len({target, *(c["file"] for c in changes)}),
+            "importsUpdated": len(first_lines),
+            "preview": preview,
+        }
+        if not preview:
+            files = list(dict.fromkeys(change["file"] for change in changes))
+            self.emit("files-changed", project=payload["project"], files=files)
+            body["files"] = self._digests(payload, changes)
+        return 200, body, self._search_phases(payload, write=not preview)
+
+    def _inline(self, payload: dict[str, Any]) -> BridgeResult:
+        changes = self._changes(payload, "symbol", "expression")
+        body = {"success": True, "changes": changes, "usagesInlined": len(changes)}
+        return self._preview_or_apply(payload, body)
+
+    def _change_signature(self, payload: dict[str, Any]) -> BridgeResult:
+        changes = self._changes(payload, "symbol(a)", "symbol(a, b)")
+        body = {"success": True, "changes": changes, "callSitesUpdated": len(changes)}
+        return self._preview_or_apply(payload, body)
+
+    def _apply_plan(self, payload: dict[str, Any]) -> BridgeResult:
+        steps = payload.get("steps") or []
+        if not steps:
+            return _error(400, "Bad Request", "A plan needs at least one step")
+        results = []
+        changes: list[dict[str, Any]] = []
+        for index, step in enumerate(steps):
+            texts = _PLAN_TEXTS.get(step.get("type"))
+            if texts is None or not _has_target(step):
+                problem = "Unknown step type" if texts is None else "No element at the target"
+                undone = f", the {index} step(s) before it were undone" if index else ""
+                return _error(
+                    400,
+                    "Bad Request",
+                    f"Step {index + 1} ({step.get('type')}) failed{undone}: {problem}",
+                )
+            if step["type"] in self.failing_writes:
+                # The bridge undoes the plan's command, partial edits included
+                before = f" and the {index} step(s) before it" if index else ""
+                return _error(
+                    400,
+                    "Bad Request",
+                    f"Step {index + 1} ({step['type']}) failed, its partial edits{before} "
+                    "were undone: Write failed",
+                )
+            old, new = texts
+            step_changes = self._changes(payload, old, new or step.get("newName", ""))
+            results.append(
+                {
+                    "type": step["type"],
+                    "changeCount": len(step_changes),
+                    "filesModified": len({c["file"] for c in step_changes}),
+                }
+            )
+            changes.extend(step_changes)
+        body: dict[str, Any] = {
+            "success": True,
+            "steps": results,
+            "changes": changes,
+            "filesModified": len({c["file"] for c in changes}),
+        }
+        return self._preview_or_apply(payload, body)
+
+    def _preview_or_apply(self, payload: dict[str, Any], body: dict[str, Any]) -> BridgeResult:
+        preview = bool(payload.get("preview", False))
+        if preview:
+            body["handle"] = payload.get("handle") or str(uuid.uuid4())
+        else:
+            files = list(dict.fromkeys(change["file"] for change in body["changes"]))
+            self.emit("files-changed", project=payload["project"], files=files)
+            body["files"] = self._digests(payload, body["changes"])
+        if payload.get("format") == "columnar":
+            body["changeColumns"] = encode_changes(body["changes"])
+            body["changes"] = []
+        return 200, body, self._search_phases(payload, write=not preview)
+
+    def _digests(
+        self, payload: dict[str, Any], changes: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        # Each stub file is made up of its changed lines, before and after
+        before: dict[str, list[str]] = {}
+        after: dict[str, list[str]] = {}
+        for change in changes:
+            before.setdefault(change["file"], []).append(change["oldText"] + "\n")
+            after.setdefault(change["file"], []).append(change["newText"] + "\n")
+        contents = payload.get("contents", "none")
+        return [
+            file_digest(path, "".join(lines).encode(), contents, "".join(before[path]))
+            for path, lines in after.items()
+        ]
+
+    def _extract_method(self, payload: dict[str, Any]) -> BridgeResult:
+        body = {
+            "success": True,
+            "file": payload.get("file", ""),
+            "methodLine": payload.get("startLine", 1),
+            "parameters": [],
+            "returnType": None,
+        }
+        return 200, body, {**self._save_phases(payload), "resolve": 0.1, "write": 1.0}
+
+    def _extract_variable(self, payload: dict[str, Any]) -> BridgeResult:
+        body = {
+            "success": True,
+            "file": payload.get("file", ""),
+            "variableLine": payload.get("startLine", 1),
+            "occurrencesReplaced": 1,
+        }
+        return 200, body, {**self._save_phases(payload), "resolve": 0.1, "write": 1.0}
+
+    def _extract_ranges(self, payload: dict[str, Any]) -> BridgeResult:
+        ranges = payload.get("ranges") or []
+        if not ranges:
+            return _error(400, "Bad Request", "Provide at least one range to extract")
+        spans = sorted(
+            ((r["startLine"], r["startColumn"]), (r["endLine"], r["endColumn"]), i)
+            for i, r in enumerate(ranges)
+        )
+        for (_, upper_end, upper), (lower_start, _, lower) in itertools.pairwise(spans):
+            if upper_end > lower_start:
+                return _error(400, "Bad Request", f"Ranges {upper + 1} and {lower + 1} overlap")
+        # A new method takes three lines at its range, a variable one
+        added = {"method": 3, "variable": 1}
+        extracted = [
+            {
+                "kind": r["kind"],
+                "name": r["name"],
+                "startLine": r["startLine"],
+                "line": r["startLine"]
+                + sum(added[o["kind"]] for o in ranges if o["startLine"] < r["startLine"]),
+                "occurrencesReplaced": 1,
+            }
+            for r in ranges
+        ]
+        changes = [
+            {"file": payload["file"], "line": e["line"], "oldText": "", "newText": e["name"]}
+            for e in extracted
+        ]
+        self.emit("files-changed", project=payload["project"], files=[payload["file"]])
+        body = {
+            "success": True,
+            "file": payload["file"],
+            "extracted": extracted,
+            "files": self._digests(payload, changes),
+        }
+        return 200, body, {**self._save_phases(payload), "resolve": 0.1, "write": 1.0}
+
+    def _safe_delete(self, payload: dict[str, Any]) -> BridgeResult:
+        if payload.get("searchForUsages", True) and self.usages_per_symbol > 1:
+            usages = self._usages(payload)[1:]
+            body = {
+                "success": True,
+                "deleted": False,
+                "usagesFound": len(usages),
+                "usages": usages,
+                "handle": payload.get("handle") or str(uuid.uuid4()),
+            }
+            return 200, body, self._search_phases(payload, write=False)
+        body = {"success": True, "deleted": True, "usagesFound": 0, "usages": None}
+        return 200, body, self._search_phases(payload, write=True)
+
+    def _safe_delete_bulk(self, payload: dict[str, Any]) -> BridgeResult:
+        # Every other candidate is used; a scope holds four top-level functions
+        candidates = payload.get("candidates") or [
+            {"file": f"{payload['scope']}/module_{i}.py", "line": 1} for i in range(4)
+        ]
+        deleted: list[dict[str, Any]] = []
+        blocked: list[dict[str, Any]] = []
+        removed: list[dict[str, Any]] = []
+        for i, candidate in enumerate(candidates):
+            name = f"unused_{i}"
+            file = candidate.get("file") or f"pkg/handle_{candidate.get('handle')}.py"
+            line = candidate.get("line") or 1
+            if i % 2 and self.usages_per_symbol:
+                usages = self._usages(payload)
+                blocked.append(
+                    {
+                        "name": name,
+                        "file": file,
+                        "line": line,
+                        "usagesFound": len(usages),
+                        "usages": usages[: payload.get("maxUsages", 10)],
+                        "handle": str(uuid.uuid4()),
+                    }
+                )
+            else:
+                deleted.append({"name": name, "file": file, "line": line})
+                removed.append(
+                    {"file": file, "line": line, "oldText": f"def {name}():", "newText": ""}
+                )
+        body: dict[str, Any] = {
+            "success": True,
+            "deleted": deleted,
+            "blocked": blocked,
+            "preview": bool(payload.get("preview", False)),
+        }
+        if not body["preview"] and removed:
+            files: list[str] = list(dict.fromkeys(change["file"] for change in removed))
+            self.emit("files-changed", project=payload["project"], files=files)
+            body.update(filesModified=len(files), files=self._digests(payload, removed))
+        return 200, body, self._search_phases(payload, write=not body["preview"])
+
+    def _find_usages(self, payload: dict[str, Any]) -> BridgeResult:
+        usages = self._usages(payload)
+        position = (payload.get("file"), payload.get("line"), payload.get("column"))
+        symbol = self.symbols.get(position, "symbol")
+        token = str(uuid.uuid4())
+        with self._lock:
+            self._tokens[token] = symbol
+            # Like the bridge, a token only counts for the symbol it was issued for
+            since = self._tokens.get(payload.get("sinceToken") or "")
+        body: dict[str, Any] = {
+            "success": True,
+            "symbol": symbol,
+            "usages": usages,
+            "totalCount": len(usages),
+            "handle": payload.get("handle") or str(uuid.uuid4()),
+            "token": token,
+        }
+        if since == symbol:
+            # Nothing changes between calls on the stub, so the delta is empty
+            body.update(usages=[], incremental=True, added=[], removed=[])
+        elif payload.get("format") == "columnar":
+            body.update(usages=[], usageColumns=encode_usages(usages))
+        phases = {"resolve": 0.2, "search": 0.01 * self.usages_per_symbol + 0.1}
+        return 200, body, phases
+
+    def _find_usages_all_projects(self, payload: dict[str, Any]) -> BridgeResult:
+        results = []
+        for project in payload.get("projects") or self.projects:
+            entry: dict[str, Any] = {"project": project}
+            if project not in self.projects:
+                entry["error"] = "Project not open in PyCharm"
+            elif project in self.indexing:
+                entry["error"] = "Indexing in progress"
+            elif project in self.timing_out:
+                entry.update(
+                    timedOut=True, error=f"Still searching after {payload['timeoutMs']} ms"
+                )
+            else:
+                usages = self._usages({**payload, "project": project})
+                entry.update(usages=usages, totalCount=len(usages))
+                if payload.get("format") == "columnar":
+                    entry.update(usages=[], usageColumns=encode_usages(usages))
+            results.append(entry)
+        body = {
+            "success": True,
+            "symbol": "symbol",
+            "qualifiedName": "pkg.module.symbol",
+            "projects": results,
+            "totalCount": sum(entry.get("totalCount", 0) for entry in results),
+            "handle": payload.get("handle") or str(uuid.uuid4()),
+        }
+        searched = sum("error" not in entry for entry in results)
+        phases = {"resolve": 0.2, "search": 0.01 * self.usages_per_symbol * searched + 0.1}
+        return 200, body, phases
+
+
+def _has_target(payload: dict[str, Any]) -> bool:
+    return "handle" in payload or all(key in payload for key in ("file", "line", "column"))
+
+
+# Old and new text of the lines each kind of plan step changes
+_PLAN_TEXTS: dict[str, tuple[str, str | None]] = {
+    "rename": ("symbol", None),
+    "move": ("import from source", "import from target"),
+    "inline": ("symbol", "expression"),
+    "change-signature": ("symbol(a)", "symbol(a, b)"),
+}
+
+
+def _error(status: int, error: str, details: str) -> BridgeResult:
+    return status, {"success": False, "error": error, "details": details}, {}
+
+
+_POST_HANDLERS = {
+    "/refactor/rename": StubBridge._rename,
+    "/refactor/move": StubBridge._move,
+    "/refactor/move-bulk": StubBridge._move_bulk,
+    "/refactor/extract-method": StubBridge._extract_method,
+    "/refactor/extract-variable": StubBridge._extract_variable,
+    "/refactor/extract-ranges": StubBridge._extract_ranges,
+    "/refactor/inline": StubBridge._inline,
+    "/refactor/change-signature": StubBridge._change_signature,
+    "/refactor/safe-delete": StubBridge._safe_delete,
+    "/refactor/safe-delete-bulk": StubBridge._safe_delete_bulk,
+    "/refactor/apply-plan": StubBridge._apply_plan,
+    "/find/usages": StubBridge._find_usages,
+    "/find/usages/all-projects": StubBridge._find_usages_all_projects,
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Adapts HTTP requests to :meth:`StubBridge.handle`."""
+
+    bridge: StubBridge
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path == "/events":
+            self._stream_events()
+        else:
+            self._dispatch("GET", None)
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        self._dispatch("POST", json.loads(raw) if raw else None)
+
+    def _dispatch(self, method: str, payload: dict[str, Any] | None) -> None:
+        deadline = self.headers.get(DEADLINE_HEADER)
+        status, body, phases = self.bridge.handle(
+            method, self.path, payload, int(deadline) if deadline else None
+        )
+
+        started = time.perf_counter()
+        encoded = json.dumps(body).encode()
+        phases = {**phases, "serialize": (time.perf_counter() - started) * 1000}
+
+        self.send_response(status)
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.send_header(
+            "Server-Timing",
+            ", ".join(f"{name};dur={duration:.3f}" for name, duration in phases.items()),
+        )
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def _stream_events(self) -> None:
+        subscriber, connected = self.bridge._subscribe()
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            event: dict[str, Any] | None = connected
+            while event is not None:
+                self.wfile.write(
+                    f"id: {event['id']}\nevent: {event['type']}\n"
+                    f"data: {json.dumps(event)}\n\n".encode()
+                )
+                self.wfile.flush()
+                event = self._next_event(subscriber)
+        except OSError:
+            pass
+        finally:
+            self.bridge._unsubscribe(subscriber)
+
+    def _next_event(self, subscriber: queue.Queue[dict[str, Any] | None]) -> dict[str, Any] | None:
+        """Wait for the next event, writing a keep-alive comment while idle."""
+        while True:
+            try:
+                return subscriber.get(timeout=KEEPALIVE_INTERVAL)
+            except queue.Empty:
+                self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def main() -> None:
+    """Run the stub bridge until interrupted."""
+    parser = argparse.ArgumentParser(description="Local stand-in for the PyCharm bridge")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9876)
+    parser.add_argument("--project", action="append", dest="projects")
+    parser.add_argument("--usages", type=int, default=3, help="usages per symbol")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    bridge = StubBridge(
+        host=args.host,
+        port=args.port,
+        projects=args.projects,
+        usages_per_symbol=args.usages,
+        latency_ms=args.latency_ms,
+    ).start()
+    print(f"Stub bridge listening on {bridge.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bridge.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Per-endpoint request timeouts learned from observed latency.
+
+Instead of one fixed timeout for everything from ``/health`` to a
+project-wide move, :class:`AdaptiveTimeouts` gives each endpoint the p99 of
+its recent round trips, as recorded in :mod:`pycharm_mcp.metrics`, times a
+factor, clamped between a floor and a ceiling. Until an endpoint has enough
+samples it gets a fixed initial timeout. Answers from the result cache are
+recorded in their own series, so they do not make an endpoint look faster
+than the bridge is, and so are incremental usage searches, which are much
+faster than full ones. A request that times out adds its wait to the
+series and raises the endpoint's timeout, so a timeout learned from fast
+calls can grow back. Like the latency, timeouts are recorded in the shared
+metrics, so the raise carries over to every client, not just the one whose
+request timed out. Refactorings, which write, never get less than the
+initial timeout.
+
+The client sends the timeout it chose to the bridge in the
+``X-Deadline-Ms`` header, so the bridge can stop work it cannot finish
+before the client gives up. Wrap calls in :func:`timeout_override` to give
+them a timeout of their own.
+"""
+
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from pycharm_mcp.metrics import ClientMetrics, metrics
+from pycharm_mcp.options import env_float
+
+DEADLINE_HEADER = "X-Deadline-Ms"
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_FACTOR = 3.0
+DEFAULT_FLOOR = 2.0
+DEFAULT_CEILING = 300.0
+# Round trips an endpoint needs before its p99 is trusted
+MIN_SAMPLES = 20
+# Initial timeouts of endpoints that should answer at once
+_INITIAL = {"/health": 5.0, "/projects": 5.0}
+# Endpoints that write; they are never given less than the initial timeout
+_WRITE_PREFIX = "/refactor/"
+
+# Timeout of the enclosed calls, overriding the learned ones; see timeout_override()
+request_timeout: ContextVar[float | None] = ContextVar("request_timeout", default=None)
+
+
+@contextmanager
+def timeout_override(seconds: float) -> Iterator[None]:
+    """Give the bridge requests of the enclosed calls a timeout of ``seconds``."""
+    token = request_timeout.set(seconds)
+    try:
+        yield
+    finally:
+        request_timeout.reset(token)
+
+
+def series_name(path: str, json_data: Mapping[str, Any] | None = None) -> str:
+    """Metrics series of a request to ``path``, whose latency its timeout follows.
+
+    Incremental usage searches, sent with a ``sinceToken``, are recorded as
+    ``incremental:/find/usages`` apart from full ones.
+    """
+    if path == "/find/usages" and json_data and json_data.get("sinceToken"):
+        return f"incremental:{path}"
+    return path
+
+
+class AdaptiveTimeouts:
+    """Timeouts per endpoint from the p99 of its round trips in ``metrics``.
+
+    ``factor``, ``floor`` and ``ceiling`` default to ``PYCHARM_TIMEOUT_FACTOR``,
+    ``PYCHARM_TIMEOUT_FLOOR`` and ``PYCHARM_TIMEOUT_CEILING``.
+    """
+
+    def __init__(
+        self,
+        client_metrics: ClientMetrics | None = None,
+        factor: float | None = None,
+        floor: float | None = None,
+        ceiling: float | None = None,
+        initial: float = DEFAULT_TIMEOUT,
+        min_samples: int = MIN_SAMPLES,
+    ) -> None:
+        self.metrics = client_metrics if client_metrics is not None else metrics
+        self.factor = (
+            env_float("PYCHARM_TIMEOUT_FACTOR", DEFAULT_FACTOR) if factor is None else factor
+        )
+        self.floor = env_float("PYCHARM_TIMEOUT_FLOOR", DEFAULT_FLOOR) if floor is None else floor
+        self.ceiling = (
+            env_float("PYCHARM_TIMEOUT_CEILING", DEFAULT_CEILING) if ceiling is None else ceiling
+        )
+        self.initial = initial
+        self.min_samples = min_samples
+
+    def timeout_for(self, series: str) -> float:
+        """Seconds to wait for a request recorded as ``series``; see :func:`series_name`."""
+        stats = self.metrics.get(series)
+        if stats is None or stats.count < self.min_samples:
+            timeout = _INITIAL.get(series, self.initial)
+        else:
+            timeout = stats.percentile(0.99) / 1000 * self.factor
+        floor = self.floor
+        if series.startswith(_WRITE_PREFIX):
+            floor = max(floor, self.initial)
+        timed_out = self.metrics.get(f"timeout:{series}")
+        if timed_out is not None:
+            floor = max(floor, timed_out.max_ms / 1000 * 2)
+        return min(max(timeout, floor), self.ceiling)
+
+    def timed_out(self, series: str, waited_s: float) -> None:
+        """Record that a request recorded as ``series`` got no answer in ``waited_s``.
+
+        The wait is recorded as ``timeout:<series>``, and joins the series as a
+        lower bound of that request's latency. The series is given at least
+        twice the longest such wait from then on.
+        """
+        self.metrics.series(f"timeout:{series}").add(waited_s * 1000)
+        self.metrics.series(series).add(waited_s * 1000)
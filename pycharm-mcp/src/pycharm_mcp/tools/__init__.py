@@ -1,10 +1,11 @@
 """MCP tools for PyCharm refactoring."""
 
-from pycharm_mcp.tools.delete import safe_delete
-from pycharm_mcp.tools.extract import extract_method, extract_variable
-from pycharm_mcp.tools.find import find_usages
+from pycharm_mcp.tools.delete import safe_delete, safe_delete_bulk
+from pycharm_mcp.tools.extract import extract_method, extract_ranges, extract_variable
+from pycharm_mcp.tools.find import find_usages, find_usages_all_projects
 from pycharm_mcp.tools.inline import inline_element
-from pycharm_mcp.tools.move import move_element
+from pycharm_mcp.tools.move import move_element, move_elements
+from pycharm_mcp.tools.plan import apply_plan
 from pycharm_mcp.tools.projects import list_projects
 from pycharm_mcp.tools.rename import rename_symbol
 from pycharm_mcp.tools.signature import change_signature
@@ -13,10 +14,15 @@ __all__ = [
     "list_projects",
     "rename_symbol",
     "move_element",
+    "move_elements",
     "extract_method",
     "extract_variable",
+    "extract_ranges",
     "inline_element",
     "change_signature",
     "safe_delete",
+    "safe_delete_bulk",
     "find_usages",
+    "find_usages_all_projects",
+    "apply_plan",
 ]
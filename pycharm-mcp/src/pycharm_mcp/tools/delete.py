@@ -1,15 +1,27 @@
 """Tool for safe deletion in PyCharm."""
 
+from mcp.types import CallToolResult
+
 from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.models import DeleteCandidate
+from pycharm_mcp.options import DocumentSync, FileContents, TextOutput
+from pycharm_mcp.positions import check_position
+from pycharm_mcp.registry import registry
+from pycharm_mcp.tools.formatting import file_lines, tool_error, tool_result, verification_lines
+from pycharm_mcp.verify import verify_changes
 
 
 async def safe_delete(
-    project_path: str,
-    file_path: str,
-    line: int,
-    column: int,
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
     search_for_usages: bool = True,
-) -> str:
+    handle: str | None = None,
+    document_sync: DocumentSync | None = None,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> CallToolResult:
     """
     Delete an element only if it has no usages.
 
@@ -18,31 +30,49 @@ async def safe_delete(
     reported.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the element
         line: Line number where the element is defined (1-indexed)
         column: Column number (1-indexed)
         search_for_usages: Check for usages before deleting (default: True)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of blocking usages, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Confirmation of deletion or list of usages that prevent deletion.
     """
     client = PyCharmClient()
     try:
+        project_path = await registry.resolve_project(project_path, file_path)
+        if handle is None:
+            check_position(project_path, file_path, line, column)
+
         response = await client.safe_delete(
             project=project_path,
             file=file_path,
             line=line,
             column=column,
             search_for_usages=search_for_usages,
+            sync=document_sync,
+            handle=handle,
         )
 
         if response.deleted:
-            return "Successfully deleted element (no usages found)."
+            return tool_result(
+                response, ["Successfully deleted element (no usages found)."], text, debug_timings
+            )
 
         lines = [f"Cannot delete: {response.usages_found} usage(s) found:", ""]
+        if response.handle:
+            lines.insert(1, f"Element handle: {response.handle}")
 
-        if response.usages:
+        if text == "full" and response.usages:
             for usage in response.usages[:15]:
                 access_type = "write" if usage.is_write_access else "read"
                 lines.append(f"  • {usage.file}:{usage.line}:{usage.column} ({access_type})")
@@ -51,12 +81,114 @@ async def safe_delete(
 
             if len(response.usages) > 15:
                 lines.append(f"  ... and {len(response.usages) - 15} more usages")
+            lines.append("")
 
-        lines.append("")
         lines.append("Remove or update these usages before deleting.")
 
-        return "\n".join(lines)
+        return tool_result(response, lines, text, debug_timings)
+    except PyCharmBridgeError as e:
+        raise tool_error(e) from e
+    finally:
+        await client.close()
+
+
+async def safe_delete_bulk(
+    project_path: str | None = None,
+    *,
+    candidates: list[DeleteCandidate] | None = None,
+    scope: str | None = None,
+    preview: bool = False,
+    max_usages: int = 10,
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> CallToolResult:
+    """
+    Delete every unused symbol among many candidates in one sweep.
+
+    Usages of all candidates are counted in one pass over the project, and
+    the unused ones are deleted as one undoable command. A candidate used
+    only by other deleted candidates is deleted too. Candidates still in use
+    are kept and reported with their usages.
+
+    Args:
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      scope or file of the first candidate, or the only open project
+        candidates: Symbols to consider, each a 'handle' or 'file', 'line' and 'column'
+        scope: Instead of candidates, a file or directory whose top-level functions
+               and classes are considered, except dunders, tests, decorated ones and
+               names in __all__
+        preview: If True, report what would be deleted without deleting (default: False)
+        max_usages: Usages to return per kept candidate (default: 10)
+        document_sync: Which unsaved editor documents to save first: 'all', only the
+                       involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of deleted and kept symbols, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
+
+    Returns:
+        The deleted symbols, and the kept ones with the usages that keep them.
+    """
+    # A sweep over many symbols; queue it behind interactive calls
+    client = PyCharmClient(priority="background")
+    try:
+        first = candidates[0] if candidates else None
+        project_path = await registry.resolve_project(
+            project_path, scope or (first.file if first else None)
+        )
+        for candidate in candidates or []:
+            if candidate.handle is None:
+                check_position(project_path, candidate.file, candidate.line, candidate.column)
+
+        response = await client.safe_delete_bulk(
+            project=project_path,
+            candidates=candidates,
+            scope=scope,
+            preview=preview,
+            max_usages=max_usages,
+            sync=document_sync,
+            contents=file_contents,
+        )
+
+        verb = "Would delete" if response.preview else "Deleted"
+        lines = [
+            f"{verb} {len(response.deleted)} unused symbols; "
+            f"kept {len(response.blocked)} that are still used."
+        ]
+        if not response.preview and response.deleted:
+            lines.append(f"  Files modified: {response.files_modified}")
+
+        if text == "full":
+            if response.deleted:
+                lines.append("")
+                lines.append("Deleted:" if not response.preview else "To delete:")
+                for symbol in response.deleted:
+                    lines.append(f"  • {symbol.name} ({symbol.file}:{symbol.line})")
+            if response.blocked:
+                lines.append("")
+                lines.append("Kept:")
+                for blocked in response.blocked:
+                    lines.append(
+                        f"  • {blocked.name} ({blocked.file}:{blocked.line}): "
+                        f"{blocked.usages_found} usage(s)"
+                    )
+                    for usage in blocked.usages[:3]:
+                        lines.append(f"      {usage.file}:{usage.line}: {usage.text.strip()}")
+            lines.extend(file_lines(response.files))
+
+        if verify and not response.preview:
+            response.verification = await verify_changes(project_path, response)
+            lines.extend(verification_lines(response.verification))
+
+        return tool_result(response, lines, text, debug_timings)
     except PyCharmBridgeError as e:
-        return f"Error: {e.message}\n{e.details or ''}"
+        raise tool_error(e) from e
     finally:
         await client.close()
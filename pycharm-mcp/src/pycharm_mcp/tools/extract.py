@@ -1,10 +1,19 @@
 """Tools for extracting methods and variables in PyCharm."""
 
+from mcp.types import CallToolResult
+
 from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.models import ExtractRange
+from pycharm_mcp.options import DocumentSync, FileContents, TextOutput
+from pycharm_mcp.positions import check_range
+from pycharm_mcp.registry import registry
+from pycharm_mcp.tools.formatting import file_lines, tool_error, tool_result, verification_lines
+from pycharm_mcp.verify import verify_changes
 
 
 async def extract_method(
-    project_path: str,
+    project_path: str | None = None,
+    *,
     file_path: str,
     start_line: int,
     start_column: int,
@@ -12,7 +21,10 @@ async def extract_method(
     end_column: int,
     method_name: str,
     preview: bool = False,
-) -> str:
+    document_sync: DocumentSync | None = None,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> CallToolResult:
     """
     Extract selected code into a new method.
 
@@ -20,7 +32,8 @@ async def extract_method(
     selected code's dependencies.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the code to extract
         start_line: Starting line of the selection (1-indexed)
         start_column: Starting column of the selection (1-indexed)
@@ -28,12 +41,20 @@ async def extract_method(
         end_column: Ending column of the selection (1-indexed)
         method_name: Name for the new method
         preview: If True, show what would change without applying (default: False)
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        text: Text returned next to the structured result: a 'summary' or 'none';
+              'full' is the same as 'summary' here (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Summary of the extraction including the new method's signature.
     """
     client = PyCharmClient()
     try:
+        project_path = await registry.resolve_project(project_path, file_path)
+        check_range(project_path, file_path, start_line, start_column, end_line, end_column)
+
         response = await client.extract_method(
             project=project_path,
             file=file_path,
@@ -43,6 +64,7 @@ async def extract_method(
             end_column=end_column,
             method_name=method_name,
             preview=preview,
+            sync=document_sync,
         )
 
         if preview:
@@ -61,15 +83,16 @@ async def extract_method(
         if response.return_type:
             lines.append(f"  Return type: {response.return_type}")
 
-        return "\n".join(lines)
+        return tool_result(response, lines, text, debug_timings)
     except PyCharmBridgeError as e:
-        return f"Error: {e.message}\n{e.details or ''}"
+        raise tool_error(e) from e
     finally:
         await client.close()
 
 
 async def extract_variable(
-    project_path: str,
+    project_path: str | None = None,
+    *,
     file_path: str,
     start_line: int,
     start_column: int,
@@ -78,7 +101,10 @@ async def extract_variable(
     variable_name: str,
     replace_all: bool = True,
     preview: bool = False,
-) -> str:
+    document_sync: DocumentSync | None = None,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> CallToolResult:
     """
     Extract an expression into a variable.
 
@@ -86,7 +112,8 @@ async def extract_variable(
     all identical occurrences will be replaced.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the expression
         start_line: Starting line of the expression (1-indexed)
         start_column: Starting column of the expression (1-indexed)
@@ -95,12 +122,20 @@ async def extract_variable(
         variable_name: Name for the new variable
         replace_all: Replace all identical occurrences (default: True)
         preview: If True, show what would change without applying (default: False)
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        text: Text returned next to the structured result: a 'summary' or 'none';
+              'full' is the same as 'summary' here (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Summary of the extraction including occurrences replaced.
     """
     client = PyCharmClient()
     try:
+        project_path = await registry.resolve_project(project_path, file_path)
+        check_range(project_path, file_path, start_line, start_column, end_line, end_column)
+
         response = await client.extract_variable(
             project=project_path,
             file=file_path,
@@ -111,6 +146,7 @@ async def extract_variable(
             variable_name=variable_name,
             replace_all=replace_all,
             preview=preview,
+            sync=document_sync,
         )
 
         if preview:
@@ -122,8 +158,86 @@ async def extract_variable(
         lines.append(f"  Variable line: {response.variable_line}")
         lines.append(f"  Occurrences replaced: {response.occurrences_replaced}")
 
-        return "\n".join(lines)
+        return tool_result(response, lines, text, debug_timings)
+    except PyCharmBridgeError as e:
+        raise tool_error(e) from e
+    finally:
+        await client.close()
+
+
+async def extract_ranges(
+    project_path: str | None = None,
+    *,
+    file_path: str,
+    ranges: list[ExtractRange],
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> CallToolResult:
+    """
+    Apply many method and variable extractions to one file in one step.
+
+    All ranges are given in the file's current coordinates; there is no need
+    to re-read the file or shift later ranges by hand. They are applied from
+    the bottom of the file up as one undoable command, and the new location
+    of each extracted method or variable is returned.
+
+    Args:
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
+        file_path: Path to the file containing the code to extract
+        ranges: Non-overlapping extractions, each with a 'kind' ('method' or 'variable'),
+                'startLine', 'startColumn', 'endLine', 'endColumn' (1-indexed), the new
+                'name' and, for variables, 'replaceAll' (default: True)
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides the file's hash and size, also return its new 'content'
+                       or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing with the file digest, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
+
+    Returns:
+        Each extraction's new method or variable and the line it ended up on.
+    """
+    client = PyCharmClient()
+    try:
+        project_path = await registry.resolve_project(project_path, file_path)
+        for r in ranges:
+            check_range(
+                project_path, file_path, r.start_line, r.start_column, r.end_line, r.end_column
+            )
+
+        response = await client.extract_ranges(
+            project=project_path,
+            file=file_path,
+            ranges=ranges,
+            sync=document_sync,
+            contents=file_contents,
+        )
+
+        lines = [f"Successfully applied {len(response.extracted)} extractions:", ""]
+        lines.append(f"  File: {response.file}")
+        for extracted in response.extracted:
+            line = f"  • {extracted.kind} '{extracted.name}': line {extracted.line}"
+            if extracted.line != extracted.start_line:
+                line += f" (range sent at line {extracted.start_line})"
+            lines.append(line)
+
+        if text == "full":
+            lines.extend(file_lines(response.files))
+
+        if verify:
+            response.verification = await verify_changes(project_path, response)
+            lines.extend(verification_lines(response.verification))
+
+        return tool_result(response, lines, text, debug_timings)
     except PyCharmBridgeError as e:
-        return f"Error: {e.message}\n{e.details or ''}"
+        raise tool_error(e) from e
     finally:
         await client.close()
@@ -1,14 +1,46 @@
 """Tool for finding usages in PyCharm."""
 
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from mcp.types import CallToolResult
+
 from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.columnar import UsageRow
+from pycharm_mcp.events import stream
+from pycharm_mcp.models import BridgeEvent, FindUsagesResponse, UsageInfo
+from pycharm_mcp.options import TextOutput
+from pycharm_mcp.positions import check_position
+from pycharm_mcp.registry import registry
+from pycharm_mcp.tools.formatting import tool_error, tool_result
+
+# Previous results by query, so repeat checks only fetch what changed
+_MAX_CACHED_RESULTS = 32
+_cached_results: OrderedDict[
+    tuple[str, str | None, int | None, int | None, str | None], FindUsagesResponse
+] = OrderedDict()
+
+
+def _on_event(event: BridgeEvent) -> None:
+    """Forget results for a closed project; their tokens died with it."""
+    if event.type == "project-closed":
+        for key in [key for key in _cached_results if key[0] == event.project]:
+            del _cached_results[key]
+
+
+stream.add_handler(_on_event)
 
 
 async def find_usages(
-    project_path: str,
-    file_path: str,
-    line: int,
-    column: int,
-) -> str:
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
+    incremental: bool = True,
+    handle: str | None = None,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> CallToolResult:
     """
     Find all usages of a symbol across the project.
 
@@ -16,48 +48,167 @@ async def find_usages(
     understanding how a symbol is used throughout the codebase.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the symbol
         line: Line number where the symbol is located (1-indexed)
         column: Column number (1-indexed)
+        incremental: Re-search only files changed since the last identical query (default: True)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing grouped by file, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         List of all usages with file locations and context.
     """
     client = PyCharmClient()
     try:
-        response = await client.find_usages(
+        project_path = await registry.resolve_project(project_path, file_path)
+        key = (project_path, file_path, line, column, handle)
+        previous = _cached_results.get(key) if incremental else None
+
+        if handle is None:
+            check_position(project_path, file_path, line, column)
+
+        delta = await client.find_usages(
             project=project_path,
             file=file_path,
             line=line,
             column=column,
+            since_token=previous.token if previous is not None else None,
+            handle=handle,
         )
 
-        lines = [f"Usages of '{response.symbol}': {response.total_count} found", ""]
+        response = previous.apply_delta(delta) if previous is not None else delta
+        if response.token is not None:
+            _cached_results[key] = response
+            _cached_results.move_to_end(key)
+            while len(_cached_results) > _MAX_CACHED_RESULTS:
+                _cached_results.popitem(last=False)
 
-        # Group by file
-        usages_by_file: dict[str, list[tuple[int, int, str, bool]]] = {}
-        for usage in response.usages:
-            if usage.file not in usages_by_file:
-                usages_by_file[usage.file] = []
-            usages_by_file[usage.file].append(
-                (usage.line, usage.column, usage.text, usage.is_write_access)
+        lines = [f"Usages of '{response.symbol}': {response.total_count} found"]
+        if delta.incremental:
+            lines.append(
+                f"(incremental: {len(delta.added)} added, {len(delta.removed)} removed "
+                "since last check)"
             )
-
-        for file_path, usages in usages_by_file.items():
-            lines.append(f"📄 {file_path}:")
-            for line_num, col, text, is_write in sorted(usages, key=lambda x: x[0]):
-                access_type = "📝" if is_write else "👁️"
-                lines.append(f"  {access_type} Line {line_num}:{col}")
-                # Show first line of context only
-                context_line = text.split("\n")[0].strip()
-                if len(context_line) > 80:
-                    context_line = context_line[:77] + "..."
-                lines.append(f"     {context_line}")
+        if response.handle:
+            lines.append(f"Element handle: {response.handle}")
+        if text == "full":
             lines.append("")
+            lines.extend(_listing(response.usages))
+
+        return tool_result(response, lines, text, debug_timings)
+    except PyCharmBridgeError as e:
+        raise tool_error(e) from e
+    finally:
+        await client.close()
+
+
+async def find_usages_all_projects(
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
+    projects: list[str] | None = None,
+    timeout: float = 20.0,
+    handle: str | None = None,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> CallToolResult:
+    """
+    Find all usages of a symbol across several projects open in PyCharm.
+
+    The symbol is resolved once in its own project, then every open project, or
+    the chosen ones, is searched concurrently. Use this when shared libraries
+    and the code using them are open as separate projects. A project that
+    times out or cannot be searched is reported, and the others still are.
+
+    Args:
+        project_path: Absolute path to the project defining the symbol; if omitted,
+                      inferred from an absolute file_path or the only open project
+        file_path: Path to the file containing the symbol
+        line: Line number where the symbol is located (1-indexed)
+        column: Column number (1-indexed)
+        projects: Paths of the projects to search (default: every open project)
+        timeout: Seconds to wait for each project's search (default: 20)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing grouped by project and file, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
+
+    Returns:
+        Usages with file locations and context, grouped by project.
+    """
+    # Searches every open project; queue it behind interactive calls
+    client = PyCharmClient(priority="background")
+    try:
+        project_path = await registry.resolve_project(project_path, file_path)
+        if handle is None:
+            check_position(project_path, file_path, line, column)
+
+        response = await client.find_usages_all_projects(
+            project=project_path,
+            file=file_path,
+            line=line,
+            column=column,
+            handle=handle,
+            projects=projects,
+            timeout=timeout,
+        )
 
-        return "\n".join(lines)
+        lines = [
+            f"Usages of '{response.qualified_name or response.symbol}' in "
+            f"{len(response.projects)} projects: {response.total_count} found"
+        ]
+        for result in response.projects:
+            if result.error is not None:
+                status = "timed out" if result.timed_out else f"failed: {result.error}"
+                lines.append(f"  {result.project}: {status}")
+            else:
+                lines.append(f"  {result.project}: {result.total_count} usages")
+        if response.handle:
+            lines.append(f"Element handle: {response.handle}")
+        if text == "full":
+            for result in response.projects:
+                if result.usages:
+                    lines.append("")
+                    lines.append(f"📁 {result.project}:")
+                    lines.extend(_listing(result.usages))
+
+        return tool_result(response, lines, text, debug_timings)
     except PyCharmBridgeError as e:
-        return f"Error: {e.message}\n{e.details or ''}"
+        raise tool_error(e) from e
     finally:
         await client.close()
+
+
+def _listing(usages: Iterable[UsageInfo | UsageRow]) -> list[str]:
+    """Usages grouped by file, one entry with its context line per usage."""
+    lines: list[str] = []
+
+    # Group by file
+    usages_by_file: dict[str, list[tuple[int, int, str, bool]]] = {}
+    for usage in usages:
+        if usage.file not in usages_by_file:
+            usages_by_file[usage.file] = []
+        usages_by_file[usage.file].append(
+            (usage.line, usage.column, usage.text, usage.is_write_access)
+        )
+
+    for file_path, file_usages in usages_by_file.items():
+        lines.append(f"📄 {file_path}:")
+        for line_num, col, text, is_write in sorted(file_usages, key=lambda x: x[0]):
+            access_type = "📝" if is_write else "👁️"
+            lines.append(f"  {access_type} Line {line_num}:{col}")
+            # Show first line of context only
+            context_line = text.split("\n")[0].strip()
+            if len(context_line) > 80:
+                context_line = context_line[:77] + "..."
+            lines.append(f"     {context_line}")
+        lines.append("")
+
+    return lines
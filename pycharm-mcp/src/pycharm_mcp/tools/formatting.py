@@ -0,0 +1,86 @@
+"""Shared output helpers for the refactoring tools."""
+
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.types import CallToolResult, ContentBlock, TextContent
+
+from pycharm_mcp.client import PyCharmBridgeError
+from pycharm_mcp.models import BridgeResponse, FileDigest, RequestTimings, Verification
+from pycharm_mcp.options import TextOutput
+
+LOCAL_BACKEND_NOTE = (
+    "Note: answered by the local engine, not PyCharm. Symbols are matched by name "
+    "and scope, so same-named attributes of unrelated classes are included."
+)
+
+
+def append_timings(text: str, timings: RequestTimings | None, enabled: bool) -> str:
+    """Append the per-phase timing breakdown to a tool result if requested."""
+    if not enabled or timings is None:
+        return text
+    return "\n".join([text, "", *timings.format_lines()])
+
+
+def mark_backend(text: str, response: BridgeResponse) -> str:
+    """Prefix a tool result with a note if the local engine produced it."""
+    if response.backend != "local":
+        return text
+    return "\n".join([LOCAL_BACKEND_NOTE, "", text])
+
+
+def file_lines(files: list[FileDigest]) -> list[str]:
+    """List the digests of modified files, with any diffs requested."""
+    if not files:
+        return []
+    lines = ["", "Files:"]
+    for digest in files:
+        lines.append(f"  • {digest.file} ({digest.size} bytes, sha256 {digest.sha256[:12]})")
+    diffs = [digest.diff for digest in files if digest.diff]
+    if diffs:
+        lines.extend(["", *(diff.rstrip("\n") for diff in diffs)])
+    return lines
+
+
+def verification_lines(verification: Verification | None, limit: int = 20) -> list[str]:
+    """Summarize the checks of modified files, listing up to ``limit`` problems."""
+    if verification is None:
+        return []
+    if verification.skipped is not None:
+        return ["", f"Not verified: {verification.skipped}"]
+    checked = f"Verified {verification.files_checked} files in {verification.elapsed_ms:.0f} ms"
+    problems = verification.diagnostics
+    if not problems:
+        return ["", f"{checked}: no problems found"]
+    lines = ["", f"{checked}: {len(problems)} problems"]
+    for problem in problems[:limit]:
+        lines.append(
+            f"  • {problem.file}:{problem.line}:{problem.column} {problem.kind}: {problem.message}"
+        )
+    if len(problems) > limit:
+        lines.append(f"  ... and {len(problems) - limit} more")
+    return lines
+
+
+def tool_result(
+    response: BridgeResponse, lines: list[str], text: TextOutput, debug_timings: bool
+) -> CallToolResult:
+    """Return ``response`` as the tool's structured result, with ``lines`` as its text.
+
+    The timings are only part of the structured result when they were asked for.
+    """
+    structured = response.model_dump(
+        mode="json", by_alias=True, exclude=None if debug_timings else {"timings"}
+    )
+    content: list[ContentBlock] = []
+    if text != "none":
+        rendered = append_timings(
+            mark_backend("\n".join(lines), response), response.timings, debug_timings
+        )
+        content.append(TextContent(type="text", text=rendered))
+    return CallToolResult(content=content, structuredContent=structured)
+
+
+def tool_error(error: PyCharmBridgeError) -> ToolError:
+    """Turn a bridge error into the error result of a tool call."""
+    if error.details:
+        return ToolError(f"{error.message}\n{error.details}")
+    return ToolError(error.message)
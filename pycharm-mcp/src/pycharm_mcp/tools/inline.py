@@ -1,15 +1,28 @@
 """Tool for inlining elements in PyCharm."""
 
+from mcp.types import CallToolResult
+
 from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.options import DocumentSync, FileContents, TextOutput
+from pycharm_mcp.positions import check_position
+from pycharm_mcp.registry import registry
+from pycharm_mcp.tools.formatting import file_lines, tool_error, tool_result, verification_lines
+from pycharm_mcp.verify import verify_changes
 
 
 async def inline_element(
-    project_path: str,
-    file_path: str,
-    line: int,
-    column: int,
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
     preview: bool = False,
-) -> str:
+    handle: str | None = None,
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> CallToolResult:
     """
     Inline a variable or method (replace usages with the definition).
 
@@ -17,33 +30,55 @@ async def inline_element(
     For methods, each call is replaced with the method body.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the element
         line: Line number where the element is defined (1-indexed)
         column: Column number (1-indexed)
         preview: If True, show what would change without applying (default: False)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of changed lines, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Summary of the inline operation including usages replaced.
     """
     client = PyCharmClient()
     try:
+        project_path = await registry.resolve_project(project_path, file_path)
+        if handle is None:
+            check_position(project_path, file_path, line, column)
+
         response = await client.inline(
             project=project_path,
             file=file_path,
             line=line,
             column=column,
             preview=preview,
+            sync=document_sync,
+            handle=handle,
+            contents=file_contents,
         )
 
         if preview:
             lines = ["Preview: Inlining would affect:", ""]
+            if response.handle:
+                lines.append(f"  Element handle: {response.handle}")
         else:
             lines = ["Successfully inlined:", ""]
 
         lines.append(f"  Usages inlined: {response.usages_inlined}")
 
-        if response.changes:
+        if text == "full" and response.changes:
             lines.append("")
             lines.append("Changes:")
             for change in response.changes[:10]:
@@ -53,8 +88,15 @@ async def inline_element(
             if len(response.changes) > 10:
                 lines.append(f"  ... and {len(response.changes) - 10} more")
 
-        return "\n".join(lines)
+        if text == "full":
+            lines.extend(file_lines(response.files))
+
+        if verify and not preview:
+            response.verification = await verify_changes(project_path, response)
+            lines.extend(verification_lines(response.verification))
+
+        return tool_result(response, lines, text, debug_timings)
     except PyCharmBridgeError as e:
-        return f"Error: {e.message}\n{e.details or ''}"
+        raise tool_error(e) from e
     finally:
         await client.close()
@@ -1,16 +1,31 @@
 """Tool for moving elements between modules in PyCharm."""
 
+from mcp.types import CallToolResult
+
 from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.models import MoveElement
+from pycharm_mcp.options import DocumentSync, FileContents, TextOutput
+from pycharm_mcp.positions import check_position
+from pycharm_mcp.registry import registry
+from pycharm_mcp.tools.formatting import file_lines, tool_error, tool_result, verification_lines
+from pycharm_mcp.verify import verify_changes
 
 
 async def move_element(
-    project_path: str,
-    file_path: str,
-    line: int,
-    column: int,
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
+    *,
     target_file: str,
     preview: bool = False,
-) -> str:
+    handle: str | None = None,
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> CallToolResult:
     """
     Move a class, function, or variable to a different module.
 
@@ -18,18 +33,35 @@ async def move_element(
     specified position will be moved to the target file.
 
     Args:
-        project_path: Absolute path to the project
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the source file containing the element
         line: Line number where the element is defined (1-indexed)
         column: Column number (1-indexed)
         target_file: Path to the destination file
         preview: If True, show what would change without applying (default: False)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of changed lines, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Summary of the move operation including import updates.
     """
     client = PyCharmClient()
     try:
+        project_path = await registry.resolve_project(project_path, file_path)
+        if handle is None:
+            check_position(project_path, file_path, line, column)
+
         response = await client.move(
             project=project_path,
             file=file_path,
@@ -37,17 +69,22 @@ async def move_element(
             column=column,
             target_file=target_file,
             preview=preview,
+            sync=document_sync,
+            handle=handle,
+            contents=file_contents,
         )
 
         if preview:
             lines = [f"Preview: Moving to '{target_file}' would affect:", ""]
+            if response.handle:
+                lines.append(f"  Element handle: {response.handle}")
         else:
             lines = [f"Successfully moved to '{target_file}':", ""]
 
         lines.append(f"  Files modified: {response.files_modified}")
         lines.append(f"  Imports updated: {response.imports_updated}")
 
-        if response.changes:
+        if text == "full" and response.changes:
             lines.append("")
             lines.append("Changes:")
             for change in response.changes[:10]:
@@ -57,8 +94,107 @@ async def move_element(
             if len(response.changes) > 10:
                 lines.append(f"  ... and {len(response.changes) - 10} more")
 
-        return "\n".join(lines)
+        if text == "full":
+            lines.extend(file_lines(response.files))
+
+        if verify and not preview:
+            response.verification = await verify_changes(project_path, response)
+            lines.extend(verification_lines(response.verification))
+
+        return tool_result(response, lines, text, debug_timings)
+    except PyCharmBridgeError as e:
+        raise tool_error(e) from e
+    finally:
+        await client.close()
+
+
+async def move_elements(
+    project_path: str | None = None,
+    *,
+    elements: list[MoveElement],
+    target_file: str,
+    preview: bool = False,
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> CallToolResult:
+    """
+    Move many top-level classes and functions into one module together.
+
+    All elements move as one refactoring, and imports are rewritten in a
+    single pass, so each referencing file is updated once. Use this to split
+    a module instead of moving its members one at a time. The target file is
+    created if it does not exist.
+
+    Args:
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file of the first element or target_file, or the only open project
+        elements: Classes and functions to move, each a 'handle', a 'file', 'line' and
+                  'column', or a dotted 'qualifiedName' such as 'pkg.module.Name'
+        target_file: Path to the destination file
+        preview: If True, show what would change without applying (default: False)
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of changed lines, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
+
+    Returns:
+        The moved elements and the files whose imports were updated.
+    """
+    client = PyCharmClient()
+    try:
+        first = elements[0] if elements else None
+        project_path = await registry.resolve_project(
+            project_path, first.file if first and first.file else target_file
+        )
+        for element in elements:
+            if element.handle is None and element.qualified_name is None:
+                check_position(project_path, element.file, element.line, element.column)
+
+        response = await client.move_bulk(
+            project=project_path,
+            elements=elements,
+            target_file=target_file,
+            preview=preview,
+            sync=document_sync,
+            contents=file_contents,
+        )
+
+        verb = "Moving" if preview else "Moved"
+        lines = [f"{verb} {len(response.moved)} elements to '{target_file}':", ""]
+        for moved in response.moved:
+            lines.append(f"  • {moved.name} (from {moved.file}:{moved.line})")
+        lines.append("")
+        lines.append(f"  Files modified: {response.files_modified}")
+        lines.append(f"  Imports updated: {response.imports_updated}")
+
+        if text == "full" and response.changes:
+            lines.append("")
+            lines.append("Changes:")
+            for change in response.changes[:10]:
+                lines.append(f"  • {change.file}:{change.line}")
+                lines.append(f"    {change.old_text} → {change.new_text}")
+
+            if len(response.changes) > 10:
+                lines.append(f"  ... and {len(response.changes) - 10} more")
+
+        if text == "full":
+            lines.extend(file_lines(response.files))
+
+        if verify and not preview:
+            response.verification = await verify_changes(project_path, response)
+            lines.extend(verification_lines(response.verification))
+
+        return tool_result(response, lines, text, debug_timings)
     except PyCharmBridgeError as e:
-        return f"Error: {e.message}\n{e.details or ''}"
+        raise tool_error(e) from e
     finally:
         await client.close()
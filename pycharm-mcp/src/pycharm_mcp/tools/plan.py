@@ -0,0 +1,92 @@
+"""Tool for applying several refactorings as one IDE command."""
+
+from mcp.types import CallToolResult
+
+from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.models import PlanStep
+from pycharm_mcp.options import DocumentSync, FileContents, TextOutput
+from pycharm_mcp.positions import check_position
+from pycharm_mcp.registry import registry
+from pycharm_mcp.tools.formatting import file_lines, tool_error, tool_result, verification_lines
+from pycharm_mcp.verify import verify_changes
+
+
+async def apply_plan(
+    project_path: str | None = None,
+    *,
+    steps: list[PlanStep],
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> CallToolResult:
+    """
+    Apply an ordered list of refactorings as one undoable IDE command.
+
+    Documents are synced once before the first step and committed once after
+    the last. If a step fails, the steps before it and any edits it made are
+    undone, so the project is never left half-refactored.
+
+    Args:
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file path of the first step or the only open project
+        steps: Refactorings to apply in order: 'rename', 'move', 'inline' or
+               'change-signature', each with the arguments of the matching tool
+        document_sync: Which unsaved editor documents to save before the first step: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of changed lines, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
+
+    Returns:
+        Summary of each step and the combined changes.
+    """
+    client = PyCharmClient()
+    try:
+        first = steps[0] if steps else None
+        project_path = await registry.resolve_project(project_path, first.file if first else None)
+        # Later steps are resolved after earlier ones changed the code
+        if first is not None and first.handle is None:
+            check_position(project_path, first.file, first.line, first.column)
+
+        response = await client.apply_plan(
+            project=project_path, steps=steps, sync=document_sync, contents=file_contents
+        )
+
+        lines = [f"Successfully applied a plan of {len(response.steps)} steps:", ""]
+        for index, step in enumerate(response.steps, 1):
+            lines.append(
+                f"  {index}. {step.type}: {step.change_count} changes "
+                f"in {step.files_modified} files"
+            )
+        lines.append("")
+        lines.append(f"  Files modified: {response.files_modified}")
+
+        if text == "full" and response.changes:
+            lines.append("")
+            lines.append("Changes:")
+            for change in response.changes[:10]:
+                lines.append(f"  • {change.file}:{change.line}")
+                lines.append(f"    {change.old_text} → {change.new_text}")
+
+            if len(response.changes) > 10:
+                lines.append(f"  ... and {len(response.changes) - 10} more")
+
+        if text == "full":
+            lines.extend(file_lines(response.files))
+
+        if verify:
+            response.verification = await verify_changes(project_path, response)
+            lines.extend(verification_lines(response.verification))
+
+        return tool_result(response, lines, text, debug_timings)
+    except PyCharmBridgeError as e:
+        raise tool_error(e) from e
+    finally:
+        await client.close()
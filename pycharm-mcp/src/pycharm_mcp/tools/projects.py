@@ -1,34 +1,57 @@
 """Tool for listing open projects in PyCharm."""
 
-from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from mcp.types import CallToolResult
 
+from pycharm_mcp.client import PyCharmBridgeError
+from pycharm_mcp.options import TextOutput
+from pycharm_mcp.registry import registry
+from pycharm_mcp.tools.formatting import tool_error, tool_result
 
-async def list_projects() -> str:
+
+async def list_projects(
+    refresh: bool = False, text: TextOutput = "summary", debug_timings: bool = False
+) -> CallToolResult:
     """
     List all projects currently open in PyCharm.
 
     Returns project names, paths, and which one is currently active.
     Use this to identify the correct project path before performing refactoring operations.
+    Answers from the project list the server keeps up to date in the background.
+
+    Args:
+        refresh: Fetch the list from PyCharm instead of the cache (default: False)
+        text: Text returned next to the structured result: a 'summary' or 'none';
+              'full' is the same as 'summary' here (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         A formatted list of open projects with their paths.
     """
-    client = PyCharmClient()
     try:
-        response = await client.list_projects()
+        response = await registry.get(refresh=refresh)
+        response = response.model_copy(
+            update={
+                "projects": [
+                    project.model_copy(update={"indexing": registry.is_indexing(project.path)})
+                    for project in response.projects
+                ]
+            }
+        )
 
         if not response.projects:
-            return "No projects are currently open in PyCharm."
+            return tool_result(
+                response, ["No projects are currently open in PyCharm."], text, debug_timings
+            )
 
         lines = ["Open projects in PyCharm:", ""]
         for project in response.projects:
             status = " (default)" if project.is_default else ""
+            if project.indexing:
+                status += " (indexing)"
             lines.append(f"  • {project.name}{status}")
             lines.append(f"    Path: {project.path}")
             lines.append("")
 
-        return "\n".join(lines)
+        return tool_result(response, lines, text, debug_timings)
     except PyCharmBridgeError as e:
-        return f"Error: {e.message}\n{e.details or ''}"
-    finally:
-        await client.close()
+        raise tool_error(e) from e
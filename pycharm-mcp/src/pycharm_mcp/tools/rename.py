@@ -1,18 +1,32 @@
 """Tool for renaming symbols in PyCharm."""
 
+from mcp.types import CallToolResult
+
 from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.options import DocumentSync, FileContents, TextOutput
+from pycharm_mcp.positions import check_position
+from pycharm_mcp.registry import registry
+from pycharm_mcp.tools.formatting import file_lines, tool_error, tool_result, verification_lines
+from pycharm_mcp.verify import verify_changes
 
 
 async def rename_symbol(
-    project_path: str,
-    file_path: str,
-    line: int,
-    column: int,
+    project_path: str | None = None,
+    file_path: str | None = None,
+    line: int | None = None,
+    column: int | None = None,
+    *,
     new_name: str,
     search_in_comments: bool = True,
     search_in_strings: bool = False,
     preview: bool = False,
-) -> str:
+    handle: str | None = None,
+    document_sync: DocumentSync | None = None,
+    file_contents: FileContents = "none",
+    verify: bool = False,
+    text: TextOutput = "summary",
+    debug_timings: bool = False,
+) -> CallToolResult:
     """
     Rename a symbol (variable, function, class, etc.) across the entire project.
 
@@ -20,7 +34,8 @@ async def rename_symbol(
     Files are auto-saved before refactoring.
 
     Args:
-        project_path: Absolute path to the project (use list_projects to find available projects)
+        project_path: Absolute path to the project; if omitted, inferred from an absolute
+                      file_path or the only open project
         file_path: Path to the file containing the symbol (relative to project or absolute)
         line: Line number where the symbol is located (1-indexed)
         column: Column number where the symbol is located (1-indexed)
@@ -28,12 +43,28 @@ async def rename_symbol(
         search_in_comments: Also rename occurrences in comments (default: True)
         search_in_strings: Also rename occurrences in string literals (default: False)
         preview: If True, show what would change without applying (default: False)
+        handle: Element handle from a previous find_usages or preview result, used
+                instead of file_path/line/column
+        document_sync: Which unsaved editor documents to save before refactoring: 'all',
+                       only the involved 'files', or 'none' (default: $PYCHARM_DOCUMENT_SYNC)
+        file_contents: Besides each modified file's hash and size, also return its new
+                       'content' or a 'diff' against the old one (default: 'none')
+        verify: After applying, check the modified files for syntax errors, unresolved
+                project imports and undefined names, and report problems per file
+                (default: False)
+        text: Text returned next to the structured result: a 'summary', the 'full'
+              listing of changed lines, or 'none' (default: 'summary')
+        debug_timings: Append the bridge's per-phase timing breakdown (default: False)
 
     Returns:
         Summary of the rename operation including files modified and usages updated.
     """
     client = PyCharmClient()
     try:
+        project_path = await registry.resolve_project(project_path, file_path)
+        if handle is None:
+            check_position(project_path, file_path, line, column)
+
         response = await client.rename(
             project=project_path,
             file=file_path,
@@ -43,17 +74,22 @@ async def rename_symbol(
             search_in_comments=search_in_comments,
             search_in_strings=search_in_strings,
             preview=preview,
+            sync=document_sync,
+            handle=handle,
+            contents=file_contents,
         )
 
         if preview:
             lines = [f"Preview: Renaming to '{new_name}' would affect:", ""]
+            if response.handle:
+                lines.append(f"  Element handle: {response.handle}")
         else:
             lines = [f"Successfully renamed to '{new_name}':", ""]
 
         lines.append(f"  Files modified: {response.files_modified}")
         lines.append(f"  Usages updated: {response.usages_updated}")
 
-        if response.changes:
+        if text == "full" and response.changes:
             lines.append("")
             lines.append("Changes:")
             for change in response.changes[:10]:  # Limit to first 10
@@ -63,8 +99,15 @@ async def rename_symbol(
             if len(response.changes) > 10:
                 lines.append(f"  ... and {len(response.changes) - 10} more")
 
-        return "\n".join(lines)
+        if text == "full":
+            lines.extend(file_lines(response.files))
+
+        if verify and not preview:
+            response.verification = await verify_changes(project_path, response)
+            lines.extend(verification_lines(response.verification))
+
+        return tool_result(response, lines, text, debug_timings)
     except PyCharmBridgeError as e:
-        return f"Error: {e.message}\n{e.details or ''}"
+        raise tool_error(e) from e
     finally:
         await client.close()
@@ -0,0 +1,301 @@
+"""Quick checks of the files a refactoring modified.
+
+With ``verify`` set, refactoring tools check every file named in the result
+before returning, instead of leaving it to a full test run. The checks are
+static and need nothing from the project's environment:
+
+- the file compiles;
+- imports of the project's own modules resolve, as do the names they import
+  from them (modules are looked for under the project root and ``src/``;
+  imports of anything else, and imports guarded by ``try``, are not checked);
+- every name the file reads is bound somewhere in it or is a builtin. Scopes
+  are not told apart, so this catches references left behind by a rename or
+  move, not every ``NameError``. Files with ``from x import *`` are skipped.
+
+Files are checked in a process pool, one worker per core. Verification is
+skipped, and says so, when the project directory is not on this machine, as
+with a bridge on another host: its files cannot be read here.
+"""
+
+import ast
+import asyncio
+import builtins
+import os
+import time
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from pycharm_mcp.models import (
+    BulkSafeDeleteResponse,
+    ChangeListResponse,
+    MultiExtractResponse,
+    Verification,
+)
+
+# Below this many files, a process pool costs more than it saves
+PARALLEL_THRESHOLD = 8
+
+# Names every module can read without binding them
+_IMPLICIT_NAMES = frozenset(dir(builtins)) | {
+    "__file__",
+    "__name__",
+    "__doc__",
+    "__spec__",
+    "__loader__",
+    "__package__",
+    "__path__",
+    "__builtins__",
+    "__annotations__",
+    "__class__",
+}
+
+
+def _diagnostic(file: str, node: ast.AST, kind: str, message: str) -> dict[str, Any]:
+    line = getattr(node, "lineno", 1)
+    column = getattr(node, "col_offset", 0) + 1
+    return {"file": file, "line": line, "column": column, "kind": kind, "message": message}
+
+
+def _bound_names(tree: ast.AST) -> set[str] | None:
+    """Every name the module binds in any scope, or None if it has a star import."""
+    bound: set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == "*":
+                    return None
+                bound.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, (ast.ExceptHandler, ast.MatchAs, ast.MatchStar)) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, ast.MatchMapping) and node.rest:
+            bound.add(node.rest)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            bound.update(node.names)
+    return bound
+
+
+def _module_names(tree: ast.Module) -> set[str] | None:
+    """Names a module defines at top level, or None if it may define any name."""
+    names: set[str] = set()
+    stack: list[ast.AST] = list(tree.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if node.name == "__getattr__":
+                return None
+            names.add(node.name)
+            # Functions can still bind module names with ``global``
+            stack.extend(n for n in ast.walk(node) if isinstance(n, ast.Global))
+            continue
+        if isinstance(node, ast.Lambda):
+            continue
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == "*":
+                    return None
+                names.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, ast.Global):
+            names.update(node.names)
+        stack.extend(ast.iter_child_nodes(node))
+    return names
+
+
+def _find_module(base: Path, parts: list[str]) -> Path | None:
+    """The file or package directory of module ``parts`` under ``base``, if any."""
+    path = base.joinpath(*parts)
+    if path.with_suffix(".py").is_file():
+        return path.with_suffix(".py")
+    if path.is_dir():
+        return path
+    return None
+
+
+def _exported_names(module: Path) -> set[str] | None:
+    """Names importable from a module file or package, None if any may be."""
+    if module.is_dir():
+        module = module / "__init__.py"
+        if not module.is_file():
+            # A namespace package only has submodules
+            return set()
+    try:
+        tree = ast.parse(module.read_bytes(), str(module))
+    except (OSError, SyntaxError, ValueError):
+        return None
+    return _module_names(tree)
+
+
+class _ImportChecker(ast.NodeVisitor):
+    """Reports imports of project modules and names that do not exist."""
+
+    def __init__(self, roots: list[Path], path: Path, file: str) -> None:
+        self.roots = roots
+        self.path = path
+        self.file = file
+        self.diagnostics: list[dict[str, Any]] = []
+
+    def visit_Try(self, node: ast.Try) -> None:  # noqa: N802
+        # Imports guarded by try are allowed to fail
+        for child in [*node.handlers, *node.orelse, *node.finalbody]:
+            self.visit(child)
+
+    visit_TryStar = visit_Try  # noqa: N815
+
+    def _project_module(self, parts: list[str]) -> tuple[bool, Path | None]:
+        """Whether ``parts`` names a project module, and where it is if it exists."""
+        for root in self.roots:
+            if _find_module(root, parts[:1]) is not None:
+                return True, _find_module(root, parts)
+        return False, None
+
+    def _report(self, node: ast.AST, message: str) -> None:
+        self.diagnostics.append(_diagnostic(self.file, node, "import", message))
+
+    def visit_Import(self, node: ast.Import) -> None:  # noqa: N802
+        for alias in node.names:
+            in_project, module = self._project_module(alias.name.split("."))
+            if in_project and module is None:
+                self._report(node, f"No module named '{alias.name}' in the project")
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:  # noqa: N802
+        parts = node.module.split(".") if node.module else []
+        if node.level:
+            base = self.path.parent
+            for _ in range(node.level - 1):
+                base = base.parent
+            module = _find_module(base, parts) if parts else base
+            name = "." * node.level + (node.module or "")
+            if module is None:
+                self._report(node, f"No module named '{name}'")
+                return
+        else:
+            in_project, module = self._project_module(parts)
+            if not in_project:
+                return
+            name = node.module or ""
+            if module is None:
+                self._report(node, f"No module named '{name}' in the project")
+                return
+
+        exported = _exported_names(module)
+        if exported is None:
+            return
+        for alias in node.names:
+            if alias.name == "*" or alias.name in exported:
+                continue
+            if module.is_dir() and _find_module(module, [alias.name]) is not None:
+                continue
+            self._report(node, f"Cannot import '{alias.name}' from '{name}'")
+
+
+def check_file(root: str, file: str) -> list[dict[str, Any]]:
+    """Diagnostics for one file of the project at ``root``, as bridge-style dicts."""
+    project = Path(root)
+    path = project / file
+    try:
+        source = path.read_bytes()
+    except OSError as e:
+        message = f"Cannot read the file: {e.strerror or e}"
+        return [{"file": file, "line": 1, "column": 1, "kind": "read", "message": message}]
+    try:
+        tree = ast.parse(source, str(path))
+        # Some errors, like return outside a function, only show when compiling
+        compile(tree, str(path), "exec", dont_inherit=True)
+    except SyntaxError as e:
+        return [
+            {
+                "file": file,
+                "line": e.lineno or 1,
+                "column": e.offset or 1,
+                "kind": "syntax",
+                "message": e.msg,
+            }
+        ]
+    except ValueError as e:
+        return [{"file": file, "line": 1, "column": 1, "kind": "syntax", "message": str(e)}]
+
+    roots = [project, *([project / "src"] if (project / "src").is_dir() else [])]
+    checker = _ImportChecker(roots, path, file)
+    checker.visit(tree)
+    diagnostics = checker.diagnostics
+
+    bound = _bound_names(tree)
+    if bound is not None:
+        known = bound | _IMPLICIT_NAMES
+        for node in ast.walk(tree):
+            if (
+                isinstance(node, ast.Name)
+                and isinstance(node.ctx, ast.Load)
+                and node.id not in known
+            ):
+                diagnostics.append(_diagnostic(file, node, "name", f"Undefined name '{node.id}'"))
+    return diagnostics
+
+
+def _relative(root: str, file: str) -> str:
+    return os.path.relpath(file, root) if os.path.isabs(file) else file
+
+
+def _check_files(root: str, files: list[str]) -> list[dict[str, Any]]:
+    return [diagnostic for file in files for diagnostic in check_file(root, file)]
+
+
+def verify_files(
+    root: str, files: Iterable[str], workers: int | None = None, gone: Iterable[str] = ()
+) -> Verification:
+    """Check Python ``files`` (relative to ``root`` or absolute) in parallel.
+
+    ``gone`` are files the refactoring deleted or moved away, which are not
+    checked; any other file that cannot be read is reported.
+    """
+    started = time.perf_counter()
+    if not os.path.isdir(root):
+        return Verification(
+            filesChecked=0,
+            elapsedMs=0.0,
+            skipped=f"{root} is not a directory on this machine",
+        )
+    paths = sorted({_relative(root, f) for f in files} - {_relative(root, f) for f in gone})
+    paths = [f for f in paths if f.endswith((".py", ".pyi"))]
+    workers = workers or os.cpu_count() or 1
+
+    if len(paths) >= PARALLEL_THRESHOLD and workers != 1:
+        # A few batches per worker, so one slow file does not hold up the rest
+        batches = [paths[i :: workers * 4] for i in range(min(len(paths), workers * 4))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_check_files, [root] * len(batches), batches)
+            rows = [diagnostic for batch in results for diagnostic in batch]
+    else:
+        rows = _check_files(root, paths)
+
+    rows.sort(key=lambda d: (d["file"], d["line"], d["column"]))
+    return Verification.model_validate(
+        {
+            "filesChecked": len(paths),
+            "diagnostics": rows,
+            "elapsedMs": (time.perf_counter() - started) * 1000,
+        }
+    )
+
+
+async def verify_changes(
+    root: str, response: ChangeListResponse | MultiExtractResponse | BulkSafeDeleteResponse
+) -> Verification:
+    """Check the files an applied refactoring changed, without blocking the event loop."""
+    files = {digest.file for digest in response.files}
+    if isinstance(response, ChangeListResponse):
+        files.update(change.file for change in response.changes)
+    elif isinstance(response, MultiExtractResponse):
+        files.add(response.file)
+    else:
+        files.update(symbol.file for symbol in response.deleted)
+    return await asyncio.to_thread(verify_files, root, files)
@@ -144,3 +144,97 @@ async def test_error_response(client: PyCharmClient) -> None:
     assert "Element not found" in str(exc_info.value)
 
     await client.close()
+
+
+@respx.mock
+@pytest.mark.asyncio
+async def test_find_usages_incremental(client: PyCharmClient) -> None:
+    """Test merging an incremental find-usages delta into a previous result."""
+    usage_a = {"file": "/project/a.py", "line": 1, "column": 5, "text": "def f():"}
+    usage_b = {"file": "/project/b.py", "line": 3, "column": 1, "text": "f()"}
+    usage_c = {"file": "/project/c.py", "line": 7, "column": 9, "text": "x = f()"}
+
+    route = respx.post("http://localhost:9876/find/usages")
+    route.side_effect = [
+        Response(
+            200,
+            json={
+                "success": True,
+                "symbol": "f",
+                "usages": [usage_a, usage_b],
+                "totalCount": 2,
+                "token": "t1",
+            },
+        ),
+        Response(
+            200,
+            json={
+                "success": True,
+                "symbol": "f",
+                "usages": [],
+                "totalCount": 2,
+                "token": "t2",
+                "backend": "local",
+                "incremental": True,
+                "added": [usage_c],
+                "removed": [usage_b],
+            },
+        ),
+    ]
+
+    first = await client.find_usages(project="/project", file="a.py", line=1, column=5)
+    delta = await client.find_usages(
+        project="/project", file="a.py", line=1, column=5, since_token=first.token
+    )
+
+    assert b'"sinceToken":"t1"' in route.calls[1].request.content.replace(b" ", b"")
+    merged = first.apply_delta(delta)
+    assert merged.token == "t2"
+    assert [u.file for u in merged.usages] == ["/project/a.py", "/project/c.py"]
+    assert merged.total_count == 2
+    assert merged.backend == "local"
+
+    await client.close()
+
+
+@respx.mock
+@pytest.mark.asyncio
+async def test_rename_with_handle(client: PyCharmClient) -> None:
+    """Test that an element handle replaces file/line/column in the request."""
+    route = respx.post("http://localhost:9876/refactor/rename").mock(
+        return_value=Response(
+            200,
+            json={"success": True, "changes": [], "filesModified": 0, "usagesUpdated": 0},
+        )
+    )
+
+    await client.rename(project="/project", handle="h-1", new_name="new_name")
+
+    body = route.calls[0].request.content.decode()
+    assert '"handle":"h-1"' in body.replace(" ", "")
+    assert '"line"' not in body
+
+    with pytest.raises(PyCharmBridgeError):
+        await client.rename(project="/project", file="src/main.py", new_name="new_name")
+
+    await client.close()
+
+
+@respx.mock
+@pytest.mark.asyncio
+async def test_server_timing_header(client: PyCharmClient) -> None:
+    """Test parsing of the bridge's Server-Timing header."""
+    respx.get("http://localhost:9876/health").mock(
+        return_value=Response(
+            200,
+            json={"status": "ok", "version": "0.1.0", "projectsOpen": 1},
+            headers={"Server-Timing": "resolve;dur=0.250, serialize;dur=1.5, cache"},
+        )
+    )
+
+    response = await client.health()
+
+    assert response.timings is not None
+    assert response.timings.phases == {"resolve": 0.25, "serialize": 1.5, "cache": 0.0}
+
+    await client.close()
@@ -0,0 +1,83 @@
+"""Tests for columnar usage and change lists."""
+
+import pytest
+
+from pycharm_mcp.client import PyCharmClient
+from pycharm_mcp.columnar import ChangeTable, UsageTable, encode_usages
+from pycharm_mcp.models import FindUsagesResponse, UsageInfo
+from pycharm_mcp.stub_bridge import StubBridge
+
+USAGES = [
+    {"file": "/p/a.py", "line": 3, "column": 5, "text": "x = f()", "isWriteAccess": True},
+    {"file": "/p/a.py", "line": 9, "column": 1, "text": "f()", "isWriteAccess": False},
+    {"file": "/p/b.py", "line": 2, "column": 8, "text": "f()", "isWriteAccess": False},
+]
+
+
+def test_decode_columns() -> None:
+    """Test that columnar usages decode to the same rows, with shared strings."""
+    columns = encode_usages(USAGES)
+    assert columns["strings"] == ["/p/a.py", "x = f()", "f()", "/p/b.py"]
+
+    response = FindUsagesResponse.model_validate(
+        {"symbol": "f", "usages": [], "usageColumns": columns, "totalCount": 3}
+    )
+
+    assert isinstance(response.usages, UsageTable)
+    assert [row.to_dict() for row in response.usages] == USAGES
+    assert response.usages[-1].file == "/p/b.py"
+    assert response.model_dump(by_alias=True)["usages"] == USAGES
+
+
+def test_mismatched_columns_rejected() -> None:
+    """Test that columns of different lengths fail validation."""
+    columns = encode_usages(USAGES)
+    columns["line"] = columns["line"][:2]
+
+    with pytest.raises(ValueError):
+        FindUsagesResponse.model_validate(
+            {"symbol": "f", "usages": [], "usageColumns": columns, "totalCount": 3}
+        )
+
+
+def test_apply_delta_to_table() -> None:
+    """Test that incremental deltas merge into a columnar result."""
+    previous = FindUsagesResponse.model_validate(
+        {"symbol": "f", "usages": [], "usageColumns": encode_usages(USAGES), "totalCount": 3}
+    )
+    delta = FindUsagesResponse(
+        symbol="f",
+        usages=[],
+        total_count=0,
+        incremental=True,
+        added=[UsageInfo(file="/p/c.py", line=1, column=1, text="f()")],
+        removed=[UsageInfo.model_validate(USAGES[1])],
+    )
+
+    merged = previous.apply_delta(delta)
+
+    assert isinstance(merged.usages, UsageTable)
+    assert [(u.file, u.line) for u in merged.usages] == [
+        ("/p/a.py", 3),
+        ("/p/b.py", 2),
+        ("/p/c.py", 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_client_requests_columnar() -> None:
+    """Test that a client opted into columnar results asks for them and decodes them."""
+    with StubBridge(usages_per_symbol=20) as stub:
+        client = PyCharmClient(base_url=stub.url, result_format="columnar")
+        renamed = await client.rename(
+            project="/stub/project", file="a.py", line=1, column=1, new_name="g"
+        )
+        rows = await PyCharmClient(base_url=stub.url).find_usages(
+            project="/stub/project", file="a.py", line=1, column=1
+        )
+        await client.close()
+
+    assert isinstance(renamed.changes, ChangeTable)
+    assert len(renamed.changes) == 20
+    assert renamed.changes[:2][1].new_text == "g"
+    assert isinstance(rows.usages, list)
@@ -0,0 +1,122 @@
+"""Tests for the bridge event stream."""
+
+import asyncio
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+
+from pycharm_mcp import positions
+from pycharm_mcp.client import PyCharmClient
+from pycharm_mcp.events import EventStream
+from pycharm_mcp.models import BridgeEvent
+from pycharm_mcp.registry import ProjectRegistry
+from pycharm_mcp.stub_bridge import StubBridge
+
+PROJECT = "/work/app"
+
+
+@pytest.fixture
+def bridge(monkeypatch: pytest.MonkeyPatch) -> Iterator[StubBridge]:
+    """Run a stub bridge and point new clients at it."""
+    with StubBridge(projects=[PROJECT]) as stub:
+        monkeypatch.setenv("PYCHARM_BRIDGE_URL", stub.url)
+        yield stub
+
+
+async def _until(condition: Callable[[], object]) -> None:
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+@pytest.mark.asyncio
+async def test_client_receives_events(bridge: StubBridge) -> None:
+    """Test that the stream starts with connected and carries applied changes."""
+    client = PyCharmClient()
+    events = client.events()
+
+    connected = await anext(events)
+    assert connected.type == "connected"
+
+    writer = PyCharmClient()
+    await writer.rename(project=PROJECT, file="pkg/a.py", line=1, column=1, new_name="b")
+    await writer.close()
+    bridge.emit("indexing", project=PROJECT, indexing=True)
+
+    changed = await anext(events)
+    assert changed.type == "files-changed"
+    assert changed.project == PROJECT
+    assert changed.files == [f"{PROJECT}/pkg/module_{i}.py" for i in range(3)]
+    indexing = await anext(events)
+    assert (indexing.type, indexing.indexing) == ("indexing", True)
+    assert connected.id < changed.id < indexing.id
+
+    await events.aclose()
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_registry_follows_events(bridge: StubBridge) -> None:
+    """Test that project and indexing events update a running registry."""
+    registry = ProjectRegistry(interval=60)
+    stream = EventStream(retry_delay=0.01)
+    stream.add_handler(registry.on_event)
+    registry.start()
+    stream.start()
+    try:
+        await _until(lambda: stream.connected and registry.projects is not None)
+
+        bridge.open_project("/work/other")
+        await _until(lambda: registry.owner("/work/other/x.py"))
+
+        bridge.emit("indexing", project="/work/other", indexing=True)
+        await _until(lambda: registry.is_indexing("/work/other"))
+
+        bridge.close_project("/work/other")
+        await _until(lambda: registry.owner("/work/other/x.py") is None)
+        assert not registry.is_indexing("/work/other")
+    finally:
+        await stream.stop()
+        await registry.stop()
+
+
+@pytest.mark.asyncio
+async def test_stream_reconnects(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the subscription survives the bridge restarting."""
+    received: list[BridgeEvent] = []
+    stream = EventStream(retry_delay=0.01)
+    stream.add_handler(received.append)
+
+    first = StubBridge().start()
+    monkeypatch.setenv("PYCHARM_BRIDGE_URL", first.url)
+    stream.start()
+    try:
+        await _until(lambda: stream.connected)
+        port = first._server.server_port if first._server else 0
+        first.stop()
+        await _until(lambda: not stream.connected)
+
+        with StubBridge(port=port):
+            await _until(lambda: stream.connected)
+        assert [event.type for event in received] == ["connected", "connected"]
+    finally:
+        await stream.stop()
+
+
+def test_changed_files_drop_line_indexes(tmp_path: Path) -> None:
+    """Test that files-changed evicts exactly the listed files' line indexes."""
+    changed = tmp_path / "changed.py"
+    kept = tmp_path / "kept.py"
+    for path in (changed, kept):
+        path.write_text("x = 1\n")
+        positions.line_index(path)
+
+    positions._on_event(BridgeEvent(type="files-changed", files=[str(changed)]))
+    assert changed not in positions._line_indexes
+    assert kept in positions._line_indexes
+
+    positions._on_event(BridgeEvent(type="files-changed", project=str(tmp_path), truncated=True))
+    assert kept not in positions._line_indexes
@@ -0,0 +1,245 @@
+"""Tests for the local engine used when no IDE is available."""
+
+import hashlib
+import textwrap
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from pycharm_mcp import local_engine
+from pycharm_mcp.local_engine import LocalEngine
+from pycharm_mcp.registry import registry
+from pycharm_mcp.tools import find_usages, rename_symbol
+
+CORE = """\
+LIMIT = 10
+
+
+def compute(value, scale=2):
+    total = value * scale
+    return [total for total in range(total)][-1] + LIMIT
+
+
+class Worker:
+    def run(self, value):
+        return compute(value)
+
+
+def unused():
+    return unused
+"""
+
+APP = """\
+from pkg.core import compute, Worker as W
+
+
+def main():
+    total = compute(3)
+    return W().run(total)
+"""
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    """Create a small two-module project."""
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "core.py").write_text(CORE)
+    (tmp_path / "pkg" / "app.py").write_text(APP)
+    return tmp_path
+
+
+def _post(engine: LocalEngine, path: str, **payload: Any) -> dict[str, Any]:
+    status, body, _ = engine.handle("POST", path, payload)
+    assert status == 200, body
+    assert body["backend"] == "local"
+    return body
+
+
+def test_find_usages_by_scope(project: Path) -> None:
+    """Test that globals are found across files and locals only in their function."""
+    engine = LocalEngine(projects=[str(project)])
+
+    request = {"project": str(project), "file": "pkg/core.py"}
+    found = _post(engine, "/find/usages", **request, line=4, column=5)
+    assert [(Path(u["file"]).name, u["line"], u["isWriteAccess"]) for u in found["usages"]] == [
+        ("core.py", 4, True),
+        ("app.py", 1, False),
+        ("app.py", 5, False),
+        ("core.py", 11, False),
+    ]
+
+    # The comprehension's own ``total`` is a different variable
+    found = _post(engine, "/find/usages", **request, line=5, column=5)
+    assert [(u["line"], u["column"], u["isWriteAccess"]) for u in found["usages"]] == [
+        (5, 5, True),
+        (6, 38, False),
+    ]
+
+
+def test_rename(project: Path) -> None:
+    """Test that rename previews without writing and then rewrites every file."""
+    engine = LocalEngine(projects=[str(project)])
+    request = {"project": str(project), "file": "pkg/app.py", "line": 5, "column": 13}
+
+    preview = _post(engine, "/refactor/rename", **request, newName="calc", preview=True)
+    assert preview["usagesUpdated"] == 4
+    assert (project / "pkg" / "core.py").read_text() == CORE
+
+    applied = _post(engine, "/refactor/rename", **request, newName="calc")
+    assert applied["filesModified"] == 2
+    assert "def calc(value, scale=2):" in (project / "pkg" / "core.py").read_text()
+    assert (project / "pkg" / "app.py").read_text().startswith("from pkg.core import calc,")
+
+    status, body, _ = engine.handle("POST", "/refactor/rename", {**request, "newName": "class"})
+    assert status == 400 and "identifier" in body["details"]
+
+
+def test_form_feed_keeps_lines(project: Path) -> None:
+    """Test that a form feed in a string does not shift the lines of later usages."""
+    (project / "pkg" / "report.py").write_text(
+        'from pkg.core import compute\n\nPAGE = "\f"\nresult = compute(PAGE)\n'
+    )
+    engine = LocalEngine(projects=[str(project)])
+    request = {"project": str(project), "file": "pkg/core.py", "line": 4, "column": 5}
+
+    found = _post(engine, "/find/usages", **request)
+    rows = {(Path(u["file"]).name, u["line"]): u["text"] for u in found["usages"]}
+    assert rows[("report.py", 4)] == "result = compute(PAGE)"
+
+    _post(engine, "/refactor/rename", **request, newName="calc")
+    assert (project / "pkg" / "report.py").read_text().endswith('"\f"\nresult = calc(PAGE)\n')
+
+
+def test_rename_scoped_to_module(project: Path) -> None:
+    """Test that a module-level rename skips same-named symbols of unrelated modules."""
+    (project / "pkg" / "other.py").write_text("def compute():\n    return 1\n\n\ncompute()\n")
+    (project / "pkg" / "qualified.py").write_text(
+        "import pkg.core\nfrom pkg import core as c\n\npkg.core.compute(1) + c.compute(2)\n"
+    )
+    engine = LocalEngine(projects=[str(project)])
+    request = {"project": str(project), "file": "pkg/core.py", "line": 4, "column": 5}
+
+    preview = _post(engine, "/refactor/rename", **request, newName="calc", preview=True)
+    assert sorted((Path(c["file"]).name, c["line"]) for c in preview["changes"]) == [
+        ("app.py", 1),
+        ("app.py", 5),
+        ("core.py", 4),
+        ("core.py", 11),
+        ("qualified.py", 4),
+        ("qualified.py", 4),
+    ]
+
+    # Applying is refused while another module defines the same name
+    status, body, _ = engine.handle("POST", "/refactor/rename", {**request, "newName": "calc"})
+    assert status == 400 and "pkg/other.py" in body["details"]
+    (project / "pkg" / "other.py").unlink()
+    _post(engine, "/refactor/rename", **request, newName="calc")
+    assert "pkg.core.calc(1) + c.calc(2)" in (project / "pkg" / "qualified.py").read_text()
+
+
+def test_rename_conflict_writes_nothing(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a file changed since indexing fails the rename before any file is written."""
+    engine = LocalEngine(projects=[str(project)])
+    engine.index(str(project)).refresh()
+    monkeypatch.setattr(local_engine.ProjectIndex, "refresh", lambda self: 0)
+    (project / "pkg" / "core.py").write_text(CORE.replace("def compute", "def  compute"))
+
+    status, body, _ = engine.handle(
+        "POST",
+        "/refactor/rename",
+        {"project": str(project), "file": "pkg/app.py", "line": 5, "column": 13, "newName": "calc"},
+    )
+
+    assert status == 409, body
+    assert (project / "pkg" / "app.py").read_text() == APP
+
+
+def test_rename_file_digests(project: Path) -> None:
+    """Test that an applied rename reports each file's new hash, size and diff."""
+    engine = LocalEngine(projects=[str(project)])
+    request = {"project": str(project), "file": "pkg/app.py", "line": 5, "column": 13}
+
+    applied = _post(engine, "/refactor/rename", **request, newName="calc", contents="diff")
+    digests = {Path(d["file"]).name: d for d in applied["files"]}
+    assert set(digests) == {"app.py", "core.py"}
+    for name, digest in digests.items():
+        data = (project / "pkg" / name).read_bytes()
+        assert digest["sha256"] == hashlib.sha256(data).hexdigest()
+        assert digest["size"] == len(data)
+    diff = digests["core.py"]["diff"]
+    assert "-def compute(value, scale=2):\n+def calc(value, scale=2):\n" in diff
+    assert "content" not in digests["core.py"]
+
+
+def test_safe_delete(project: Path) -> None:
+    """Test that used definitions are reported and unused ones removed."""
+    engine = LocalEngine(projects=[str(project)])
+
+    blocked = _post(
+        engine, "/refactor/safe-delete", project=str(project), file="pkg/core.py", line=1, column=1
+    )
+    assert not blocked["deleted"]
+    assert blocked["usagesFound"] == 1
+
+    # Its reference to itself does not count
+    deleted = _post(
+        engine, "/refactor/safe-delete", project=str(project), file="pkg/core.py", line=14, column=5
+    )
+    assert deleted["deleted"]
+    assert "unused" not in (project / "pkg" / "core.py").read_text()
+
+
+def test_index_cache_and_parallel_scan(
+    project: Path, tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the index is reused from disk and a parallel scan matches a serial one."""
+    for i in range(8):
+        (project / f"mod_{i}.py").write_text(
+            textwrap.dedent(f"""\
+                from pkg.core import compute
+
+                VALUE_{i} = compute({i})
+            """)
+        )
+    cache_dir = tmp_path_factory.mktemp("cache")
+    monkeypatch.setattr(local_engine, "PARALLEL_THRESHOLD", 4)
+
+    parallel = LocalEngine([str(project)], cache_dir=cache_dir, workers=2).index(str(project))
+    assert parallel.refresh() == 10
+
+    serial = LocalEngine([str(project)], workers=1).index(str(project))
+    serial.refresh()
+    assert {p: f["names"] for p, f in parallel.files.items()} == {
+        p: f["names"] for p, f in serial.files.items()
+    }
+
+    reloaded = LocalEngine([str(project)], cache_dir=cache_dir).index(str(project))
+    assert reloaded.refresh() == 0
+    (project / "mod_0.py").write_text("VALUE = 1\n")
+    assert reloaded.refresh() == 1
+
+
+@pytest.mark.asyncio
+async def test_tools_on_local_backend(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that tools fall back to the local engine and say so."""
+    monkeypatch.setenv("PYCHARM_BACKEND", "auto")
+    # Nothing listens here, so every request falls back
+    monkeypatch.setenv("PYCHARM_BRIDGE_URL", "http://127.0.0.1:9")
+    monkeypatch.setenv("PYCHARM_LOCAL_PROJECTS", str(project))
+    monkeypatch.setenv("PYCHARM_MCP_CACHE_DIR", str(project / ".cache"))
+    local_engine.local_engine.cache_clear()
+    try:
+        result = await find_usages(file_path=str(project / "pkg" / "core.py"), line=4, column=5)
+        text = result.content[0].text
+        assert text.startswith("Note: answered by the local engine")
+        assert "Usages of 'compute': 4 found" in text
+        assert result.structuredContent["backend"] == "local"
+
+        result = await rename_symbol(
+            str(project), "pkg/core.py", 9, 7, new_name="Runner", preview=True
+        )
+        assert "Usages updated: 2" in result.content[0].text
+    finally:
+        local_engine.local_engine.cache_clear()
+        registry.projects = None
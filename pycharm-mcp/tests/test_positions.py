@@ -0,0 +1,88 @@
+"""Tests for local pre-flight position checks."""
+
+import os
+from pathlib import Path
+
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError
+
+from pycharm_mcp.positions import InvalidPositionError, check_position, check_range, line_index
+from pycharm_mcp.stub_bridge import StubBridge
+from pycharm_mcp.tools import rename_symbol
+
+SOURCE = "import os\n\ndef compute(value):\n    return os.path.join(value)\n"
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    """Create a project directory with one module."""
+    (tmp_path / "module.py").write_text(SOURCE)
+    return tmp_path
+
+
+def test_valid_position(project: Path) -> None:
+    """Test that a position on an identifier passes."""
+    check_position(str(project), "module.py", 3, 5)
+    check_position(str(project), str(project / "module.py"), 4, 12)
+
+
+def test_invalid_positions(project: Path) -> None:
+    """Test that missing files, lines and columns are rejected."""
+    with pytest.raises(InvalidPositionError, match="File not found"):
+        check_position(str(project), "missing.py", 1, 1)
+    with pytest.raises(InvalidPositionError) as exc_info:
+        check_position(str(project), "module.py", 50, 1)
+    assert exc_info.value.details == "module.py has 5 lines, got line 50"
+    with pytest.raises(InvalidPositionError, match="Column out of range"):
+        check_position(str(project), "module.py", 1, 40)
+
+
+def test_whitespace_suggests_nearest_identifier(project: Path) -> None:
+    """Test that a column on whitespace names the closest identifier."""
+    with pytest.raises(InvalidPositionError) as exc_info:
+        check_position(str(project), "module.py", 4, 3)
+    assert exc_info.value.details == (
+        "Line 4, column 3 of module.py is whitespace; nearest identifier is 'return' at column 5"
+    )
+
+
+def test_check_range(project: Path) -> None:
+    """Test selection bounds, including an end column just past the line."""
+    check_range(str(project), "module.py", 4, 12, 4, 31)
+    with pytest.raises(InvalidPositionError, match="Empty selection"):
+        check_range(str(project), "module.py", 4, 12, 4, 12)
+    with pytest.raises(InvalidPositionError, match="Column out of range"):
+        check_range(str(project), "module.py", 4, 12, 4, 40)
+
+
+def test_line_index_rebuilt_on_change(project: Path) -> None:
+    """Test that the cached index follows edits to the file."""
+    path = project / "module.py"
+    assert line_index(path).line_count == 5
+
+    path.write_text(SOURCE + "\nprint(compute('x'))\n")
+    assert line_index(path).line_count == 7
+
+
+def test_remote_project_not_checked() -> None:
+    """Test that projects not on the local filesystem are left to the bridge."""
+    check_position("/no/such/project", "module.py", 999, 999)
+
+
+def test_preflight_disabled(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that PYCHARM_PREFLIGHT=0 turns the checks off."""
+    monkeypatch.setenv("PYCHARM_PREFLIGHT", "0")
+    check_position(str(project), "missing.py", 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_tool_fails_before_request(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that an invalid position never reaches the bridge."""
+    with StubBridge(projects=[os.fspath(project)]) as stub:
+        monkeypatch.setenv("PYCHARM_BRIDGE_URL", stub.url)
+        with pytest.raises(ToolError, match="Line out of range"):
+            await rename_symbol(
+                project_path=str(project), file_path="module.py", line=9, column=1, new_name="x"
+            )
+
+    assert stub.requests == []
@@ -0,0 +1,91 @@
+"""Tests for recording bridge traffic and replaying it."""
+
+import time
+from pathlib import Path
+
+import pytest
+
+from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.metrics import ClientMetrics
+from pycharm_mcp.recording import Exchange, Recorder, load
+from pycharm_mcp.replay_bridge import ReplayBridge
+from pycharm_mcp.stub_bridge import StubBridge
+
+PROJECT = "/stub/project"
+
+
+async def _record(path: Path) -> list[str]:
+    """Record a short session against the stub bridge; return the renamed files."""
+    recorder = Recorder(path)
+    with StubBridge(projects=[PROJECT]) as stub:
+        client = PyCharmClient(base_url=stub.url, client_metrics=ClientMetrics(), recorder=recorder)
+        await client.list_projects()
+        rename = await client.rename(
+            project=PROJECT, file="pkg/a.py", line=1, column=1, new_name="renamed"
+        )
+        with pytest.raises(PyCharmBridgeError):
+            await client.find_usages(project="/not/open", file="a.py", line=1, column=1)
+        await client.close()
+    recorder.close()
+    return [change.file for change in rename.changes]
+
+
+@pytest.mark.asyncio
+async def test_recorder_logs_exchanges(tmp_path: Path) -> None:
+    """Test that every request is recorded with its response and timings."""
+    path = tmp_path / "session.jsonl.gz"
+    await _record(path)
+
+    exchanges = list(load(path))
+
+    assert [(e.method, e.path, e.status) for e in exchanges] == [
+        ("GET", "/projects", 200),
+        ("POST", "/refactor/rename", 200),
+        ("POST", "/find/usages", 400),
+    ]
+    rename = exchanges[1]
+    assert rename.request is not None and rename.request["newName"] == "renamed"
+    assert "timings" not in rename.body
+    assert {"resolve", "search", "serialize"} <= set(rename.phases)
+    assert rename.round_trip_ms > 0
+    assert exchanges[0].at <= rename.at
+
+
+@pytest.mark.asyncio
+async def test_replay_serves_recorded_responses(tmp_path: Path) -> None:
+    """Test that a replayed session answers the same requests the same way."""
+    path = tmp_path / "session.jsonl.gz"
+    renamed = await _record(path)
+
+    with ReplayBridge.from_file(path, time_scale=0) as bridge:
+        client = PyCharmClient(base_url=bridge.url, client_metrics=ClientMetrics())
+        projects = await client.list_projects()
+        rename = await client.rename(
+            project=PROJECT, file="pkg/a.py", line=1, column=1, new_name="renamed"
+        )
+        with pytest.raises(PyCharmBridgeError, match="Project not open"):
+            await client.find_usages(project="/not/open", file="a.py", line=1, column=1)
+        # Not recorded verbatim, so answered by another rename
+        other = await client.rename(
+            project=PROJECT, file="pkg/b.py", line=2, column=1, new_name="other"
+        )
+        await client.close()
+
+    assert [p.path for p in projects.projects] == [PROJECT]
+    assert [change.file for change in rename.changes] == renamed
+    assert [change.file for change in other.changes] == renamed
+    assert bridge.unmatched == 1
+
+
+def test_replay_scales_latency() -> None:
+    """Test that replay takes the recorded bridge time times the scale."""
+    exchange = Exchange(0.0, "GET", "/health", None, 200, {"status": "ok"}, {"search": 200.0}, 210)
+
+    started = time.perf_counter()
+    status, body, phases = ReplayBridge([exchange], time_scale=0.25).handle("GET", "/health", None)
+    elapsed = time.perf_counter() - started
+
+    assert (status, body) == (200, {"status": "ok"})
+    assert phases == {"search": 50.0}
+    assert 0.05 <= elapsed < 0.15
+    assert ReplayBridge([exchange]).handle("GET", "/projects", None)[0] == 404
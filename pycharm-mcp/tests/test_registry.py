@@ -0,0 +1,78 @@
+"""Tests for the cached project registry."""
+
+import asyncio
+from collections.abc import Iterator
+
+import pytest
+
+from pycharm_mcp.client import PyCharmBridgeError
+from pycharm_mcp.registry import ProjectRegistry
+from pycharm_mcp.stub_bridge import StubBridge
+from pycharm_mcp.tools import list_projects
+
+
+@pytest.fixture
+def bridge(monkeypatch: pytest.MonkeyPatch) -> Iterator[StubBridge]:
+    """Run a stub bridge with nested projects and point new clients at it."""
+    with StubBridge(projects=["/work/app", "/work/app/plugins/extra"]) as stub:
+        monkeypatch.setenv("PYCHARM_BRIDGE_URL", stub.url)
+        yield stub
+
+
+@pytest.mark.asyncio
+async def test_resolve_project(bridge: StubBridge) -> None:
+    """Test inferring the owning project from a file path."""
+    registry = ProjectRegistry(interval=0)
+
+    assert await registry.resolve_project("/explicit", None) == "/explicit"
+    assert await registry.resolve_project(None, "/work/app/src/a.py") == "/work/app"
+    assert (
+        await registry.resolve_project(None, "/work/app/plugins/extra/b.py")
+        == "/work/app/plugins/extra"
+    )
+    with pytest.raises(PyCharmBridgeError, match="Cannot infer project"):
+        await registry.resolve_project(None, "/elsewhere/c.py")
+    with pytest.raises(PyCharmBridgeError, match="Cannot infer project"):
+        await registry.resolve_project(None, "src/a.py")
+
+    bridge.projects = ["/work/app"]
+    await registry.refresh()
+    assert await registry.resolve_project(None, "src/a.py") == "/work/app"
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_tracks_projects(bridge: StubBridge) -> None:
+    """Test that the heartbeat warms the cache and notices opened projects."""
+    registry = ProjectRegistry(interval=0.02)
+    registry.start()
+    try:
+        for _ in range(100):
+            if registry.projects is not None:
+                break
+            await asyncio.sleep(0.01)
+        assert registry.health is not None
+        assert [p.path for p in (await registry.get()).projects] == [
+            "/work/app",
+            "/work/app/plugins/extra",
+        ]
+
+        bridge.projects.append("/work/other")
+        for _ in range(100):
+            if registry.owner("/work/other/x.py"):
+                break
+            await asyncio.sleep(0.01)
+        assert registry.owner("/work/other/x.py") == "/work/other"
+    finally:
+        await registry.stop()
+
+
+@pytest.mark.asyncio
+async def test_list_projects_cached(bridge: StubBridge) -> None:
+    """Test that list_projects only fetches again when asked to refresh."""
+    first = await list_projects()
+    second = await list_projects()
+    await list_projects(refresh=True)
+
+    assert first == second
+    assert "/work/app/plugins/extra" in first.content[0].text
+    assert [path for _, path, _ in bridge.requests] == ["/projects", "/projects"]
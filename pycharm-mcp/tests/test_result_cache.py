@@ -0,0 +1,146 @@
+"""Tests for the on-disk result cache."""
+
+import time
+from pathlib import Path
+
+import pytest
+
+from pycharm_mcp import result_cache
+from pycharm_mcp.client import PyCharmClient
+from pycharm_mcp.metrics import ClientMetrics
+from pycharm_mcp.result_cache import (
+    ProjectResultCache,
+    ResultCache,
+    cacheable,
+    default_result_cache,
+)
+from pycharm_mcp.stub_bridge import StubBridge
+
+
+def _project(tmp_path: Path) -> Path:
+    project = tmp_path / "project"
+    (project / "pkg").mkdir(parents=True)
+    for i in range(3):
+        (project / "pkg" / f"module_{i}.py").write_text(f"value = symbol({i})\n")
+    return project
+
+
+@pytest.mark.asyncio
+async def test_repeat_query_is_served_from_disk(tmp_path: Path) -> None:
+    """Test that a later session reuses a result until a file of the project changes."""
+    project = _project(tmp_path)
+    cache_dir = tmp_path / "cache"
+
+    async def session() -> tuple[str | None, int]:
+        cache = ResultCache(cache_dir, max_bytes=1 << 20)
+        client = PyCharmClient(
+            base_url=stub.url, client_metrics=ClientMetrics(), result_cache=cache
+        )
+        response = await client.find_usages(
+            project=str(project), file="pkg/module_0.py", line=1, column=9
+        )
+        await client.close()
+        cache.close()
+        assert response.total_count == 3
+        return response.handle, len(stub.requests)
+
+    with StubBridge(projects=[str(project)]) as stub:
+        first_handle, sent = await session()
+        second_handle, sent_again = await session()
+        (project / "pkg" / "module_1.py").write_text("value = symbol(1) + 1\n")
+        _, sent_after_edit = await session()
+        _, sent_again_after_edit = await session()
+        # A new usage in a file the result does not name
+        (project / "pkg" / "module_3.py").write_text("value = symbol(3)\n")
+        _, sent_after_new_file = await session()
+
+    assert first_handle is not None
+    # Handles die with the bridge session, so they are not stored
+    assert second_handle is None
+    assert (sent, sent_again, sent_after_edit, sent_again_after_edit) == (1, 1, 2, 2)
+    assert sent_after_new_file == 3
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path) -> None:
+    """Test that the size cap evicts the entries used longest ago."""
+    project = _project(tmp_path)
+    cache = ResultCache(tmp_path / "cache", max_bytes=300)
+    sent_at = time.time()
+
+    def payload(line: int) -> dict[str, object]:
+        return {"project": str(project), "file": "pkg/module_0.py", "line": line, "column": 1}
+
+    def body(line: int) -> dict[str, object]:
+        usages = [{"file": "pkg/module_1.py", "line": line, "text": f"{line:0>100}"}]
+        return {"symbol": "symbol", "usages": usages, "totalCount": 1}
+
+    for line in (1, 2, 3):
+        assert cache.put("/find/usages", payload(line), body(line), sent_at)
+    assert cache.get("/find/usages", payload(1)) is not None
+    assert cache.put("/find/usages", payload(4), body(4), sent_at)
+
+    project_cache = cache.project(str(project))
+    assert project_cache is not None
+    assert project_cache.size <= 300
+    assert cache.get("/find/usages", payload(2)) is None
+    for line in (1, 3, 4):
+        assert cache.get("/find/usages", payload(line)) == body(line)
+
+
+def test_only_session_free_reads_are_stored(tmp_path: Path) -> None:
+    """Test which requests are cached, and that results racing an edit are not."""
+    target = {"project": "/p", "file": "a.py", "line": 1, "column": 1}
+    assert cacheable("/find/usages", target)
+    assert cacheable("/refactor/rename", {**target, "newName": "x", "preview": True})
+    assert not cacheable("/refactor/rename", {**target, "newName": "x", "preview": False})
+    assert not cacheable("/find/usages", {"project": "/p", "handle": "h"})
+    assert not cacheable("/find/usages", {**target, "sinceToken": "t"})
+    assert not cacheable("/refactor/safe-delete-bulk", {"project": "/p", "preview": True})
+
+    project = _project(tmp_path)
+    cache = ResultCache(tmp_path / "cache", max_bytes=1 << 20)
+    request = {**target, "project": str(project), "file": "pkg/module_0.py"}
+    sent_at = time.time() - 60
+    body = {"symbol": "symbol", "usages": [], "totalCount": 0}
+
+    assert not cache.put("/find/usages", request, body, sent_at)
+    assert not cache.put("/find/usages", {**request, "project": "/not/here"}, body, time.time())
+    assert not cache.put("/find/usages", request, {**body, "backend": "local"}, time.time())
+
+
+def test_invalid_size_disables_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that an unparsable PYCHARM_RESULT_CACHE_MB leaves the cache off."""
+    monkeypatch.setenv("PYCHARM_RESULT_CACHE_MB", "lots")
+    default_result_cache.cache_clear()
+    try:
+        assert default_result_cache() is None
+    finally:
+        default_result_cache.cache_clear()
+
+
+def test_lookups_reuse_the_project_stamp(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that hits within STAMP_TTL do not walk the project again."""
+    project = _project(tmp_path)
+    cache = ResultCache(tmp_path / "cache", max_bytes=1 << 20)
+    payload = {"project": str(project), "file": "pkg/module_0.py", "line": 1, "column": 9}
+    body = {"success": True, "symbol": "symbol", "usages": [], "totalCount": 0}
+    assert cache.put("/find/usages", payload, body, time.time())
+
+    walks = 0
+    walk = ProjectResultCache._walk
+
+    def counted(self: ProjectResultCache) -> list[tuple[str, int, int]]:
+        nonlocal walks
+        walks += 1
+        return walk(self)
+
+    monkeypatch.setattr(ProjectResultCache, "_walk", counted)
+    for _ in range(5):
+        assert cache.get("/find/usages", payload) is not None
+    assert walks == 0
+
+    monkeypatch.setattr(result_cache, "STAMP_TTL", 0.0)
+    (project / "pkg" / "module_3.py").write_text("value = symbol(3)\n")
+    assert cache.get("/find/usages", payload) is None
+    assert walks == 1
+    cache.close()
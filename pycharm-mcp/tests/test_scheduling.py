@@ -0,0 +1,182 @@
+"""Tests for holding requests while PyCharm is indexing and ordering them by priority."""
+
+import asyncio
+from collections.abc import Iterator
+
+import pytest
+
+from pycharm_mcp.client import BridgeIndexingError, PyCharmClient
+from pycharm_mcp.metrics import ClientMetrics
+from pycharm_mcp.options import Priority
+from pycharm_mcp.scheduling import IndexingGate, PriorityScheduler, background
+from pycharm_mcp.stub_bridge import StubBridge
+
+PROJECT = "/stub/project"
+
+
+@pytest.fixture
+def bridge(monkeypatch: pytest.MonkeyPatch) -> Iterator[StubBridge]:
+    """Run a stub bridge and point new clients at it."""
+    with StubBridge(projects=[PROJECT]) as stub:
+        monkeypatch.setenv("PYCHARM_BRIDGE_URL", stub.url)
+        yield stub
+
+
+def _finds(bridge: StubBridge) -> int:
+    return sum(1 for _, path, _ in bridge.requests if path == "/find/usages")
+
+
+@pytest.mark.asyncio
+async def test_reads_held_and_released_together(bridge: StubBridge) -> None:
+    """Test that reads wait out indexing and all go once it ends."""
+    client_metrics = ClientMetrics()
+    gate = IndexingGate(client_metrics)
+    client = PyCharmClient(indexing_gate=gate, client_metrics=client_metrics)
+
+    bridge.set_indexing(PROJECT, True)
+    assert (await client.health()).indexing_projects == [PROJECT]
+    gate.set_indexing(PROJECT, True)
+
+    reads = [asyncio.create_task(client.find_usages(PROJECT, "pkg/a.py", 1, 1)) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    assert _finds(bridge) == 0
+
+    bridge.set_indexing(PROJECT, False)
+    gate.set_indexing(PROJECT, False)
+    results = await asyncio.gather(*reads)
+
+    assert all(result.total_count == 3 for result in results)
+    assert client_metrics.snapshot()["indexing-wait:read"]["count"] == 5
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_deadline(bridge: StubBridge) -> None:
+    """Test that a request still held at its deadline fails without being sent."""
+    client_metrics = ClientMetrics()
+    gate = IndexingGate(client_metrics)
+    gate.set_indexing(PROJECT, True)
+    client = PyCharmClient(indexing_gate=gate, indexing_timeout=0.05)
+
+    with pytest.raises(BridgeIndexingError, match="Indexing in progress"):
+        await client.rename(PROJECT, "pkg/a.py", 1, 1, new_name="b")
+
+    assert not any(path == "/refactor/rename" for _, path, _ in bridge.requests)
+    assert client_metrics.snapshot()["indexing-timeout"]["count"] == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_retry_after_indexing_reply(bridge: StubBridge) -> None:
+    """Test that a 503 from the bridge holds the request until indexing ends."""
+    gate = IndexingGate(ClientMetrics())
+    client = PyCharmClient(indexing_gate=gate)
+    bridge.set_indexing(PROJECT, True)
+
+    async def finish_indexing() -> None:
+        await asyncio.sleep(0.05)
+        bridge.set_indexing(PROJECT, False)
+        gate.set_indexing(PROJECT, False)
+
+    finisher = asyncio.create_task(finish_indexing())
+    response = await client.find_usages(PROJECT, "pkg/a.py", 1, 1)
+    await finisher
+
+    assert response.total_count == 3
+    assert _finds(bridge) == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_writes_released_one_at_a_time() -> None:
+    """Test that writes queued during indexing do not overlap afterwards."""
+    gate = IndexingGate(ClientMetrics())
+    gate.set_indexing(PROJECT, True)
+    order: list[str] = []
+
+    async def write(name: str) -> None:
+        async with gate.admit(PROJECT, write=True, timeout=1.0):
+            order.append(f"start {name}")
+            await asyncio.sleep(0.01)
+            order.append(f"end {name}")
+
+    writes = [asyncio.create_task(write(name)) for name in "abc"]
+    await asyncio.sleep(0.01)
+    gate.set_indexing(PROJECT, False)
+    await asyncio.gather(*writes)
+
+    assert order == ["start a", "end a", "start b", "end b", "start c", "end c"]
+
+
+async def _queue(
+    scheduler: PriorityScheduler, priorities: list[Priority], order: list[str]
+) -> list[asyncio.Task[None]]:
+    """Queue one request per priority behind a held slot, in the given order."""
+
+    async def request(name: str, priority: Priority) -> None:
+        async with scheduler.slot(priority):
+            order.append(name)
+
+    tasks = []
+    for index, priority in enumerate(priorities):
+        tasks.append(asyncio.create_task(request(f"{priority[0]}{index}", priority)))
+        await asyncio.sleep(0)
+    return tasks
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_go_first() -> None:
+    """Test that queued interactive requests overtake queued background ones."""
+    client_metrics = ClientMetrics()
+    scheduler = PriorityScheduler(slots=1, max_background_wait=60, client_metrics=client_metrics)
+    order: list[str] = []
+
+    async with scheduler.slot("background"):
+        tasks = await _queue(scheduler, ["background", "background", "interactive"], order)
+        assert scheduler.queued == {"interactive": 1, "background": 2}
+        # A request cancelled while queued gives up its place
+        tasks[0].cancel()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert order == ["i2", "b1"]
+    assert scheduler.in_flight == 0
+    assert client_metrics.snapshot()["queue-wait:background"]["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_background_requests_do_not_starve() -> None:
+    """Test that a background request past its maximum wait goes before interactive ones."""
+    scheduler = PriorityScheduler(slots=1, max_background_wait=0.02, client_metrics=ClientMetrics())
+    order: list[str] = []
+
+    async with scheduler.slot("interactive"):
+        tasks = await _queue(scheduler, ["background"], order)
+        await asyncio.sleep(0.03)
+        tasks += await _queue(scheduler, ["interactive", "interactive"], order)
+    await asyncio.gather(*tasks)
+
+    assert order == ["b0", "i0", "i1"]
+
+
+@pytest.mark.asyncio
+async def test_client_priority_metrics(bridge: StubBridge) -> None:
+    """Test that bridge requests are scheduled and timed per priority class."""
+    client_metrics = ClientMetrics()
+    scheduler = PriorityScheduler(slots=2, client_metrics=client_metrics)
+    with background():
+        batch = PyCharmClient(client_metrics=client_metrics, request_scheduler=scheduler)
+    agent = PyCharmClient(client_metrics=client_metrics, request_scheduler=scheduler)
+
+    await asyncio.gather(
+        *(batch.find_usages(PROJECT, "pkg/a.py", 1, 1) for _ in range(4)),
+        agent.find_usages(PROJECT, "pkg/a.py", 1, 1),
+    )
+
+    snapshot = client_metrics.snapshot()
+    assert batch.priority == "background" and agent.priority == "interactive"
+    assert snapshot["priority:background"]["count"] == 4
+    assert snapshot["priority:interactive"]["count"] == 1
+    assert snapshot["queue-wait:background"]["count"] == 4
+    await batch.close()
+    await agent.close()
@@ -0,0 +1,109 @@
+"""Tests for MCP server startup."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from pycharm_mcp.lazy_mcp import LazyFastMCP
+from pycharm_mcp.stub_bridge import StubBridge
+
+
+def make_server() -> LazyFastMCP:
+    server = LazyFastMCP("Test")
+
+    @server.tool()
+    async def echo(text: str, repeat: int = 1) -> str:
+        """Echo the text back."""
+        return text * repeat
+
+    return server
+
+
+def test_server_import_defers_tools() -> None:
+    """Test that starting the server does not import the tool modules."""
+    code = (
+        "import sys, pycharm_mcp.server; "
+        "print(' '.join(m for m in sys.modules if m.startswith('pycharm_mcp')))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    loaded = result.stdout.split()
+
+    assert "pycharm_mcp.server" in loaded
+    assert not {"pycharm_mcp.tools", "pycharm_mcp.client", "pycharm_mcp.models"} & set(loaded)
+
+
+def test_client_import_defers_local_engine() -> None:
+    """Test that the client only loads the local engine when a backend uses it."""
+    code = "import sys, pycharm_mcp.client; print('pycharm_mcp.local_engine' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == "False"
+
+
+@pytest.mark.asyncio
+async def test_tool_schemas_cached(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that tools/list is served from the schema cache once written."""
+    monkeypatch.setenv("PYCHARM_MCP_CACHE_DIR", str(tmp_path))
+
+    first = make_server()
+    generated = await first.list_tools()
+    assert len(list(tmp_path.glob("tools-*.json"))) == 1
+
+    second = make_server()
+    cached = await second.list_tools()
+    assert cached == generated
+    assert second._tool_manager.list_tools() == []
+
+    result = await second.call_tool("echo", {"text": "ab", "repeat": 2})
+    assert "abab" in str(result)
+
+
+@pytest.mark.parametrize("edited", ["models.py", "options.py", "columnar.py"])
+def test_schema_cache_key_covers_imported_types(
+    edited: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that editing a module the deferred types import changes the cache key."""
+    server = make_server()
+    server.defer_import("pycharm_mcp.models")
+    key = server.schema_cache_key()
+
+    read_bytes = Path.read_bytes
+
+    def with_edit(path: Path) -> bytes:
+        source = read_bytes(path)
+        return source + b"\n# edited\n" if path.name == edited else source
+
+    monkeypatch.setattr(Path, "read_bytes", with_edit)
+    assert server.schema_cache_key() != key
+
+
+@pytest.mark.asyncio
+async def test_tools_return_structured_results(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that tools return their response model as structured content."""
+    from pycharm_mcp.server import mcp
+
+    monkeypatch.setenv("PYCHARM_MCP_CACHE_DIR", str(tmp_path))
+    tools = {tool.name: tool for tool in await mcp.list_tools()}
+    assert all(tool.outputSchema is not None for tool in tools.values())
+    assert "totalCount" in tools["pycharm_find_usages"].outputSchema["properties"]
+
+    with StubBridge(projects=["/stub/project"]) as stub:
+        monkeypatch.setenv("PYCHARM_BRIDGE_URL", stub.url)
+        args = {"project_path": "/stub/project", "file_path": "pkg/a.py", "line": 1, "column": 1}
+        summary = await mcp.call_tool("pycharm_find_usages", args)
+        full = await mcp.call_tool("pycharm_find_usages", {**args, "text": "full"})
+        bare = await mcp.call_tool("pycharm_find_usages", {**args, "text": "none"})
+
+    assert summary.structuredContent["totalCount"] == len(summary.structuredContent["usages"])
+    assert summary.structuredContent["usages"] == bare.structuredContent["usages"]
+    assert "📄" not in summary.content[0].text
+    assert "📄" in full.content[0].text
+    assert bare.content == []
@@ -0,0 +1,66 @@
+"""Tests for reading large responses through a temporary file."""
+
+import json
+import tempfile
+from array import array
+from typing import Any
+
+import pytest
+
+from pycharm_mcp import spill
+from pycharm_mcp.client import PyCharmClient
+from pycharm_mcp.metrics import ClientMetrics
+from pycharm_mcp.stub_bridge import StubBridge
+
+PROJECT = "/stub/project"
+
+
+def _parse(raw: bytes) -> dict[str, Any]:
+    with tempfile.TemporaryFile() as file:
+        file.write(raw)
+        return spill.parse_file(file)
+
+
+def test_parse_across_windows(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that values cut by window boundaries parse like json.loads."""
+    monkeypatch.setattr(spill, "WINDOW", 64)
+    body = {
+        "usageColumns": {
+            "strings": ["pkg/a.py", "value = f(x, y]", "naïve ✓ " * 20],
+            "file": list(range(500)),
+            "line": [0, 2**40, 7] * 50,
+            "column": [*range(100), 2**70, -(2**70), 3],
+        },
+        "mixed": [1, 2, "three", 4.5, None, {"nested": [1, [2, 3]]}],
+        "floats": [*range(100), 1.5],
+        "empty": [],
+        "success": True,
+    }
+
+    for raw in (json.dumps(body).encode(), json.dumps(body, indent=2, ensure_ascii=False).encode()):
+        parsed = _parse(raw)
+        columns = parsed["usageColumns"]
+        assert isinstance(columns["file"], array) and columns["file"].typecode == "I"
+        assert columns["line"].typecode == "q"
+        assert isinstance(columns["column"], list)
+        assert json.loads(json.dumps(parsed, default=list)) == body
+
+    with pytest.raises(ValueError):
+        _parse(b'{"usages": [1, 2')
+
+
+@pytest.mark.asyncio
+async def test_large_response_spilled() -> None:
+    """Test that a response past the threshold decodes to the same result."""
+    with StubBridge(projects=[PROJECT], usages_per_symbol=5000) as stub:
+        results = []
+        for spill_bytes in (1 << 30, 1024):
+            client = PyCharmClient(
+                base_url=stub.url, client_metrics=ClientMetrics(), spill_bytes=spill_bytes
+            )
+            response = await client.find_usages(project=PROJECT, file="a.py", line=1, column=1)
+            await client.close()
+            results.append([(u.file, u.line, u.column, u.text) for u in response.usages])
+
+    assert len(results[0]) == 5000
+    assert results[0] == results[1]
@@ -0,0 +1,286 @@
+"""Tests against the local stand-in bridge."""
+
+import hashlib
+from collections.abc import Iterator
+
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError
+
+from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.metrics import ClientMetrics
+from pycharm_mcp.models import ExtractRange, MoveElement, PlanStep
+from pycharm_mcp.stub_bridge import StubBridge
+from pycharm_mcp.tools import (
+    extract_ranges,
+    find_usages,
+    find_usages_all_projects,
+    move_elements,
+    rename_symbol,
+    safe_delete_bulk,
+)
+
+PROJECT = "/stub/project"
+
+
+@pytest.fixture
+def bridge(monkeypatch: pytest.MonkeyPatch) -> Iterator[StubBridge]:
+    """Run a stub bridge and point new clients at it."""
+    with StubBridge(projects=[PROJECT]) as stub:
+        monkeypatch.setenv("PYCHARM_BRIDGE_URL", stub.url)
+        yield stub
+
+
+@pytest.mark.asyncio
+async def test_timings_parsed_and_recorded(bridge: StubBridge) -> None:
+    """Test that Server-Timing phases reach the response model and metrics."""
+    client_metrics = ClientMetrics()
+    client = PyCharmClient(client_metrics=client_metrics)
+
+    response = await client.rename(
+        project=PROJECT, file="pkg/a.py", line=1, column=1, new_name="renamed"
+    )
+
+    assert response.timings is not None
+    assert {"save", "resolve", "search", "write", "serialize"} <= set(response.timings.phases)
+    assert response.timings.round_trip_ms > 0
+    snapshot = client_metrics.snapshot()
+    assert snapshot["/refactor/rename"]["count"] == 1
+    assert "/refactor/rename:search" in snapshot
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_tool_debug_timings(bridge: StubBridge) -> None:
+    """Test that tools only show the timing breakdown when asked."""
+    plain = await rename_symbol(
+        project_path=PROJECT, file_path="pkg/a.py", line=1, column=1, new_name="renamed"
+    )
+    debug = await rename_symbol(
+        project_path=PROJECT,
+        file_path="pkg/a.py",
+        line=1,
+        column=1,
+        new_name="renamed",
+        debug_timings=True,
+    )
+
+    assert "Timings:" not in plain.content[0].text
+    assert "timings" not in plain.structuredContent
+    assert "Timings:" in debug.content[0].text
+    assert "search:" in debug.content[0].text
+    assert "search" in debug.structuredContent["timings"]["phases"]
+
+
+@pytest.mark.asyncio
+async def test_document_sync(bridge: StubBridge, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the sync mode defaults from the environment and can be overridden."""
+    monkeypatch.setenv("PYCHARM_DOCUMENT_SYNC", "files")
+    client = PyCharmClient()
+
+    scoped = await client.rename(
+        project=PROJECT, file="pkg/a.py", line=1, column=1, new_name="renamed"
+    )
+    skipped = await client.rename(
+        project=PROJECT, file="pkg/a.py", line=1, column=1, new_name="renamed", sync="none"
+    )
+
+    assert [payload["sync"] for _, _, payload in bridge.requests if payload] == ["files", "none"]
+    assert scoped.timings is not None and "save" in scoped.timings.phases
+    assert skipped.timings is not None and "save" not in skipped.timings.phases
+
+    await client.close()
+
+    monkeypatch.setenv("PYCHARM_DOCUMENT_SYNC", "some")
+    with pytest.raises(ValueError):
+        PyCharmClient()
+
+
+@pytest.mark.asyncio
+async def test_file_digests(bridge: StubBridge) -> None:
+    """Test that applied refactorings report digests, with content only on request."""
+    client = PyCharmClient()
+    target = {"project": PROJECT, "file": "pkg/a.py", "line": 1, "column": 1}
+
+    preview = await client.rename(**target, new_name="renamed", preview=True)
+    plain = await client.rename(**target, new_name="renamed")
+    full = await client.inline(**target, contents="content")
+
+    assert preview.files == []
+    assert len(plain.files) == plain.files_modified
+    assert all(digest.content is None and digest.diff is None for digest in plain.files)
+    digest = full.files[0]
+    assert digest.content is not None
+    assert digest.sha256 == hashlib.sha256(digest.content.encode()).hexdigest()
+    assert digest.size == len(digest.content.encode())
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_apply_plan(bridge: StubBridge) -> None:
+    """Test that a plan is sent as one request and its changes come back combined."""
+    client = PyCharmClient()
+    steps = [
+        PlanStep(type="move", handle="h1", target_file="pkg/b.py"),
+        PlanStep(type="rename", handle="h1", new_name="renamed"),
+    ]
+
+    response = await client.apply_plan(project=PROJECT, steps=steps, contents="diff")
+
+    _, path, payload = bridge.requests[-1]
+    assert path == "/refactor/apply-plan"
+    assert payload is not None
+    assert payload["steps"][0] == {
+        "type": "move",
+        "handle": "h1",
+        "targetFile": "pkg/b.py",
+        "searchInComments": True,
+        "searchInStrings": False,
+    }
+    assert [(step.type, step.change_count) for step in response.steps] == [
+        ("move", 3),
+        ("rename", 3),
+    ]
+    assert len(response.changes) == 6
+    assert response.files_modified == len(response.files) == 3
+    assert all(digest.diff for digest in response.files)
+
+    failing = [*steps, PlanStep(type="inline", file="pkg/a.py")]
+    with pytest.raises(PyCharmBridgeError, match="Step 3 .* 2 step"):
+        await client.apply_plan(project=PROJECT, steps=failing)
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_apply_plan_first_step_fails_writing(bridge: StubBridge) -> None:
+    """Test that a first step failing partway through its write reports it was undone."""
+    bridge.failing_writes.add("move")
+    client = PyCharmClient()
+    steps = [
+        PlanStep(type="move", handle="h1", target_file="pkg/b.py"),
+        PlanStep(type="rename", handle="h1", new_name="renamed"),
+    ]
+
+    with pytest.raises(PyCharmBridgeError, match=r"Step 1 \(move\) failed, its partial edits were"):
+        await client.apply_plan(project=PROJECT, steps=steps)
+    with pytest.raises(PyCharmBridgeError, match="partial edits and the 1 step"):
+        await client.apply_plan(project=PROJECT, steps=steps[::-1])
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_incremental_usages_follow_the_symbol(bridge: StubBridge) -> None:
+    """Test that a token is not reused once its position names another symbol."""
+    target = {"project_path": PROJECT, "file_path": "pkg/shifted.py", "line": 3, "column": 5}
+    await find_usages(**target)
+    again = await find_usages(**target)
+    assert again.structuredContent is not None
+    assert "incremental" in again.content[0].text
+
+    # An edit above shifted another symbol onto the same position
+    bridge.symbols[("pkg/shifted.py", 3, 5)] = "other"
+    moved = await find_usages(**target)
+    assert bridge.requests[-1][2] is not None and bridge.requests[-1][2]["sinceToken"]
+    assert moved.structuredContent is not None
+    assert moved.structuredContent["symbol"] == "other"
+    assert moved.structuredContent["totalCount"] == 3
+    assert "incremental" not in moved.content[0].text
+
+
+@pytest.mark.asyncio
+async def test_find_usages_all_projects(bridge: StubBridge) -> None:
+    """Test that usages come back per project and a slow project does not sink the rest."""
+    consumer, slow = "/stub/consumer", "/stub/slow"
+    bridge.projects.extend([consumer, slow])
+    bridge.timing_out.add(slow)
+
+    result = await find_usages_all_projects(
+        project_path=PROJECT, file_path="pkg/a.py", line=1, column=1, timeout=5, text="full"
+    )
+
+    _, path, payload = bridge.requests[-1]
+    assert path == "/find/usages/all-projects"
+    assert payload is not None and payload["timeoutMs"] == 5000
+    structured = result.structuredContent
+    assert structured is not None
+    by_project = {entry["project"]: entry for entry in structured["projects"]}
+    assert by_project[consumer]["totalCount"] == 3
+    assert all(u["file"].startswith(consumer) for u in by_project[consumer]["usages"])
+    assert by_project[slow]["timedOut"] and by_project[slow]["usages"] == []
+    assert structured["totalCount"] == 6
+    text = result.content[0].text
+    assert f"{slow}: timed out" in text
+    assert f"📁 {consumer}:" in text
+
+
+@pytest.mark.asyncio
+async def test_safe_delete_bulk(bridge: StubBridge) -> None:
+    """Test that a scope is deleted in one request and used symbols are reported."""
+    result = await safe_delete_bulk(project_path=PROJECT, scope="pkg", text="full")
+
+    _, path, payload = bridge.requests[-1]
+    assert path == "/refactor/safe-delete-bulk"
+    assert payload is not None and payload["scope"] == "pkg" and "candidates" not in payload
+    structured = result.structuredContent
+    assert structured is not None
+    assert [symbol["name"] for symbol in structured["deleted"]] == ["unused_0", "unused_2"]
+    assert [symbol["usagesFound"] for symbol in structured["blocked"]] == [3, 3]
+    assert structured["filesModified"] == len(structured["files"]) == 2
+    assert "unused_1" in result.content[0].text
+
+
+@pytest.mark.asyncio
+async def test_move_elements(bridge: StubBridge) -> None:
+    """Test that elements move in one request and each referencing file is updated once."""
+    bridge.usages_per_symbol = 10
+    elements = [
+        MoveElement(qualified_name="pkg.core.Circle"),
+        MoveElement(qualified_name="pkg.core.Square"),
+        MoveElement(handle="h1"),
+    ]
+
+    result = await move_elements(
+        project_path=PROJECT, elements=elements, target_file="pkg/shapes.py", text="full"
+    )
+
+    _, path, payload = bridge.requests[-1]
+    assert path == "/refactor/move-bulk"
+    assert payload is not None
+    assert payload["elements"][0] == {"qualifiedName": "pkg.core.Circle"}
+    structured = result.structuredContent
+    assert structured is not None
+    assert [element["name"] for element in structured["moved"]] == ["Circle", "Square", "element_2"]
+    # Ten usages across seven files, whatever the number of elements
+    assert structured["importsUpdated"] == 7
+    assert "Imports updated: 7" in result.content[0].text
+
+
+@pytest.mark.asyncio
+async def test_extract_ranges(bridge: StubBridge) -> None:
+    """Test that ranges in original coordinates go in one request and map back."""
+    ranges = [
+        ExtractRange(
+            kind="variable", start_line=30, start_column=5, end_line=30, end_column=9, name="total"
+        ),
+        ExtractRange(
+            kind="method", start_line=10, start_column=1, end_line=20, end_column=1, name="load"
+        ),
+    ]
+
+    result = await extract_ranges(project_path=PROJECT, file_path="pkg/a.py", ranges=ranges)
+
+    _, path, payload = bridge.requests[-1]
+    assert path == "/refactor/extract-ranges"
+    assert payload is not None and [r["startLine"] for r in payload["ranges"]] == [30, 10]
+    structured = result.structuredContent
+    assert structured is not None
+    # The method above the variable pushes it down
+    lines = [(e["name"], e["line"]) for e in structured["extracted"]]
+    assert lines == [("total", 33), ("load", 10)]
+
+    overlapping = [*ranges, ranges[1].model_copy(update={"start_line": 15, "end_line": 25})]
+    with pytest.raises(ToolError, match="overlap"):
+        await extract_ranges(project_path=PROJECT, file_path="pkg/a.py", ranges=overlapping)
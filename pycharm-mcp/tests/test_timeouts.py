@@ -0,0 +1,114 @@
+"""Tests for per-endpoint timeouts and the deadline sent to the bridge."""
+
+import time
+
+import httpx
+import pytest
+import respx
+
+from pycharm_mcp.client import PyCharmBridgeError, PyCharmClient
+from pycharm_mcp.metrics import ClientMetrics
+from pycharm_mcp.stub_bridge import StubBridge
+from pycharm_mcp.timeouts import AdaptiveTimeouts, series_name, timeout_override
+
+PROJECT = "/stub/project"
+
+
+def test_timeouts_follow_p99_within_bounds() -> None:
+    """Test that an endpoint gets its p99 times the factor once it has enough samples."""
+    client_metrics = ClientMetrics()
+    timeouts = AdaptiveTimeouts(
+        client_metrics, factor=3.0, floor=1.0, ceiling=60.0, initial=30.0, min_samples=10
+    )
+    assert timeouts.timeout_for("/find/usages") == 30.0
+    assert timeouts.timeout_for("/health") == 5.0
+
+    for _ in range(100):
+        client_metrics.series("/find/usages").add(1000.0)
+        client_metrics.series("/health").add(1.0)
+        client_metrics.series("/refactor/move").add(50_000.0)
+    assert timeouts.timeout_for("/find/usages") == pytest.approx(3.0)
+    assert timeouts.timeout_for("/health") == 1.0
+    assert timeouts.timeout_for("/refactor/move") == 60.0
+
+
+def test_timeouts_recover_and_keep_writes_safe() -> None:
+    """Test that a timeout raises the learned one and writes never adapt downward."""
+    client_metrics = ClientMetrics()
+    timeouts = AdaptiveTimeouts(
+        client_metrics, factor=3.0, floor=1.0, ceiling=60.0, initial=30.0, min_samples=10
+    )
+    incremental = series_name("/find/usages", {"sinceToken": "t1"})
+    assert incremental == "incremental:/find/usages"
+    assert series_name("/find/usages", {"sinceToken": None}) == "/find/usages"
+
+    for _ in range(100):
+        client_metrics.series("/find/usages").add(100.0)
+        client_metrics.series("/refactor/move").add(100.0)
+    assert timeouts.timeout_for("/find/usages") == 1.0
+    assert timeouts.timeout_for(incremental) == 30.0
+    assert timeouts.timeout_for("/refactor/move") == 30.0
+
+    timeouts.timed_out("/find/usages", 1.0)
+    assert timeouts.timeout_for("/find/usages") == 2.0
+    assert client_metrics.series("/find/usages").count == 101
+
+
+@respx.mock
+@pytest.mark.asyncio
+async def test_timeout_raise_outlives_the_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a timeout in one client raises the timeout the next client gets."""
+    monkeypatch.setenv("PYCHARM_TIMEOUT_FLOOR", "0.1")
+    client_metrics = ClientMetrics()
+    for _ in range(100):
+        client_metrics.series("/find/usages").add(10.0)
+
+    def slow(request: httpx.Request) -> httpx.Response:
+        time.sleep(0.2)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    respx.post("http://localhost:9876/find/usages").mock(side_effect=slow)
+    # Like the tools: a new client per call, over the same metrics
+    first = PyCharmClient(base_url="http://localhost:9876", client_metrics=client_metrics)
+    assert first.timeout_for("/find/usages") == pytest.approx(0.1)
+    with pytest.raises(PyCharmBridgeError, match="timed out"):
+        await first.find_usages(project=PROJECT, file="a.py", line=1, column=1)
+    await first.close()
+
+    second = PyCharmClient(base_url="http://localhost:9876", client_metrics=client_metrics)
+    assert second.timeout_for("/find/usages") >= 0.4
+    assert client_metrics.series("timeout:/find/usages").count == 1
+
+
+def test_bounds_from_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that factor, floor and ceiling default to the environment."""
+    monkeypatch.setenv("PYCHARM_TIMEOUT_FACTOR", "2")
+    monkeypatch.setenv("PYCHARM_TIMEOUT_FLOOR", "0.5")
+    monkeypatch.setenv("PYCHARM_TIMEOUT_CEILING", "20")
+    timeouts = AdaptiveTimeouts(ClientMetrics())
+    assert (timeouts.factor, timeouts.floor, timeouts.ceiling) == (2.0, 0.5, 20.0)
+    assert timeouts.timeout_for("/refactor/rename") == 20.0
+
+
+@pytest.mark.asyncio
+async def test_deadline_sent_and_overridable() -> None:
+    """Test that the chosen timeout reaches the bridge and an override replaces it."""
+    client_metrics = ClientMetrics()
+    with StubBridge(projects=[PROJECT]) as stub:
+        client = PyCharmClient(
+            base_url=stub.url,
+            client_metrics=client_metrics,
+            timeouts=AdaptiveTimeouts(client_metrics, floor=1.0, ceiling=60.0),
+        )
+        await client.health()
+        with timeout_override(12.5):
+            await client.find_usages(project=PROJECT, file="a.py", line=1, column=1)
+        await client.find_usages(project=PROJECT, file="a.py", line=1, column=1)
+
+        # The bridge answers at once that it cannot finish in time
+        stub.latency_ms = 2000
+        with timeout_override(1.0), pytest.raises(PyCharmBridgeError, match="Deadline"):
+            await client.find_usages(project=PROJECT, file="a.py", line=1, column=1)
+        await client.close()
+
+    assert stub.deadlines == [5000, 12500, 30000, 1000]
@@ -0,0 +1,131 @@
+"""Tests for checking the files a refactoring modified."""
+
+from pathlib import Path
+
+import pytest
+
+from pycharm_mcp.models import ExtractRange
+from pycharm_mcp.stub_bridge import StubBridge
+from pycharm_mcp.tools import extract_ranges, rename_symbol
+from pycharm_mcp.verify import verify_files
+
+SOURCES = {
+    "pkg/__init__.py": "",
+    "pkg/core.py": "def area():\n    return 1\n",
+    "pkg/ok.py": "import json\nfrom pkg.core import area\n\nprint(area(), json)\n",
+    "pkg/syntax.py": "def area(:\n    return 1\n",
+    "pkg/imports.py": (
+        "from pkg.core import volume\n"
+        "import pkg.shapes\n"
+        "from . import core\n"
+        "from .missing import square\n"
+        "try:\n"
+        "    import pkg.optional\n"
+        "except ImportError:\n"
+        "    pass\n"
+    ),
+    "pkg/names.py": "def total(values):\n    return sum(v for v in values) + old_name\n",
+    "pkg/starred.py": "from pkg.core import *\n\nprint(anything)\n",
+}
+
+
+def _project(tmp_path: Path, sources: dict[str, str]) -> Path:
+    project = tmp_path / "project"
+    for file, source in sources.items():
+        (project / file).parent.mkdir(parents=True, exist_ok=True)
+        (project / file).write_text(source)
+    return project
+
+
+def test_diagnostics_per_file(tmp_path: Path) -> None:
+    """Test that syntax errors, missing project imports and undefined names are found."""
+    project = _project(tmp_path, SOURCES)
+
+    files = [*SOURCES, "pkg/deleted.py", "pkg/lost.py", "README.md"]
+    verification = verify_files(str(project), files, workers=1, gone=["pkg/deleted.py"])
+
+    found = [(d.file, d.line, d.kind, d.message) for d in verification.diagnostics]
+    assert found == [
+        ("pkg/imports.py", 1, "import", "Cannot import 'volume' from 'pkg.core'"),
+        ("pkg/imports.py", 2, "import", "No module named 'pkg.shapes' in the project"),
+        ("pkg/imports.py", 4, "import", "No module named '.missing'"),
+        ("pkg/lost.py", 1, "read", "Cannot read the file: No such file or directory"),
+        ("pkg/names.py", 2, "name", "Undefined name 'old_name'"),
+        ("pkg/syntax.py", 1, "syntax", "invalid syntax"),
+    ]
+    assert verification.files_checked == len(SOURCES) + 1
+    assert verification.skipped is None
+
+
+def test_remote_project_not_verified(tmp_path: Path) -> None:
+    """Test that a project that is not on this machine is skipped, not passed."""
+    verification = verify_files(str(tmp_path / "elsewhere"), ["pkg/core.py"], workers=1)
+
+    assert verification.files_checked == 0 and not verification.diagnostics
+    assert verification.skipped is not None and "not a directory" in verification.skipped
+
+
+def test_pool_matches_serial(tmp_path: Path) -> None:
+    """Test that checking in a process pool gives the same diagnostics."""
+    sources = {**SOURCES, **{f"pkg/module_{i}.py": f"value = missing_{i}\n" for i in range(10)}}
+    project = _project(tmp_path, sources)
+
+    serial = verify_files(str(project), sources, workers=1)
+    parallel = verify_files(str(project), [str(project / file) for file in sources], workers=2)
+
+    assert parallel.diagnostics == serial.diagnostics
+    assert len(serial.diagnostics) == 15
+
+
+@pytest.mark.asyncio
+async def test_rename_with_verify(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that an applied rename reports problems in the files it changed."""
+    source = "from pkg.core import symbol\n\nvalue = symbol(1)\n"
+    sources = {f"pkg/module_{i}.py": source for i in range(3)}
+    sources["pkg/core.py"] = "def symbol(x):\n    return x\n"
+    # Lost its import
+    sources["pkg/module_1.py"] = "value = symbol(1)\n"
+    project = _project(tmp_path, sources)
+    with StubBridge(projects=[str(project)]) as stub:
+        monkeypatch.setenv("PYCHARM_BRIDGE_URL", stub.url)
+
+        preview = await rename_symbol(
+            project_path=str(project), handle="h1", new_name="renamed", preview=True, verify=True
+        )
+        result = await rename_symbol(
+            project_path=str(project), handle="h1", new_name="renamed", verify=True
+        )
+
+    assert preview.structuredContent is not None
+    assert preview.structuredContent["verification"] is None
+    structured = result.structuredContent
+    assert structured is not None
+    assert structured["verification"]["filesChecked"] == 3
+    assert [d["file"] for d in structured["verification"]["diagnostics"]] == ["pkg/module_1.py"]
+    assert "pkg/module_1.py:1:9 name: Undefined name 'symbol'" in result.content[0].text
+
+
+@pytest.mark.asyncio
+async def test_extract_ranges_with_verify(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the multi-range extract checks the file it extracted from."""
+    project = _project(tmp_path, {"pkg/shapes.py": "def area(r):\n    return r * pi\n"})
+    extraction = ExtractRange.model_validate(
+        {
+            "kind": "variable",
+            "startLine": 2,
+            "startColumn": 12,
+            "endLine": 2,
+            "endColumn": 17,
+            "name": "scaled",
+        }
+    )
+    with StubBridge(projects=[str(project)]) as stub:
+        monkeypatch.setenv("PYCHARM_BRIDGE_URL", stub.url)
+        result = await extract_ranges(
+            project_path=str(project), file_path="pkg/shapes.py", ranges=[extraction], verify=True
+        )
+
+    structured = result.structuredContent
+    assert structured is not None
+    assert structured["verification"]["filesChecked"] == 1
+    assert "pkg/shapes.py:2:16 name: Undefined name 'pi'" in result.content[0].text
@@ -1,11 +1,17 @@
 package com.github.pycharm.refactoring.refactoring
 
+import com.github.pycharm.refactoring.server.models.ExtractKind
 import com.github.pycharm.refactoring.server.models.ExtractMethodRequest
 import com.github.pycharm.refactoring.server.models.ExtractMethodResponse
 import com.github.pycharm.refactoring.server.models.ExtractVariableRequest
 import com.github.pycharm.refactoring.server.models.ExtractVariableResponse
+import com.github.pycharm.refactoring.server.models.ExtractedRange
+import com.github.pycharm.refactoring.server.models.MultiExtractRequest
+import com.github.pycharm.refactoring.server.models.MultiExtractResponse
+import com.github.pycharm.refactoring.util.FileDigests
 import com.github.pycharm.refactoring.util.ProjectUtils
 import com.github.pycharm.refactoring.util.PsiUtils
+import com.github.pycharm.refactoring.util.RequestTimer
 import com.intellij.openapi.application.ApplicationManager
 import com.intellij.openapi.application.WriteAction
 import com.intellij.openapi.command.CommandProcessor
@@ -24,13 +30,21 @@ import com.jetbrains.python.refactoring.introduce.variable.PyIntroduceVariableHa
 
 class ExtractService {
 
-    fun extractMethod(request: ExtractMethodRequest): ExtractMethodResponse {
-        val project = ProjectUtils.findProjectByPath(request.project)
+    fun extractMethod(
+        request: ExtractMethodRequest,
+        timer: RequestTimer = RequestTimer()
+    ): ExtractMethodResponse {
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
             ?: throw IllegalArgumentException("Project not found: ${request.project}")
 
-        ProjectUtils.saveAllDocuments()
+        timer.phase("save") {
+            ProjectUtils.syncDocuments(
+                request.sync,
+                listOf(ProjectUtils.findVirtualFile(project, request.file))
+            )
+        }
 
-        val psiFile = ProjectUtils.findPsiFile(project, request.file)
+        val psiFile = timer.phase("resolve") { ProjectUtils.findPsiFile(project, request.file) }
             ?: throw IllegalArgumentException("File not found: ${request.file}")
 
         if (psiFile !is PyFile) {
@@ -54,21 +68,14 @@ class ExtractService {
 
         val extractedMethodLine: Int
 
-        ApplicationManager.getApplication().invokeAndWait {
-            CommandProcessor.getInstance().executeCommand(project, {
-                WriteAction.run<Throwable> {
-                    editor.selectionModel.setSelection(startOffset, endOffset)
-
-                    // Use PyCharm's extract method utility
-                    // Note: This is a simplified version - full implementation would use
-                    // PyExtractMethodUtil.extractMethod with proper settings
-                    val elements = getElementsInRange(psiFile, startOffset, endOffset)
-                    if (elements.isNotEmpty()) {
-                        // PyExtractMethodUtil.extractMethod(...)
-                        // The actual implementation would need to handle the dialog
+        timer.phase("write") {
+            ApplicationManager.getApplication().invokeAndWait {
+                CommandProcessor.getInstance().executeCommand(project, {
+                    WriteAction.run<Throwable> {
+                        runExtractMethod(psiFile, editor, startOffset, endOffset)
                     }
-                }
-            }, "Extract method: ${request.methodName}", null)
+                }, "Extract method: ${request.methodName}", null)
+            }
         }
 
         return ExtractMethodResponse(
@@ -80,13 +87,21 @@ class ExtractService {
         )
     }
 
-    fun extractVariable(request: ExtractVariableRequest): ExtractVariableResponse {
-        val project = ProjectUtils.findProjectByPath(request.project)
+    fun extractVariable(
+        request: ExtractVariableRequest,
+        timer: RequestTimer = RequestTimer()
+    ): ExtractVariableResponse {
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
             ?: throw IllegalArgumentException("Project not found: ${request.project}")
 
-        ProjectUtils.saveAllDocuments()
+        timer.phase("save") {
+            ProjectUtils.syncDocuments(
+                request.sync,
+                listOf(ProjectUtils.findVirtualFile(project, request.file))
+            )
+        }
 
-        val psiFile = ProjectUtils.findPsiFile(project, request.file)
+        val psiFile = timer.phase("resolve") { ProjectUtils.findPsiFile(project, request.file) }
             ?: throw IllegalArgumentException("File not found: ${request.file}")
 
         if (psiFile !is PyFile) {
@@ -106,29 +121,14 @@ class ExtractService {
 
         var occurrencesReplaced = 1
 
-        ApplicationManager.getApplication().invokeAndWait {
-            CommandProcessor.getInstance().executeCommand(project, {
-                WriteAction.run<Throwable> {
-                    // Find the expression to extract
-                    val element = psiFile.findElementAt(startOffset)
-                    var expression: PyExpression? = null
-                    var current: PsiElement? = element
-                    while (current != null && current !is PsiFile) {
-                        if (current is PyExpression &&
-                            current.textRange.startOffset >= startOffset &&
-                            current.textRange.endOffset <= endOffset) {
-                            expression = current
-                        }
-                        current = current.parent
+        timer.phase("write") {
+            ApplicationManager.getApplication().invokeAndWait {
+                CommandProcessor.getInstance().executeCommand(project, {
+                    WriteAction.run<Throwable> {
+                        occurrencesReplaced = runExtractVariable(psiFile, startOffset, endOffset).occurrencesReplaced
                     }
-
-                    if (expression != null) {
-                        // Use PyCharm's introduce variable handler
-                        // Note: Full implementation would use PyIntroduceVariableHandler
-                        // with the request.variableName and request.replaceAll settings
-                    }
-                }
-            }, "Extract variable: ${request.variableName}", null)
+                }, "Extract variable: ${request.variableName}", null)
+            }
         }
 
         return ExtractVariableResponse(
@@ -139,6 +139,141 @@ class ExtractService {
         )
     }
 
+    /**
+     * Apply many extractions to one file as one command. Ranges are given in
+     * the file's coordinates before any of them is applied, so they are
+     * applied from the bottom of the file up: an extraction only shifts the
+     * text below it, which was already handled. Where each new method or
+     * variable ends up is tracked with range markers through the extractions
+     * above it, and the document is committed once after the last.
+     */
+    fun extractRanges(request: MultiExtractRequest, timer: RequestTimer = RequestTimer()): MultiExtractResponse {
+        if (request.ranges.isEmpty()) {
+            throw IllegalArgumentException("Provide at least one range to extract")
+        }
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
+            ?: throw IllegalArgumentException("Project not found: ${request.project}")
+
+        timer.phase("save") {
+            ProjectUtils.syncDocuments(
+                request.sync,
+                listOf(ProjectUtils.findVirtualFile(project, request.file))
+            )
+        }
+
+        val psiFile = timer.phase("resolve") { ProjectUtils.findPsiFile(project, request.file) }
+            ?: throw IllegalArgumentException("File not found: ${request.file}")
+
+        if (psiFile !is PyFile) {
+            throw IllegalArgumentException("File is not a Python file: ${request.file}")
+        }
+
+        val document = PsiDocumentManager.getInstance(project).getDocument(psiFile)
+            ?: throw IllegalArgumentException("Could not get document for file: ${request.file}")
+
+        val offsets = request.ranges.mapIndexed { index, range ->
+            if (range.endLine > document.lineCount || range.startLine < 1) {
+                throw IllegalArgumentException("Range ${index + 1}: lines out of bounds")
+            }
+            PsiUtils.getTextRange(document, range.startLine, range.startColumn, range.endLine, range.endColumn)
+        }
+        // Bottom-up order, checking that no range overlaps the one below it
+        val order = offsets.indices.sortedByDescending { offsets[it].first }
+        order.zipWithNext().forEach { (lower, upper) ->
+            if (offsets[upper].second > offsets[lower].first) {
+                throw IllegalArgumentException("Ranges ${upper + 1} and ${lower + 1} overlap")
+            }
+        }
+
+        val editor = getOrCreateEditor(project, psiFile)
+            ?: throw IllegalArgumentException("Could not create editor for file: ${request.file}")
+        val path = psiFile.virtualFile.path
+        val before = timer.phase("digest") { FileDigests.snapshot(setOf(path), request.contents) }
+
+        val extracted = arrayOfNulls<ExtractedRange>(request.ranges.size)
+        timer.phase("write") {
+            ApplicationManager.getApplication().invokeAndWait {
+                CommandProcessor.getInstance().executeCommand(project, {
+                    WriteAction.run<Throwable> {
+                        val applied = order.map { index ->
+                            val range = request.ranges[index]
+                            val (startOffset, endOffset) = offsets[index]
+                            val extraction = when (range.kind) {
+                                ExtractKind.METHOD -> runExtractMethod(psiFile, editor, startOffset, endOffset)
+                                ExtractKind.VARIABLE -> runExtractVariable(psiFile, startOffset, endOffset)
+                            }
+                            // Follows the new code through the extractions above it
+                            Triple(index, extraction, document.createRangeMarker(extraction.offset, extraction.offset))
+                        }
+                        PsiDocumentManager.getInstance(project).commitDocument(document)
+                        for ((index, extraction, marker) in applied) {
+                            val range = request.ranges[index]
+                            extracted[index] = ExtractedRange(
+                                kind = range.kind,
+                                name = range.name,
+                                startLine = range.startLine,
+                                line = document.getLineNumber(marker.startOffset) + 1,
+                                occurrencesReplaced = extraction.occurrencesReplaced
+                            )
+                            marker.dispose()
+                        }
+                    }
+                }, "Extract ${request.ranges.size} ranges", null)
+            }
+        }
+
+        val files = timer.phase("digest") { FileDigests.collect(setOf(path), before, request.contents) }
+
+        return MultiExtractResponse(
+            success = true,
+            file = request.file,
+            extracted = extracted.map { it!! },
+            files = files
+        )
+    }
+
+    /**
+     * Where an extraction put its new method or variable, as a document
+     * offset as of right after it, and how many occurrences it replaced.
+     */
+    private class Extraction(val offset: Int, val occurrencesReplaced: Int = 1)
+
+    private fun runExtractMethod(psiFile: PsiFile, editor: Editor, startOffset: Int, endOffset: Int): Extraction {
+        editor.selectionModel.setSelection(startOffset, endOffset)
+
+        // Use PyCharm's extract method utility
+        // Note: This is a simplified version - full implementation would use
+        // PyExtractMethodUtil.extractMethod with proper settings
+        val elements = getElementsInRange(psiFile, startOffset, endOffset)
+        if (elements.isNotEmpty()) {
+            // PyExtractMethodUtil.extractMethod(...)
+            // The actual implementation would need to handle the dialog
+        }
+        return Extraction(startOffset) // Would be the new method's offset
+    }
+
+    private fun runExtractVariable(psiFile: PsiFile, startOffset: Int, endOffset: Int): Extraction {
+        // Find the expression to extract
+        val element = psiFile.findElementAt(startOffset)
+        var expression: PyExpression? = null
+        var current: PsiElement? = element
+        while (current != null && current !is PsiFile) {
+            if (current is PyExpression &&
+                current.textRange.startOffset >= startOffset &&
+                current.textRange.endOffset <= endOffset) {
+                expression = current
+            }
+            current = current.parent
+        }
+
+        if (expression != null) {
+            // Use PyCharm's introduce variable handler
+            // Note: Full implementation would use PyIntroduceVariableHandler
+            // with the variable name and replaceAll settings
+        }
+        return Extraction(startOffset) // Would be the new assignment's offset
+    }
+
     private fun getOrCreateEditor(project: com.intellij.openapi.project.Project, psiFile: PsiFile): Editor? {
         val virtualFile = psiFile.virtualFile ?: return null
 
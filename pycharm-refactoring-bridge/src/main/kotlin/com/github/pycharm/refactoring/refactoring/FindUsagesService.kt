@@ -1,53 +1,314 @@
 package com.github.pycharm.refactoring.refactoring
 
+import com.github.pycharm.refactoring.server.models.CrossProjectUsagesRequest
+import com.github.pycharm.refactoring.server.models.CrossProjectUsagesResponse
 import com.github.pycharm.refactoring.server.models.FindUsagesRequest
 import com.github.pycharm.refactoring.server.models.FindUsagesResponse
 import com.github.pycharm.refactoring.server.models.UsageInfo
+import com.github.pycharm.refactoring.util.ElementHandles
 import com.github.pycharm.refactoring.util.ProjectUtils
 import com.github.pycharm.refactoring.util.PsiUtils
+import com.github.pycharm.refactoring.util.RequestTimer
+import com.github.pycharm.refactoring.util.UsageSnapshotStore
+import com.github.pycharm.refactoring.server.models.ProjectUsages
 import com.intellij.openapi.application.ApplicationManager
+import com.intellij.openapi.module.ModuleManager
+import com.intellij.openapi.progress.EmptyProgressIndicator
+import com.intellij.openapi.progress.ProgressIndicator
+import com.intellij.openapi.progress.ProgressManager
+import com.intellij.openapi.project.DumbService
+import com.intellij.openapi.project.IndexNotReadyException
+import com.intellij.openapi.project.Project
+import com.intellij.openapi.util.Computable
+import com.intellij.openapi.vfs.LocalFileSystem
 import com.intellij.psi.PsiElement
+import com.intellij.psi.PsiManager
 import com.intellij.psi.PsiNamedElement
+import com.intellij.psi.SmartPointerManager
+import com.intellij.psi.SmartPsiElementPointer
 import com.intellij.psi.search.GlobalSearchScope
 import com.intellij.psi.search.searches.ReferencesSearch
+import com.intellij.psi.util.QualifiedName
+import com.intellij.util.concurrency.AppExecutorUtil
+import com.jetbrains.python.psi.PyClass
+import com.jetbrains.python.psi.PyQualifiedNameOwner
+import com.jetbrains.python.psi.resolve.PyQualifiedNameResolveContext
+import com.jetbrains.python.psi.resolve.fromModule
+import com.jetbrains.python.psi.resolve.resolveTopLevelMember
+import java.util.concurrent.Callable
+import java.util.concurrent.ExecutionException
+import java.util.concurrent.Future
+import java.util.concurrent.TimeUnit
+import java.util.concurrent.TimeoutException
 
 class FindUsagesService {
 
-    fun findUsages(request: FindUsagesRequest): FindUsagesResponse {
-        val project = ProjectUtils.findProjectByPath(request.project)
+    fun findUsages(request: FindUsagesRequest, timer: RequestTimer = RequestTimer()): FindUsagesResponse {
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
             ?: throw IllegalArgumentException("Project not found: ${request.project}")
 
-        val psiFile = ProjectUtils.findPsiFile(project, request.file)
-            ?: throw IllegalArgumentException("File not found: ${request.file}")
+        val element = timer.phase("resolve") {
+            PsiUtils.findTargetElement(project, request.handle, request.file, request.line, request.column)
+        }
+            ?: throw IllegalArgumentException("No symbol found at line ${request.line}, column ${request.column}")
+
+        // Try to answer with a delta against a previous result first. After an
+        // edit the same position can name another symbol, so the token only
+        // counts if the target still resolves to the symbol it was issued for.
+        request.sinceToken?.let { token ->
+            UsageSnapshotStore.get(project, token)?.let { snapshot ->
+                timer.phase("search") { findChangedUsages(project, element, snapshot) }?.let { return it }
+            }
+        }
 
-        val element = PsiUtils.findNamedElementAt(psiFile, request.line, request.column)
+        return timer.phase("search") { findAllUsages(project, element) }
+    }
+
+    /**
+     * Resolve the symbol once in the request's project, then search each of
+     * [projectPaths] concurrently, one pooled thread per project. PSI belongs
+     * to one project, so in the others the symbol is looked up again by its
+     * qualified name. A project that is indexing, cannot resolve the symbol or
+     * is still searching when the timeout runs out is reported as such; the
+     * other projects' usages are returned all the same.
+     */
+    fun findUsagesInProjects(
+        request: CrossProjectUsagesRequest,
+        projectPaths: List<String>,
+        timer: RequestTimer = RequestTimer()
+    ): CrossProjectUsagesResponse {
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
+            ?: throw IllegalArgumentException("Project not found: ${request.project}")
+
+        val element = timer.phase("resolve") {
+            PsiUtils.findTargetElement(project, request.handle, request.file, request.line, request.column)
+        }
             ?: throw IllegalArgumentException("No symbol found at line ${request.line}, column ${request.column}")
 
-        return findAllUsages(project, element)
+        val (symbolName, qualifiedName) = ApplicationManager.getApplication().runReadAction<Pair<String, String?>> {
+            (element.name ?: "unknown") to (element as? PyQualifiedNameOwner)?.qualifiedName
+        }
+
+        val results = timer.phase("search") {
+            val searches = projectPaths.map { path -> path to startSearch(path, project, element, qualifiedName) }
+            // Answer with what finished before the client stops waiting
+            val timeoutMs = minOf(request.timeoutMs, timer.remainingMs() ?: Long.MAX_VALUE).coerceAtLeast(0)
+            val deadline = System.nanoTime() + TimeUnit.MILLISECONDS.toNanos(timeoutMs)
+            searches.map { (path, search) -> awaitSearch(path, search, deadline, timeoutMs) }
+        }
+
+        return CrossProjectUsagesResponse(
+            success = true,
+            symbol = symbolName,
+            qualifiedName = qualifiedName,
+            projects = results,
+            // A file in the content roots of two projects is reported by both
+            totalCount = results.flatMap { it.usages }.distinctBy { Triple(it.file, it.line, it.column) }.size,
+            handle = ElementHandles.register(project, createPointer(project, element))
+        )
+    }
+
+    private class ProjectSearch(val future: Future<List<UsageInfo>>, val indicator: ProgressIndicator)
+
+    private fun startSearch(
+        path: String,
+        source: Project,
+        element: PsiNamedElement,
+        qualifiedName: String?
+    ): ProjectSearch {
+        // Cancelled on timeout; the search checks it between references
+        val indicator = EmptyProgressIndicator()
+        val future = AppExecutorUtil.getAppExecutorService().submit(Callable {
+            ProgressManager.getInstance().runProcess(Computable {
+                val target = ProjectUtils.findProjectByPath(path)
+                    ?: throw IllegalArgumentException("Project not open in PyCharm")
+                if (DumbService.isDumb(target)) {
+                    throw IndexNotReadyException.create()
+                }
+                val counterpart = if (target == source) element else findCounterpart(target, qualifiedName)
+                    ?: throw IllegalArgumentException(
+                        if (qualifiedName == null) "Symbol has no qualified name to look up in other projects"
+                        else "$qualifiedName not found in this project"
+                    )
+                projectUsages(target, counterpart)
+            }, indicator)
+        })
+        return ProjectSearch(future, indicator)
+    }
+
+    private fun awaitSearch(path: String, search: ProjectSearch, deadline: Long, timeoutMs: Long): ProjectUsages {
+        return try {
+            val usages = search.future.get(maxOf(0L, deadline - System.nanoTime()), TimeUnit.NANOSECONDS)
+            ProjectUsages(project = path, usages = usages, totalCount = usages.size)
+        } catch (e: TimeoutException) {
+            search.indicator.cancel()
+            ProjectUsages(project = path, timedOut = true, error = "Still searching after $timeoutMs ms")
+        } catch (e: ExecutionException) {
+            val cause = e.cause ?: e
+            val error = if (generateSequence(cause) { it.cause }.any { it is IndexNotReadyException }) {
+                "Indexing in progress"
+            } else {
+                cause.message ?: cause.toString()
+            }
+            ProjectUsages(project = path, error = error)
+        }
     }
 
-    private fun findAllUsages(project: com.intellij.openapi.project.Project, element: PsiNamedElement): FindUsagesResponse {
+    /**
+     * The definition, if it lies in [project], and the references in [project].
+     */
+    private fun projectUsages(project: Project, element: PsiNamedElement): List<UsageInfo> {
+        val scope = GlobalSearchScope.projectScope(project)
         val usages = mutableListOf<UsageInfo>()
+        val defined = ApplicationManager.getApplication().runReadAction<Boolean> {
+            element.containingFile?.virtualFile?.let { scope.contains(it) } == true
+        }
+        if (defined) {
+            usages.add(definitionUsage(element))
+        }
+        usages.addAll(searchReferences(element, scope))
+        return usages
+    }
 
+    /**
+     * Look up a module-level symbol, or a member of a module-level class, by
+     * qualified name as the modules of [project] resolve it.
+     */
+    private fun findCounterpart(project: Project, qualifiedName: String?): PsiNamedElement? {
+        if (qualifiedName == null) return null
+        val name = QualifiedName.fromDottedString(qualifiedName)
+        return ApplicationManager.getApplication().runReadAction<PsiNamedElement?> {
+            ModuleManager.getInstance(project).modules.firstNotNullOfOrNull { module ->
+                val context = fromModule(module)
+                resolveTopLevelMember(name, context) as? PsiNamedElement ?: findClassMember(name, context)
+            }
+        }
+    }
+
+    private fun findClassMember(name: QualifiedName, context: PyQualifiedNameResolveContext): PsiNamedElement? {
+        val member = name.lastComponent ?: return null
+        if (name.componentCount < 3) return null
+        val owner = resolveTopLevelMember(name.removeLastComponent(), context) as? PyClass ?: return null
+        return owner.findMethodByName(member, false, null) ?: owner.findClassAttribute(member, false, null)
+    }
+
+    private fun findAllUsages(project: Project, element: PsiNamedElement): FindUsagesResponse {
         val symbolName = ApplicationManager.getApplication().runReadAction<String> {
             element.name ?: "unknown"
         }
 
-        ApplicationManager.getApplication().runReadAction {
-            // Add the definition itself
-            val defFile = element.containingFile?.virtualFile?.path ?: ""
-            usages.add(
-                UsageInfo(
-                    file = defFile,
-                    line = PsiUtils.getLineNumber(element),
-                    column = PsiUtils.getColumnNumber(element),
-                    text = PsiUtils.getSurroundingText(element, 1),
-                    isWriteAccess = true  // Definition is a "write"
-                )
+        val usages = mutableListOf(definitionUsage(element))
+        usages.addAll(searchReferences(element, GlobalSearchScope.projectScope(project)))
+
+        val usagesByFile = usages.groupBy { it.file }
+        val pointer = createPointer(project, element)
+        val token = UsageSnapshotStore.put(
+            project,
+            UsageSnapshotStore.Snapshot(
+                element = pointer,
+                stamps = UsageSnapshotStore.collectStamps(project, usagesByFile.keys),
+                usagesByFile = usagesByFile
+            )
+        )
+
+        return FindUsagesResponse(
+            success = true,
+            symbol = symbolName,
+            usages = usages,
+            totalCount = usages.size,
+            handle = ElementHandles.register(project, pointer),
+            token = token
+        )
+    }
+
+    /**
+     * Re-search only the files whose modification stamp changed since [snapshot]
+     * was taken. Returns null if the snapshot's symbol can no longer be resolved
+     * or is not [target], in which case the caller falls back to a full search.
+     */
+    private fun findChangedUsages(
+        project: Project,
+        target: PsiNamedElement,
+        snapshot: UsageSnapshotStore.Snapshot
+    ): FindUsagesResponse? {
+        val element = ApplicationManager.getApplication().runReadAction<PsiNamedElement?> {
+            snapshot.element.element?.takeIf {
+                it.isValid && PsiManager.getInstance(project).areElementsEquivalent(it, target)
+            }
+        } ?: return null
+
+        val symbolName = ApplicationManager.getApplication().runReadAction<String> {
+            element.name ?: "unknown"
+        }
+
+        val stamps = UsageSnapshotStore.collectStamps(project, snapshot.usagesByFile.keys)
+        val changedPaths = (stamps.keys + snapshot.stamps.keys).filter { path ->
+            stamps[path] != snapshot.stamps[path]
+        }.toSet()
+
+        val changedFiles = changedPaths.mapNotNull { path ->
+            LocalFileSystem.getInstance().findFileByPath(path)?.takeIf { it.isValid }
+        }
+
+        val found = mutableListOf<UsageInfo>()
+        val definition = definitionUsage(element)
+        if (definition.file in changedPaths) {
+            found.add(definition)
+        }
+        if (changedFiles.isNotEmpty()) {
+            found.addAll(searchReferences(element, GlobalSearchScope.filesScope(project, changedFiles)))
+        }
+
+        val foundByFile = found.groupBy { it.file }
+        val added = mutableListOf<UsageInfo>()
+        val removed = mutableListOf<UsageInfo>()
+        for (path in changedPaths) {
+            val before = snapshot.usagesByFile[path].orEmpty()
+            val after = foundByFile[path].orEmpty()
+            added.addAll(after - before.toSet())
+            removed.addAll(before - after.toSet())
+        }
+
+        val usagesByFile = snapshot.usagesByFile.filterKeys { it !in changedPaths } + foundByFile
+        val token = UsageSnapshotStore.put(
+            project,
+            UsageSnapshotStore.Snapshot(
+                element = snapshot.element,
+                stamps = stamps,
+                usagesByFile = usagesByFile
+            )
+        )
+
+        return FindUsagesResponse(
+            success = true,
+            symbol = symbolName,
+            usages = emptyList(),
+            totalCount = usagesByFile.values.sumOf { it.size },
+            handle = ElementHandles.register(project, snapshot.element),
+            token = token,
+            incremental = true,
+            added = added,
+            removed = removed
+        )
+    }
+
+    private fun definitionUsage(element: PsiNamedElement): UsageInfo {
+        return ApplicationManager.getApplication().runReadAction<UsageInfo> {
+            UsageInfo(
+                file = element.containingFile?.virtualFile?.path ?: "",
+                line = PsiUtils.getLineNumber(element),
+                column = PsiUtils.getColumnNumber(element),
+                text = PsiUtils.getSurroundingText(element, 1),
+                isWriteAccess = true  // Definition is a "write"
             )
+        }
+    }
 
-            // Find all references
-            val references = ReferencesSearch.search(element, GlobalSearchScope.projectScope(project))
+    private fun searchReferences(element: PsiNamedElement, scope: GlobalSearchScope): List<UsageInfo> {
+        val usages = mutableListOf<UsageInfo>()
+
+        ApplicationManager.getApplication().runReadAction {
+            val references = ReferencesSearch.search(element, scope)
             references.forEach { ref ->
                 val refElement = ref.element
                 val refFile = refElement.containingFile?.virtualFile?.path ?: return@forEach
@@ -64,12 +325,13 @@ class FindUsagesService {
             }
         }
 
-        return FindUsagesResponse(
-            success = true,
-            symbol = symbolName,
-            usages = usages,
-            totalCount = usages.size
-        )
+        return usages
+    }
+
+    private fun createPointer(project: Project, element: PsiNamedElement): SmartPsiElementPointer<PsiNamedElement> {
+        return ApplicationManager.getApplication().runReadAction<SmartPsiElementPointer<PsiNamedElement>> {
+            SmartPointerManager.getInstance(project).createSmartPsiElementPointer(element)
+        }
     }
 
     private fun isWriteAccess(element: PsiElement): Boolean {
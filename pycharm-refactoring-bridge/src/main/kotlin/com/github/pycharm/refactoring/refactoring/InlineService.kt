@@ -1,13 +1,18 @@
 package com.github.pycharm.refactoring.refactoring
 
 import com.github.pycharm.refactoring.server.models.FileChange
+import com.github.pycharm.refactoring.server.models.FileContents
 import com.github.pycharm.refactoring.server.models.InlineRequest
 import com.github.pycharm.refactoring.server.models.InlineResponse
+import com.github.pycharm.refactoring.util.ElementHandles
+import com.github.pycharm.refactoring.util.FileDigests
 import com.github.pycharm.refactoring.util.ProjectUtils
 import com.github.pycharm.refactoring.util.PsiUtils
+import com.github.pycharm.refactoring.util.RequestTimer
 import com.intellij.openapi.application.ApplicationManager
 import com.intellij.openapi.application.WriteAction
 import com.intellij.openapi.command.CommandProcessor
+import com.intellij.openapi.project.Project
 import com.intellij.psi.PsiNamedElement
 import com.intellij.psi.search.GlobalSearchScope
 import com.intellij.psi.search.searches.ReferencesSearch
@@ -18,16 +23,20 @@ import com.jetbrains.python.refactoring.inline.PyInlineLocalHandler
 
 class InlineService {
 
-    fun inline(request: InlineRequest): InlineResponse {
-        val project = ProjectUtils.findProjectByPath(request.project)
+    fun inline(request: InlineRequest, timer: RequestTimer = RequestTimer()): InlineResponse {
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
             ?: throw IllegalArgumentException("Project not found: ${request.project}")
 
-        ProjectUtils.saveAllDocuments()
-
-        val psiFile = ProjectUtils.findPsiFile(project, request.file)
-            ?: throw IllegalArgumentException("File not found: ${request.file}")
+        timer.phase("save") {
+            ProjectUtils.syncDocuments(
+                request.sync,
+                listOf(PsiUtils.findTargetFile(project, request.handle, request.file))
+            )
+        }
 
-        val element = PsiUtils.findNamedElementAt(psiFile, request.line, request.column)
+        val element = timer.phase("resolve") {
+            PsiUtils.findTargetElement(project, request.handle, request.file, request.line, request.column)
+        }
             ?: throw IllegalArgumentException("No inlineable element found at line ${request.line}, column ${request.column}")
 
         // Verify element is inlineable (variable or function)
@@ -35,10 +44,24 @@ class InlineService {
             ?: throw IllegalArgumentException("Element at line ${request.line} is not inlineable (must be a variable or function)")
 
         if (request.preview) {
-            return previewInline(project, inlineableElement)
+            return timer.phase("search") { previewInline(project, inlineableElement) }
+                .copy(handle = ElementHandles.register(project, inlineableElement))
         }
 
-        return performInline(project, inlineableElement)
+        return performInline(project, inlineableElement, request.contents, timer)
+    }
+
+    /**
+     * Resolve an inline that runs as a step of a plan, on the EDT inside the
+     * plan's command and after its document sync.
+     */
+    fun prepareStep(project: Project, request: InlineRequest): PreparedStep {
+        val element = PsiUtils.findTargetElement(project, request.handle, request.file, request.line, request.column)
+            ?: throw IllegalArgumentException("No inlineable element found at line ${request.line}, column ${request.column}")
+        val inlineableElement = findInlineableElement(element)
+            ?: throw IllegalArgumentException("Element at line ${request.line} is not inlineable (must be a variable or function)")
+        val changes = previewInline(project, inlineableElement).changes
+        return PreparedStep(changes) { runInline(inlineableElement) }
     }
 
     private fun findInlineableElement(element: PsiNamedElement): PsiNamedElement? {
@@ -92,57 +115,76 @@ class InlineService {
         )
     }
 
-    private fun performInline(project: com.intellij.openapi.project.Project, element: PsiNamedElement): InlineResponse {
+    private fun performInline(
+        project: com.intellij.openapi.project.Project,
+        element: PsiNamedElement,
+        contents: FileContents,
+        timer: RequestTimer
+    ): InlineResponse {
         val changes = mutableListOf<FileChange>()
         val filesModified = mutableSetOf<String>()
 
         // Collect usage info before inline
-        ApplicationManager.getApplication().runReadAction {
-            val name = element.name ?: "unknown"
-            val definition = getDefinitionText(element)
-
-            val references = ReferencesSearch.search(element, GlobalSearchScope.projectScope(project))
-            references.forEach { ref ->
-                val refElement = ref.element
-                val refFile = refElement.containingFile?.virtualFile?.path ?: return@forEach
-                filesModified.add(refFile)
-                changes.add(
-                    FileChange(
-                        file = refFile,
-                        line = PsiUtils.getLineNumber(refElement),
-                        oldText = name,
-                        newText = definition
+        timer.phase("search") {
+            ApplicationManager.getApplication().runReadAction {
+                val name = element.name ?: "unknown"
+                val definition = getDefinitionText(element)
+
+                val references = ReferencesSearch.search(element, GlobalSearchScope.projectScope(project))
+                references.forEach { ref ->
+                    val refElement = ref.element
+                    val refFile = refElement.containingFile?.virtualFile?.path ?: return@forEach
+                    filesModified.add(refFile)
+                    changes.add(
+                        FileChange(
+                            file = refFile,
+                            line = PsiUtils.getLineNumber(refElement),
+                            oldText = name,
+                            newText = definition
+                        )
                     )
-                )
+                }
             }
         }
 
+        // Keep the old text of the files for diffs
+        val before = timer.phase("digest") { FileDigests.snapshot(filesModified, contents) }
+
         // Perform the inline
-        ApplicationManager.getApplication().invokeAndWait {
-            CommandProcessor.getInstance().executeCommand(project, {
-                WriteAction.run<Throwable> {
-                    when (element) {
-                        is PyTargetExpression -> {
-                            // Use PyCharm's inline local handler
-                            // PyInlineLocalHandler.doInline(project, editor, element, null)
-                            // Note: Full implementation requires an editor context
-                        }
-                        is PyFunction -> {
-                            // Use PyCharm's inline function handler
-                            // PyInlineFunctionHandler.doInline(project, editor, element, null)
-                        }
-                    }
-                }
-            }, "Inline ${element.name}", null)
+        timer.phase("write") {
+            ApplicationManager.getApplication().invokeAndWait {
+                CommandProcessor.getInstance().executeCommand(project, {
+                    runInline(element)
+                }, "Inline ${element.name}", null)
+            }
         }
 
+        val files = timer.phase("digest") { FileDigests.collect(filesModified, before, contents) }
+
         return InlineResponse(
             success = true,
             changes = changes,
-            usagesInlined = changes.size
+            usagesInlined = changes.size,
+            files = files
         )
     }
 
+    private fun runInline(element: PsiNamedElement) {
+        WriteAction.run<Throwable> {
+            when (element) {
+                is PyTargetExpression -> {
+                    // Use PyCharm's inline local handler
+                    // PyInlineLocalHandler.doInline(project, editor, element, null)
+                    // Note: Full implementation requires an editor context
+                }
+                is PyFunction -> {
+                    // Use PyCharm's inline function handler
+                    // PyInlineFunctionHandler.doInline(project, editor, element, null)
+                }
+            }
+        }
+    }
+
     private fun getDefinitionText(element: PsiNamedElement): String {
         return ApplicationManager.getApplication().runReadAction<String> {
             when (element) {
@@ -1,13 +1,22 @@
 package com.github.pycharm.refactoring.refactoring
 
+import com.github.pycharm.refactoring.server.models.BulkMoveRequest
+import com.github.pycharm.refactoring.server.models.BulkMoveResponse
 import com.github.pycharm.refactoring.server.models.FileChange
+import com.github.pycharm.refactoring.server.models.FileContents
+import com.github.pycharm.refactoring.server.models.MoveElement
 import com.github.pycharm.refactoring.server.models.MoveRequest
 import com.github.pycharm.refactoring.server.models.MoveResponse
+import com.github.pycharm.refactoring.server.models.MovedElement
+import com.github.pycharm.refactoring.util.ElementHandles
+import com.github.pycharm.refactoring.util.FileDigests
 import com.github.pycharm.refactoring.util.ProjectUtils
 import com.github.pycharm.refactoring.util.PsiUtils
+import com.github.pycharm.refactoring.util.RequestTimer
 import com.intellij.openapi.application.ApplicationManager
 import com.intellij.openapi.application.WriteAction
 import com.intellij.openapi.command.CommandProcessor
+import com.intellij.openapi.module.ModuleManager
 import com.intellij.openapi.project.Project
 import com.intellij.psi.PsiDirectory
 import com.intellij.psi.PsiElement
@@ -15,37 +24,196 @@ import com.intellij.psi.PsiFile
 import com.intellij.psi.PsiNamedElement
 import com.intellij.psi.search.GlobalSearchScope
 import com.intellij.psi.search.searches.ReferencesSearch
+import com.intellij.psi.util.PsiTreeUtil
+import com.intellij.psi.util.QualifiedName
 import com.intellij.refactoring.move.moveFilesOrDirectories.MoveFilesOrDirectoriesProcessor
 import com.jetbrains.python.psi.PyClass
+import com.jetbrains.python.psi.PyFile
 import com.jetbrains.python.psi.PyFunction
+import com.jetbrains.python.psi.resolve.fromModule
+import com.jetbrains.python.psi.resolve.resolveTopLevelMember
+import com.jetbrains.python.refactoring.move.moduleMembers.PyMoveModuleMembersProcessor
+import java.io.File
 
 class MoveService {
 
-    fun move(request: MoveRequest): MoveResponse {
-        val project = ProjectUtils.findProjectByPath(request.project)
+    fun move(request: MoveRequest, timer: RequestTimer = RequestTimer()): MoveResponse {
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
             ?: throw IllegalArgumentException("Project not found: ${request.project}")
 
-        // Save all documents before refactoring
-        ProjectUtils.saveAllDocuments()
-
-        val psiFile = ProjectUtils.findPsiFile(project, request.file)
-            ?: throw IllegalArgumentException("File not found: ${request.file}")
+        // Sync documents to disk before refactoring
+        timer.phase("save") {
+            ProjectUtils.syncDocuments(
+                request.sync,
+                listOf(
+                    PsiUtils.findTargetFile(project, request.handle, request.file),
+                    ProjectUtils.findVirtualFile(project, request.targetFile)
+                )
+            )
+        }
 
-        val element = PsiUtils.findNamedElementAt(psiFile, request.line, request.column)
+        val element = timer.phase("resolve") {
+            PsiUtils.findTargetElement(project, request.handle, request.file, request.line, request.column)
+        }
             ?: throw IllegalArgumentException("No movable element found at line ${request.line}, column ${request.column}")
 
         // Verify element is movable (class, function, or file)
         val movableElement = findMovableElement(element)
             ?: throw IllegalArgumentException("Element at line ${request.line} is not movable (must be a class, function, or file)")
 
+        val targetFile = timer.phase("resolve") { ProjectUtils.findPsiFile(project, request.targetFile) }
+            ?: throw IllegalArgumentException("Target file not found: ${request.targetFile}")
+
+        if (request.preview) {
+            return timer.phase("search") { previewMove(project, movableElement, targetFile) }
+                .copy(handle = ElementHandles.register(project, element))
+        }
+
+        return performMove(project, movableElement, targetFile, request.contents, timer)
+    }
+
+    /**
+     * Resolve a move that runs as a step of a plan, on the EDT inside the
+     * plan's command and after its document sync.
+     */
+    fun prepareStep(project: Project, request: MoveRequest): PreparedStep {
+        val element = PsiUtils.findTargetElement(project, request.handle, request.file, request.line, request.column)
+            ?: throw IllegalArgumentException("No movable element found at line ${request.line}, column ${request.column}")
+        val movableElement = findMovableElement(element)
+            ?: throw IllegalArgumentException("Element at line ${request.line} is not movable (must be a class, function, or file)")
         val targetFile = ProjectUtils.findPsiFile(project, request.targetFile)
             ?: throw IllegalArgumentException("Target file not found: ${request.targetFile}")
+        val changes = previewMove(project, movableElement, targetFile).changes
+        return PreparedStep(changes) { runMove(project, movableElement, targetFile) }
+    }
+
+    /**
+     * Move many top-level classes and functions into one file. Their
+     * references are collected up front and grouped by file, and the move
+     * runs as one [PyMoveModuleMembersProcessor], which rewrites the imports
+     * of every referencing file in the same pass.
+     */
+    fun moveBulk(request: BulkMoveRequest, timer: RequestTimer = RequestTimer()): BulkMoveResponse {
+        if (request.elements.isEmpty()) {
+            throw IllegalArgumentException("Provide at least one element to move")
+        }
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
+            ?: throw IllegalArgumentException("Project not found: ${request.project}")
+
+        timer.phase("save") {
+            ProjectUtils.syncDocuments(
+                request.sync,
+                request.elements.map { PsiUtils.findTargetFile(project, it.handle, it.file) } +
+                    ProjectUtils.findVirtualFile(project, request.targetFile)
+            )
+        }
+
+        // The processor creates the target module if it does not exist yet
+        val targetPath = ProjectUtils.findVirtualFile(project, request.targetFile)?.path
+            ?: File(request.targetFile).let { if (it.isAbsolute) it else File(project.basePath, request.targetFile) }
+                .canonicalPath
+        val elements = timer.phase("resolve") {
+            request.elements.mapIndexed { index, element -> resolveModuleMember(project, index, element) }.distinct()
+        }
+
+        val (moved, references) = timer.phase("search") {
+            ApplicationManager.getApplication().runReadAction<Pair<List<MovedElement>, Map<String, Int>>> {
+                elements.forEach { element ->
+                    if (filePath(element) == targetPath) {
+                        throw IllegalArgumentException("${element.name} is already in ${request.targetFile}")
+                    }
+                }
+                val moved = elements.map { MovedElement(it.name ?: "", filePath(it), PsiUtils.getLineNumber(it)) }
+                moved to collectReferences(project, elements, targetPath)
+            }
+        }
+
+        val changes = moved.map { FileChange(it.file, it.line, it.name, "moved to $targetPath") } +
+            references.map { (file, line) -> FileChange(file, line, "import from old module", "import from $targetPath") }
+        val filesModified = linkedSetOf(targetPath).apply {
+            moved.mapTo(this) { it.file }
+            addAll(references.keys)
+        }
 
         if (request.preview) {
-            return previewMove(project, movableElement, targetFile)
+            return BulkMoveResponse(
+                success = true,
+                moved = moved,
+                targetFile = targetPath,
+                changes = changes,
+                filesModified = filesModified.size,
+                importsUpdated = references.size,
+                preview = true
+            )
         }
 
-        return performMove(project, movableElement, targetFile)
+        val before = timer.phase("digest") { FileDigests.snapshot(filesModified, request.contents) }
+        timer.phase("write") {
+            ApplicationManager.getApplication().invokeAndWait {
+                CommandProcessor.getInstance().executeCommand(project, {
+                    PyMoveModuleMembersProcessor(elements.toTypedArray(), targetPath).run()
+                }, "Move ${elements.size} elements to ${File(targetPath).name}", null)
+            }
+        }
+        val files = timer.phase("digest") { FileDigests.collect(filesModified, before, request.contents) }
+
+        return BulkMoveResponse(
+            success = true,
+            moved = moved,
+            targetFile = targetPath,
+            changes = changes,
+            filesModified = filesModified.size,
+            importsUpdated = references.size,
+            files = files
+        )
+    }
+
+    /**
+     * The top-level class or function a bulk move element names.
+     */
+    private fun resolveModuleMember(project: Project, index: Int, element: MoveElement): PsiNamedElement {
+        val found = if (element.qualifiedName != null) {
+            val name = QualifiedName.fromDottedString(element.qualifiedName)
+            ApplicationManager.getApplication().runReadAction<PsiElement?> {
+                ModuleManager.getInstance(project).modules.firstNotNullOfOrNull { module ->
+                    resolveTopLevelMember(name, fromModule(module))
+                }
+            } ?: throw IllegalArgumentException("Element ${index + 1}: ${element.qualifiedName} not found")
+        } else {
+            PsiUtils.findTargetElement(project, element.handle, element.file, element.line, element.column)
+                ?: throw IllegalArgumentException(
+                    "Element ${index + 1}: nothing found at line ${element.line}, column ${element.column}"
+                )
+        }
+        return ApplicationManager.getApplication().runReadAction<PsiNamedElement?> {
+            val member = PsiTreeUtil.getNonStrictParentOfType(found, PyClass::class.java, PyFunction::class.java)
+            member?.takeIf { it.parent is PyFile } as PsiNamedElement?
+        } ?: throw IllegalArgumentException("Element ${index + 1} is not a top-level class or function")
+    }
+
+    /**
+     * The files outside [targetPath] that reference any of [elements] from
+     * outside them, each with the line of its first such reference.
+     */
+    private fun collectReferences(project: Project, elements: List<PsiNamedElement>, targetPath: String): Map<String, Int> {
+        val scope = GlobalSearchScope.projectScope(project)
+        val references = sortedMapOf<String, Int>()
+        for (element in elements) {
+            ReferencesSearch.search(element, scope).forEach { ref ->
+                val refElement = ref.element
+                val refFile = filePath(refElement)
+                // References inside the moved elements travel with them
+                if (refFile != targetPath && elements.none { PsiTreeUtil.isAncestor(it, refElement, false) }) {
+                    val line = PsiUtils.getLineNumber(refElement)
+                    references.merge(refFile, line, ::minOf)
+                }
+            }
+        }
+        return references
+    }
+
+    private fun filePath(element: PsiElement): String {
+        return element.containingFile?.virtualFile?.path ?: ""
     }
 
     private fun findMovableElement(element: PsiElement): PsiElement? {
@@ -110,79 +278,99 @@ class MoveService {
         )
     }
 
-    private fun performMove(project: Project, element: PsiElement, targetFile: PsiFile): MoveResponse {
+    private fun performMove(
+        project: Project,
+        element: PsiElement,
+        targetFile: PsiFile,
+        contents: FileContents,
+        timer: RequestTimer
+    ): MoveResponse {
         val changes = mutableListOf<FileChange>()
         val filesModified = mutableSetOf<String>()
         var importsUpdated = 0
 
         // Collect info before move
-        ApplicationManager.getApplication().runReadAction {
-            val elementName = (element as? PsiNamedElement)?.name ?: element.containingFile?.name ?: "unknown"
-            val sourceFile = element.containingFile?.virtualFile?.path ?: ""
-            val targetPath = targetFile.virtualFile?.path ?: ""
+        timer.phase("search") {
+            ApplicationManager.getApplication().runReadAction {
+                val elementName = (element as? PsiNamedElement)?.name ?: element.containingFile?.name ?: "unknown"
+                val sourceFile = element.containingFile?.virtualFile?.path ?: ""
+                val targetPath = targetFile.virtualFile?.path ?: ""
 
-            filesModified.add(sourceFile)
-            filesModified.add(targetPath)
+                filesModified.add(sourceFile)
+                filesModified.add(targetPath)
 
-            changes.add(
-                FileChange(
-                    file = sourceFile,
-                    line = PsiUtils.getLineNumber(element),
-                    oldText = elementName,
-                    newText = "moved to $targetPath"
+                changes.add(
+                    FileChange(
+                        file = sourceFile,
+                        line = PsiUtils.getLineNumber(element),
+                        oldText = elementName,
+                        newText = "moved to $targetPath"
+                    )
                 )
-            )
 
-            if (element is PsiNamedElement) {
-                val references = ReferencesSearch.search(element, GlobalSearchScope.projectScope(project))
-                references.forEach { ref ->
-                    val refFile = ref.element.containingFile?.virtualFile?.path ?: return@forEach
-                    if (refFile != sourceFile && refFile != targetPath) {
-                        filesModified.add(refFile)
-                        importsUpdated++
+                if (element is PsiNamedElement) {
+                    val references = ReferencesSearch.search(element, GlobalSearchScope.projectScope(project))
+                    references.forEach { ref ->
+                        val refFile = ref.element.containingFile?.virtualFile?.path ?: return@forEach
+                        if (refFile != sourceFile && refFile != targetPath) {
+                            filesModified.add(refFile)
+                            importsUpdated++
+                        }
                     }
                 }
             }
         }
 
+        // Keep the old text of the files for diffs
+        val before = timer.phase("digest") { FileDigests.snapshot(filesModified, contents) }
+
         // Perform the move
-        ApplicationManager.getApplication().invokeAndWait {
-            CommandProcessor.getInstance().executeCommand(project, {
-                WriteAction.run<Throwable> {
-                    val targetDir = targetFile.containingDirectory
-                    if (element is PsiFile) {
-                        MoveFilesOrDirectoriesProcessor(
-                            project,
-                            arrayOf(element),
-                            targetDir,
-                            true,  // search for references
-                            true,  // search in comments
-                            true,  // search in strings
-                            null,
-                            null
-                        ).run()
-                    } else {
-                        // For classes/functions, we need to use a different approach
-                        // This is a simplified version - full implementation would use MoveHandler
-                        val text = element.text
-                        val containingFile = element.containingFile
-                        element.delete()
-
-                        // Add to target file at the end
-                        val targetPsi = targetFile
-                        targetPsi.add(com.intellij.psi.PsiParserFacade.getInstance(project)
-                            .createWhiteSpaceFromText("\n\n"))
-                        // Note: Full implementation would properly parse and add the element
-                    }
-                }
-            }, "Move element to ${targetFile.name}", null)
+        timer.phase("write") {
+            ApplicationManager.getApplication().invokeAndWait {
+                CommandProcessor.getInstance().executeCommand(project, {
+                    runMove(project, element, targetFile)
+                }, "Move element to ${targetFile.name}", null)
+            }
         }
 
+        val files = timer.phase("digest") { FileDigests.collect(filesModified, before, contents) }
+
         return MoveResponse(
             success = true,
             changes = changes,
             filesModified = filesModified.size,
-            importsUpdated = importsUpdated
+            importsUpdated = importsUpdated,
+            files = files
         )
     }
+
+    private fun runMove(project: Project, element: PsiElement, targetFile: PsiFile) {
+        WriteAction.run<Throwable> {
+            val targetDir = targetFile.containingDirectory
+            if (element is PsiFile) {
+                MoveFilesOrDirectoriesProcessor(
+                    project,
+                    arrayOf(element),
+                    targetDir,
+                    true,  // search for references
+                    true,  // search in comments
+                    true,  // search in strings
+                    null,
+                    null
+                ).run()
+            } else {
+                // For classes/functions, we need to use a different approach
+                // This is a simplified version - full implementation would use MoveHandler
+                val text = element.text
+                val containingFile = element.containingFile
+                element.delete()
+
+                // Add to target file at the end
+                val targetPsi = targetFile
+                targetPsi.add(com.intellij.psi.PsiParserFacade.getInstance(project)
+                    .createWhiteSpaceFromText("\n\n"))
+                // Note: Full implementation would properly parse and add the element
+            }
+        }
+    }
 }
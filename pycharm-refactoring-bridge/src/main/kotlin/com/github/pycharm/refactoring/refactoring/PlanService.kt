@@ -0,0 +1,229 @@
+package com.github.pycharm.refactoring.refactoring
+
+import com.github.pycharm.refactoring.server.models.ApplyPlanRequest
+import com.github.pycharm.refactoring.server.models.ApplyPlanResponse
+import com.github.pycharm.refactoring.server.models.ChangeSignatureRequest
+import com.github.pycharm.refactoring.server.models.DocumentSync
+import com.github.pycharm.refactoring.server.models.FileChange
+import com.github.pycharm.refactoring.server.models.InlineRequest
+import com.github.pycharm.refactoring.server.models.MoveRequest
+import com.github.pycharm.refactoring.server.models.PlanStep
+import com.github.pycharm.refactoring.server.models.PlanStepResult
+import com.github.pycharm.refactoring.server.models.PlanStepType
+import com.github.pycharm.refactoring.server.models.RenameRequest
+import com.github.pycharm.refactoring.util.FileDigests
+import com.github.pycharm.refactoring.util.ProjectUtils
+import com.github.pycharm.refactoring.util.PsiUtils
+import com.github.pycharm.refactoring.util.RequestTimer
+import com.intellij.openapi.application.ApplicationManager
+import com.intellij.openapi.command.CommandProcessor
+import com.intellij.openapi.command.undo.UndoManager
+import com.intellij.openapi.project.IndexNotReadyException
+import com.intellij.openapi.project.Project
+import com.intellij.psi.PsiDocumentManager
+
+/**
+ * A plan step whose target is resolved: the lines it will change and the
+ * write that applies it, to be run inside the plan's command.
+ */
+class PreparedStep(val changes: List<FileChange>, val write: () -> Unit) {
+    val files: Set<String> get() = changes.mapTo(linkedSetOf()) { it.file }
+}
+
+/**
+ * Applies an ordered list of refactorings as one undoable command: documents
+ * are synced once before the first step and committed once after the last,
+ * and if a step fails, whatever the plan wrote is undone: the steps before it
+ * and any edits the failing step made before it threw.
+ */
+class PlanService(
+    private val renameService: RenameService,
+    private val moveService: MoveService,
+    private val inlineService: InlineService,
+    private val signatureService: SignatureService
+) {
+
+    fun applyPlan(request: ApplyPlanRequest, timer: RequestTimer = RequestTimer()): ApplyPlanResponse {
+        if (request.steps.isEmpty()) {
+            throw IllegalArgumentException("A plan needs at least one step")
+        }
+        request.steps.forEachIndexed { index, step -> checkStep(index, step) }
+
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
+            ?: throw IllegalArgumentException("Project not found: ${request.project}")
+
+        // One sync for the whole plan, covering every file a step names
+        timer.phase("save") {
+            ProjectUtils.syncDocuments(
+                request.sync,
+                request.steps.flatMap { step ->
+                    listOf(
+                        PsiUtils.findTargetFile(project, step.handle, step.file),
+                        step.targetFile?.let { ProjectUtils.findVirtualFile(project, it) }
+                    )
+                }
+            )
+        }
+
+        val results = mutableListOf<PlanStepResult>()
+        val changes = mutableListOf<FileChange>()
+        val filesModified = linkedSetOf<String>()
+        val before = mutableMapOf<String, String>()
+        var failedStep = -1
+        var failure: Exception? = null
+        // Whether any step started writing, and whether the failing one had
+        var written = false
+        var failedWriting = false
+        var rolledBack = false
+
+        timer.phase("write") {
+            ApplicationManager.getApplication().invokeAndWait {
+                CommandProcessor.getInstance().executeCommand(project, {
+                    // Global, so undoing it does not need an editor
+                    CommandProcessor.getInstance().markCurrentCommandAsGlobal(project)
+                    for ((index, step) in request.steps.withIndex()) {
+                        try {
+                            val prepared = prepare(project, request.project, step)
+                            // Keep the old text of the files for diffs, as first seen
+                            before += FileDigests.snapshot(prepared.files - before.keys, request.contents)
+                            written = true
+                            failedWriting = true
+                            prepared.write()
+                            failedWriting = false
+                            results.add(PlanStepResult(step.type, prepared.changes.size, prepared.files.size))
+                            changes.addAll(prepared.changes)
+                            filesModified.addAll(prepared.files)
+                        } catch (e: Exception) {
+                            failedStep = index
+                            failure = e
+                            break
+                        }
+                    }
+                    PsiDocumentManager.getInstance(project).commitAllDocuments()
+                }, PLAN_COMMAND, null)
+
+                if (failure != null && written) {
+                    rolledBack = rollback(project)
+                }
+            }
+        }
+
+        failure?.let { e ->
+            // Searches need indexes; let the controller ask the client to retry
+            if (generateSequence<Throwable>(e) { it.cause }.any { it is IndexNotReadyException }) {
+                throw e
+            }
+            val step = request.steps[failedStep]
+            val undone = when {
+                !rolledBack -> ""
+                !failedWriting -> ", the ${results.size} step(s) before it were undone"
+                results.isEmpty() -> ", its partial edits were undone"
+                else -> ", its partial edits and the ${results.size} step(s) before it were undone"
+            }
+            throw IllegalArgumentException(
+                "Step ${failedStep + 1} (${step.type.name.lowercase()}) failed$undone: ${e.message ?: e}"
+            )
+        }
+
+        val files = timer.phase("digest") { FileDigests.collect(filesModified, before, request.contents) }
+
+        return ApplyPlanResponse(
+            success = true,
+            steps = results,
+            changes = changes,
+            filesModified = filesModified.size,
+            files = files
+        )
+    }
+
+    private fun checkStep(index: Int, step: PlanStep) {
+        val problem = when {
+            step.handle == null && (step.file == null || step.line == null || step.column == null) ->
+                "either handle or file, line and column must be provided"
+            step.type == PlanStepType.RENAME && step.newName == null -> "rename needs newName"
+            step.type == PlanStepType.MOVE && step.targetFile == null -> "move needs targetFile"
+            else -> null
+        }
+        if (problem != null) {
+            throw IllegalArgumentException("Step ${index + 1}: $problem")
+        }
+    }
+
+    private fun prepare(project: Project, projectPath: String, step: PlanStep): PreparedStep {
+        // Documents were synced for the whole plan and digests are collected at the end
+        return when (step.type) {
+            PlanStepType.RENAME -> renameService.prepareStep(
+                project,
+                RenameRequest(
+                    project = projectPath,
+                    file = step.file,
+                    line = step.line,
+                    column = step.column,
+                    handle = step.handle,
+                    newName = step.newName!!,
+                    searchInComments = step.searchInComments,
+                    searchInStrings = step.searchInStrings,
+                    sync = DocumentSync.NONE
+                )
+            )
+            PlanStepType.MOVE -> moveService.prepareStep(
+                project,
+                MoveRequest(
+                    project = projectPath,
+                    file = step.file,
+                    line = step.line,
+                    column = step.column,
+                    handle = step.handle,
+                    targetFile = step.targetFile!!,
+                    sync = DocumentSync.NONE
+                )
+            )
+            PlanStepType.INLINE -> inlineService.prepareStep(
+                project,
+                InlineRequest(
+                    project = projectPath,
+                    file = step.file,
+                    line = step.line,
+                    column = step.column,
+                    handle = step.handle,
+                    sync = DocumentSync.NONE
+                )
+            )
+            PlanStepType.CHANGE_SIGNATURE -> signatureService.prepareStep(
+                project,
+                ChangeSignatureRequest(
+                    project = projectPath,
+                    file = step.file,
+                    line = step.line,
+                    column = step.column,
+                    handle = step.handle,
+                    newName = step.newName,
+                    parameters = step.parameters,
+                    returnType = step.returnType,
+                    sync = DocumentSync.NONE
+                )
+            )
+        }
+    }
+
+    /**
+     * Undo the plan's command, taking back everything its steps wrote. Returns
+     * false if there is nothing of the plan's to undo: a write that threw
+     * before changing anything leaves no command, and undoing then would take
+     * back the user's last edit instead.
+     */
+    private fun rollback(project: Project): Boolean {
+        val undoManager = UndoManager.getInstance(project)
+        if (!undoManager.isUndoAvailable(null) ||
+            !undoManager.getUndoActionNameAndDescription(null).first.contains(PLAN_COMMAND)
+        ) {
+            return false
+        }
+        undoManager.undo(null)
+        return true
+    }
+
+    companion object {
+        private const val PLAN_COMMAND = "Apply refactoring plan"
+    }
+}
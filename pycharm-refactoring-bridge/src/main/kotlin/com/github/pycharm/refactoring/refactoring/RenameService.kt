@@ -3,8 +3,11 @@ package com.github.pycharm.refactoring.refactoring
 import com.github.pycharm.refactoring.server.models.FileChange
 import com.github.pycharm.refactoring.server.models.RenameRequest
 import com.github.pycharm.refactoring.server.models.RenameResponse
+import com.github.pycharm.refactoring.util.ElementHandles
+import com.github.pycharm.refactoring.util.FileDigests
 import com.github.pycharm.refactoring.util.ProjectUtils
 import com.github.pycharm.refactoring.util.PsiUtils
+import com.github.pycharm.refactoring.util.RequestTimer
 import com.intellij.openapi.application.ApplicationManager
 import com.intellij.openapi.application.WriteAction
 import com.intellij.openapi.command.CommandProcessor
@@ -17,24 +20,40 @@ import com.intellij.refactoring.rename.RenameProcessor
 
 class RenameService {
 
-    fun rename(request: RenameRequest): RenameResponse {
-        val project = ProjectUtils.findProjectByPath(request.project)
+    fun rename(request: RenameRequest, timer: RequestTimer = RequestTimer()): RenameResponse {
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
             ?: throw IllegalArgumentException("Project not found: ${request.project}")
 
-        // Save all documents before refactoring
-        ProjectUtils.saveAllDocuments()
-
-        val psiFile = ProjectUtils.findPsiFile(project, request.file)
-            ?: throw IllegalArgumentException("File not found: ${request.file}")
+        // Sync documents to disk before refactoring
+        timer.phase("save") {
+            ProjectUtils.syncDocuments(
+                request.sync,
+                listOf(PsiUtils.findTargetFile(project, request.handle, request.file))
+            )
+        }
 
-        val element = PsiUtils.findNamedElementAt(psiFile, request.line, request.column)
+        val element = timer.phase("resolve") {
+            PsiUtils.findTargetElement(project, request.handle, request.file, request.line, request.column)
+        }
             ?: throw IllegalArgumentException("No renamable element found at line ${request.line}, column ${request.column}")
 
         if (request.preview) {
-            return previewRename(project, element, request.newName)
+            return timer.phase("search") { previewRename(project, element, request.newName) }
+                .copy(handle = ElementHandles.register(project, element))
         }
 
-        return performRename(project, element, request)
+        return performRename(project, element, request, timer)
+    }
+
+    /**
+     * Resolve a rename that runs as a step of a plan, on the EDT inside the
+     * plan's command and after its document sync.
+     */
+    fun prepareStep(project: Project, request: RenameRequest): PreparedStep {
+        val element = PsiUtils.findTargetElement(project, request.handle, request.file, request.line, request.column)
+            ?: throw IllegalArgumentException("No renamable element found at line ${request.line}, column ${request.column}")
+        val changes = previewRename(project, element, request.newName).changes
+        return PreparedStep(changes) { runRename(project, element, request) }
     }
 
     private fun previewRename(project: Project, element: PsiNamedElement, newName: String): RenameResponse {
@@ -81,7 +100,12 @@ class RenameService {
         )
     }
 
-    private fun performRename(project: Project, element: PsiNamedElement, request: RenameRequest): RenameResponse {
+    private fun performRename(
+        project: Project,
+        element: PsiNamedElement,
+        request: RenameRequest,
+        timer: RequestTimer
+    ): RenameResponse {
         val changes = mutableListOf<FileChange>()
         val filesModified = mutableSetOf<String>()
         val oldName = ApplicationManager.getApplication().runReadAction<String> {
@@ -89,55 +113,69 @@ class RenameService {
         }
 
         // Collect references before rename
-        ApplicationManager.getApplication().runReadAction {
-            val defFile = element.containingFile?.virtualFile?.path ?: ""
-            filesModified.add(defFile)
-            changes.add(
-                FileChange(
-                    file = defFile,
-                    line = PsiUtils.getLineNumber(element),
-                    oldText = oldName,
-                    newText = request.newName
-                )
-            )
-
-            val references = ReferencesSearch.search(element, GlobalSearchScope.projectScope(project))
-            references.forEach { ref ->
-                val refElement = ref.element
-                val refFile = refElement.containingFile?.virtualFile?.path ?: return@forEach
-                filesModified.add(refFile)
+        timer.phase("search") {
+            ApplicationManager.getApplication().runReadAction {
+                val defFile = element.containingFile?.virtualFile?.path ?: ""
+                filesModified.add(defFile)
                 changes.add(
                     FileChange(
-                        file = refFile,
-                        line = PsiUtils.getLineNumber(refElement),
+                        file = defFile,
+                        line = PsiUtils.getLineNumber(element),
                         oldText = oldName,
                         newText = request.newName
                     )
                 )
+
+                val references = ReferencesSearch.search(element, GlobalSearchScope.projectScope(project))
+                references.forEach { ref ->
+                    val refElement = ref.element
+                    val refFile = refElement.containingFile?.virtualFile?.path ?: return@forEach
+                    filesModified.add(refFile)
+                    changes.add(
+                        FileChange(
+                            file = refFile,
+                            line = PsiUtils.getLineNumber(refElement),
+                            oldText = oldName,
+                            newText = request.newName
+                        )
+                    )
+                }
             }
         }
 
+        // Keep the old text of the files for diffs
+        val before = timer.phase("digest") { FileDigests.snapshot(filesModified, request.contents) }
+
         // Perform the actual rename
-        ApplicationManager.getApplication().invokeAndWait {
-            CommandProcessor.getInstance().executeCommand(project, {
-                WriteAction.run<Throwable> {
-                    val processor = RenameProcessor(
-                        project,
-                        element,
-                        request.newName,
-                        request.searchInComments,
-                        request.searchInStrings
-                    )
-                    processor.run()
-                }
-            }, "Rename ${oldName} to ${request.newName}", null)
+        timer.phase("write") {
+            ApplicationManager.getApplication().invokeAndWait {
+                CommandProcessor.getInstance().executeCommand(project, {
+                    runRename(project, element, request)
+                }, "Rename ${oldName} to ${request.newName}", null)
+            }
         }
 
+        val files = timer.phase("digest") { FileDigests.collect(filesModified, before, request.contents) }
+
         return RenameResponse(
             success = true,
             changes = changes,
             filesModified = filesModified.size,
-            usagesUpdated = changes.size
+            usagesUpdated = changes.size,
+            files = files
         )
     }
+
+    private fun runRename(project: Project, element: PsiNamedElement, request: RenameRequest) {
+        WriteAction.run<Throwable> {
+            val processor = RenameProcessor(
+                project,
+                element,
+                request.newName,
+                request.searchInComments,
+                request.searchInStrings
+            )
+            processor.run()
+        }
+    }
 }
@@ -1,48 +1,278 @@
 package com.github.pycharm.refactoring.refactoring
 
+import com.github.pycharm.refactoring.server.models.BlockedSymbol
+import com.github.pycharm.refactoring.server.models.BulkSafeDeleteRequest
+import com.github.pycharm.refactoring.server.models.BulkSafeDeleteResponse
+import com.github.pycharm.refactoring.server.models.DeletedSymbol
 import com.github.pycharm.refactoring.server.models.SafeDeleteRequest
 import com.github.pycharm.refactoring.server.models.SafeDeleteResponse
 import com.github.pycharm.refactoring.server.models.UsageInfo
+import com.github.pycharm.refactoring.util.ElementHandles
+import com.github.pycharm.refactoring.util.FileDigests
 import com.github.pycharm.refactoring.util.ProjectUtils
 import com.github.pycharm.refactoring.util.PsiUtils
+import com.github.pycharm.refactoring.util.RequestTimer
 import com.intellij.openapi.application.ApplicationManager
 import com.intellij.openapi.application.WriteAction
 import com.intellij.openapi.command.CommandProcessor
+import com.intellij.openapi.project.Project
+import com.intellij.openapi.vfs.VfsUtilCore
+import com.intellij.openapi.vfs.VirtualFile
+import com.intellij.psi.PsiDocumentManager
 import com.intellij.psi.PsiElement
+import com.intellij.psi.PsiFile
+import com.intellij.psi.PsiManager
 import com.intellij.psi.PsiNamedElement
+import com.intellij.psi.PsiPolyVariantReference
 import com.intellij.psi.search.GlobalSearchScope
+import com.intellij.psi.search.PsiSearchHelper
 import com.intellij.psi.search.searches.ReferencesSearch
+import com.intellij.psi.util.PsiTreeUtil
 import com.intellij.refactoring.safeDelete.SafeDeleteProcessor
+import com.jetbrains.python.psi.PyClass
+import com.jetbrains.python.psi.PyDecoratable
+import com.jetbrains.python.psi.PyFile
+import com.jetbrains.python.psi.PyReferenceExpression
+import com.jetbrains.python.psi.PyStringLiteralExpression
 
 class SafeDeleteService {
 
-    fun safeDelete(request: SafeDeleteRequest): SafeDeleteResponse {
-        val project = ProjectUtils.findProjectByPath(request.project)
+    fun safeDelete(request: SafeDeleteRequest, timer: RequestTimer = RequestTimer()): SafeDeleteResponse {
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
             ?: throw IllegalArgumentException("Project not found: ${request.project}")
 
-        ProjectUtils.saveAllDocuments()
-
-        val psiFile = ProjectUtils.findPsiFile(project, request.file)
-            ?: throw IllegalArgumentException("File not found: ${request.file}")
+        timer.phase("save") {
+            ProjectUtils.syncDocuments(
+                request.sync,
+                listOf(PsiUtils.findTargetFile(project, request.handle, request.file))
+            )
+        }
 
-        val element = PsiUtils.findNamedElementAt(psiFile, request.line, request.column)
+        val element = timer.phase("resolve") {
+            PsiUtils.findTargetElement(project, request.handle, request.file, request.line, request.column)
+        }
             ?: throw IllegalArgumentException("No deletable element found at line ${request.line}, column ${request.column}")
 
         // Find usages if requested
         if (request.searchForUsages) {
-            val usages = findUsages(project, element)
+            val usages = timer.phase("search") { findUsages(project, element) }
             if (usages.isNotEmpty()) {
                 return SafeDeleteResponse(
                     success = true,
                     deleted = false,
                     usagesFound = usages.size,
-                    usages = usages
+                    usages = usages,
+                    handle = ElementHandles.register(project, element)
                 )
             }
         }
 
         // No usages found, safe to delete
-        return performDelete(project, element)
+        return timer.phase("write") { performDelete(project, element) }
+    }
+
+    /**
+     * Safe-delete many symbols with one shared reference pass. Every file
+     * that mentions a candidate's name, found through the word index, is
+     * walked once, and each reference with a candidate's name is resolved.
+     * A candidate is deletable if all its usages lie in itself or in other
+     * deletable candidates, so dead code that only uses other dead code goes
+     * in the same sweep. The deletable ones are removed in one command.
+     */
+    fun safeDeleteBulk(request: BulkSafeDeleteRequest, timer: RequestTimer = RequestTimer()): BulkSafeDeleteResponse {
+        if (request.candidates.isEmpty() == (request.scope == null)) {
+            throw IllegalArgumentException("Provide either candidates or a scope, not both")
+        }
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
+            ?: throw IllegalArgumentException("Project not found: ${request.project}")
+
+        timer.phase("save") {
+            ProjectUtils.syncDocuments(
+                request.sync,
+                request.candidates.map { PsiUtils.findTargetFile(project, it.handle, it.file) } +
+                    listOfNotNull(request.scope?.let { ProjectUtils.findVirtualFile(project, it) })
+            )
+        }
+
+        val candidates = timer.phase("resolve") {
+            if (request.scope != null) {
+                scanScope(project, request.scope)
+            } else {
+                request.candidates.mapIndexed { index, candidate ->
+                    PsiUtils.findTargetElement(project, candidate.handle, candidate.file, candidate.line, candidate.column)
+                        ?: throw IllegalArgumentException(
+                            "Candidate ${index + 1}: no deletable element found at line ${candidate.line}, " +
+                                "column ${candidate.column}"
+                        )
+                }.distinct()
+            }
+        }
+
+        val usages = timer.phase("search") { collectUsages(project, candidates) }
+
+        // Drop candidates used from outside the deletable set until none are
+        val deletable = candidates.toMutableSet()
+        do {
+            val blocked = deletable.filter { candidate ->
+                usages.getValue(candidate).any { it.inside == null || it.inside !in deletable }
+            }
+            deletable.removeAll(blocked.toSet())
+        } while (blocked.isNotEmpty())
+
+        val (deleted, blocked) = ApplicationManager.getApplication().runReadAction<Pair<List<DeletedSymbol>, List<BlockedSymbol>>> {
+            val deleted = candidates.filter { it in deletable }.map { candidate ->
+                DeletedSymbol(candidate.name ?: "", filePath(candidate), PsiUtils.getLineNumber(candidate))
+            }
+            val blocked = candidates.filter { it !in deletable }.map { candidate ->
+                val blocking = usages.getValue(candidate).filter { it.inside == null || it.inside !in deletable }
+                BlockedSymbol(
+                    name = candidate.name ?: "",
+                    file = filePath(candidate),
+                    line = PsiUtils.getLineNumber(candidate),
+                    usagesFound = blocking.size,
+                    usages = blocking.take(request.maxUsages).map { usageInfo(it.element) }
+                )
+            }
+            deleted to blocked
+        }
+        val blockedWithHandles = blocked.zip(candidates.filter { it !in deletable }) { symbol, candidate ->
+            symbol.copy(handle = ElementHandles.register(project, candidate))
+        }
+
+        if (request.preview || deleted.isEmpty()) {
+            return BulkSafeDeleteResponse(
+                success = true,
+                deleted = deleted,
+                blocked = blockedWithHandles,
+                preview = request.preview
+            )
+        }
+
+        val paths = deleted.mapTo(linkedSetOf()) { it.file }
+        val before = FileDigests.snapshot(paths, request.contents)
+        timer.phase("write") {
+            ApplicationManager.getApplication().invokeAndWait {
+                CommandProcessor.getInstance().executeCommand(project, {
+                    WriteAction.run<Throwable> {
+                        // A candidate nested in another is gone with it
+                        candidates.filter { it in deletable && it.isValid }.forEach { it.delete() }
+                        PsiDocumentManager.getInstance(project).commitAllDocuments()
+                    }
+                }, "Safe delete ${deleted.size} unused symbols", null)
+            }
+        }
+        val files = timer.phase("digest") { FileDigests.collect(paths, before, request.contents) }
+
+        return BulkSafeDeleteResponse(
+            success = true,
+            deleted = deleted,
+            blocked = blockedWithHandles,
+            filesModified = paths.size,
+            files = files
+        )
+    }
+
+    /**
+     * A reference to a candidate, and the candidate it appears in, if any.
+     */
+    private class CandidateUsage(val element: PsiElement, val inside: PsiNamedElement?)
+
+    private fun collectUsages(
+        project: Project,
+        candidates: List<PsiNamedElement>
+    ): Map<PsiNamedElement, List<CandidateUsage>> {
+        val usages = candidates.associateWith { mutableListOf<CandidateUsage>() }
+        val targets: Set<PsiElement> = usages.keys
+
+        ApplicationManager.getApplication().runReadAction {
+            val names = candidates.mapNotNullTo(hashSetOf()) { it.name }
+            val scope = GlobalSearchScope.projectScope(project)
+            val files = linkedSetOf<PsiFile>()
+            for (name in names) {
+                PsiSearchHelper.getInstance(project).processAllFilesWithWord(name, scope, { files.add(it); true }, true)
+            }
+
+            for (file in files) {
+                PsiTreeUtil.processElements(file) { element ->
+                    val mentionsCandidate = when (element) {
+                        is PyReferenceExpression -> element.referencedName in names
+                        // Entries of __all__
+                        is PyStringLiteralExpression -> element.stringValue in names
+                        else -> false
+                    }
+                    if (mentionsCandidate) {
+                        for (target in resolveAll(element)) {
+                            if (target in targets) {
+                                val inside = PsiTreeUtil.findFirstParent(element, true) { it in targets }
+                                usages.getValue(target as PsiNamedElement).add(
+                                    CandidateUsage(element, inside as PsiNamedElement?)
+                                )
+                            }
+                        }
+                    }
+                    true
+                }
+            }
+        }
+
+        return usages
+    }
+
+    private fun resolveAll(element: PsiElement): Set<PsiElement> {
+        return element.references.flatMapTo(hashSetOf()) { reference ->
+            if (reference is PsiPolyVariantReference) {
+                reference.multiResolve(false).mapNotNull { it.element }
+            } else {
+                listOfNotNull(reference.resolve())
+            }
+        }
+    }
+
+    /**
+     * Top-level functions and classes in the Python files under [scope] that
+     * nothing outside the file registers by name: dunders, test functions and
+     * classes, decorated definitions and names in `__all__` are left out.
+     */
+    private fun scanScope(project: Project, scope: String): List<PsiNamedElement> {
+        val root = ProjectUtils.findVirtualFile(project, scope)
+            ?: throw IllegalArgumentException("Scope not found: $scope")
+        val projectScope = GlobalSearchScope.projectScope(project)
+
+        val files = mutableListOf<VirtualFile>()
+        VfsUtilCore.iterateChildrenRecursively(root, { projectScope.contains(it) || it.isDirectory }) { file ->
+            if (!file.isDirectory && file.extension == "py") {
+                files.add(file)
+            }
+            true
+        }
+
+        return ApplicationManager.getApplication().runReadAction<List<PsiNamedElement>> {
+            files.mapNotNull { PsiManager.getInstance(project).findFile(it) as? PyFile }.flatMap { pyFile ->
+                val exported = pyFile.dunderAll.orEmpty().toSet()
+                val symbols: List<PsiNamedElement> = pyFile.topLevelFunctions + pyFile.topLevelClasses
+                symbols.filter { symbol ->
+                    val name = symbol.name ?: return@filter false
+                    !(name.startsWith("__") && name.endsWith("__")) &&
+                        !name.startsWith(if (symbol is PyClass) "Test" else "test") &&
+                        (symbol as? PyDecoratable)?.decoratorList?.decorators.isNullOrEmpty() &&
+                        name !in exported
+                }
+            }
+        }
+    }
+
+    private fun filePath(element: PsiElement): String {
+        return element.containingFile?.virtualFile?.path ?: ""
+    }
+
+    private fun usageInfo(element: PsiElement): UsageInfo {
+        return UsageInfo(
+            file = filePath(element),
+            line = PsiUtils.getLineNumber(element),
+            column = PsiUtils.getColumnNumber(element),
+            text = PsiUtils.getSurroundingText(element, 0),
+            isWriteAccess = isWriteAccess(element)
+        )
     }
 
     private fun findUsages(project: com.intellij.openapi.project.Project, element: PsiNamedElement): List<UsageInfo> {
@@ -3,11 +3,15 @@ package com.github.pycharm.refactoring.refactoring
 import com.github.pycharm.refactoring.server.models.ChangeSignatureRequest
 import com.github.pycharm.refactoring.server.models.ChangeSignatureResponse
 import com.github.pycharm.refactoring.server.models.FileChange
+import com.github.pycharm.refactoring.util.ElementHandles
+import com.github.pycharm.refactoring.util.FileDigests
 import com.github.pycharm.refactoring.util.ProjectUtils
 import com.github.pycharm.refactoring.util.PsiUtils
+import com.github.pycharm.refactoring.util.RequestTimer
 import com.intellij.openapi.application.ApplicationManager
 import com.intellij.openapi.application.WriteAction
 import com.intellij.openapi.command.CommandProcessor
+import com.intellij.openapi.project.Project
 import com.intellij.psi.PsiElement
 import com.intellij.psi.PsiNamedElement
 import com.intellij.psi.search.GlobalSearchScope
@@ -17,16 +21,23 @@ import com.jetbrains.python.refactoring.changeSignature.PyChangeSignatureProcess
 
 class SignatureService {
 
-    fun changeSignature(request: ChangeSignatureRequest): ChangeSignatureResponse {
-        val project = ProjectUtils.findProjectByPath(request.project)
+    fun changeSignature(
+        request: ChangeSignatureRequest,
+        timer: RequestTimer = RequestTimer()
+    ): ChangeSignatureResponse {
+        val project = timer.phase("resolve") { ProjectUtils.findProjectByPath(request.project) }
             ?: throw IllegalArgumentException("Project not found: ${request.project}")
 
-        ProjectUtils.saveAllDocuments()
-
-        val psiFile = ProjectUtils.findPsiFile(project, request.file)
-            ?: throw IllegalArgumentException("File not found: ${request.file}")
+        timer.phase("save") {
+            ProjectUtils.syncDocuments(
+                request.sync,
+                listOf(PsiUtils.findTargetFile(project, request.handle, request.file))
+            )
+        }
 
-        val element = PsiUtils.findNamedElementAt(psiFile, request.line, request.column)
+        val element = timer.phase("resolve") {
+            PsiUtils.findTargetElement(project, request.handle, request.file, request.line, request.column)
+        }
             ?: throw IllegalArgumentException("No element found at line ${request.line}, column ${request.column}")
 
         // Find the function to modify
@@ -34,10 +45,24 @@ class SignatureService {
             ?: throw IllegalArgumentException("No function found at line ${request.line}, column ${request.column}")
 
         if (request.preview) {
-            return previewChangeSignature(project, function, request)
+            return timer.phase("search") { previewChangeSignature(project, function, request) }
+                .copy(handle = ElementHandles.register(project, function))
         }
 
-        return performChangeSignature(project, function, request)
+        return performChangeSignature(project, function, request, timer)
+    }
+
+    /**
+     * Resolve a signature change that runs as a step of a plan, on the EDT
+     * inside the plan's command and after its document sync.
+     */
+    fun prepareStep(project: Project, request: ChangeSignatureRequest): PreparedStep {
+        val element = PsiUtils.findTargetElement(project, request.handle, request.file, request.line, request.column)
+            ?: throw IllegalArgumentException("No element found at line ${request.line}, column ${request.column}")
+        val function = findFunction(element)
+            ?: throw IllegalArgumentException("No function found at line ${request.line}, column ${request.column}")
+        val changes = previewChangeSignature(project, function, request).changes
+        return PreparedStep(changes) { runChangeSignature(function, request) }
     }
 
     private fun findFunction(element: PsiElement): PyFunction? {
@@ -102,67 +127,82 @@ class SignatureService {
     private fun performChangeSignature(
         project: com.intellij.openapi.project.Project,
         function: PyFunction,
-        request: ChangeSignatureRequest
+        request: ChangeSignatureRequest,
+        timer: RequestTimer
     ): ChangeSignatureResponse {
         val changes = mutableListOf<FileChange>()
         val filesModified = mutableSetOf<String>()
         var callSitesUpdated = 0
 
         // Collect info before change
-        ApplicationManager.getApplication().runReadAction {
-            val oldSignature = buildSignatureString(function)
-            val newSignature = buildNewSignatureString(function, request)
+        timer.phase("search") {
+            ApplicationManager.getApplication().runReadAction {
+                val oldSignature = buildSignatureString(function)
+                val newSignature = buildNewSignatureString(function, request)
 
-            val defFile = function.containingFile?.virtualFile?.path ?: ""
-            filesModified.add(defFile)
-            changes.add(
-                FileChange(
-                    file = defFile,
-                    line = PsiUtils.getLineNumber(function),
-                    oldText = oldSignature,
-                    newText = newSignature
+                val defFile = function.containingFile?.virtualFile?.path ?: ""
+                filesModified.add(defFile)
+                changes.add(
+                    FileChange(
+                        file = defFile,
+                        line = PsiUtils.getLineNumber(function),
+                        oldText = oldSignature,
+                        newText = newSignature
+                    )
                 )
-            )
 
-            val references = ReferencesSearch.search(function, GlobalSearchScope.projectScope(project))
-            references.forEach { ref ->
-                val refFile = ref.element.containingFile?.virtualFile?.path ?: return@forEach
-                filesModified.add(refFile)
-                callSitesUpdated++
+                val references = ReferencesSearch.search(function, GlobalSearchScope.projectScope(project))
+                references.forEach { ref ->
+                    val refFile = ref.element.containingFile?.virtualFile?.path ?: return@forEach
+                    filesModified.add(refFile)
+                    callSitesUpdated++
+                }
             }
         }
 
+        // Keep the old text of the files for diffs
+        val before = timer.phase("digest") { FileDigests.snapshot(filesModified, request.contents) }
+
         // Perform the signature change
-        ApplicationManager.getApplication().invokeAndWait {
-            CommandProcessor.getInstance().executeCommand(project, {
-                WriteAction.run<Throwable> {
-                    // Build new parameter info
-                    // Note: Full implementation would use PyChangeSignatureProcessor
-                    // with properly constructed PyParameterInfo objects
-
-                    // Rename if requested
-                    request.newName?.let { newName ->
-                        if (newName != function.name) {
-                            function.setName(newName)
-                        }
-                    }
-
-                    // Update parameters if requested
-                    request.parameters?.let { params ->
-                        // Would need to reconstruct the parameter list
-                        // using PyChangeSignatureProcessor
-                    }
-                }
-            }, "Change signature of ${function.name}", null)
+        timer.phase("write") {
+            ApplicationManager.getApplication().invokeAndWait {
+                CommandProcessor.getInstance().executeCommand(project, {
+                    runChangeSignature(function, request)
+                }, "Change signature of ${function.name}", null)
+            }
         }
 
+        val files = timer.phase("digest") { FileDigests.collect(filesModified, before, request.contents) }
+
         return ChangeSignatureResponse(
             success = true,
             changes = changes,
-            callSitesUpdated = callSitesUpdated
+            callSitesUpdated = callSitesUpdated,
+            files = files
         )
     }
 
+    private fun runChangeSignature(function: PyFunction, request: ChangeSignatureRequest) {
+        WriteAction.run<Throwable> {
+            // Build new parameter info
+            // Note: Full implementation would use PyChangeSignatureProcessor
+            // with properly constructed PyParameterInfo objects
+
+            // Rename if requested
+            request.newName?.let { newName ->
+                if (newName != function.name) {
+                    function.setName(newName)
+                }
+            }
+
+            // Update parameters if requested
+            request.parameters?.let { params ->
+                // Would need to reconstruct the parameter list
+                // using PyChangeSignatureProcessor
+            }
+        }
+    }
+
     private fun buildSignatureString(function: PyFunction): String {
         return ApplicationManager.getApplication().runReadAction<String> {
             val params = function.parameterList.parameters.joinToString(", ") { param ->
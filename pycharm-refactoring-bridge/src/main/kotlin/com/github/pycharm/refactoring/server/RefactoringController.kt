@@ -3,12 +3,25 @@ package com.github.pycharm.refactoring.server
 import com.github.pycharm.refactoring.refactoring.*
 import com.github.pycharm.refactoring.server.models.*
 import com.github.pycharm.refactoring.settings.RefactoringBridgeSettings
+import com.github.pycharm.refactoring.util.BridgeEvents
+import com.github.pycharm.refactoring.util.ColumnarEncoder
+import com.github.pycharm.refactoring.util.DeadlineExceededException
 import com.github.pycharm.refactoring.util.ProjectUtils
+import com.github.pycharm.refactoring.util.RequestTimer
+import com.intellij.openapi.project.IndexNotReadyException
 import io.ktor.http.*
 import io.ktor.server.application.*
 import io.ktor.server.request.*
 import io.ktor.server.response.*
 import io.ktor.server.routing.*
+import kotlinx.coroutines.coroutineScope
+import kotlinx.coroutines.delay
+import kotlinx.coroutines.flow.onSubscription
+import kotlinx.coroutines.isActive
+import kotlinx.coroutines.launch
+import kotlinx.coroutines.sync.Mutex
+import kotlinx.coroutines.sync.withLock
+import kotlinx.serialization.encodeToString
 import kotlinx.serialization.json.Json
 
 class RefactoringController {
@@ -20,9 +33,11 @@ class RefactoringController {
     private val safeDeleteService = SafeDeleteService()
     private val signatureService = SignatureService()
     private val findUsagesService = FindUsagesService()
+    private val planService = PlanService(renameService, moveService, inlineService, signatureService)
 
+    // Compact output: pretty-printing puts every element of a columnar
+    // response's integer arrays on its own line
     private val json = Json {
-        prettyPrint = true
         ignoreUnknownKeys = true
     }
 
@@ -30,98 +45,167 @@ class RefactoringController {
         routing.apply {
             // Health check
             get("/health") {
-                val projects = ProjectUtils.getOpenProjects()
-                call.respond(
+                val timer = RequestTimer()
+                val projects = timer.phase("resolve") { ProjectUtils.getOpenProjects() }
+                respondTimed(
+                    call,
+                    timer,
                     HealthResponse(
                         status = "ok",
                         version = "0.1.0",
-                        projectsOpen = projects.size
+                        projectsOpen = projects.size,
+                        indexingProjects = ProjectUtils.getIndexingProjects()
                     )
                 )
             }
 
             // List projects
             get("/projects") {
-                val projects = ProjectUtils.getOpenProjects().map { project ->
-                    ProjectInfo(
-                        name = project.name,
-                        path = project.basePath ?: "",
-                        isOpen = true,
-                        isDefault = project.isDefault
-                    )
+                val timer = RequestTimer()
+                val projects = timer.phase("resolve") {
+                    ProjectUtils.getOpenProjects().map { project ->
+                        ProjectInfo(
+                            name = project.name,
+                            path = project.basePath ?: "",
+                            isOpen = true,
+                            isDefault = project.isDefault
+                        )
+                    }
                 }
-                call.respond(ProjectListResponse(success = true, projects = projects))
+                respondTimed(call, timer, ProjectListResponse(success = true, projects = projects))
+            }
+
+            // Server-sent events: file changes, indexing, project open/close
+            get("/events") {
+                if (!authorize(call)) return@get
+                streamEvents(call)
             }
 
             // Rename
             post("/refactor/rename") {
-                handleRefactoring(call) {
-                    val request = call.receive<RenameRequest>()
-                    validateProject(request.project)
-                    renameService.rename(request)
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<RenameRequest>() }
+                    timer.phase("resolve") { validateProject(request.project) }
+                    val response = renameService.rename(request, timer)
+                    timer.phase("serialize") { ColumnarEncoder.encode(response, request.format) }
                 }
             }
 
             // Move
             post("/refactor/move") {
-                handleRefactoring(call) {
-                    val request = call.receive<MoveRequest>()
-                    validateProject(request.project)
-                    moveService.move(request)
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<MoveRequest>() }
+                    timer.phase("resolve") { validateProject(request.project) }
+                    val response = moveService.move(request, timer)
+                    timer.phase("serialize") { ColumnarEncoder.encode(response, request.format) }
+                }
+            }
+
+            // Move of many elements with one import rewrite
+            post("/refactor/move-bulk") {
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<BulkMoveRequest>() }
+                    timer.phase("resolve") { validateProject(request.project) }
+                    moveService.moveBulk(request, timer)
                 }
             }
 
             // Extract Method
             post("/refactor/extract-method") {
-                handleRefactoring(call) {
-                    val request = call.receive<ExtractMethodRequest>()
-                    validateProject(request.project)
-                    extractService.extractMethod(request)
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<ExtractMethodRequest>() }
+                    timer.phase("resolve") { validateProject(request.project) }
+                    extractService.extractMethod(request, timer)
                 }
             }
 
             // Extract Variable
             post("/refactor/extract-variable") {
-                handleRefactoring(call) {
-                    val request = call.receive<ExtractVariableRequest>()
-                    validateProject(request.project)
-                    extractService.extractVariable(request)
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<ExtractVariableRequest>() }
+                    timer.phase("resolve") { validateProject(request.project) }
+                    extractService.extractVariable(request, timer)
+                }
+            }
+
+            // Many extractions in one file, in its original coordinates
+            post("/refactor/extract-ranges") {
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<MultiExtractRequest>() }
+                    timer.phase("resolve") { validateProject(request.project) }
+                    extractService.extractRanges(request, timer)
                 }
             }
 
             // Inline
             post("/refactor/inline") {
-                handleRefactoring(call) {
-                    val request = call.receive<InlineRequest>()
-                    validateProject(request.project)
-                    inlineService.inline(request)
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<InlineRequest>() }
+                    timer.phase("resolve") { validateProject(request.project) }
+                    val response = inlineService.inline(request, timer)
+                    timer.phase("serialize") { ColumnarEncoder.encode(response, request.format) }
                 }
             }
 
             // Change Signature
             post("/refactor/change-signature") {
-                handleRefactoring(call) {
-                    val request = call.receive<ChangeSignatureRequest>()
-                    validateProject(request.project)
-                    signatureService.changeSignature(request)
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<ChangeSignatureRequest>() }
+                    timer.phase("resolve") { validateProject(request.project) }
+                    val response = signatureService.changeSignature(request, timer)
+                    timer.phase("serialize") { ColumnarEncoder.encode(response, request.format) }
+                }
+            }
+
+            // Apply Plan: ordered refactorings as one command
+            post("/refactor/apply-plan") {
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<ApplyPlanRequest>() }
+                    timer.phase("resolve") { validateProject(request.project) }
+                    val response = planService.applyPlan(request, timer)
+                    timer.phase("serialize") { ColumnarEncoder.encode(response, request.format) }
                 }
             }
 
             // Safe Delete
             post("/refactor/safe-delete") {
-                handleRefactoring(call) {
-                    val request = call.receive<SafeDeleteRequest>()
-                    validateProject(request.project)
-                    safeDeleteService.safeDelete(request)
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<SafeDeleteRequest>() }
+                    timer.phase("resolve") { validateProject(request.project) }
+                    safeDeleteService.safeDelete(request, timer)
+                }
+            }
+
+            // Safe Delete of many candidates with one reference pass
+            post("/refactor/safe-delete-bulk") {
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<BulkSafeDeleteRequest>() }
+                    timer.phase("resolve") { validateProject(request.project) }
+                    safeDeleteService.safeDeleteBulk(request, timer)
                 }
             }
 
             // Find Usages
             post("/find/usages") {
-                handleRefactoring(call) {
-                    val request = call.receive<FindUsagesRequest>()
-                    validateProject(request.project)
-                    findUsagesService.findUsages(request)
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<FindUsagesRequest>() }
+                    timer.phase("resolve") { validateProject(request.project) }
+                    val response = findUsagesService.findUsages(request, timer)
+                    timer.phase("serialize") { ColumnarEncoder.encode(response, request.format) }
+                }
+            }
+
+            // Find Usages in several open projects
+            post("/find/usages/all-projects") {
+                handleRefactoring(call) { timer ->
+                    val request = timer.phase("parse") { call.receive<CrossProjectUsagesRequest>() }
+                    val projects = timer.phase("resolve") {
+                        validateProject(request.project)
+                        request.projects?.onEach { checkAllowed(it) }
+                            ?: ProjectUtils.getOpenProjects().mapNotNull { it.basePath }.filter { isAllowed(it) }
+                    }
+                    val response = findUsagesService.findUsagesInProjects(request, projects, timer)
+                    timer.phase("serialize") { ColumnarEncoder.encode(response, request.format) }
                 }
             }
         }
@@ -129,55 +213,160 @@ class RefactoringController {
 
     private suspend inline fun <reified T : Any> handleRefactoring(
         call: ApplicationCall,
-        crossinline handler: suspend () -> T
+        crossinline handler: suspend (RequestTimer) -> T
     ) {
+        val timer = RequestTimer(call.request.header(RequestTimer.DEADLINE_HEADER)?.toLongOrNull())
         try {
-            // Check auth token if configured
-            val settings = RefactoringBridgeSettings.getInstance()
-            if (settings.authToken.isNotEmpty()) {
-                val authHeader = call.request.header("Authorization")
-                val expectedToken = "Bearer ${settings.authToken}"
-                if (authHeader != expectedToken) {
-                    call.respond(
-                        HttpStatusCode.Unauthorized,
-                        ErrorResponse(error = "Unauthorized", details = "Invalid or missing auth token")
-                    )
-                    return
-                }
-            }
+            if (!authorize(call)) return
 
-            val result = handler()
-            call.respond(result)
+            val result = handler(timer)
+            respondTimed(call, timer, result)
+        } catch (e: DeadlineExceededException) {
+            call.response.header(RequestTimer.HEADER, timer.toHeader())
+            call.respond(
+                HttpStatusCode.GatewayTimeout,
+                ErrorResponse(
+                    error = "Deadline exceeded",
+                    details = e.message,
+                    indexingProjects = ProjectUtils.getIndexingProjects()
+                )
+            )
         } catch (e: IllegalArgumentException) {
+            call.response.header(RequestTimer.HEADER, timer.toHeader())
             call.respond(
                 HttpStatusCode.BadRequest,
-                ErrorResponse(error = "Bad Request", details = e.message)
+                ErrorResponse(
+                    error = "Bad Request",
+                    details = e.message,
+                    indexingProjects = ProjectUtils.getIndexingProjects()
+                )
             )
         } catch (e: Exception) {
+            call.response.header(RequestTimer.HEADER, timer.toHeader())
+            // Searches and refactorings need indexes; ask the client to retry.
+            // The exception may arrive wrapped by invokeAndWait or a read action
+            if (generateSequence<Throwable>(e) { it.cause }.any { it is IndexNotReadyException }) {
+                call.response.header(HttpHeaders.RetryAfter, INDEXING_RETRY_AFTER_SECONDS.toString())
+                call.respond(
+                    HttpStatusCode.ServiceUnavailable,
+                    ErrorResponse(
+                        error = "Indexing in progress",
+                        details = "PyCharm is updating indexes; retry when it finishes",
+                        indexingProjects = ProjectUtils.getIndexingProjects()
+                    )
+                )
+                return
+            }
             call.respond(
                 HttpStatusCode.InternalServerError,
-                ErrorResponse(error = "Internal Server Error", details = e.message ?: e.toString())
+                ErrorResponse(
+                    error = "Internal Server Error",
+                    details = e.message ?: e.toString(),
+                    indexingProjects = ProjectUtils.getIndexingProjects()
+                )
             )
         }
     }
 
-    private fun validateProject(projectPath: String) {
+    /**
+     * Check the auth token if one is configured, responding 401 if it is wrong.
+     */
+    private suspend fun authorize(call: ApplicationCall): Boolean {
         val settings = RefactoringBridgeSettings.getInstance()
+        if (settings.authToken.isNotEmpty()) {
+            val authHeader = call.request.header("Authorization")
+            val expectedToken = "Bearer ${settings.authToken}"
+            if (authHeader != expectedToken) {
+                call.respond(
+                    HttpStatusCode.Unauthorized,
+                    ErrorResponse(error = "Unauthorized", details = "Invalid or missing auth token")
+                )
+                return false
+            }
+        }
+        return true
+    }
 
-        // If allowlist is configured, check it
-        if (settings.allowedProjectPaths.isNotEmpty()) {
-            val normalizedPath = java.io.File(projectPath).canonicalPath
-            val allowed = settings.allowedProjectPaths.any { allowedPath ->
-                normalizedPath.startsWith(java.io.File(allowedPath).canonicalPath)
+    /**
+     * Stream [BridgeEvents] as server-sent events until the client goes away.
+     * Each stream starts with a `connected` event, sent once the subscription
+     * is in place so no event published after it is missed, and carries a
+     * comment line every [KEEPALIVE_MS] so idle connections stay open.
+     */
+    private suspend fun streamEvents(call: ApplicationCall) {
+        call.response.cacheControl(CacheControl.NoCache(null))
+        call.respondTextWriter(ContentType.Text.EventStream) {
+            val writer = this
+            val lock = Mutex()
+            suspend fun send(text: String) = lock.withLock {
+                writer.write(text)
+                writer.flush()
             }
-            if (!allowed) {
-                throw IllegalArgumentException("Project not in allowed list: $projectPath")
+
+            coroutineScope {
+                val keepAlive = launch {
+                    while (isActive) {
+                        delay(KEEPALIVE_MS)
+                        send(": keep-alive\n\n")
+                    }
+                }
+                try {
+                    BridgeEvents.events
+                        .onSubscription { emit(BridgeEvents.connected()) }
+                        .collect { event ->
+                            val data = json.encodeToString(event)
+                            send("id: ${event.id}\nevent: ${event.type}\ndata: $data\n\n")
+                        }
+                } finally {
+                    keepAlive.cancel()
+                }
             }
         }
+    }
+
+    /**
+     * Serialize [result] ourselves so serialization shows up in the
+     * `Server-Timing` header alongside the other phases.
+     */
+    private suspend inline fun <reified T : Any> respondTimed(
+        call: ApplicationCall,
+        timer: RequestTimer,
+        result: T
+    ) {
+        val body = timer.phase("serialize") { json.encodeToString(result) }
+        call.response.header(RequestTimer.HEADER, timer.toHeader())
+        call.respondText(body, ContentType.Application.Json)
+    }
+
+    private fun validateProject(projectPath: String) {
+        checkAllowed(projectPath)
 
         // Verify project is open
         if (ProjectUtils.findProjectByPath(projectPath) == null) {
             throw IllegalArgumentException("Project not open in PyCharm: $projectPath")
         }
     }
+
+    /**
+     * Whether [projectPath] is under a path of the allowlist, if one is configured.
+     */
+    private fun isAllowed(projectPath: String): Boolean {
+        val settings = RefactoringBridgeSettings.getInstance()
+        if (settings.allowedProjectPaths.isEmpty()) return true
+        val normalizedPath = ProjectUtils.canonicalPath(projectPath)
+        return settings.allowedProjectPaths.any { allowedPath ->
+            normalizedPath.startsWith(ProjectUtils.canonicalPath(allowedPath))
+        }
+    }
+
+    private fun checkAllowed(projectPath: String) {
+        if (!isAllowed(projectPath)) {
+            throw IllegalArgumentException("Project not in allowed list: $projectPath")
+        }
+    }
+
+    companion object {
+        private const val KEEPALIVE_MS = 15_000L
+        private const val INDEXING_RETRY_AFTER_SECONDS = 5
+    }
 }
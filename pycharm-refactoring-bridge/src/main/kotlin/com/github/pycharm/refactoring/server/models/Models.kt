@@ -1,14 +1,65 @@
 package com.github.pycharm.refactoring.server.models
 
+import kotlinx.serialization.SerialName
 import kotlinx.serialization.Serializable
 
 // ========== Common Models ==========
 
+/**
+ * How documents are synced to disk before a refactoring.
+ */
+@Serializable
+enum class DocumentSync {
+    /** Save every unsaved document in the IDE. */
+    @SerialName("all")
+    ALL,
+
+    /** Save only the documents of the files named in the request. */
+    @SerialName("files")
+    FILES,
+
+    /** Skip saving; the client states that the on-disk state is authoritative. */
+    @SerialName("none")
+    NONE
+}
+
+@Serializable
+enum class ResultFormat {
+    /** One JSON object per usage or change. */
+    @SerialName("rows")
+    ROWS,
+
+    /** Parallel arrays with file paths and texts de-duplicated into a string table. */
+    @SerialName("columnar")
+    COLUMNAR
+}
+
+/**
+ * What an applied refactoring returns about each modified file besides its digest.
+ */
+@Serializable
+enum class FileContents {
+    /** Only the hash and size. */
+    @SerialName("none")
+    NONE,
+
+    /** The full new content. */
+    @SerialName("content")
+    CONTENT,
+
+    /** A unified diff against the content before the refactoring. */
+    @SerialName("diff")
+    DIFF
+}
+
 @Serializable
 data class ErrorResponse(
     val success: Boolean = false,
     val error: String,
-    val details: String? = null
+    val details: String? = null,
+    // Projects in dumb mode when the request failed; a failure during
+    // indexing is usually worth retrying once it finishes
+    val indexingProjects: List<String> = emptyList()
 )
 
 @Serializable
@@ -19,6 +70,32 @@ data class FileChange(
     val newText: String
 )
 
+/**
+ * Changes encoded column by column. Row `i` is `strings[file[i]]`, `line[i]`,
+ * `strings[oldText[i]]` and `strings[newText[i]]`.
+ */
+@Serializable
+data class ChangeColumns(
+    val strings: List<String>,
+    val file: List<Int>,
+    val line: List<Int>,
+    val oldText: List<Int>,
+    val newText: List<Int>
+)
+
+/**
+ * A modified file as saved after a refactoring, so clients can skip re-reading
+ * files whose hash they already know. [content] or [diff] are set on request.
+ */
+@Serializable
+data class FileDigest(
+    val file: String,
+    val sha256: String,
+    val size: Long,
+    val content: String? = null,
+    val diff: String? = null
+)
+
 // ========== Project Models ==========
 
 @Serializable
@@ -40,13 +117,17 @@ data class ProjectListResponse(
 @Serializable
 data class RenameRequest(
     val project: String,
-    val file: String,
-    val line: Int,
-    val column: Int,
+    val file: String? = null,
+    val line: Int? = null,
+    val column: Int? = null,
+    val handle: String? = null,
     val newName: String,
     val searchInComments: Boolean = true,
     val searchInStrings: Boolean = false,
-    val preview: Boolean = false
+    val preview: Boolean = false,
+    val sync: DocumentSync = DocumentSync.ALL,
+    val format: ResultFormat = ResultFormat.ROWS,
+    val contents: FileContents = FileContents.NONE
 )
 
 @Serializable
@@ -54,7 +135,10 @@ data class RenameResponse(
     val success: Boolean = true,
     val changes: List<FileChange>,
     val filesModified: Int,
-    val usagesUpdated: Int
+    val usagesUpdated: Int,
+    val handle: String? = null,
+    val changeColumns: ChangeColumns? = null,
+    val files: List<FileDigest> = emptyList()
 )
 
 // ========== Move Models ==========
@@ -62,11 +146,15 @@ data class RenameResponse(
 @Serializable
 data class MoveRequest(
     val project: String,
-    val file: String,
-    val line: Int,
-    val column: Int,
+    val file: String? = null,
+    val line: Int? = null,
+    val column: Int? = null,
+    val handle: String? = null,
     val targetFile: String,
-    val preview: Boolean = false
+    val preview: Boolean = false,
+    val sync: DocumentSync = DocumentSync.ALL,
+    val format: ResultFormat = ResultFormat.ROWS,
+    val contents: FileContents = FileContents.NONE
 )
 
 @Serializable
@@ -74,7 +162,57 @@ data class MoveResponse(
     val success: Boolean = true,
     val changes: List<FileChange>,
     val filesModified: Int,
-    val importsUpdated: Int
+    val importsUpdated: Int,
+    val handle: String? = null,
+    val changeColumns: ChangeColumns? = null,
+    val files: List<FileDigest> = emptyList()
+)
+
+/**
+ * An element to move in bulk: a [handle], a position in [file], or the
+ * dotted [qualifiedName] of a top-level class or function.
+ */
+@Serializable
+data class MoveElement(
+    val file: String? = null,
+    val line: Int? = null,
+    val column: Int? = null,
+    val handle: String? = null,
+    val qualifiedName: String? = null
+)
+
+/**
+ * Move many top-level classes and functions into [targetFile] as one
+ * refactoring, creating the file if it does not exist. Imports are rewritten
+ * once for all of them, so each referencing file is updated once.
+ */
+@Serializable
+data class BulkMoveRequest(
+    val project: String,
+    val elements: List<MoveElement>,
+    val targetFile: String,
+    val preview: Boolean = false,
+    val sync: DocumentSync = DocumentSync.ALL,
+    val contents: FileContents = FileContents.NONE
+)
+
+@Serializable
+data class MovedElement(
+    val name: String,
+    val file: String,
+    val line: Int
+)
+
+@Serializable
+data class BulkMoveResponse(
+    val success: Boolean = true,
+    val moved: List<MovedElement>,
+    val targetFile: String,
+    val changes: List<FileChange>,
+    val filesModified: Int,
+    val importsUpdated: Int,
+    val preview: Boolean = false,
+    val files: List<FileDigest> = emptyList()
 )
 
 // ========== Extract Models ==========
@@ -88,7 +226,8 @@ data class ExtractMethodRequest(
     val endLine: Int,
     val endColumn: Int,
     val methodName: String,
-    val preview: Boolean = false
+    val preview: Boolean = false,
+    val sync: DocumentSync = DocumentSync.ALL
 )
 
 @Serializable
@@ -110,7 +249,8 @@ data class ExtractVariableRequest(
     val endColumn: Int,
     val variableName: String,
     val replaceAll: Boolean = true,
-    val preview: Boolean = false
+    val preview: Boolean = false,
+    val sync: DocumentSync = DocumentSync.ALL
 )
 
 @Serializable
@@ -121,22 +261,89 @@ data class ExtractVariableResponse(
     val occurrencesReplaced: Int
 )
 
-// ========== Inline Models ==========
+@Serializable
+enum class ExtractKind {
+    @SerialName("method")
+    METHOD,
+
+    @SerialName("variable")
+    VARIABLE
+}
+
+/**
+ * One extraction of a multi-range extract, in the coordinates of the file
+ * before any of the request's extractions. [name] is the method or variable
+ * name; [replaceAll] only applies to variables.
+ */
+@Serializable
+data class ExtractRange(
+    val kind: ExtractKind,
+    val startLine: Int,
+    val startColumn: Int,
+    val endLine: Int,
+    val endColumn: Int,
+    val name: String,
+    val replaceAll: Boolean = true
+)
 
+/**
+ * Extract many non-overlapping ranges of one file in one command. They are
+ * applied bottom-up, so no extraction shifts a range still to be extracted,
+ * and the document is committed once at the end.
+ */
 @Serializable
-data class InlineRequest(
+data class MultiExtractRequest(
     val project: String,
     val file: String,
+    val ranges: List<ExtractRange>,
+    val sync: DocumentSync = DocumentSync.ALL,
+    val contents: FileContents = FileContents.NONE
+)
+
+/**
+ * Where an extraction ended up once all of them were applied: [line] is the
+ * line of the new method or variable, [startLine] that of the range as sent.
+ */
+@Serializable
+data class ExtractedRange(
+    val kind: ExtractKind,
+    val name: String,
+    val startLine: Int,
     val line: Int,
-    val column: Int,
-    val preview: Boolean = false
+    val occurrencesReplaced: Int = 1
+)
+
+@Serializable
+data class MultiExtractResponse(
+    val success: Boolean = true,
+    val file: String,
+    val extracted: List<ExtractedRange>,
+    val files: List<FileDigest> = emptyList()
+)
+
+// ========== Inline Models ==========
+
+@Serializable
+data class InlineRequest(
+    val project: String,
+    val file: String? = null,
+    val line: Int? = null,
+    val column: Int? = null,
+    val handle: String? = null,
+    val preview: Boolean = false,
+    val sync: DocumentSync = DocumentSync.ALL,
+    val format: ResultFormat = ResultFormat.ROWS,
+    val contents: FileContents = FileContents.NONE
 )
 
 @Serializable
 data class InlineResponse(
     val success: Boolean = true,
     val changes: List<FileChange>,
-    val usagesInlined: Int
+    val usagesInlined: Int,
+    val handle: String? = null,
+    val changeColumns: ChangeColumns? = null,
+    val files: List<FileDigest> = emptyList()
 )
 
 // ========== Change Signature Models ==========
@@ -151,20 +358,90 @@ data class ParameterInfo(
 @Serializable
 data class ChangeSignatureRequest(
     val project: String,
-    val file: String,
-    val line: Int,
-    val column: Int,
+    val file: String? = null,
+    val line: Int? = null,
+    val column: Int? = null,
+    val handle: String? = null,
     val newName: String? = null,
     val parameters: List<ParameterInfo>? = null,
     val returnType: String? = null,
-    val preview: Boolean = false
+    val preview: Boolean = false,
+    val sync: DocumentSync = DocumentSync.ALL,
+    val format: ResultFormat = ResultFormat.ROWS,
+    val contents: FileContents = FileContents.NONE
 )
 
 @Serializable
 data class ChangeSignatureResponse(
     val success: Boolean = true,
     val changes: List<FileChange>,
-    val callSitesUpdated: Int
+    val callSitesUpdated: Int,
+    val handle: String? = null,
+    val changeColumns: ChangeColumns? = null,
+    val files: List<FileDigest> = emptyList()
+)
+
+// ========== Plan Models ==========
+
+@Serializable
+enum class PlanStepType {
+    @SerialName("rename")
+    RENAME,
+
+    @SerialName("move")
+    MOVE,
+
+    @SerialName("inline")
+    INLINE,
+
+    @SerialName("change-signature")
+    CHANGE_SIGNATURE
+}
+
+/**
+ * One refactoring of a plan, with the fields of the matching request. Its
+ * target is resolved when the step runs, after the steps before it; handles
+ * from earlier previews follow those edits, positions do not.
+ */
+@Serializable
+data class PlanStep(
+    val type: PlanStepType,
+    val file: String? = null,
+    val line: Int? = null,
+    val column: Int? = null,
+    val handle: String? = null,
+    val newName: String? = null,
+    val searchInComments: Boolean = true,
+    val searchInStrings: Boolean = false,
+    val targetFile: String? = null,
+    val parameters: List<ParameterInfo>? = null,
+    val returnType: String? = null
+)
+
+@Serializable
+data class ApplyPlanRequest(
+    val project: String,
+    val steps: List<PlanStep>,
+    val sync: DocumentSync = DocumentSync.ALL,
+    val format: ResultFormat = ResultFormat.ROWS,
+    val contents: FileContents = FileContents.NONE
+)
+
+@Serializable
+data class PlanStepResult(
+    val type: PlanStepType,
+    val changeCount: Int,
+    val filesModified: Int
+)
+
+@Serializable
+data class ApplyPlanResponse(
+    val success: Boolean = true,
+    val steps: List<PlanStepResult>,
+    val changes: List<FileChange>,
+    val filesModified: Int,
+    val changeColumns: ChangeColumns? = null,
+    val files: List<FileDigest> = emptyList()
 )
 
 // ========== Safe Delete Models ==========
@@ -172,10 +449,12 @@ data class ChangeSignatureResponse(
 @Serializable
 data class SafeDeleteRequest(
     val project: String,
-    val file: String,
-    val line: Int,
-    val column: Int,
-    val searchForUsages: Boolean = true
+    val file: String? = null,
+    val line: Int? = null,
+    val column: Int? = null,
+    val handle: String? = null,
+    val searchForUsages: Boolean = true,
+    val sync: DocumentSync = DocumentSync.ALL
 )
 
 @Serializable
@@ -183,17 +462,76 @@ data class SafeDeleteResponse(
     val success: Boolean = true,
     val deleted: Boolean,
     val usagesFound: Int = 0,
-    val usages: List<UsageInfo>? = null
+    val usages: List<UsageInfo>? = null,
+    val handle: String? = null
 )
 
-// ========== Find Usages Models ==========
+/**
+ * A symbol to consider for deletion, by position or handle.
+ */
+@Serializable
+data class DeleteCandidate(
+    val file: String? = null,
+    val line: Int? = null,
+    val column: Int? = null,
+    val handle: String? = null
+)
 
+/**
+ * Safe-delete many symbols at once: the [candidates], or the undecorated
+ * top-level functions and classes of the file or directory [scope]. Usages
+ * of all of them are counted in one pass over the files mentioning their
+ * names, and the unused ones are deleted in one command unless [preview].
+ */
 @Serializable
-data class FindUsagesRequest(
+data class BulkSafeDeleteRequest(
     val project: String,
+    val candidates: List<DeleteCandidate> = emptyList(),
+    val scope: String? = null,
+    val preview: Boolean = false,
+    val maxUsages: Int = 10,
+    val sync: DocumentSync = DocumentSync.ALL,
+    val contents: FileContents = FileContents.NONE
+)
+
+@Serializable
+data class DeletedSymbol(
+    val name: String,
+    val file: String,
+    val line: Int
+)
+
+@Serializable
+data class BlockedSymbol(
+    val name: String,
     val file: String,
     val line: Int,
-    val column: Int
+    val usagesFound: Int,
+    val usages: List<UsageInfo>,
+    val handle: String? = null
+)
+
+@Serializable
+data class BulkSafeDeleteResponse(
+    val success: Boolean = true,
+    val deleted: List<DeletedSymbol>,
+    val blocked: List<BlockedSymbol>,
+    val preview: Boolean = false,
+    val filesModified: Int = 0,
+    val files: List<FileDigest> = emptyList()
+)
+
+// ========== Find Usages Models ==========
+
+@Serializable
+data class FindUsagesRequest(
+    val project: String,
+    val file: String? = null,
+    val line: Int? = null,
+    val column: Int? = null,
+    val handle: String? = null,
+    val sinceToken: String? = null,
+    val format: ResultFormat = ResultFormat.ROWS
 )
 
 @Serializable
@@ -205,12 +543,70 @@ data class UsageInfo(
     val isWriteAccess: Boolean = false
 )
 
+/**
+ * Usages encoded column by column. Row `i` is `strings[file[i]]`, `line[i]`,
+ * `column[i]` and `strings[text[i]]`; bit 0 of `flags[i]` marks a write access.
+ */
+@Serializable
+data class UsageColumns(
+    val strings: List<String>,
+    val file: List<Int>,
+    val line: List<Int>,
+    val column: List<Int>,
+    val text: List<Int>,
+    val flags: List<Int>
+)
+
 @Serializable
 data class FindUsagesResponse(
     val success: Boolean = true,
     val symbol: String,
     val usages: List<UsageInfo>,
-    val totalCount: Int
+    val totalCount: Int,
+    val handle: String? = null,
+    val token: String? = null,
+    val incremental: Boolean = false,
+    val added: List<UsageInfo> = emptyList(),
+    val removed: List<UsageInfo> = emptyList(),
+    val usageColumns: UsageColumns? = null
+)
+
+/**
+ * Find usages of one symbol in several open projects. The symbol is resolved
+ * in [project]; [projects] limits the search to those project paths (default:
+ * every open project), and a project that takes longer than [timeoutMs] is
+ * reported as timed out instead of failing the request.
+ */
+@Serializable
+data class CrossProjectUsagesRequest(
+    val project: String,
+    val file: String? = null,
+    val line: Int? = null,
+    val column: Int? = null,
+    val handle: String? = null,
+    val projects: List<String>? = null,
+    val timeoutMs: Long = 20_000,
+    val format: ResultFormat = ResultFormat.ROWS
+)
+
+@Serializable
+data class ProjectUsages(
+    val project: String,
+    val usages: List<UsageInfo> = emptyList(),
+    val totalCount: Int = 0,
+    val timedOut: Boolean = false,
+    val error: String? = null,
+    val usageColumns: UsageColumns? = null
+)
+
+@Serializable
+data class CrossProjectUsagesResponse(
+    val success: Boolean = true,
+    val symbol: String,
+    val qualifiedName: String? = null,
+    val projects: List<ProjectUsages>,
+    val totalCount: Int,
+    val handle: String? = null
 )
 
 // ========== Health Check ==========
@@ -219,5 +615,26 @@ data class FindUsagesResponse(
 data class HealthResponse(
     val status: String = "ok",
     val version: String,
-    val projectsOpen: Int
+    val projectsOpen: Int,
+    val indexingProjects: List<String> = emptyList()
+)
+
+// ========== Events ==========
+
+/**
+ * Event pushed to subscribers of `GET /events`.
+ *
+ * Types: `connected` (first event on every stream), `files-changed`,
+ * `indexing`, `project-opened` and `project-closed`.
+ */
+@Serializable
+data class BridgeEvent(
+    val id: Long,
+    val type: String,
+    val project: String? = null,
+    val files: List<String> = emptyList(),
+    val indexing: Boolean? = null,
+    // Set when a bulk change touched more files than listed; treat every
+    // file of the project as changed
+    val truncated: Boolean = false
 )
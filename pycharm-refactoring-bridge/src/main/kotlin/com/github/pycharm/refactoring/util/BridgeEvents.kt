@@ -0,0 +1,132 @@
+package com.github.pycharm.refactoring.util
+
+import com.github.pycharm.refactoring.server.models.BridgeEvent
+import com.intellij.openapi.project.DumbService
+import com.intellij.openapi.project.Project
+import com.intellij.openapi.project.ProjectCloseListener
+import com.intellij.openapi.startup.ProjectActivity
+import com.intellij.openapi.vfs.newvfs.BulkFileListener
+import com.intellij.openapi.vfs.newvfs.events.VFileContentChangeEvent
+import com.intellij.openapi.vfs.newvfs.events.VFileEvent
+import kotlinx.coroutines.channels.BufferOverflow
+import kotlinx.coroutines.flow.MutableSharedFlow
+import kotlinx.coroutines.flow.SharedFlow
+import kotlinx.coroutines.flow.asSharedFlow
+import java.io.File
+import java.util.concurrent.atomic.AtomicLong
+
+/**
+ * Hub for the events streamed to `GET /events` subscribers.
+ *
+ * Listeners registered in plugin.xml publish file changes, indexing state and
+ * project open/close here. Events are dropped, not queued, while nobody is
+ * subscribed; a subscriber that falls behind loses the oldest events, and
+ * clients treat every (re)connect as "anything may have changed".
+ */
+object BridgeEvents {
+
+    // Longer lists are cut and the event marked truncated
+    const val MAX_FILES_PER_EVENT = 500
+    private const val BUFFER_SIZE = 1024
+
+    private val nextId = AtomicLong(1)
+    private val flow = MutableSharedFlow<BridgeEvent>(
+        extraBufferCapacity = BUFFER_SIZE,
+        onBufferOverflow = BufferOverflow.DROP_OLDEST
+    )
+
+    val events: SharedFlow<BridgeEvent> = flow.asSharedFlow()
+
+    val hasSubscribers: Boolean
+        get() = flow.subscriptionCount.value > 0
+
+    fun connected(): BridgeEvent = BridgeEvent(id = nextId.getAndIncrement(), type = "connected")
+
+    fun publish(
+        type: String,
+        project: Project? = null,
+        files: List<String> = emptyList(),
+        indexing: Boolean? = null
+    ) {
+        if (!hasSubscribers) return
+        flow.tryEmit(
+            BridgeEvent(
+                id = nextId.getAndIncrement(),
+                type = type,
+                project = project?.basePath,
+                files = files.take(MAX_FILES_PER_EVENT),
+                indexing = indexing,
+                truncated = files.size > MAX_FILES_PER_EVENT
+            )
+        )
+    }
+}
+
+/**
+ * Publishes `files-changed`, one event per project for each batch of VFS
+ * events. Changes outside every open project are published without one.
+ * Files or directories created, moved or deleted also reset the remembered
+ * canonical paths.
+ */
+class FileChangeEventListener : BulkFileListener {
+
+    override fun after(events: List<VFileEvent>) {
+        if (events.any { it !is VFileContentChangeEvent }) {
+            ProjectUtils.forgetCanonicalPaths()
+        }
+        if (!BridgeEvents.hasSubscribers) return
+
+        val roots = ProjectUtils.getOpenProjects().mapNotNull { project ->
+            project.basePath?.let { ProjectUtils.canonicalPath(it) + File.separator to project }
+        }
+        val byProject = LinkedHashMap<Project?, MutableList<String>>()
+        for (event in events) {
+            val path = event.path
+            val owner = roots.filter { (root, _) -> path.startsWith(root) }
+                .maxByOrNull { (root, _) -> root.length }
+                ?.second
+            byProject.getOrPut(owner) { mutableListOf() }.add(path)
+        }
+        for ((project, files) in byProject) {
+            BridgeEvents.publish("files-changed", project, files.distinct())
+        }
+    }
+}
+
+/**
+ * Publishes `indexing` when a project enters or leaves dumb mode.
+ */
+class IndexingEventListener(private val project: Project) : DumbService.DumbModeListener {
+
+    override fun enteredDumbMode() {
+        BridgeEvents.publish("indexing", project, indexing = true)
+    }
+
+    override fun exitDumbMode() {
+        BridgeEvents.publish("indexing", project, indexing = false)
+    }
+}
+
+/**
+ * Publishes `project-opened` once a project has finished opening.
+ */
+class ProjectOpenedEventActivity : ProjectActivity {
+
+    override suspend fun execute(project: Project) {
+        BridgeEvents.publish("project-opened", project)
+    }
+}
+
+/**
+ * Publishes `project-closed` and drops what the bridge remembers about the
+ * project: element handles, usage snapshots and canonical paths.
+ */
+class ProjectClosedEventListener : ProjectCloseListener {
+
+    override fun projectClosed(project: Project) {
+        ElementHandles.forget(project)
+        UsageSnapshotStore.forget(project)
+        ProjectUtils.forgetCanonicalPaths()
+        BridgeEvents.publish("project-closed", project)
+    }
+}
@@ -0,0 +1,80 @@
+package com.github.pycharm.refactoring.util
+
+import com.github.pycharm.refactoring.server.models.*
+
+/**
+ * Re-encodes usage and change lists as [UsageColumns] / [ChangeColumns], so
+ * large results repeat each file path and text once instead of once per row.
+ */
+object ColumnarEncoder {
+
+    private class StringTable {
+        val strings = ArrayList<String>()
+        private val indexes = HashMap<String, Int>()
+
+        fun indexOf(value: String): Int = indexes.getOrPut(value) {
+            strings.add(value)
+            strings.size - 1
+        }
+    }
+
+    fun usages(usages: List<UsageInfo>): UsageColumns {
+        val table = StringTable()
+        return UsageColumns(
+            file = usages.map { table.indexOf(it.file) },
+            line = usages.map { it.line },
+            column = usages.map { it.column },
+            text = usages.map { table.indexOf(it.text) },
+            flags = usages.map { if (it.isWriteAccess) 1 else 0 },
+            strings = table.strings
+        )
+    }
+
+    fun changes(changes: List<FileChange>): ChangeColumns {
+        val table = StringTable()
+        return ChangeColumns(
+            file = changes.map { table.indexOf(it.file) },
+            line = changes.map { it.line },
+            oldText = changes.map { table.indexOf(it.oldText) },
+            newText = changes.map { table.indexOf(it.newText) },
+            strings = table.strings
+        )
+    }
+
+    fun encode(response: FindUsagesResponse, format: ResultFormat): FindUsagesResponse {
+        if (format != ResultFormat.COLUMNAR) return response
+        return response.copy(usages = emptyList(), usageColumns = usages(response.usages))
+    }
+
+    fun encode(response: CrossProjectUsagesResponse, format: ResultFormat): CrossProjectUsagesResponse {
+        if (format != ResultFormat.COLUMNAR) return response
+        return response.copy(
+            projects = response.projects.map { it.copy(usages = emptyList(), usageColumns = usages(it.usages)) }
+        )
+    }
+
+    fun encode(response: RenameResponse, format: ResultFormat): RenameResponse {
+        if (format != ResultFormat.COLUMNAR) return response
+        return response.copy(changes = emptyList(), changeColumns = changes(response.changes))
+    }
+
+    fun encode(response: MoveResponse, format: ResultFormat): MoveResponse {
+        if (format != ResultFormat.COLUMNAR) return response
+        return response.copy(changes = emptyList(), changeColumns = changes(response.changes))
+    }
+
+    fun encode(response: InlineResponse, format: ResultFormat): InlineResponse {
+        if (format != ResultFormat.COLUMNAR) return response
+        return response.copy(changes = emptyList(), changeColumns = changes(response.changes))
+    }
+
+    fun encode(response: ChangeSignatureResponse, format: ResultFormat): ChangeSignatureResponse {
+        if (format != ResultFormat.COLUMNAR) return response
+        return response.copy(changes = emptyList(), changeColumns = changes(response.changes))
+    }
+
+    fun encode(response: ApplyPlanResponse, format: ResultFormat): ApplyPlanResponse {
+        if (format != ResultFormat.COLUMNAR) return response
+        return response.copy(changes = emptyList(), changeColumns = changes(response.changes))
+    }
+}
@@ -0,0 +1,85 @@
+package com.github.pycharm.refactoring.util
+
+import com.intellij.openapi.application.ApplicationManager
+import com.intellij.openapi.project.Project
+import com.intellij.openapi.vfs.VirtualFile
+import com.intellij.psi.PsiNamedElement
+import com.intellij.psi.SmartPointerManager
+import com.intellij.psi.SmartPsiElementPointer
+import java.util.UUID
+
+/**
+ * Opaque handles for resolved elements, backed by smart pointers so they keep
+ * pointing at the same symbol after edits shift its position.
+ */
+object ElementHandles {
+
+    // Per project
+    private const val MAX_HANDLES = 1024
+
+    // Project -> handle -> pointer, least recently used first
+    private val handles = HashMap<Project, LinkedHashMap<String, SmartPsiElementPointer<PsiNamedElement>>>()
+
+    private fun handlesOf(project: Project): LinkedHashMap<String, SmartPsiElementPointer<PsiNamedElement>> {
+        return handles.getOrPut(project) {
+            object : LinkedHashMap<String, SmartPsiElementPointer<PsiNamedElement>>(64, 0.75f, true) {
+                override fun removeEldestEntry(
+                    eldest: MutableMap.MutableEntry<String, SmartPsiElementPointer<PsiNamedElement>>
+                ): Boolean {
+                    return size > MAX_HANDLES
+                }
+            }
+        }
+    }
+
+    /**
+     * Create a handle for an element.
+     */
+    fun register(project: Project, element: PsiNamedElement): String {
+        val pointer = ApplicationManager.getApplication().runReadAction<SmartPsiElementPointer<PsiNamedElement>> {
+            SmartPointerManager.getInstance(project).createSmartPsiElementPointer(element)
+        }
+        return register(project, pointer)
+    }
+
+    /**
+     * Create a handle for an existing smart pointer.
+     */
+    fun register(project: Project, pointer: SmartPsiElementPointer<PsiNamedElement>): String {
+        val handle = UUID.randomUUID().toString()
+        synchronized(handles) {
+            handlesOf(project)[handle] = pointer
+        }
+        return handle
+    }
+
+    /**
+     * Drop every handle of a project, so a closed project is not kept alive.
+     */
+    fun forget(project: Project) {
+        synchronized(handles) {
+            handles.remove(project)
+        }
+    }
+
+    /**
+     * Return the file containing a handle's element, or null if it cannot be resolved.
+     */
+    fun resolveFile(project: Project, handle: String): VirtualFile? {
+        val element = resolve(project, handle) ?: return null
+        return ApplicationManager.getApplication().runReadAction<VirtualFile?> {
+            element.containingFile?.virtualFile
+        }
+    }
+
+    /**
+     * Resolve a handle within a project. Returns null if the handle is unknown,
+     * belongs to another project, or its element no longer exists.
+     */
+    fun resolve(project: Project, handle: String): PsiNamedElement? {
+        val pointer = synchronized(handles) { handles[project]?.get(handle) } ?: return null
+        return ApplicationManager.getApplication().runReadAction<PsiNamedElement?> {
+            pointer.element?.takeIf { it.isValid }
+        }
+    }
+}
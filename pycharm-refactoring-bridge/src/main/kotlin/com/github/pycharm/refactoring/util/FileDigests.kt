@@ -0,0 +1,138 @@
+package com.github.pycharm.refactoring.util
+
+import com.github.pycharm.refactoring.server.models.FileContents
+import com.github.pycharm.refactoring.server.models.FileDigest
+import com.intellij.openapi.application.ApplicationManager
+import com.intellij.openapi.fileEditor.FileDocumentManager
+import com.intellij.openapi.util.text.StringUtil
+import com.intellij.openapi.vfs.LocalFileSystem
+import com.intellij.openapi.vfs.VfsUtilCore
+import com.intellij.openapi.vfs.VirtualFile
+import com.intellij.util.diff.Diff
+import com.intellij.util.diff.FilesTooBigForDiffException
+import java.security.MessageDigest
+
+/**
+ * Digests of the files a refactoring modified, so clients know their new state
+ * without reading them back. Modified documents are saved first, so the hash
+ * and size describe what is on disk.
+ */
+object FileDigests {
+
+    private const val DIFF_CONTEXT_LINES = 3
+
+    /**
+     * Text of [paths] before a refactoring, when [mode] asks for diffs.
+     */
+    fun snapshot(paths: Collection<String>, mode: FileContents): Map<String, String> {
+        if (mode != FileContents.DIFF) {
+            return emptyMap()
+        }
+        return ApplicationManager.getApplication().runReadAction<Map<String, String>> {
+            paths.mapNotNull { path ->
+                LocalFileSystem.getInstance().findFileByPath(path)?.let { path to currentText(it) }
+            }.toMap()
+        }
+    }
+
+    /**
+     * Save [paths] and digest them, with content or a diff against [before]
+     * as [mode] asks. Files that no longer exist, such as the old location of
+     * a moved file, are left out.
+     */
+    fun collect(paths: Collection<String>, before: Map<String, String>, mode: FileContents): List<FileDigest> {
+        val files = paths.mapNotNull { LocalFileSystem.getInstance().findFileByPath(it) }
+        ProjectUtils.saveDocuments(files)
+
+        return ApplicationManager.getApplication().runReadAction<List<FileDigest>> {
+            files.filter { it.isValid }.map { file ->
+                val bytes = file.contentsToByteArray()
+                FileDigest(
+                    file = file.path,
+                    sha256 = sha256(bytes),
+                    size = bytes.size.toLong(),
+                    content = if (mode == FileContents.CONTENT) String(bytes, file.charset) else null,
+                    diff = if (mode == FileContents.DIFF) {
+                        unifiedDiff(file.path, before[file.path] ?: "", currentText(file))
+                    } else {
+                        null
+                    }
+                )
+            }
+        }
+    }
+
+    private fun currentText(file: VirtualFile): String {
+        val text = FileDocumentManager.getInstance().getCachedDocument(file)?.text
+            ?: VfsUtilCore.loadText(file)
+        return StringUtil.convertLineSeparators(text)
+    }
+
+    private fun sha256(bytes: ByteArray): String {
+        return MessageDigest.getInstance("SHA-256").digest(bytes).joinToString("") { "%02x".format(it) }
+    }
+
+    /**
+     * Unified diff of [before] and [after], empty if they are equal. Hunks
+     * whose context lines overlap are merged, as `diff -u` does.
+     */
+    fun unifiedDiff(path: String, before: String, after: String): String {
+        val old = lines(before)
+        val new = lines(after)
+        val changes = try {
+            generateSequence(Diff.buildChanges(old, new)) { it.link }.toList()
+        } catch (e: FilesTooBigForDiffException) {
+            return ""
+        }
+        if (changes.isEmpty()) {
+            return ""
+        }
+
+        val out = StringBuilder("--- $path\n+++ $path\n")
+        var first = 0
+        while (first < changes.size) {
+            var last = first
+            while (last + 1 < changes.size &&
+                changes[last + 1].line0 - (changes[last].line0 + changes[last].deleted) <= 2 * DIFF_CONTEXT_LINES
+            ) {
+                last++
+            }
+
+            val start0 = maxOf(0, changes[first].line0 - DIFF_CONTEXT_LINES)
+            val start1 = changes[first].line1 - (changes[first].line0 - start0)
+            val end0 = minOf(old.size, changes[last].line0 + changes[last].deleted + DIFF_CONTEXT_LINES)
+            val end1 = end0 - (changes[last].line0 + changes[last].deleted) + changes[last].line1 + changes[last].inserted
+            out.append("@@ -${range(start0, end0 - start0)} +${range(start1, end1 - start1)} @@\n")
+
+            var line = start0
+            for (change in changes.subList(first, last + 1)) {
+                while (line < change.line0) {
+                    out.append(' ').append(old[line++]).append('\n')
+                }
+                for (i in 0 until change.deleted) {
+                    out.append('-').append(old[change.line0 + i]).append('\n')
+                }
+                for (i in 0 until change.inserted) {
+                    out.append('+').append(new[change.line1 + i]).append('\n')
+                }
+                line = change.line0 + change.deleted
+            }
+            while (line < end0) {
+                out.append(' ').append(old[line++]).append('\n')
+            }
+            first = last + 1
+        }
+        return out.toString()
+    }
+
+    private fun lines(text: String): Array<String> {
+        if (text.isEmpty()) {
+            return emptyArray()
+        }
+        return text.removeSuffix("\n").split('\n').toTypedArray()
+    }
+
+    private fun range(start: Int, count: Int): String {
+        return if (count == 0) "$start,0" else "${start + 1},$count"
+    }
+}
@@ -1,6 +1,9 @@
 package com.github.pycharm.refactoring.util
 
+import com.github.pycharm.refactoring.server.models.DocumentSync
 import com.intellij.openapi.application.ApplicationManager
+import com.intellij.openapi.fileEditor.FileDocumentManager
+import com.intellij.openapi.project.DumbService
 import com.intellij.openapi.project.Project
 import com.intellij.openapi.project.ProjectManager
 import com.intellij.openapi.vfs.LocalFileSystem
@@ -11,6 +14,15 @@ import java.io.File
 
 object ProjectUtils {
 
+    private const val MAX_CANONICAL_PATHS = 256
+
+    // Path -> canonical path, least recently used first
+    private val canonicalPaths = object : LinkedHashMap<String, String>(64, 0.75f, true) {
+        override fun removeEldestEntry(eldest: MutableMap.MutableEntry<String, String>): Boolean {
+            return size > MAX_CANONICAL_PATHS
+        }
+    }
+
     /**
      * Get all currently open projects.
      */
@@ -18,13 +30,41 @@ object ProjectUtils {
         return ProjectManager.getInstance().openProjects.filter { !it.isDefault }
     }
 
+    /**
+     * Base paths of the open projects that are indexing (in dumb mode).
+     */
+    fun getIndexingProjects(): List<String> {
+        return getOpenProjects()
+            .filter { DumbService.isDumb(it) }
+            .mapNotNull { it.basePath }
+    }
+
+    /**
+     * Canonicalize a path, remembering the result since project and request
+     * paths repeat on every call. See [forgetCanonicalPaths].
+     */
+    fun canonicalPath(path: String): String {
+        synchronized(canonicalPaths) { canonicalPaths[path] }?.let { return it }
+        val canonical = File(path).canonicalPath
+        synchronized(canonicalPaths) { canonicalPaths[path] = canonical }
+        return canonical
+    }
+
+    /**
+     * Drop remembered canonical paths, which go stale when directories or
+     * symlinks are created, moved or deleted, or a project is closed.
+     */
+    fun forgetCanonicalPaths() {
+        synchronized(canonicalPaths) { canonicalPaths.clear() }
+    }
+
     /**
      * Find a project by its base path.
      */
     fun findProjectByPath(path: String): Project? {
-        val normalizedPath = File(path).canonicalPath
+        val normalizedPath = canonicalPath(path)
         return getOpenProjects().find { project ->
-            project.basePath?.let { File(it).canonicalPath == normalizedPath } == true
+            project.basePath?.let { canonicalPath(it) == normalizedPath } == true
         }
     }
 
@@ -54,13 +94,44 @@ object ProjectUtils {
         }
     }
 
+    /**
+     * Sync documents to disk before refactoring according to [mode]. With
+     * [DocumentSync.FILES] only the given files are saved, and the EDT is not
+     * touched at all when none of them has unsaved changes.
+     */
+    fun syncDocuments(mode: DocumentSync, files: Collection<VirtualFile?> = emptyList()) {
+        when (mode) {
+            DocumentSync.ALL -> saveAllDocuments()
+            DocumentSync.FILES -> saveDocuments(files.filterNotNull())
+            DocumentSync.NONE -> Unit
+        }
+    }
+
+    /**
+     * Save the documents of the given files, if they have unsaved changes.
+     */
+    fun saveDocuments(files: Collection<VirtualFile>) {
+        val documentManager = FileDocumentManager.getInstance()
+        val unsaved = files.mapNotNull { file ->
+            documentManager.getCachedDocument(file)?.takeIf { documentManager.isDocumentUnsaved(it) }
+        }
+        if (unsaved.isEmpty()) {
+            return
+        }
+        ApplicationManager.getApplication().invokeAndWait {
+            ApplicationManager.getApplication().runWriteAction {
+                unsaved.forEach { documentManager.saveDocument(it) }
+            }
+        }
+    }
+
     /**
      * Save all documents before refactoring.
      */
     fun saveAllDocuments() {
         ApplicationManager.getApplication().invokeAndWait {
             ApplicationManager.getApplication().runWriteAction {
-                com.intellij.openapi.fileEditor.FileDocumentManager.getInstance().saveAllDocuments()
+                FileDocumentManager.getInstance().saveAllDocuments()
             }
         }
     }
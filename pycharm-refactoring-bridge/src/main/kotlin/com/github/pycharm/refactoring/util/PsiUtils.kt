@@ -3,6 +3,7 @@ package com.github.pycharm.refactoring.util
 import com.intellij.openapi.application.ApplicationManager
 import com.intellij.openapi.editor.Document
 import com.intellij.openapi.project.Project
+import com.intellij.openapi.vfs.VirtualFile
 import com.intellij.psi.PsiDocumentManager
 import com.intellij.psi.PsiElement
 import com.intellij.psi.PsiFile
@@ -50,6 +51,42 @@ object PsiUtils {
         }
     }
 
+    /**
+     * Find the named element a request targets, given either a handle returned
+     * by an earlier response or a file/line/column position.
+     */
+    fun findTargetElement(
+        project: Project,
+        handle: String?,
+        file: String?,
+        line: Int?,
+        column: Int?
+    ): PsiNamedElement? {
+        if (handle != null) {
+            return ElementHandles.resolve(project, handle)
+                ?: throw IllegalArgumentException("Element handle is no longer valid: $handle")
+        }
+
+        if (file == null || line == null || column == null) {
+            throw IllegalArgumentException("Either handle or file, line and column must be provided")
+        }
+
+        val psiFile = ProjectUtils.findPsiFile(project, file)
+            ?: throw IllegalArgumentException("File not found: $file")
+
+        return findNamedElementAt(psiFile, line, column)
+    }
+
+    /**
+     * Find the file a request targets, given either an element handle or a path.
+     */
+    fun findTargetFile(project: Project, handle: String?, file: String?): VirtualFile? {
+        if (handle != null) {
+            return ElementHandles.resolveFile(project, handle)
+        }
+        return file?.let { ProjectUtils.findVirtualFile(project, it) }
+    }
+
     /**
      * Find all elements of a specific type within a PSI element.
      */
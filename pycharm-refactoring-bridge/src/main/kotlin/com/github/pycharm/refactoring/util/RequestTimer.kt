@@ -0,0 +1,85 @@
+package com.github.pycharm.refactoring.util
+
+/**
+ * Thrown at the start of a phase once the client's deadline has passed.
+ */
+class DeadlineExceededException(phase: String, deadlineMs: Long) :
+    RuntimeException("Gave up before the $phase phase; the client stops waiting after $deadlineMs ms")
+
+/**
+ * Collects per-phase durations for a single request and renders them as a
+ * `Server-Timing` header. Repeated phases accumulate.
+ *
+ * With a [deadlineMs] from the client, each phase first checks that the
+ * client is still waiting and throws [DeadlineExceededException] if not, so
+ * no work is spent on an answer nobody reads. From the `write` phase on the
+ * request runs to the end, so a refactoring is never left half-done.
+ */
+class RequestTimer(val deadlineMs: Long? = null) {
+
+    private val phases = LinkedHashMap<String, Long>()
+    private val deadlineNanos = deadlineMs?.let { System.nanoTime() + it * 1_000_000 }
+
+    @Volatile
+    private var writing = false
+
+    /**
+     * Run [block] and add its duration to [name]. Inline so that suspending
+     * calls can be timed too.
+     */
+    inline fun <T> phase(name: String, block: () -> T): T {
+        checkDeadline(name)
+        val start = System.nanoTime()
+        try {
+            return block()
+        } finally {
+            record(name, System.nanoTime() - start)
+        }
+    }
+
+    /**
+     * Milliseconds until the client's deadline, or null if it sent none.
+     */
+    fun remainingMs(): Long? = deadlineNanos?.let { (it - System.nanoTime()) / 1_000_000 }
+
+    /**
+     * Throw [DeadlineExceededException] if the deadline passed before [phase],
+     * unless the request already started writing.
+     */
+    fun checkDeadline(phase: String) {
+        if (phase == WRITE_PHASE) writing = true
+        if (writing || deadlineMs == null) return
+        if (remainingMs()!! <= 0) {
+            throw DeadlineExceededException(phase, deadlineMs)
+        }
+    }
+
+    /**
+     * Add [nanos] to the duration of [name].
+     */
+    fun record(name: String, nanos: Long) {
+        synchronized(phases) {
+            phases[name] = (phases[name] ?: 0L) + nanos
+        }
+    }
+
+    /**
+     * Render the phases as a `Server-Timing` header value, in milliseconds.
+     */
+    fun toHeader(): String {
+        return synchronized(phases) {
+            phases.entries.joinToString(", ") { (name, nanos) ->
+                "$name;dur=${"%.3f".format(java.util.Locale.ROOT, nanos / 1_000_000.0)}"
+            }
+        }
+    }
+
+    companion object {
+        const val HEADER = "Server-Timing"
+
+        /** Milliseconds the client waits for the answer, sent with each request. */
+        const val DEADLINE_HEADER = "X-Deadline-Ms"
+
+        private const val WRITE_PHASE = "write"
+    }
+}
@@ -0,0 +1,93 @@
+package com.github.pycharm.refactoring.util
+
+import com.github.pycharm.refactoring.server.models.UsageInfo
+import com.intellij.openapi.application.ApplicationManager
+import com.intellij.openapi.fileEditor.FileDocumentManager
+import com.intellij.openapi.project.Project
+import com.intellij.openapi.vfs.LocalFileSystem
+import com.intellij.openapi.vfs.VirtualFile
+import com.intellij.psi.PsiNamedElement
+import com.intellij.psi.SmartPsiElementPointer
+import com.intellij.psi.search.FileTypeIndex
+import com.intellij.psi.search.GlobalSearchScope
+import com.jetbrains.python.PythonFileType
+import java.util.UUID
+
+/**
+ * Remembers the state a find-usages result was computed against, so that a
+ * follow-up search can re-scan only the files that changed since then.
+ */
+object UsageSnapshotStore {
+
+    // Per project
+    private const val MAX_SNAPSHOTS = 64
+
+    data class Snapshot(
+        val element: SmartPsiElementPointer<PsiNamedElement>,
+        val stamps: Map<String, Long>,
+        val usagesByFile: Map<String, List<UsageInfo>>
+    )
+
+    // Project -> token -> snapshot, least recently used first
+    private val snapshots = HashMap<Project, LinkedHashMap<String, Snapshot>>()
+
+    /**
+     * Store a snapshot of a project and return the opaque token that refers to it.
+     */
+    fun put(project: Project, snapshot: Snapshot): String {
+        val token = UUID.randomUUID().toString()
+        synchronized(snapshots) {
+            val byToken = snapshots.getOrPut(project) {
+                object : LinkedHashMap<String, Snapshot>(16, 0.75f, true) {
+                    override fun removeEldestEntry(eldest: MutableMap.MutableEntry<String, Snapshot>): Boolean {
+                        return size > MAX_SNAPSHOTS
+                    }
+                }
+            }
+            byToken[token] = snapshot
+        }
+        return token
+    }
+
+    /**
+     * Look up a project's snapshot by token. Returns null if it is unknown,
+     * belongs to another project or was evicted.
+     */
+    fun get(project: Project, token: String): Snapshot? {
+        return synchronized(snapshots) { snapshots[project]?.get(token) }
+    }
+
+    /**
+     * Drop every snapshot of a project, so a closed project is not kept alive.
+     */
+    fun forget(project: Project) {
+        synchronized(snapshots) {
+            snapshots.remove(project)
+        }
+    }
+
+    /**
+     * Collect modification stamps for every Python file in the project plus any
+     * extra files (e.g. non-Python files that held usages). Unsaved edits are
+     * taken into account through the cached document's stamp.
+     */
+    fun collectStamps(project: Project, extraPaths: Collection<String> = emptyList()): Map<String, Long> {
+        return ApplicationManager.getApplication().runReadAction<Map<String, Long>> {
+            val stamps = mutableMapOf<String, Long>()
+            FileTypeIndex.getFiles(PythonFileType.INSTANCE, GlobalSearchScope.projectScope(project))
+                .forEach { file -> stamps[file.path] = stampOf(file) }
+            extraPaths.filter { it !in stamps }.forEach { path ->
+                val file = LocalFileSystem.getInstance().findFileByPath(path)
+                if (file != null && file.isValid) {
+                    stamps[path] = stampOf(file)
+                }
+            }
+            stamps
+        }
+    }
+
+    private fun stampOf(file: VirtualFile): Long {
+        val document = FileDocumentManager.getInstance().getCachedDocument(file)
+        return document?.modificationStamp ?: file.modificationStamp
+    }
+}